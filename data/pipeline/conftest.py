@@ -0,0 +1,279 @@
+"""Fixtures partagées : génération de PDF minimaux imitant les fiches NAF Ameli.
+
+Les vraies fiches ne sont pas versionnées. write_pdf() écrit un PDF valide (police
+Helvetica standard, encodage WinAnsi) à partir de textes positionnés et de traits ;
+write_fiche_pdf() y place les blocs lus par parse_pdf.parse_one_pdf (synthèse et
+tableaux annuels en page 1, tableaux de répartition AT en page 2, MP en page 3) et,
+en page 1, ceux des extracteurs de fiche_pass.py (tableau des principales MP,
+graphique par taille d'établissement dessiné en rectangles et marqueurs vectoriels).
+"""
+
+import pytest
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _content_stream(page: dict, height: float) -> bytes:
+    """Flux de contenu d'une page : coordonnées données depuis le haut (comme pdfplumber)."""
+    ops = []
+    for x, top, text, size in page.get("texts", []):
+        baseline = height - top - size
+        ops.append(b"BT /F1 %g Tf 1 0 0 1 %g %g Tm %s Tj ET" % (size, x, baseline, _pdf_string(text)))
+    for x0, top0, x1, top1 in page.get("lines", []):
+        ops.append(b"%g %g m %g %g l S" % (x0, height - top0, x1, height - top1))
+    for x0, top, x1, bottom, color in page.get("rects", []):
+        r, g, b = color
+        ops.append(b"%g %g %g rg %g %g %g %g re f" % (r, g, b, x0, height - bottom, x1 - x0, bottom - top))
+    for x0, top, x1, bottom, color in page.get("curves", []):
+        r, g, b = color
+        y0, y1 = height - bottom, height - top
+        ops.append(b"%g %g %g rg %g %g m %g %g l %g %g l %g %g %g %g %g %g c h f"
+                   % (r, g, b, x0, y0, x1, y0, x1, y1, x1, y1, x0, y1, x0, y1))
+    return b"\n".join(ops)
+
+
+def write_pdf(path, pages: list[dict], width: float = PAGE_WIDTH, height: float = PAGE_HEIGHT,
+              outline: list[tuple] = ()):
+    """Écrit un PDF minimal.
+
+    Args:
+        path: fichier de sortie
+        pages: une entrée par page, dict avec les clés optionnelles
+            texts : [(x, top, texte, taille)]
+            lines : [(x0, top0, x1, top1)] traits noirs
+            rects : [(x0, top, x1, bottom, (r, g, b))] rectangles pleins (composantes 0-1)
+            curves : [(x0, top, x1, bottom, (r, g, b))] petites formes pleines tracées
+                     avec une courbe de Bézier (objets "curve" de pdfplumber)
+        outline: signets [(titre, index de page)]
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, complété plus bas
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for page in pages:
+        stream = _content_stream(page, height)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %g %g] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>" % (width, height, content_id)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+    if outline:
+        root_id = len(objects) + 1
+        first, last = root_id + 1, root_id + len(outline)
+        objects[0] = b"<< /Type /Catalog /Pages 2 0 R /Outlines %d 0 R >>" % root_id
+        objects.append(b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>"
+                       % (first, last, len(outline)))
+        for item_id, (title, index) in enumerate(outline, first):
+            links = b"".join([b" /Prev %d 0 R" % (item_id - 1) if item_id > first else b"",
+                              b" /Next %d 0 R" % (item_id + 1) if item_id < last else b""])
+            objects.append(b"<< /Title %s /Parent %d 0 R /Dest [%s /Fit]%s >>"
+                           % (_pdf_string(title), root_id, kids[index], links))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+def _fr(n: int) -> str:
+    """Nombre au format des fiches (espace comme séparateur de milliers)."""
+    return f"{n:,}".replace(",", " ")
+
+
+def _grid(x0: float, top: float, col_widths: list[float], row_heights: list[float]) -> list:
+    """Traits d'un tableau réglé (lignes et colonnes)."""
+    xs = [x0]
+    for w in col_widths:
+        xs.append(xs[-1] + w)
+    tops = [top]
+    for h in row_heights:
+        tops.append(tops[-1] + h)
+    lines = [(xs[0], t, xs[-1], t) for t in tops]
+    lines += [(x, tops[0], x, tops[-1]) for x in xs]
+    return lines
+
+
+def _cell_lines(x: float, top: float, lines: list[str], size: float = 6) -> list:
+    return [(x, top + i * (size + 3), text, size) for i, text in enumerate(lines)]
+
+
+def _breakdown_lines(seed: int) -> tuple[list[str], list[str]]:
+    """Textes des cellules gauche (sexe, âge, siège) et droite (activité, modalité)."""
+    left = [
+        "REPARTITION PAR SEXE",
+        f"1 masculin {_fr(1200 + seed)}",
+        f"2 féminin {_fr(700 + seed)}",
+        "REPARTITION PAR AGE",
+        f"1 Moins de 20 ans {40 + seed}",
+        f"2 de 20 à 24 ans {150 + seed}",
+        f"3 de 25 à 29 ans {210 + seed}",
+        f"4 de 30 à 34 ans {_fr(1230 + seed)}",
+        f"5 de 35 à 39 ans {260 + seed}",
+        f"6 de 40 à 49 ans {400 + seed}",
+        f"7 de 50 à 59 ans {380 + seed}",
+        f"8 de 60 à 64 ans {90 + seed}",
+        f"9 65 ans et plus {10 + seed}",
+        "SIEGE DES LESIONS",
+        f"1 Localisation de la blessure non déterminée {5 + seed}",
+        f"2 Tête, sans autre spécification {60 + seed}",
+        f"3 Dos, dont colonne vertébrale {300 + seed}",
+        f"4 Membres supérieurs {700 + seed}",
+        f"5 Membres inférieurs {450 + seed}",
+    ]
+    right = [
+        "ACTIVITE PHYSIQUE SPECIFIQUE",
+        f"1 Opération de machine {20 + seed}",
+        f"2 Travail avec des outils à main {130 + seed}",
+        f"3 Manipulation d'objets {800 + seed}",
+        f"4 Mouvement {500 + seed}",
+        "MODALITE DE LA BLESSURE",
+        f"1 Heurt par objet {210 + seed}",
+        f"2 Contrainte du corps {900 + seed}",
+        f"3 Autre ou sans information {70 + seed}",
+    ]
+    return left, right
+
+
+def _text_top(y_center: float, size: float) -> float:
+    """Position 'top' à passer à write_pdf pour centrer un glyphe Helvetica sur y_center."""
+    return y_center - 0.707 * size
+
+
+def mp_disease_rows(seed: int) -> list[dict]:
+    """Lignes attendues du tableau « Principales maladies professionnelles »."""
+    return [
+        {"code": "057A", "libelle": "Affections périarticulaires", "nb": 1200 + seed,
+         "pct": 60, "nb_prev": 1100 + seed},
+        {"code": "098A", "libelle": "Affections chroniques du rachis lombaire", "nb": 40 + seed,
+         "pct": 25, "nb_prev": 35},
+        {"code": "AUTRES", "libelle": "Autres MP", "nb": 12 + seed, "pct": 15, "nb_prev": 9},
+    ]
+
+
+def _mp_disease_table(seed: int) -> list:
+    texts = [(330, 300, "Code tableau Libellé Nb MP % Nb", 6)]
+    for i, row in enumerate(mp_disease_rows(seed)):
+        label = "Autres MP" if row["code"] == "AUTRES" else f"{row['code']} {row['libelle']}"
+        texts.append((330, 312 + 10 * i, f"{label} {_fr(row['nb'])} {row['pct']}% {_fr(row['nb_prev'])}", 6))
+    return texts
+
+
+SIZE_BASELINE = 771.0      # y du 0 % (et de l'IF 0)
+SIZE_PT_PER_PCT = 1.8      # 50 % = 90 points
+SIZE_PT_PER_IF = 1.5       # 60 = 90 points
+SIZE_CENTERS = [348.0, 380.0, 412.0, 444.0, 477.0, 509.0]
+
+
+def size_chart_values(seed: int) -> list[dict]:
+    """Valeurs attendues du graphique par taille d'établissement (sommes = 100 %)."""
+    acc = [30, 20, 15, 15, 10, 10]
+    sal = [25, 20, 20, 15, 10, 10]
+    k = seed % 6
+    acc = acc[k:] + acc[:k]
+    return [{"part_accidents": float(a), "part_salaries": float(s), "if": float(20 + 5 * ((i + seed) % 7))}
+            for i, (a, s) in enumerate(zip(acc, sal))]
+
+
+def _size_chart(seed: int) -> dict:
+    """Graphique vectoriel en bas à droite de la page 1 (géométrie des vraies fiches)."""
+    texts, rects, curves = [], [], []
+    for pct in range(0, 60, 10):
+        y = SIZE_BASELINE - pct * SIZE_PT_PER_PCT
+        texts.append((312, _text_top(y, 6), f"{pct}%", 6))
+    for value in range(0, 70, 10):
+        y = SIZE_BASELINE - value * SIZE_PT_PER_IF
+        texts.append((526, _text_top(y, 6), f"{value},0", 6))
+    for center, band in zip(SIZE_CENTERS, size_chart_values(seed)):
+        rects.append((center - 9, SIZE_BASELINE - band["part_accidents"] * SIZE_PT_PER_PCT,
+                      center - 1, SIZE_BASELINE, (0.8, 1.0, 0.8)))
+        rects.append((center + 1, SIZE_BASELINE - band["part_salaries"] * SIZE_PT_PER_PCT,
+                      center + 9, SIZE_BASELINE, (0.502, 0.0, 0.502)))
+        y = SIZE_BASELINE - band["if"] * SIZE_PT_PER_IF
+        curves.append((center - 1.35, y - 1.35, center + 1.35, y + 1.35, (0.753, 0.0, 0.0)))
+        texts.append((center - 10, SIZE_BASELINE + 8, "salariés", 5))
+    return {"texts": texts, "rects": rects, "curves": curves}
+
+
+def fiche_pages(seed: int) -> list[dict]:
+    """Pages d'une fiche NAF synthétique ; seed fait varier toutes les valeurs."""
+    years = "2020 2021 2022 2023 2024"
+    at_counts = [_fr(1000 + seed + 10 * i) for i in range(5)]
+    page1 = {"texts": [
+        (340, 40, f"Accidents du travail {_fr(1040 + seed)} +{seed % 7},5 %", 9),
+        (340, 55, f"Accidents de trajet {_fr(200 + seed)} -1,{seed % 10} %", 9),
+        (340, 70, f"Maladies professionnelles {30 + seed} +0,4 %", 9),
+        (30, 100, f"Accidents du travail {years}", 7),
+        (30, 110, f"Nombre de salariés {' '.join(_fr(20000 + seed + i) for i in range(5))}", 7),
+        (30, 120, f"Nb acc. du travail en 1er règlement : {' '.join(at_counts)}", 7),
+        (30, 130, f"Nb nouvelles IP : {' '.join(str(40 + seed + i) for i in range(5))}", 7),
+        (30, 140, f"Nb décès : {' '.join(str(i % 2) for i in range(5))}", 7),
+        (30, 150, f"Nb journées perdues : {' '.join(_fr(60000 + 100 * seed + i) for i in range(5))}", 7),
+        (30, 165, f"Accidents de trajet {years}", 7),
+        (30, 175, f"Nb acc. de trajet en 1er règlement : {' '.join(str(200 + seed + i) for i in range(5))}", 7),
+        (30, 185, f"Nb nouvelles IP : {' '.join(str(10 + i) for i in range(5))}", 7),
+        (30, 195, f"Nb décès : {' '.join('0' for _ in range(5))}", 7),
+        (30, 205, f"Nb journées perdues : {' '.join(_fr(15000 + seed + i) for i in range(5))}", 7),
+        (30, 220, f"Maladies professionnelles {years}", 7),
+        (30, 230, f"Nb MP en 1er règlement : {' '.join(str(30 + seed + i) for i in range(5))}", 7),
+        (30, 240, f"Nb nouvelles IP : {' '.join(str(12 + i) for i in range(5))}", 7),
+        (30, 250, f"Nb décès : {' '.join('0' for _ in range(5))}", 7),
+        (30, 260, f"Nb journées perdues : {' '.join(_fr(9000 + seed + i) for i in range(5))}", 7),
+        (30, 275, "Indice de fréquence", 7),
+    ]}
+    page1["texts"] += _mp_disease_table(seed)
+    chart = _size_chart(seed)
+    page1["texts"] += chart["texts"]
+    page1["rects"] = chart["rects"]
+    page1["curves"] = chart["curves"]
+
+    left, right = _breakdown_lines(seed)
+    widths = [230, 40, 40, 40, 40, 20, 140]
+    page2 = {"texts": [], "lines": []}
+    page2["lines"] += _grid(30, 40, [200, 200], [20, 20])
+    page2["lines"] += _grid(30, 100, [200, 200], [20, 20])
+    page2["lines"] += _grid(20, 160, widths, [20, 200])
+    page2["texts"] += [(35, 45, "Tableau A", 7), (35, 105, "Tableau B", 7), (25, 165, "Répartition", 7)]
+    page2["texts"] += _cell_lines(25, 185, left)
+    page2["texts"] += _cell_lines(20 + sum(widths[:6]) + 3, 185, right)
+
+    mp_left = _breakdown_lines(seed // 2 + 1)[0][:13]  # sexe + âge
+    page3 = {"texts": [], "lines": []}
+    page3["lines"] += _grid(30, 40, [200, 200], [20, 20])
+    page3["lines"] += _grid(20, 100, [230, 40, 40], [20, 140])
+    page3["texts"] += [(35, 45, "Tableau MP", 7), (25, 105, "Répartition MP", 7)]
+    page3["texts"] += _cell_lines(25, 125, mp_left)
+    return [page1, page2, page3]
+
+
+def write_fiche_pdf(path, seed: int):
+    write_pdf(path, fiche_pages(seed))
+
+
+@pytest.fixture
+def fiche_dir(tmp_path):
+    """Dossier de fiches NAF_*.pdf synthétiques, dont une illisible (échec attendu)."""
+    pdf_dir = tmp_path / "fiches"
+    pdf_dir.mkdir()
+    for seed, naf5 in enumerate(["0111Z", "4520A", "4711D", "8610Z", "9609Z"], 1):
+        write_fiche_pdf(pdf_dir / f"NAF_{naf5}.pdf", seed * 3)
+    (pdf_dir / "NAF_9999Z.pdf").write_bytes(b"%PDF-1.4\npas un vrai pdf")
+    return pdf_dir
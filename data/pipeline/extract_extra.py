@@ -6,19 +6,21 @@ REUSED (via parse_pdf.parse_one_pdf), already reliable:
 NEW positional parsers (page 0 is multi-column; line text interleaves, so we parse
 by word coordinates):
   mp_diseases  - "Principales maladies professionnelles" (code, libellé, nb, %, nb_prev)
-  statut       - "Répartition des AT suivant le statut" (CDI / CDD / Intérimaire / ...)
 
 Output: data/extra-dimensions.json keyed by NAF5.
+
+parse_fiche() works on an already-open page 0 so fiche_pass.py can run it alongside
+the other extractors on a single open of each PDF.
 """
-import pdfplumber, re, json, glob, os
+import re, json, glob, os
+import page_index
 import parse_pdf
+import pdf_backend
 
 PDF_DIR = "/Users/encarv/Desktop/Etude-BPO/pdfs_2024"
 OUT = "/Users/encarv/projects/sinistralite/data/extra-dimensions.json"
 CODE_RE = re.compile(r"^\d{3}[A-Z]$")
 NUM_RE = re.compile(r"^[\d ]+$")
-STATUTS = ["statut non connu", "CDI", "CDD", "Intérimaire", "Apprenti / élève",
-           "Apprenti", "Intérim"]
 
 
 def num(s):
@@ -40,18 +42,22 @@ def rows_by_y(words, tol=3.0):
     return rows
 
 
-def parse_mp_diseases(page):
+def parse_mp_diseases(page, words=None):
     """Right-column MP table. Anchor on the 'Code tableau ... Nb MP % Nb' header,
-    then read rows: <code> <libellé...> <nb> <pct>% <nb_prev>."""
-    words = page.extract_words()
+    then read rows: <code> <libellé...> <nb> <pct>% <nb_prev>.
+    `words` = pdf_backend.words(page) when the caller already has them; lookups go
+    through the page's spatial index (page_index.py)."""
+    index = page_index.for_page(page, "words", words)
     # header 'Code tableau ...' sits upper-right; anchor on the 'Code' token (leftmost col)
-    code_hdr = [w for w in words if w["text"] == "Code" and w["x0"] > 300
-                and any(x["text"] == "tableau" and abs(x["top"] - w["top"]) < 3 for x in words)]
+    tableau = page_index.with_text(index, "tableau")
+    code_hdr = [w for w in page_index.with_text(index, "Code") if w["x0"] > 300
+                and any(abs(x["top"] - w["top"]) < 3 for x in tableau)]
     if not code_hdr:
         return []
     h = min(code_hdr, key=lambda w: w["top"])
     top_y, x_left = h["top"], h["x0"] - 5
-    region = [w for w in words if w["x0"] > x_left and (w["top"] + w["bottom"]) / 2 > top_y + 5]
+    region = [w for w in page_index.query(index, x0=x_left, top=top_y + 5)
+              if w["x0"] > x_left and (w["top"] + w["bottom"]) / 2 > top_y + 5]
     out = []
     for row in rows_by_y(region):
         row = sorted(row, key=lambda w: w["x0"])
@@ -86,39 +92,22 @@ def parse_mp_diseases(page):
     return out
 
 
-def parse_statut(page):
-    """AT by employment status. Each statut label has its % to its immediate left,
-    in the statut sub-chart (right of the sex/age charts). Pick the nearest % token
-    on the same row, to the left of the label, within ~40pt."""
-    words = page.extract_words()
-    # locate the heading to bound the y-region
-    head = [w for w in words if w["text"] == "statut" and any(
-        ww["text"] == "suivant" and abs(ww["top"] - w["top"]) < 3 for ww in words)]
-    out = {}
-    for label in ["statut non connu", "CDI", "CDD", "Intérimaire", "Apprenti / élève"]:
-        parts = label.split()
-        # find the row containing the (first token of the) label on the right side
-        cand = [w for w in words if w["text"] == parts[-1] and w["x0"] > 430]
-        for w in cand:
-            yc = (w["top"] + w["bottom"]) / 2
-            same = [x for x in words if abs((x["top"] + x["bottom"]) / 2 - yc) < 3
-                    and re.fullmatch(r"\d+%", x["text"]) and x["x1"] <= w["x0"]
-                    and w["x0"] - x["x1"] < 45]
-            if same:
-                nearest = max(same, key=lambda x: x["x1"])
-                out[label] = int(nearest["text"].rstrip("%"))
-                break
-    return out
+def parse_one(path, backend="pdfplumber"):
+    base = parse_pdf.parse_one_pdf(path, backend=backend) or {}
+    doc = pdf_backend.open_pdf(path, backend)
+    try:
+        return parse_fiche(base, pdf_backend.pages(doc)[0])
+    finally:
+        pdf_backend.close_pdf(doc)
 
 
-def parse_one(path):
-    base = parse_pdf.parse_one_pdf(path) or {}
-    with pdfplumber.open(path) as p:
-        page = p.pages[0]
-        mp = parse_mp_diseases(page)
-    # NOTE: statut (AT by contract type) is NOT extracted here. Its % labels sit far
-    # from their category labels and tangle with the sex/age charts; it needs a
-    # vector-bar approach like extract_size.py. Deferred.
+def parse_fiche(base, page, words=None):
+    """Dimensions of one fiche from its parse_pdf result (`base`, may be {}) and page 0
+    (a pdf_backend page)."""
+    mp = parse_mp_diseases(page, words)
+    # NOTE: statut (AT by contract type) is NOT extracted here. Its % labels tangle
+    # with the sex/age charts, so it has to be read from the bars, and no real fiche
+    # has been available to calibrate that chart's geometry on. Deferred.
     return {
         "sex": base.get("sex") or {},
         "age": base.get("age") or {},
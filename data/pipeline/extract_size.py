@@ -8,13 +8,20 @@ Two bar series per band:
   - GREEN  (0.8,1.0,0.8)   = part des accidents du travail (%)
   - PURPLE (0.502,0,0.502) = part des salariés (%)
 The IF line is NOT read; it is derivable as IF_band = (part_acc/part_sal) * sector_IF.
+parse_page() takes an already-open page 0 (a pdf_backend page, optionally with its
+words) for fiche_pass.py; word lookups go through page_index.for_page.
 
 Axes auto-scale per sector, so calibration is read from each chart's own % ticks.
 Validation: green bars and purple bars should each sum to ~100% per sector.
+size_engine.py runs this and extract_size_chart.py on one parse of each fiche
+and keeps the closer-to-100 reading; its CLI replaces main() for batch runs.
 """
-import pdfplumber, re, json, glob, os
+import re, json, glob, os
 from collections import Counter
 
+import page_index
+import pdf_backend
+
 PDF_DIR = "/Users/encarv/Desktop/Etude-BPO/pdfs_2024"
 OUT = "/Users/encarv/projects/sinistralite/data/size-data.json"
 BANDS = ["- de 10", "10 à 19", "20 à 49", "50 à 99", "100 à 199", "+ de 200"]
@@ -32,8 +39,10 @@ def close(c, t, tol=0.04):
 
 
 def colored_bars(page):
+    """Tallest green / purple rect per rounded x0. Only rects of those two fills are
+    read from the page (pdf_backend.window), the rest of the drawing is skipped."""
     out = {"green": {}, "purple": {}}
-    for r in page.rects:
+    for r in pdf_backend.window(page, kinds=("rects",), colors=(GREEN, PURPLE), tol=0.04)["rects"]:
         if r["height"] < 0.5:
             continue
         col = r.get("non_stroking_color")
@@ -51,12 +60,11 @@ def baseline_of(bars):
     return Counter(bottoms).most_common(1)[0][0] if bottoms else None
 
 
-def pct_scale(page, baseline):
+def pct_scale(page, baseline, words=None):
     ticks = []
-    for w in page.extract_words():
-        if re.fullmatch(r"\d+%", w["text"]):
-            yc = (w["top"] + w["bottom"]) / 2
-            ticks.append((yc, w["x0"], float(w["text"].rstrip("%"))))
+    for w in page_index.matching(page_index.for_page(page, "words", words), r"\d+%"):
+        yc = (w["top"] + w["bottom"]) / 2
+        ticks.append((yc, w["x0"], float(w["text"].rstrip("%"))))
     zeros = [t for t in ticks if t[2] == 0 and abs(t[0] - baseline) <= 4]
     if not zeros:
         return None
@@ -73,54 +81,65 @@ def pct_scale(page, baseline):
 FIXED_CENTERS = [348.0, 380.0, 412.0, 444.0, 477.0, 509.0]
 
 
-def band_centers(page, baseline):
+def band_centers(page, baseline, words=None):
     """6 band-slot x-centers, anchored on the x-axis labels.
     Each band label ('X à Y salariés') places the word 'salariés' at its center."""
     xs = []
-    for w in page.extract_words():
+    for w in page_index.with_text(page_index.for_page(page, "words", words), "salariés"):
         yc = (w["top"] + w["bottom"]) / 2
-        if w["text"] == "salariés" and baseline < yc < baseline + 28 and 300 < w["x0"] < 545:
+        if baseline < yc < baseline + 28 and 300 < w["x0"] < 545:
             xs.append((w["x0"] + w["x1"]) / 2)
     xs = sorted(xs)
     return xs if len(xs) == 6 else FIXED_CENTERS
 
 
-def parse_one(path):
-    with pdfplumber.open(path) as p:
-        page = p.pages[0]
-        g, pu = colored_bars(page)
-        baseline = baseline_of(g + pu)
-        if baseline is None:
-            return None
-        sc = pct_scale(page, baseline)
-        if sc is None:
-            return None
-        scale, left_x = sc
-        keep_g = [b for b in g if abs((b["top"] + b["height"]) - baseline) <= 3]
-        keep_p = [b for b in pu if abs((b["top"] + b["height"]) - baseline) <= 3]
-        if not (keep_g or keep_p):
-            return None
-        centers = band_centers(page, baseline)
-
-        def nearest(xc):
-            return min(range(6), key=lambda i: abs(xc - centers[i]))
-
-        acc_by = [0.0] * 6
-        sal_by = [0.0] * 6
-        for b in keep_g:
-            i = nearest((b["x0"] + b["x1"]) / 2)
-            acc_by[i] = max(acc_by[i], b["height"] * scale)
-        for b in keep_p:
-            i = nearest((b["x0"] + b["x1"]) / 2)
-            sal_by[i] = max(sal_by[i], b["height"] * scale)
-        out = [{"label": BANDS[i], "part_accidents": round(acc_by[i], 1),
-                "part_salaries": round(sal_by[i], 1)} for i in range(6)]
-        return {
-            "bands": out,
-            "_g": round(sum(r["part_accidents"] for r in out), 1),
-            "_p": round(sum(r["part_salaries"] for r in out), 1),
-            "_n": sum(1 for r in out if r["part_accidents"] or r["part_salaries"]),
-        }
+def parse_one(path, backend="pdfplumber"):
+    doc = pdf_backend.open_pdf(path, backend)
+    try:
+        return parse_page(pdf_backend.pages(doc)[0])
+    finally:
+        pdf_backend.close_pdf(doc)
+
+
+def parse_page(page, words=None):
+    """Size chart of page 0 (a pdf_backend page); `words` = pdf_backend.words(page)
+    if already computed. Words are extracted and indexed (page_index.py) once per page,
+    before the bars, so that colored_bars filters the objects already read."""
+    if words is None:
+        words = pdf_backend.words(page)
+    g, pu = colored_bars(page)
+    baseline = baseline_of(g + pu)
+    if baseline is None:
+        return None
+    sc = pct_scale(page, baseline, words)
+    if sc is None:
+        return None
+    scale, left_x = sc
+    keep_g = [b for b in g if abs((b["top"] + b["height"]) - baseline) <= 3]
+    keep_p = [b for b in pu if abs((b["top"] + b["height"]) - baseline) <= 3]
+    if not (keep_g or keep_p):
+        return None
+    centers = band_centers(page, baseline, words)
+
+    def nearest(xc):
+        return min(range(6), key=lambda i: abs(xc - centers[i]))
+
+    acc_by = [0.0] * 6
+    sal_by = [0.0] * 6
+    for b in keep_g:
+        i = nearest((b["x0"] + b["x1"]) / 2)
+        acc_by[i] = max(acc_by[i], b["height"] * scale)
+    for b in keep_p:
+        i = nearest((b["x0"] + b["x1"]) / 2)
+        sal_by[i] = max(sal_by[i], b["height"] * scale)
+    out = [{"label": BANDS[i], "part_accidents": round(acc_by[i], 1),
+            "part_salaries": round(sal_by[i], 1)} for i in range(6)]
+    return {
+        "bands": out,
+        "_g": round(sum(r["part_accidents"] for r in out), 1),
+        "_p": round(sum(r["part_salaries"] for r in out), 1),
+        "_n": sum(1 for r in out if r["part_accidents"] or r["part_salaries"]),
+    }
 
 
 def main(test=None):
@@ -4,7 +4,7 @@ extract_size_chart.py
 
 Extract the "Répartition des accidents du travail et des effectifs salariés par
 taille d'établissement" chart from Ameli NAF fiche PDFs by parsing the underlying
-VECTOR GEOMETRY (rects, curves, glyph positions) with pdfplumber. No OCR, no pixels.
+VECTOR GEOMETRY (rects, curves, glyph positions) via pdf_backend. No OCR, no pixels.
 
 The chart is a grouped bar + line chart by establishment size, 6 bands left-to-right:
     ["- de 10", "10 à 19", "20 à 49", "50 à 99", "100 à 199", "+ de 200"]
@@ -31,7 +31,8 @@ grows downward):
     - IF markers: tiny curves (~2.7pt square) fill (0.753, 0.0, 0.0),
       one per band, also drawn twice -> dedupe.
 
-Output: data/size-data.json keyed by NAF5.
+Output: data/size-data.json keyed by NAF5. For batch runs, size_engine.py
+combines this digitizer with extract_size.py (parallel, cached, --pdf-dir).
 """
 
 import os
@@ -41,7 +42,8 @@ import json
 import math
 from collections import defaultdict
 
-import pdfplumber
+import page_index
+import pdf_backend
 
 # ---------------------------------------------------------------------------
 # Constants (chart layout on page 0; stable across the 729 fiches)
@@ -70,6 +72,11 @@ GREEN = (0.8, 1.0, 0.8)
 PURPLE = (0.502, 0.0, 0.502)
 RED_MARKER = (0.753, 0.0, 0.0)
 COLOR_TOL = 0.03
+MARKER_TOL = 0.06
+
+# Only objects touching this window are read (pdf_backend.window): both axis
+# columns and the plot between them, with 1pt slack around the tick rows
+CHART_BBOX = (PCT_AXIS_X[0], CHART_TOP_MIN - 1.0, IF_AXIS_X[1], CHART_TOP_MAX + 1.0)
 
 # IF marker geometry
 MARKER_MAX_SIDE = 5.0   # markers are ~2.7pt squares; reject the long polyline
@@ -77,6 +84,10 @@ MARKER_MAX_SIDE = 5.0   # markers are ~2.7pt squares; reject the long polyline
 # How close a bar's bottom must be to the fitted baseline to count
 BASELINE_TOL = 4.0
 
+# Slack on the axis window edges: pdfium glyph positions drift ~1e-5pt from
+# pdfminer's (see pdf_backend.py), enough to drop a tick drawn exactly on an edge
+EDGE_TOL = 0.01
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -121,7 +132,7 @@ def _linfit(pairs):
     sx = sum(x for x, _ in pairs)
     sy = sum(y for _, y in pairs)
     sxx = sum(x * x for x, _ in pairs)
-    sxy = sum(x * y for x, _ in pairs)
+    sxy = sum(x * y for x, y in pairs)
     denom = n * sxx - sx * sx
     if abs(denom) < 1e-9:
         return None
@@ -130,19 +141,21 @@ def _linfit(pairs):
     return a, b
 
 
-def _read_axis_ticks(page, pattern, x_range):
+def _read_axis_ticks(index, pattern, x_range):
     """Reconstruct axis tick labels by grouping glyphs into text rows.
 
     Each tick label ('70%', '10,0', ...) is drawn as separate single-char glyphs
     sharing the same 'top'. We group chars in the axis x-column by rounded 'top',
     join left-to-right, and match the expected pattern.
 
+    `index` is a page_index over the chart's glyphs (at least CHART_BBOX).
     Returns list of (y_center_top, value) sorted by y.
     """
-    xlo, xhi = x_range
+    xlo, xhi = x_range[0] - EDGE_TOL, x_range[1] + EDGE_TOL
+    top_min, top_max = CHART_TOP_MIN - EDGE_TOL, CHART_TOP_MAX + EDGE_TOL
     rows = defaultdict(list)
-    for ch in page.chars:
-        if xlo <= ch["x0"] <= xhi and CHART_TOP_MIN <= ch["top"] <= CHART_TOP_MAX:
+    for ch in page_index.query(index, xlo, top_min, xhi, top_max):
+        if xlo <= ch["x0"] <= xhi and top_min <= ch["top"] <= top_max:
             rows[round(ch["top"])].append((ch["x0"], ch["text"]))
     ticks = []
     for top_key, frags in rows.items():
@@ -151,10 +164,8 @@ def _read_axis_ticks(page, pattern, x_range):
         if m:
             value = float(m.group(1).replace(",", "."))
             # y center of the row: average top of the glyphs
-            ys = [c.get("top", top_key) for c in page.chars
-                  if round(c["top"]) == top_key and xlo <= c["x0"] <= xhi]
             ys = []
-            for ch in page.chars:
+            for ch in page_index.query(index, xlo, top_key - 0.5, xhi, top_key + 0.5):
                 if round(ch["top"]) == top_key and xlo <= ch["x0"] <= xhi:
                     ys.append((ch["top"] + ch["bottom"]) / 2.0)
             yc = sum(ys) / len(ys) if ys else float(top_key)
@@ -220,8 +231,35 @@ def _assign_bands(items, n_expected=N_BANDS):
 # Core extraction
 # ---------------------------------------------------------------------------
 
-def parse_one(pdf_path):
-    """Parse the size chart from one PDF. Returns a dict:
+def parse_one(pdf_path, backend="pdfplumber"):
+    """Parse the size chart from one PDF (see parse_page for the result)."""
+    try:
+        doc = pdf_backend.open_pdf(pdf_path, backend)
+        try:
+            return parse_page(pdf_backend.pages(doc)[0])
+        finally:
+            pdf_backend.close_pdf(doc)
+    except Exception as exc:  # noqa: BLE001  (unreadable file)
+        result = _empty_result()
+        result["_diag"]["error"] = f"{type(exc).__name__}: {exc}"
+        return result
+
+
+def _empty_result():
+    bands = [
+        {"label": lab, "part_accidents": None, "part_salaries": None, "if": None}
+        for lab in BAND_LABELS
+    ]
+    diag = {"pct_ticks": 0, "if_ticks": 0, "green_sum": None,
+            "purple_sum": None, "error": None}
+    return {"bands": bands, "_diag": diag}
+
+
+def parse_page(page):
+    """Parse the size chart from an open page 0 (a pdf_backend page, shared by
+    fiche_pass.py). Only the chart window is read, in one pass over the page
+    (pdf_backend.window): glyphs in CHART_BBOX and paths of the three chart colours.
+    Returns:
 
         {
           "bands": [
@@ -235,132 +273,129 @@ def parse_one(pdf_path):
     pct_pat = re.compile(r"^(\d+)%$")
     if_pat = re.compile(r"^(\d+),0$")
 
-    bands = [
-        {"label": lab, "part_accidents": None, "part_salaries": None, "if": None}
-        for lab in BAND_LABELS
-    ]
-    diag = {"pct_ticks": 0, "if_ticks": 0, "green_sum": None,
-            "purple_sum": None, "error": None}
+    result = _empty_result()
+    bands, diag = result["bands"], result["_diag"]
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            page = pdf.pages[0]
-
-            # --- 1. Calibrate the % (left) axis -------------------------------
-            pct_ticks = _read_axis_ticks(page, pct_pat, PCT_AXIS_X)
-            diag["pct_ticks"] = len(pct_ticks)
-            pct_fit = _linfit(pct_ticks) if len(pct_ticks) >= 2 else None
-            # pct_fit maps y_center -> percent. baseline_y is where percent == 0.
-            if pct_fit:
-                pa, pb = pct_fit
-                # %-per-point of bar height = |slope| (percent change per top unit)
-                pct_per_pt = abs(pa)
-                # baseline y where percent == 0
-                baseline_y = (0 - pb) / pa if abs(pa) > 1e-9 else None
-            else:
-                pct_per_pt = None
-                baseline_y = None
-
-            # --- 2. Calibrate the IF (right) axis -----------------------------
-            if_ticks = _read_axis_ticks(page, if_pat, IF_AXIS_X)
-            diag["if_ticks"] = len(if_ticks)
-            if_fit = _linfit(if_ticks) if len(if_ticks) >= 2 else None  # y -> IF
-
-            # --- 3. Collect bars ----------------------------------------------
-            # baseline for bars: use fitted baseline_y if available, else the
-            # most common bar bottom.
-            green_raw, purple_raw = [], []
-            for r in page.rects:
-                x0 = r["x0"]
-                if not (PLOT_X_MIN <= x0 <= PLOT_X_MAX):
-                    continue
-                if not (CHART_TOP_MIN <= r["top"] <= CHART_TOP_MAX):
-                    continue
-                fc = r.get("non_stroking_color")
-                if _color_is(fc, GREEN):
-                    green_raw.append(r)
-                elif _color_is(fc, PURPLE):
-                    purple_raw.append(r)
-
-            # Determine baseline from bar bottoms if axis fit missing.
-            all_bottoms = [r["bottom"] for r in green_raw + purple_raw]
-            if baseline_y is None and all_bottoms:
-                baseline_y = max(all_bottoms)  # bars grow up from 0-line
-
-            def _bars_to_items(raws):
-                # keep bars whose bottom is at the baseline; dedupe by rounded x0
-                # keeping max height.
-                by_x = {}
-                for r in raws:
-                    if baseline_y is not None and abs(r["bottom"] - baseline_y) > BASELINE_TOL:
-                        continue
-                    key = round(r["x0"], 1)
-                    h = r["height"]
-                    if key not in by_x or h > by_x[key]["h"]:
-                        by_x[key] = {"xc": (r["x0"] + r["x1"]) / 2.0, "h": h}
-                return list(by_x.values())
-
-            green_items = _bars_to_items(green_raw)
-            purple_items = _bars_to_items(purple_raw)
-
-            def _fill_series(items, field):
-                if pct_per_pt is None:
-                    return
-                band_map = _assign_bands(items)
-                for bi, cl in band_map.items():
-                    if bi >= N_BANDS or not cl:
-                        continue
-                    h = max(d["h"] for d in cl)
-                    bands[bi][field] = round(h * pct_per_pt, 1)
-
-            _fill_series(green_items, "part_accidents")
-            _fill_series(purple_items, "part_salaries")
-
-            # --- 4. Collect IF markers ----------------------------------------
-            marker_items = []
-            seen = set()
-            for cv in page.curves:
-                if not (PLOT_X_MIN <= cv["x0"] <= PLOT_X_MAX):
-                    continue
-                if not (CHART_TOP_MIN <= cv["top"] <= CHART_TOP_MAX):
-                    continue
-                # reject the connecting polyline (wide); keep small markers
-                if cv["width"] > MARKER_MAX_SIDE or cv["height"] > MARKER_MAX_SIDE:
+        shapes = pdf_backend.window(page, CHART_BBOX, ("chars", "rects", "curves"),
+                                    colors=(GREEN, PURPLE, RED_MARKER), tol=MARKER_TOL)
+        glyphs = page_index.build(shapes["chars"])
+
+        # --- 1. Calibrate the % (left) axis -------------------------------
+        pct_ticks = _read_axis_ticks(glyphs, pct_pat, PCT_AXIS_X)
+        diag["pct_ticks"] = len(pct_ticks)
+        pct_fit = _linfit(pct_ticks) if len(pct_ticks) >= 2 else None
+        # pct_fit maps y_center -> percent. baseline_y is where percent == 0.
+        if pct_fit:
+            pa, pb = pct_fit
+            # %-per-point of bar height = |slope| (percent change per top unit)
+            pct_per_pt = abs(pa)
+            # baseline y where percent == 0
+            baseline_y = (0 - pb) / pa if abs(pa) > 1e-9 else None
+        else:
+            pct_per_pt = None
+            baseline_y = None
+
+        # --- 2. Calibrate the IF (right) axis -----------------------------
+        if_ticks = _read_axis_ticks(glyphs, if_pat, IF_AXIS_X)
+        diag["if_ticks"] = len(if_ticks)
+        if_fit = _linfit(if_ticks) if len(if_ticks) >= 2 else None  # y -> IF
+
+        # --- 3. Collect bars ----------------------------------------------
+        # baseline for bars: use fitted baseline_y if available, else the
+        # most common bar bottom.
+        green_raw, purple_raw = [], []
+        for r in shapes["rects"]:
+            x0 = r["x0"]
+            if not (PLOT_X_MIN <= x0 <= PLOT_X_MAX):
+                continue
+            if not (CHART_TOP_MIN <= r["top"] <= CHART_TOP_MAX):
+                continue
+            fc = r.get("non_stroking_color")
+            if _color_is(fc, GREEN):
+                green_raw.append(r)
+            elif _color_is(fc, PURPLE):
+                purple_raw.append(r)
+
+        # Determine baseline from bar bottoms if axis fit missing.
+        all_bottoms = [r["bottom"] for r in green_raw + purple_raw]
+        if baseline_y is None and all_bottoms:
+            baseline_y = max(all_bottoms)  # bars grow up from 0-line
+
+        def _bars_to_items(raws):
+            # keep bars whose bottom is at the baseline; dedupe by rounded x0
+            # keeping max height.
+            by_x = {}
+            for r in raws:
+                if baseline_y is not None and abs(r["bottom"] - baseline_y) > BASELINE_TOL:
                     continue
-                fc = cv.get("non_stroking_color")
-                sc = cv.get("stroking_color")
-                if not (_color_is(fc, RED_MARKER, 0.06) or _color_is(sc, RED_MARKER, 0.06)):
+                key = round(r["x0"], 1)
+                h = r["height"]
+                if key not in by_x or h > by_x[key]["h"]:
+                    by_x[key] = {"xc": (r["x0"] + r["x1"]) / 2.0, "h": h}
+            return list(by_x.values())
+
+        green_items = _bars_to_items(green_raw)
+        purple_items = _bars_to_items(purple_raw)
+
+        def _fill_series(items, field):
+            if pct_per_pt is None:
+                return
+            band_map = _assign_bands(items)
+            for bi, cl in band_map.items():
+                if bi >= N_BANDS or not cl:
                     continue
-                xc = (cv["x0"] + cv["x1"]) / 2.0
-                yc = (cv["top"] + cv["bottom"]) / 2.0
-                key = (round(xc, 0), round(yc, 0))
-                if key in seen:
+                h = max(d["h"] for d in cl)
+                bands[bi][field] = round(h * pct_per_pt, 1)
+
+        _fill_series(green_items, "part_accidents")
+        _fill_series(purple_items, "part_salaries")
+
+        # --- 4. Collect IF markers ----------------------------------------
+        marker_items = []
+        seen = set()
+        for cv in shapes["curves"]:
+            if not (PLOT_X_MIN <= cv["x0"] <= PLOT_X_MAX):
+                continue
+            if not (CHART_TOP_MIN <= cv["top"] <= CHART_TOP_MAX):
+                continue
+            # reject the connecting polyline (wide); keep small markers
+            if cv["width"] > MARKER_MAX_SIDE or cv["height"] > MARKER_MAX_SIDE:
+                continue
+            fc = cv.get("non_stroking_color")
+            sc = cv.get("stroking_color")
+            if not (_color_is(fc, RED_MARKER, MARKER_TOL) or _color_is(sc, RED_MARKER, MARKER_TOL)):
+                continue
+            xc = (cv["x0"] + cv["x1"]) / 2.0
+            yc = (cv["top"] + cv["bottom"]) / 2.0
+            key = (round(xc, 0), round(yc, 0))
+            if key in seen:
+                continue
+            seen.add(key)
+            marker_items.append({"xc": xc, "yc": yc})
+
+        if if_fit and marker_items:
+            ia, ib = if_fit
+            band_map = _assign_bands(marker_items)
+            for bi, cl in band_map.items():
+                if bi >= N_BANDS or not cl:
                     continue
-                seen.add(key)
-                marker_items.append({"xc": xc, "yc": yc})
-
-            if if_fit and marker_items:
-                ia, ib = if_fit
-                band_map = _assign_bands(marker_items)
-                for bi, cl in band_map.items():
-                    if bi >= N_BANDS or not cl:
-                        continue
-                    # one marker per band; if several, take the one nearest the
-                    # column center (use median y)
-                    ys = sorted(d["yc"] for d in cl)
-                    yc = ys[len(ys) // 2]
-                    bands[bi]["if"] = round(ia * yc + ib, 1)
-
-            # --- 5. Diagnostics ----------------------------------------------
-            gvals = [b["part_accidents"] for b in bands if b["part_accidents"] is not None]
-            pvals = [b["part_salaries"] for b in bands if b["part_salaries"] is not None]
-            diag["green_sum"] = round(sum(gvals), 1) if gvals else None
-            diag["purple_sum"] = round(sum(pvals), 1) if pvals else None
+                # one marker per band; if several, take the one nearest the
+                # column center (use median y)
+                ys = sorted(d["yc"] for d in cl)
+                yc = ys[len(ys) // 2]
+                bands[bi]["if"] = round(ia * yc + ib, 1)
+
+        # --- 5. Diagnostics ----------------------------------------------
+        gvals = [b["part_accidents"] for b in bands if b["part_accidents"] is not None]
+        pvals = [b["part_salaries"] for b in bands if b["part_salaries"] is not None]
+        diag["green_sum"] = round(sum(gvals), 1) if gvals else None
+        diag["purple_sum"] = round(sum(pvals), 1) if pvals else None
 
     except Exception as exc:  # noqa: BLE001
         diag["error"] = f"{type(exc).__name__}: {exc}"
 
-    return {"bands": bands, "_diag": diag}
+    return result
 
 
 # ---------------------------------------------------------------------------
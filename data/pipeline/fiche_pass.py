@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Passe unique sur les fiches NAF : chaque PDF est ouvert et analysé une seule fois.
+
+parse_pdf.parse_one_pdf, extract_extra.parse_one, extract_size.parse_one et
+extract_size_chart.parse_one ouvrent chacun la fiche et refont l'analyse de mise en
+page de la page 1 (jusqu'à quatre fois par fiche). Ici la fiche est ouverte une fois :
+les objets de la page 1 (caractères, rectangles, courbes, mis en cache sur la page
+par le backend de pdf_backend.py) et ses mots sont calculés une fois, puis passés à
+tous les extracteurs de EXTRACTORS.
+
+Sorties (dans --out-dir, défaut data/) :
+    extra-dimensions.json : extracteur "extra"
+    size-data.json        : extracteur "size_engine" (ou "size" / "size_chart" seul,
+                            un seul des trois)
+Les données démographiques ("demographics", format de parse_pdf.parse_one_pdf) sont
+fusionnées dans at-data.json / mp-data.json par refresh_data.py.
+
+Usage:
+    python fiche_pass.py --pdf-dir /chemin/vers/pdfs [--out-dir DOSSIER] [--workers N]
+                         [--extractors demographics,extra,size_engine] [--no-cache]
+                         [--backend pdfplumber|pdfium] [--timeout SECONDES]
+                         [--max-docs-per-worker N]
+"""
+
+import argparse
+import json
+import sys
+from functools import partial
+from pathlib import Path
+
+import extract_extra
+import extract_size
+import extract_size_chart
+import parse_pdf
+import pdf_backend
+import size_engine
+
+# Cache des résultats par fiche (même format que parse_pdf.FICHE_CACHE_PATH, fichier
+# séparé : la clé inclut les extracteurs demandés)
+FICHE_PASS_CACHE_PATH = Path(__file__).parent / ".cache" / "fiche_pass.sqlite"
+OUTPUT_DIR = Path(__file__).parent.parent  # data/
+
+
+def open_fiche(doc: dict) -> dict:
+    """Géométrie partagée de la page 1 d'une fiche ouverte (pdf_backend.open_pdf).
+
+    Retourne {"doc", "page", "words"} : `words` = pdf_backend.words(page), calculé une
+    fois pour tous les extracteurs ; chars / rects / curves sont mis en cache par
+    le backend sur `page` dès le premier accès. Les extracteurs y cherchent par position
+    via l'index spatial de la page (page_index.for_page), lui aussi construit une fois.
+    """
+    page = pdf_backend.pages(doc)[0]
+    return {"doc": doc, "page": page, "words": pdf_backend.words(page)}
+
+
+def _demographics(fiche: dict, results: dict) -> dict:
+    return parse_pdf.parse_document(fiche["doc"], templates=fiche.get("templates"))
+
+
+def _extra(fiche: dict, results: dict) -> dict:
+    return extract_extra.parse_fiche(results.get("demographics") or {}, fiche["page"], fiche["words"])
+
+
+def _size(fiche: dict, results: dict) -> dict | None:
+    parsed = extract_size.parse_page(fiche["page"], fiche["words"])
+    return {"bands": parsed["bands"]} if parsed else None
+
+
+def _size_chart(fiche: dict, results: dict) -> dict:
+    return {"bands": extract_size_chart.parse_page(fiche["page"])["bands"]}
+
+
+def _size_engine(fiche: dict, results: dict) -> dict:
+    return size_engine.parse_page(fiche["page"], fiche["words"])
+
+
+# Extracteurs, dans l'ordre d'exécution :
+#   fn       : fn(fiche, résultats des extracteurs précédents) -> résultat ou None
+#   version  : entre dans la clé du cache ; incrémenter après toute modification
+#   requires : extracteurs dont le résultat est lu (ajoutés automatiquement)
+#   output   : fichier JSON {naf5: résultat} écrit par write_outputs (None = aucun) ;
+#              les clés en "_" d'un résultat (diagnostics) restent dans le cache
+EXTRACTORS = {
+    "demographics": {"fn": _demographics, "version": parse_pdf.SECTION_VERSIONS, "output": None},
+    "extra": {"fn": _extra, "version": 1, "requires": ["demographics"],
+              "output": "extra-dimensions.json"},
+    "size": {"fn": _size, "version": 1, "output": "size-data.json"},
+    "size_chart": {"fn": _size_chart, "version": 2, "output": "size-data.json"},
+    "size_engine": {"fn": _size_engine, "version": 1, "output": "size-data.json"},
+}
+DEFAULT_EXTRACTORS = ["demographics", "extra", "size_engine"]
+
+
+def resolve_extractors(names) -> list[str]:
+    """Extracteurs demandés et leurs prérequis, dans l'ordre de EXTRACTORS.
+
+    Raises:
+        ValueError pour un extracteur inconnu ou deux extracteurs écrivant le même fichier.
+    """
+    unknown = [n for n in names if n not in EXTRACTORS]
+    if unknown:
+        raise ValueError(f"Extracteur inconnu : {', '.join(unknown)} (connus : {', '.join(EXTRACTORS)})")
+    wanted = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(EXTRACTORS[name].get("requires", []))
+    resolved = [n for n in EXTRACTORS if n in wanted]
+
+    outputs = {}
+    for name in resolved:
+        output = EXTRACTORS[name]["output"]
+        if output is not None and output in outputs:
+            raise ValueError(f"Extracteurs {outputs[output]} et {name} : même sortie {output}")
+        outputs[output] = name
+    return resolved
+
+
+def parse_fiche(
+    path: str | Path, names: tuple = tuple(DEFAULT_EXTRACTORS), backend: str = "pdfplumber",
+    templates: dict | None = None,
+) -> dict | None:
+    """Ouvre une fiche une fois (avec `backend`) et y applique les extracteurs `names`
+    (déjà résolus). `templates` : gabarits du mode "crop" de parse_pdf partagés par
+    les fiches du lot (voir parse_pdf.parse_open_pdf).
+
+    Retourne {extracteur: résultat} ; un extracteur en erreur donne None (signalé),
+    un fichier illisible donne None pour la fiche entière.
+    """
+    try:
+        doc = pdf_backend.open_pdf(path, backend)
+    except Exception as e:
+        print(f"  ERREUR ouverture {path}: {e}")
+        return None
+
+    try:
+        fiche = open_fiche(doc)
+        fiche["templates"] = templates
+    except Exception as e:
+        print(f"  ERREUR parsing {path}: {e}")
+        pdf_backend.close_pdf(doc)
+        return None
+
+    try:
+        results = {}
+        for name in names:
+            try:
+                results[name] = EXTRACTORS[name]["fn"](fiche, results)
+            except Exception as e:
+                print(f"  ERREUR {name} {path}: {e}")
+                results[name] = None
+        return results
+    finally:
+        pdf_backend.close_pdf(doc)
+
+
+def iter_fiche_pass(
+    pdf_dir: Path,
+    names=DEFAULT_EXTRACTORS,
+    workers: int = 1,
+    cache_path: Path | None = FICHE_PASS_CACHE_PATH,
+    backend: str = "pdfplumber",
+    timeout: float | None = None,
+    max_docs_per_worker: int | None = None,
+):
+    """Applique les extracteurs aux fiches NAF_*.pdf de pdf_dir et les rend une à une.
+
+    Les fiches sont réparties et mises en cache comme dans parse_pdf.iter_parsed_fiches
+    (workers, cache SQLite par SHA-256 du PDF + versions des extracteurs, + backend
+    s'il n'est pas pdfplumber, délai par fiche et recyclage des processus) ; aucune
+    fiche n'est gardée en mémoire.
+
+    Yields:
+        (naf5, {extracteur: résultat ou None}) pour chaque fiche ouverte avec succès.
+    """
+    names = resolve_extractors(names)
+    pdf_backend.check_backend(backend)
+    versions = parse_pdf.backend_versions({name: EXTRACTORS[name]["version"] for name in names}, backend)
+    yield from parse_pdf.iter_parsed_fiches(
+        pdf_dir, workers=workers, cache_path=cache_path,
+        parse=partial(parse_fiche, names=tuple(names), backend=backend, templates={}),
+        versions=versions,
+        timeout=timeout, max_docs_per_worker=max_docs_per_worker,
+    )
+
+
+def run_fiche_pass(
+    pdf_dir: Path,
+    names=DEFAULT_EXTRACTORS,
+    workers: int = 1,
+    cache_path: Path | None = FICHE_PASS_CACHE_PATH,
+    backend: str = "pdfplumber",
+    timeout: float | None = None,
+    max_docs_per_worker: int | None = None,
+) -> dict[str, dict]:
+    """Applique les extracteurs à toutes les fiches NAF_*.pdf de pdf_dir (iter_fiche_pass).
+
+    Returns:
+        {extracteur: {naf5: résultat}} ; les résultats None sont omis.
+    """
+    names = resolve_extractors(names)
+    by_extractor = {name: {} for name in names}
+    total = 0
+    for naf5, results in iter_fiche_pass(pdf_dir, names, workers, cache_path, backend,
+                                         timeout, max_docs_per_worker):
+        total += 1
+        for name in names:
+            if results.get(name):
+                by_extractor[name][naf5] = results[name]
+    for name in names:
+        print(f"  {name} : {len(by_extractor[name])}/{total} fiche(s)")
+    return by_extractor
+
+
+def write_outputs(by_extractor: dict[str, dict], out_dir: Path = OUTPUT_DIR) -> list[Path]:
+    """Écrit le fichier JSON de chaque extracteur qui en déclare un (sans les clés en "_"
+    des résultats) ; retourne les chemins."""
+    written = []
+    for name, results in by_extractor.items():
+        output = EXTRACTORS[name]["output"]
+        if output is None:
+            continue
+        public = {naf5: {k: v for k, v in r.items() if not k.startswith("_")} if isinstance(r, dict) else r
+                  for naf5, r in results.items()}
+        path = Path(out_dir) / output
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(public, f, ensure_ascii=False, indent=2)
+        print(f"  [ok] {output} : {len(results)} secteur(s)")
+        written.append(path)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Passe unique sur les fiches PDF NAF : démographie, dimensions et tailles d'établissement"
+    )
+    parser.add_argument("--pdf-dir", required=True, help="Dossier contenant les fichiers NAF_*.pdf")
+    parser.add_argument("--out-dir", default=str(OUTPUT_DIR), help="Dossier des JSON produits (défaut : data/)")
+    parser.add_argument(
+        "--extractors",
+        default=",".join(DEFAULT_EXTRACTORS),
+        help=f"Extracteurs séparés par des virgules (défaut : {','.join(DEFAULT_EXTRACTORS)} ; "
+             f"connus : {','.join(EXTRACTORS)})",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus (défaut : 1)")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=parse_pdf.FICHE_TIMEOUT,
+        help=f"Délai par fiche en secondes, 0 = illimité (défaut : {parse_pdf.FICHE_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--max-docs-per-worker",
+        type=int,
+        default=parse_pdf.MAX_DOCS_PER_WORKER,
+        help=f"Fiches par processus avant son remplacement, 0 = illimité "
+             f"(défaut : {parse_pdf.MAX_DOCS_PER_WORKER})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Ignore le cache ({FICHE_PASS_CACHE_PATH.name}) et ré-ouvre toutes les fiches",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=pdf_backend.PDF_BACKENDS,
+        default="pdfplumber",
+        help="Moteur d'extraction PDF (défaut : pdfplumber ; voir pdf_backend.py)",
+    )
+    args = parser.parse_args()
+
+    pdf_dir = Path(args.pdf_dir)
+    if not pdf_dir.is_dir():
+        print(f"Erreur : '{pdf_dir}' n'est pas un dossier.", file=sys.stderr)
+        sys.exit(1)
+    try:
+        names = resolve_extractors([n.strip() for n in args.extractors.split(",") if n.strip()])
+    except ValueError as e:
+        parser.error(str(e))
+
+    cache_path = None if args.no_cache else FICHE_PASS_CACHE_PATH
+    by_extractor = run_fiche_pass(pdf_dir, names, workers=args.workers, cache_path=cache_path,
+                                  backend=args.backend, timeout=args.timeout or None,
+                                  max_docs_per_worker=args.max_docs_per_worker or None)
+    write_outputs(by_extractor, Path(args.out_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Manifeste d'exécution et reconstruction incrémentale de refresh_data.main().
+
+Le manifeste (JSON, écrit à côté des sorties) enregistre pour chaque étape :
+    fingerprint : empreinte globale (code, entrées, versions, dépendances)
+    code        : empreinte du code source atteint par l'étape
+    inputs      : {fichier: sha256} des fichiers lus
+    packages    : {distribution: version} des bibliothèques d'extraction
+    artifact    : sha256 du résultat sérialisé en JSON (dossier d'artefacts)
+    outputs     : {fichier: sha256} des fichiers écrits
+    seconds     : durée de la dernière exécution
+
+Une étape est sautée si son empreinte est inchangée et si son artefact et ses
+sorties sont intacts : son résultat est relu depuis l'artefact. L'empreinte d'une
+étape inclut le sha256 des artefacts de ses dépendances : une dépendance
+ré-exécutée qui produit le même résultat ne force pas les étapes suivantes.
+
+Les clés de l'étape lues ici (en plus de celles de scheduler.py) :
+    inputs   : fichiers d'entrée (liste de Path, optionnel)
+    outputs  : fichiers écrits (liste de Path, optionnel)
+    code     : fonctions supplémentaires à empreinter (optionnel)
+    packages : distributions dont la version entre dans l'empreinte (optionnel)
+Les `args` n'entrent pas dans l'empreinte : ce qu'ils désignent est décrit par inputs.
+"""
+
+import dis
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import re
+import time
+from importlib import metadata
+from pathlib import Path
+
+PIPELINE_DIR = Path(__file__).parent
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path) -> str:
+    """SHA-256 du contenu d'un fichier, lu par blocs."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _files_sha256(paths) -> dict[str, str | None]:
+    """{chemin: sha256} ; None pour un fichier absent."""
+    return {str(p): file_sha256(p) if Path(p).exists() else None for p in paths}
+
+
+# ---------------------------------------------------------------------------
+# Empreinte du code
+# ---------------------------------------------------------------------------
+
+
+def _is_pipeline_function(obj) -> bool:
+    """Vrai pour une fonction définie dans un module de data/pipeline/."""
+    if not inspect.isfunction(obj):
+        return False
+    try:
+        return Path(inspect.getfile(obj)).resolve().parent == PIPELINE_DIR.resolve()
+    except TypeError:
+        return False
+
+
+def _stable_repr(value) -> str | None:
+    """Représentation déterministe d'une constante de module (None si non pertinente).
+
+    Les fonctions rangées dans une constante (registre {nom: {"fn": ...}}) sont
+    représentées par leur nom qualifié, pas par leur adresse ; code_parts empreinte
+    leur source à part.
+    """
+    if inspect.isfunction(value):
+        return f"<function {value.__module__}.{value.__qualname__}>"
+    if isinstance(value, (set, frozenset)):
+        return repr(sorted(value, key=repr))
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{_stable_repr(k)}: {_stable_repr(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__ + "[" + ", ".join(str(_stable_repr(v)) for v in value) + "]"
+    if isinstance(value, (str, int, float, bool, Path, re.Pattern)) or value is None:
+        return repr(value)
+    return None
+
+
+def _nested_functions(value):
+    """Fonctions du pipeline rangées dans une constante (dict, liste, tuple)."""
+    if _is_pipeline_function(value):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _nested_functions(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from _nested_functions(v)
+
+
+def _code_objects(code):
+    yield code
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            yield from _code_objects(const)
+
+
+def _is_pipeline_module(obj) -> bool:
+    return inspect.ismodule(obj) and (PIPELINE_DIR / f"{obj.__name__}.py").exists()
+
+
+def _is_constant_name(name: str) -> bool:
+    """Constante de module (PARSER_VERSION, _DEPT_RE) ; les noms en minuscules
+    désignent un état du processus (cache rempli à l'exécution) et sont ignorés."""
+    return name.lstrip("_").isupper()
+
+
+def _referenced(fn):
+    """(nom qualifié, objet) des globales et imports locaux utilisés par fn."""
+    for code in _code_objects(fn.__code__):
+        for name in code.co_names:
+            if name in fn.__globals__:
+                value = fn.__globals__[name]
+                yield f"{fn.__module__}.{name}", value
+                # Module du pipeline importé au niveau module : "parse_pdf.parse_open_pdf(...)"
+                if _is_pipeline_module(value):
+                    for attr in code.co_names:
+                        if hasattr(value, attr):
+                            yield f"{value.__name__}.{attr}", getattr(value, attr)
+        # Imports locaux : "from parse_pdf import parse_all_pdfs" dans le corps
+        module = None
+        for ins in dis.get_instructions(code):
+            if ins.opname == "IMPORT_NAME":
+                module = None
+                if (PIPELINE_DIR / f"{ins.argval}.py").exists():
+                    module = importlib.import_module(ins.argval)
+            elif ins.opname == "IMPORT_FROM" and module is not None:
+                if hasattr(module, ins.argval):
+                    yield f"{module.__name__}.{ins.argval}", getattr(module, ins.argval)
+
+
+def code_parts(functions) -> dict[str, str]:
+    """Source des fonctions et de tout ce qu'elles atteignent, par nom qualifié.
+
+    Parcourt les fonctions du pipeline appelées (globales et imports locaux, y compris
+    dans les lambdas et fonctions imbriquées) et les constantes de module utilisées
+    (mappings de colonnes, regex, PARSER_VERSION... : noms en majuscules). Modifier build_trajet_data ne
+    change donc que l'empreinte des étapes qui l'appellent.
+    """
+    parts = {}
+    stack = list(functions)
+    while stack:
+        fn = stack.pop()
+        key = f"{fn.__module__}.{fn.__qualname__}"
+        if key in parts:
+            continue
+        parts[key] = inspect.getsource(fn)
+        for name, value in _referenced(fn):
+            if _is_pipeline_function(value):
+                stack.append(value)
+            elif name not in parts and _is_constant_name(name.rpartition(".")[2]):
+                text = _stable_repr(value)
+                if text is not None:
+                    parts[name] = text
+                    stack.extend(_nested_functions(value))
+    return parts
+
+
+def code_fingerprint(functions) -> str:
+    """Empreinte de code_parts(functions)."""
+    return hashlib.sha256(json.dumps(code_parts(functions), sort_keys=True).encode()).hexdigest()
+
+
+def package_versions(names) -> dict[str, str | None]:
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+# ---------------------------------------------------------------------------
+# Manifeste
+# ---------------------------------------------------------------------------
+
+
+def load_manifest(path: Path) -> dict:
+    """Charge le manifeste ; un fichier absent, illisible ou d'une autre version est ignoré."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "stages": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "stages": {}}
+    manifest.setdefault("stages", {})
+    return manifest
+
+
+def write_manifest(path: Path, manifest: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def stage_cache(manifest_path: Path, artifact_dir: Path, force=()):
+    """Crée les fonctions lookup / store passées à scheduler.run_stages.
+
+    Args:
+        manifest_path: fichier manifeste (lu maintenant, réécrit après chaque étape)
+        artifact_dir: dossier des résultats d'étapes sérialisés en JSON
+        force: noms d'étapes à ré-exécuter quoi qu'il arrive
+
+    Returns:
+        (lookup, store, manifest) : lookup(stage) -> (trouvé, résultat) ;
+        store(stage, result, seconds) enregistre l'artefact et met à jour le manifeste.
+    """
+    manifest = load_manifest(manifest_path)
+    previous = manifest["stages"]
+    manifest = {"version": MANIFEST_VERSION, "stages": dict(previous)}
+    force = set(force)
+    artifacts = {}   # sha256 des artefacts de cette exécution
+    current = {}     # détails d'empreinte calculés par lookup, repris par store
+
+    def fingerprint(stage):
+        requires = list(stage.get("deps", [])) + list(stage.get("after", []))
+        details = {
+            "code": code_fingerprint([stage["fn"]] + list(stage.get("code", []))),
+            "inputs": _files_sha256(stage.get("inputs", [])),
+            "packages": package_versions(stage.get("packages", [])),
+            "deps": {d: artifacts[d] for d in requires},
+        }
+        details["fingerprint"] = hashlib.sha256(
+            json.dumps(details, sort_keys=True).encode()).hexdigest()
+        return details
+
+    def lookup(stage):
+        name = stage["name"]
+        details = current[name] = fingerprint(stage)
+        entry = previous.get(name)
+        if name in force or entry is None or entry.get("fingerprint") != details["fingerprint"]:
+            return False, None
+        artifact_path = artifact_dir / f"{name}.json"
+        if not artifact_path.exists() or file_sha256(artifact_path) != entry.get("artifact"):
+            return False, None
+        outputs = entry.get("outputs", {})
+        if any(sha is None for sha in outputs.values()):
+            return False, None
+        if _files_sha256(outputs) != outputs:
+            return False, None
+        with open(artifact_path, encoding="utf-8") as f:
+            result = json.load(f)
+        artifacts[name] = entry["artifact"]
+        return True, result
+
+    def store(stage, result, seconds):
+        name = stage["name"]
+        details = current.pop(name, None) or fingerprint(stage)
+        artifact_dir.mkdir(parents=True, exist_ok=True)
+        artifact_path = artifact_dir / f"{name}.json"
+        tmp_path = artifact_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_path, artifact_path)
+        artifacts[name] = file_sha256(artifact_path)
+
+        manifest["stages"][name] = {
+            "fingerprint": details["fingerprint"],
+            "code": details["code"],
+            "inputs": details["inputs"],
+            "packages": details["packages"],
+            "artifact": artifacts[name],
+            "outputs": _files_sha256(stage.get("outputs", [])),
+            "seconds": round(seconds, 3),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        write_manifest(manifest_path, manifest)
+
+    return lookup, store, manifest
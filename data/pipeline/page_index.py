@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Index spatial des objets d'une page (mots, caractères, rectangles, courbes).
+
+Les extracteurs de fiche cherchent des objets par position : mots d'une même ligne,
+glyphes d'une colonne d'axe, barres dans le cadre d'un graphique. Un parcours de tous
+les objets par requête rend ces recherches quadratiques. Ici les objets sont rangés
+une fois dans une grille de cases de GRID_CELL points (chaque objet dans toutes les
+cases que couvre sa boîte) et, pour les objets texte, par texte exact.
+
+Une requête rend les objets dont la boîte touche le rectangle demandé, dans l'ordre
+de la liste d'origine : l'appelant applique ensuite son critère exact (centre, x0,
+top...), qui désigne toujours un point de la boîte, et obtient le même résultat qu'un
+parcours complet.
+
+for_page() garde l'index de chaque sorte d'objets sur la page pdf_backend, pour que
+les extracteurs appliqués à une même page (fiche_pass.py) le partagent.
+"""
+
+import math
+import re
+from collections import defaultdict
+
+import pdf_backend
+
+GRID_CELL = 20.0  # côté d'une case, en points
+
+# Sortes d'objets indexables par for_page (fonctions de pdf_backend)
+KINDS = ("words", "chars", "rects", "curves")
+
+
+def _span(lo: float, hi: float, first: int, last: int, cell: float) -> range:
+    """Cases [first, last] touchées par l'intervalle [lo, hi] (bornes infinies admises)."""
+    a = first if lo == -math.inf else max(first, math.floor(lo / cell))
+    b = last if hi == math.inf else min(last, math.floor(hi / cell))
+    return range(a, b + 1)
+
+
+def build(objs: list[dict], cell: float = GRID_CELL) -> dict:
+    """Index d'une liste d'objets au format pdfplumber (x0, x1, top, bottom).
+
+    Args:
+        objs: objets de la page (mots, caractères, rectangles, courbes)
+        cell: côté d'une case de la grille, en points
+
+    Returns:
+        {"objs": objs, "cell", "grid": {(case x, case y): [indices]}, "bounds":
+        (x min, x max, y min, y max) des cases, "text": {texte: [indices]}}
+    """
+    grid = defaultdict(list)
+    text = defaultdict(list)
+    for i, obj in enumerate(objs):
+        for gx in range(math.floor(obj["x0"] / cell), math.floor(obj["x1"] / cell) + 1):
+            for gy in range(math.floor(obj["top"] / cell), math.floor(obj["bottom"] / cell) + 1):
+                grid[gx, gy].append(i)
+        if "text" in obj:
+            text[obj["text"]].append(i)
+    xs = [gx for gx, _ in grid] or [0]
+    ys = [gy for _, gy in grid] or [0]
+    return {"objs": objs, "cell": cell, "grid": dict(grid),
+            "bounds": (min(xs), max(xs), min(ys), max(ys)), "text": dict(text)}
+
+
+def query(index: dict, x0: float = -math.inf, top: float = -math.inf,
+          x1: float = math.inf, bottom: float = math.inf) -> list[dict]:
+    """Objets dont la boîte touche le rectangle (x0, top, x1, bottom), bords compris.
+
+    Returns:
+        les objets dans l'ordre de la liste indexée.
+    """
+    cell, grid = index["cell"], index["grid"]
+    gx0, gx1, gy0, gy1 = index["bounds"]
+    found = set()
+    for gx in _span(x0, x1, gx0, gx1, cell):
+        for gy in _span(top, bottom, gy0, gy1, cell):
+            found.update(grid.get((gx, gy), ()))
+    objs = index["objs"]
+    return [objs[i] for i in sorted(found)
+            if objs[i]["x1"] >= x0 and objs[i]["x0"] <= x1
+            and objs[i]["bottom"] >= top and objs[i]["top"] <= bottom]
+
+
+def row(index: dict, top: float, bottom: float) -> list[dict]:
+    """Objets qui touchent la bande horizontale [top, bottom]."""
+    return query(index, top=top, bottom=bottom)
+
+
+def column(index: dict, x0: float, x1: float) -> list[dict]:
+    """Objets qui touchent la bande verticale [x0, x1]."""
+    return query(index, x0=x0, x1=x1)
+
+
+def with_text(index: dict, text: str) -> list[dict]:
+    """Objets dont le texte est exactement `text`, dans l'ordre de la liste indexée."""
+    return [index["objs"][i] for i in index["text"].get(text, ())]
+
+
+def matching(index: dict, pattern: str) -> list[dict]:
+    """Objets dont le texte correspond entièrement à l'expression `pattern` (re.fullmatch),
+    dans l'ordre de la liste indexée ; chaque texte distinct n'est testé qu'une fois."""
+    regex = re.compile(pattern)
+    hits = sorted(i for text, ids in index["text"].items() if regex.fullmatch(text) for i in ids)
+    return [index["objs"][i] for i in hits]
+
+
+def for_page(page: dict, kind: str, objs: list[dict] | None = None) -> dict:
+    """Index des objets `kind` (KINDS) de la page, construit une fois par page.
+
+    Args:
+        page: page pdf_backend (l'index y est gardé)
+        kind: "words" (réglages par défaut de pdf_backend.words), "chars", "rects"
+              ou "curves"
+        objs: objets déjà extraits par l'appelant ; l'index gardé est réutilisé s'il
+              porte sur cette même liste, sinon il est reconstruit sur elle
+
+    Returns:
+        index (voir build) ; index["objs"] est la liste des objets.
+    """
+    cache = page.setdefault("index", {})
+    index = cache.get(kind)
+    if index is None or (objs is not None and index["objs"] is not objs):
+        if objs is None:
+            objs = getattr(pdf_backend, kind)(page)
+        index = cache[kind] = build(objs)
+    return index
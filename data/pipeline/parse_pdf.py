@@ -5,15 +5,50 @@ Input:  dossier local contenant des fichiers NAF_*.pdf (chemin fourni via --pdf-
 Output: dict[naf5, parsed_data] avec données annuelles AT/Trajet/MP, répartition sexe et âge.
 
 Usage:
-    python parse_pdf.py --pdf-dir /chemin/vers/pdfs
+    python parse_pdf.py --pdf-dir /chemin/vers/pdfs [--workers N] [--no-cache] [--layout crop|full]
+                        [--timeout SECONDES] [--max-docs-per-worker N]
+
+Les résultats par fiche sont mis en cache (SQLite, JSON) sous une clé = SHA-256 du
+PDF + SECTION_VERSIONS : seules les fiches nouvelles, modifiées ou dont une section
+a changé de version sont ré-ouvertes.
+
+Avec un délai par fiche (--timeout) ou plusieurs processus, les fiches sont parsées
+dans des processus recyclables (worker_pool.py) : une fiche qui dépasse le délai est
+abandonnée et signalée à part des échecs de parsing.
 """
 
 import argparse
+import json
+import math
 import re
+import sqlite3
 import sys
+from functools import partial
 from pathlib import Path
 
-import pdfplumber
+from pdfplumber.utils import crop_to_bbox, obj_to_edges, within_bbox
+from pdfplumber.utils import extract_text as chars_to_text
+
+import pdf_backend
+import worker_pool
+from manifest import file_sha256
+
+# Cache des résultats de parse_one_pdf (SQLite, résultats en JSON)
+FICHE_CACHE_PATH = Path(__file__).parent / ".cache" / "fiches.sqlite"
+CACHE_BATCH = 64  # résultats écrits dans le cache par transaction
+
+# Valeurs par défaut des options --timeout et --max-docs-per-worker (voir worker_pool.py)
+FICHE_TIMEOUT = 120         # secondes par fiche ; une fiche normale prend moins d'une seconde
+MAX_DOCS_PER_WORKER = 200   # fiches par processus avant son remplacement
+
+# Version de chaque section extraite par parse_one_pdf. Incrémenter la version d'une
+# section après toute modification de ses parseurs : les fiches en cache sont alors
+# re-parsées au prochain lancement.
+#   synthesis : parse_synthesis
+#   yearly    : _parse_yearly_section, segment_row_numbers, YEARLY_MAX, LEVEL_COST
+#   at_detail : parse_breakdowns, *_LABELS, RIGHT_SECTIONS (page 2)
+#   mp_detail : parse_breakdowns, SEX_LABELS, AGE_LABELS (page 3)
+SECTION_VERSIONS = {"synthesis": 1, "yearly": 2, "at_detail": 2, "mp_detail": 2}
 
 
 def parse_fr_number(s: str) -> int:
@@ -74,24 +109,101 @@ YEARLY_MAX = {
 YEARLY_YEARS = ["2020", "2021", "2022", "2023", "2024"]
 
 
-def _parse_yearly_row(digit_groups: list[str], section: str, key: str) -> list[int]:
-    """Parse une ligne annuelle en essayant strict -> mid -> relaxed pour obtenir exactement 5 valeurs."""
-    for level in ["strict", "mid", "relaxed"]:
-        max_vals = YEARLY_MAX[section][level][key]
-        result = parse_table_row_numbers(digit_groups, max_vals)
-        if len(result) == 5:
-            return result
-    return parse_table_row_numbers(digit_groups, YEARLY_MAX[section]["strict"][key])
+YEARLY_LEVELS = ["strict", "mid", "relaxed"]
+# Coût d'une valeur qui ne tient que sous le plafond "mid" (1 niveau) ou "relaxed" (2),
+# ajouté à l'écart entre années consécutives |ln((b + 1) / (a + 1))|
+LEVEL_COST = 1.0
+
+
+def segment_row_numbers(digit_groups: list[str], ceilings: list[list[int]], arity: int) -> tuple[list[int], float]:
+    """Découpe optimale des groupes de chiffres d'une ligne en `arity` valeurs.
 
+    Une valeur est un groupe sans zéro de tête suivi de groupes de 3 chiffres
+    (séparateurs de milliers). Toutes les découpes en `arity` valeurs sous le plafond
+    le plus large sont énumérées par programmation dynamique (état : début et fin de
+    la dernière valeur, nombre de valeurs). Le coût d'une découpe additionne le niveau
+    de plafond de chaque valeur (LEVEL_COST par niveau au-delà du premier) et l'écart
+    entre colonnes consécutives (années successives : une série régulière est plus
+    plausible).
+
+    Args:
+        digit_groups: groupes de chiffres de la ligne, dans l'ordre
+        ceilings: plafonds par colonne, du plus strict au plus large
+        arity: nombre de valeurs attendu
 
-def _parse_yearly_section(page_text: str, section: str) -> dict[str, dict] | None:
+    Returns:
+        (valeurs, confiance) : découpe de coût minimal et sa probabilité parmi toutes
+        les découpes valides (poids exp(-coût)) ; ([], 0.0) si aucune découpe valide.
+    """
+    n = len(digit_groups)
+
+    def value(start, end, col):
+        """(valeur, niveau) des groupes [start, end) en colonne col, None si invalide."""
+        first = digit_groups[start]
+        if end - start > 1 and (first.startswith("0") or any(len(g) != 3 for g in digit_groups[start + 1:end])):
+            return None
+        v = int("".join(digit_groups[start:end]))
+        for level, maxima in enumerate(ceilings):
+            if col < len(maxima) and v <= maxima[col]:
+                return v, level
+        return None
+
+    # states[(début, fin)] pour j valeurs : (coût minimal, somme des poids, valeurs)
+    states = {}
+    for end in range(1, n + 1):
+        cell = value(0, end, 0)
+        if cell is None:
+            break  # une valeur plus longue serait aussi invalide
+        cost = cell[1] * LEVEL_COST
+        states[(0, end)] = (cost, math.exp(-cost), [cell[0]])
+    for col in range(1, arity):
+        following = {}
+        for (start, mid), (cost, weight, values) in states.items():
+            prev = values[-1]
+            for end in range(mid + 1, n + 1):
+                cell = value(mid, end, col)
+                if cell is None:
+                    break
+                step = cell[1] * LEVEL_COST + abs(math.log((cell[0] + 1) / (prev + 1)))
+                best = following.get((mid, end))
+                total_weight = weight * math.exp(-step) + (best[1] if best else 0.0)
+                if best is None or cost + step < best[0]:
+                    following[(mid, end)] = (cost + step, total_weight, values + [cell[0]])
+                else:
+                    following[(mid, end)] = (best[0], total_weight, best[2])
+        states = following
+
+    complete = [state for (start, end), state in states.items() if end == n]
+    if not complete:
+        return [], 0.0
+    cost, _, values = min(complete, key=lambda state: state[0])
+    return values, min(1.0, math.exp(-cost) / sum(state[1] for state in complete))
+
+
+def _parse_yearly_row(digit_groups: list[str], section: str, key: str) -> tuple[list[int], float]:
+    """Parse une ligne annuelle en 5 valeurs (une par année) avec segment_row_numbers.
+
+    Returns:
+        (valeurs, confiance) ; sans découpe valide, la lecture au plafond strict
+        (nombre de valeurs différent de 5) et une confiance nulle.
+    """
+    ceilings = [YEARLY_MAX[section][level][key] for level in YEARLY_LEVELS]
+    values, confidence = segment_row_numbers(digit_groups, ceilings, len(YEARLY_YEARS))
+    if not values:
+        return parse_table_row_numbers(digit_groups, YEARLY_MAX[section]["strict"][key]), 0.0
+    return values, confidence
+
+
+def _parse_yearly_section(page_text: str, section: str) -> tuple[dict[str, dict] | None, dict[str, float]]:
     """Extrait un tableau annuel (5 années) depuis le texte de la page 1.
 
     Args:
         page_text: texte de la page recadrée à 55% de largeur
         section: "at", "trajet" ou "mp"
 
-    Returns: {"2019": {"count": N, "ip": N, "deces": N, "journees": N, "salaries": N?}, ...}
+    Returns:
+        ({"2020": {"count": N, "ip": N, "deces": N, "journees": N, "salaries": N?}, ...}
+         ou None, {ligne: confiance de la découpe})
     """
     headers = {
         "at": "Accidents du travail",
@@ -112,6 +224,7 @@ def _parse_yearly_section(page_text: str, section: str) -> dict[str, dict] | Non
     lines = page_text.split("\n")
     in_section = False
     raw = {"count": [], "ip": [], "deces": [], "journees": [], "salaries": []}
+    confidence = {}
 
     for line in lines:
         if headers[section] in line and "2020" in line:
@@ -127,7 +240,7 @@ def _parse_yearly_section(page_text: str, section: str) -> dict[str, dict] | Non
         if "salariés" in line and ":" not in line and section == "at":
             digit_groups = re.findall(r"\d+", line.split("salariés")[1])
             if digit_groups:
-                raw["salaries"] = _parse_yearly_row(digit_groups, "at", "salaries")
+                raw["salaries"], confidence["salaries"] = _parse_yearly_row(digit_groups, "at", "salaries")
             continue
 
         if ":" not in line:
@@ -139,20 +252,21 @@ def _parse_yearly_section(page_text: str, section: str) -> dict[str, dict] | Non
             continue
 
         if count_patterns[section](line):
-            raw["count"] = _parse_yearly_row(digit_groups, section, "count")
+            raw["count"], confidence["count"] = _parse_yearly_row(digit_groups, section, "count")
         elif "nouvelles ip" in line.lower():
-            raw["ip"] = _parse_yearly_row(digit_groups, section, "ip")
+            raw["ip"], confidence["ip"] = _parse_yearly_row(digit_groups, section, "ip")
         elif "décès" in line.lower() or "deces" in line.lower():
-            raw["deces"] = _parse_yearly_row(digit_groups, section, "deces")
+            raw["deces"], confidence["deces"] = _parse_yearly_row(digit_groups, section, "deces")
         elif "journées perdues" in line.lower() or "journees perdues" in line.lower():
-            raw["journees"] = _parse_yearly_row(digit_groups, section, "journees")
+            raw["journees"], confidence["journees"] = _parse_yearly_row(digit_groups, section, "journees")
 
         if raw["journees"]:
             break
 
+    confidence = {key: round(c, 3) for key, c in confidence.items()}
     for key in ["count", "ip", "deces", "journees"]:
         if len(raw[key]) != 5:
-            return None
+            return None, confidence
 
     result = {}
     has_salaries = len(raw["salaries"]) == 5
@@ -166,7 +280,7 @@ def _parse_yearly_section(page_text: str, section: str) -> dict[str, dict] | Non
         if has_salaries:
             entry["salaries"] = raw["salaries"][i]
         result[year] = entry
-    return result
+    return result, confidence
 
 
 def _extract_row_at_count(line: str, label_end_pattern: str) -> int | None:
@@ -220,162 +334,476 @@ def parse_synthesis(page_text: str) -> dict:
     return result
 
 
-def parse_sex(cell_text: str) -> dict[str, int]:
-    """Extrait les comptes par sexe depuis le texte d'une cellule de tableau (page 2 AT ou page 3 MP)."""
-    result = {}
+# ═══════════════════════════════════════════
+# Cellules de répartition (sexe, âge, siège, activité, modalité)
+# ═══════════════════════════════════════════
+
+# Libellés des lignes de chaque répartition : (clé, motif). Une ligne de tableau est
+# "<n° de ligne> <libellé> <colonnes numériques>" ; la première colonne est retenue.
+SEX_LABELS = [("masculin", r"masculin"), ("feminin", r"féminin")]
+AGE_LABELS = [
+    ("<20", r"Moins de 20 ans"),
+    ("20-24", r"de 20 [àa] 24 ans"),
+    ("25-29", r"de 25 [àa] 29 ans"),
+    ("30-34", r"de 30 [àa] 34 ans"),
+    ("35-39", r"de 35 [àa] 39 ans"),
+    ("40-49", r"de 40 [àa] 49 ans"),
+    ("50-59", r"de 50 [àa] 59 ans"),
+    ("60-64", r"de 60 [àa] 64 ans"),
+    ("65+", r"65 ans et plus"),
+]
+SIEGE_LABELS = [
+    ("non_determine", r"Localisation de la blessure non d[ée]termin[ée]e"),
+    ("tete", r"T[êe]te, sans autre sp[ée]cification"),
+    ("cou", r"Cou, dont colonne vert[ée]brale"),
+    ("dos", r"Dos, dont colonne vert[ée]brale"),
+    ("torse", r"Torse et organes"),
+    ("membres_superieurs", r"Membres sup[ée]rieurs"),
+    ("membres_inferieurs", r"Membres inf[ée]rieurs"),
+    ("corps_entier", r"Ensemble du corps"),
+    ("autres", r"Autres parties du corps"),
+]
+ACTIVITE_LABELS = [
+    ("operation_machine", r"Op[ée]ration de machine"),
+    ("outils_main", r"Travail avec des outils [àa] main"),
+    ("conduite_transport", r"Conduite/pr[ée]sence moyen de transport"),
+    ("manipulation_objets", r"Manipulation d.objets"),
+    ("transport_manuel", r"Transport manuel"),
+    ("mouvement", r"Mouvement"),
+    ("presence", r"Pr[ée]sence"),
+    ("autre", r"Autre ou sans information"),
+]
+MODALITE_LABELS = [
+    ("contact_electrique", r"Contact courant [ée]lectrique"),
+    ("noyade_ensevelissement", r"Noyade, ensevelissement"),
+    ("ecrasement_mouvement", r"[ÉE]crasement mouvement"),
+    ("heurt_objet", r"Heurt par objet"),
+    ("contact_coupant", r"Contact agent mat[ée]riel coupant"),
+    ("coincement", r"Coincement, [ée]crasement"),
+    ("contrainte_corps", r"Contrainte du corps"),
+    ("morsure", r"Morsure, coup de pied"),
+    ("autre", r"Autre ou sans information"),
+]
+
+# Répartitions de la cellule droite : (clé, en-tête, en-têtes de fin, libellés).
+# Les lignes d'une section vont de la ligne d'en-tête (exclue) à la première ligne
+# contenant un en-tête de fin (en majuscules).
+RIGHT_SECTIONS = [
+    ("activite_physique", "ACTIVITE PHYSIQUE", ["REPARTITION", "MODALITE"], ACTIVITE_LABELS),
+    ("modalite_blessure", "MODALITE DE LA BLESSURE", ["REPARTITION", "(1)"], MODALITE_LABELS),
+]
+
+# Fin de ligne après le libellé : colonnes numériques seules (sexe, âge) ou précédées
+# d'un complément de libellé (siège, activité, modalité)
+_ROW_TAIL = re.compile(r"\s+([\d\s]+?)$")
+_ROW_TAIL_LOOSE = re.compile(r".*?\s+([\d\s]+?)$")
+_DIGITS = re.compile(r"\d+")
+
+
+def _label_scanner(groups: list[tuple]) -> tuple[re.Pattern, dict]:
+    """Compile une seule expression reconnaissant tous les libellés de `groups`.
 
-    for label in ("masculin", "féminin"):
-        pattern = re.compile(
-            r"\d\s+" + label + r"\s+([\d\s]+?)$", re.MULTILINE | re.IGNORECASE
-        )
-        m = pattern.search(cell_text)
-        if not m:
+    Args:
+        groups: [(répartition, préfixe, libellés, tail)] ; le préfixe précède le libellé
+                (numéro de ligne), tail est la fin de ligne attendue après le libellé
+
+    Returns:
+        (regex, {nom de groupe: (répartition, clé, tail)})
+    """
+    alternatives = []
+    dispatch = {}
+    for breakdown, prefix, labels, tail in groups:
+        named = []
+        for key, pattern in labels:
+            name = f"g{len(dispatch)}"
+            dispatch[name] = (breakdown, key, tail)
+            named.append(f"(?P<{name}>{pattern})")
+        alternatives.append(prefix + "(?:" + "|".join(named) + ")")
+    return re.compile("|".join(alternatives)), dispatch
+
+
+# Cellule gauche (pages 2 et 3) : sexe (casse ignorée, comme les fiches MP), âge, siège
+_LEFT_SCANNER = _label_scanner([
+    ("sex", r"\d\s+", [(k, f"(?i:{p})") for k, p in SEX_LABELS], _ROW_TAIL),
+    ("age", r"\d\s*", AGE_LABELS, _ROW_TAIL),
+    ("siege_lesions", r"\d\s*", SIEGE_LABELS, _ROW_TAIL_LOOSE),
+])
+_RIGHT_SCANNERS = {
+    name: _label_scanner([(name, r"\d\s*", labels, _ROW_TAIL_LOOSE)])
+    for name, _, _, labels in RIGHT_SECTIONS
+}
+
+
+def _scan_line(line: str, scanner: tuple, seen: dict) -> None:
+    """Affecte à leur répartition les lignes de tableau reconnues dans `line`.
+
+    Seule la première ligne valide d'un libellé compte (comme re.search sur la
+    cellule) ; `seen` = {(répartition, clé): [valeurs]}.
+    """
+    regex, dispatch = scanner
+    for m in regex.finditer(line):
+        breakdown, key, tail = dispatch[m.lastgroup]
+        if (breakdown, key) in seen:
             continue
-        nums_text = m.group(1).strip()
-        digit_groups = re.findall(r"\d+", nums_text)
-        values = parse_table_row_numbers(digit_groups, ROW_MAX_VALUES)
-        if values:
-            key = "masculin" if label == "masculin" else "feminin"
-            result[key] = values[0]
+        t = tail.match(line, m.end())
+        if t:
+            seen[(breakdown, key)] = parse_table_row_numbers(_DIGITS.findall(t.group(1)), ROW_MAX_VALUES)
+
+
+def parse_breakdowns(cell_text: str | None, right_cell: str | None = None) -> dict[str, dict]:
+    """Lit toutes les répartitions des cellules de détail en un seul passage par ligne.
 
+    Chaque cellule est découpée en lignes une fois ; une expression précompilée par
+    cellule (ou section) reconnaît tous les libellés et chaque ligne est affectée à sa
+    répartition.
+
+    Args:
+        cell_text: cellule gauche (page 2 AT ou page 3 MP) : sexe, âge, siège des lésions
+        right_cell: cellule droite de la page 2 : activité physique, modalité de la blessure
+
+    Returns:
+        {"sex", "age", "siege_lesions", "activite_physique", "modalite_blessure"} ; une
+        répartition dont la cellule est absente est vide. Dans une cellule lue, une
+        tranche d'âge, un siège, une activité ou une modalité absents valent 0 ; un sexe
+        absent est omis.
+    """
+    seen = {}
+    if cell_text:
+        for line in cell_text.split("\n"):
+            _scan_line(line, _LEFT_SCANNER, seen)
+
+    if right_cell:
+        state = {name: None for name, _, _, _ in RIGHT_SECTIONS}  # None, "in" ou "done"
+        for line in right_cell.split("\n"):
+            upper = line.upper()
+            for name, header, stops, _ in RIGHT_SECTIONS:
+                if state[name] == "done":
+                    continue
+                if header in upper:
+                    state[name] = "in"
+                elif state[name] == "in":
+                    if any(h in upper for h in stops):
+                        state[name] = "done"
+                    else:
+                        _scan_line(line, _RIGHT_SCANNERS[name], seen)
+
+    def first_values(breakdown, labels, default):
+        result = {}
+        for key, _ in labels:
+            values = seen.get((breakdown, key))
+            if values:
+                result[key] = values[0]
+            elif default is not None:
+                result[key] = default
+        return result
+
+    result = {"sex": {}, "age": {}, "siege_lesions": {}, "activite_physique": {}, "modalite_blessure": {}}
+    if cell_text:
+        result["sex"] = first_values("sex", SEX_LABELS, None)
+        result["age"] = first_values("age", AGE_LABELS, 0)
+        result["siege_lesions"] = first_values("siege_lesions", SIEGE_LABELS, 0)
+    if right_cell:
+        for name, _, _, labels in RIGHT_SECTIONS:
+            result[name] = first_values(name, labels, 0)
     return result
 
 
+def parse_sex(cell_text: str) -> dict[str, int]:
+    """Extrait les comptes par sexe depuis le texte d'une cellule de tableau (page 2 AT ou page 3 MP)."""
+    return parse_breakdowns(cell_text)["sex"]
+
+
 def parse_age(cell_text: str) -> dict[str, int]:
     """Extrait les comptes AT par tranche d'âge depuis le texte d'une cellule de tableau (page 2).
 
     Utilise les 9 tranches d'âge originales du PDF.
     """
-    age_patterns = [
-        ("<20", r"Moins de 20 ans"),
-        ("20-24", r"de 20 [àa] 24 ans"),
-        ("25-29", r"de 25 [àa] 29 ans"),
-        ("30-34", r"de 30 [àa] 34 ans"),
-        ("35-39", r"de 35 [àa] 39 ans"),
-        ("40-49", r"de 40 [àa] 49 ans"),
-        ("50-59", r"de 50 [àa] 59 ans"),
-        ("60-64", r"de 60 [àa] 64 ans"),
-        ("65+", r"65 ans et plus"),
-    ]
-
-    result = {}
-    for group_name, pattern in age_patterns:
-        m = re.search(
-            r"\d+\s*" + pattern + r"\s+([\d\s]+?)$",
-            cell_text,
-            re.MULTILINE,
-        )
-        if m:
-            nums_text = m.group(1).strip()
-            digit_groups = re.findall(r"\d+", nums_text)
-            values = parse_table_row_numbers(digit_groups, ROW_MAX_VALUES)
-            result[group_name] = values[0] if values else 0
-        else:
-            result[group_name] = 0
-
-    return result
+    return parse_breakdowns(cell_text)["age"]
 
 
 def parse_siege_lesions(cell_text: str) -> dict[str, int]:
     """Extrait les comptes AT par siège des lésions depuis le texte d'une cellule de tableau (page 2)."""
-    siege_patterns = [
-        ("non_determine", r"Localisation de la blessure non d[ée]termin[ée]e"),
-        ("tete", r"T[êe]te, sans autre sp[ée]cification"),
-        ("cou", r"Cou, dont colonne vert[ée]brale"),
-        ("dos", r"Dos, dont colonne vert[ée]brale"),
-        ("torse", r"Torse et organes"),
-        ("membres_superieurs", r"Membres sup[ée]rieurs"),
-        ("membres_inferieurs", r"Membres inf[ée]rieurs"),
-        ("corps_entier", r"Ensemble du corps"),
-        ("autres", r"Autres parties du corps"),
-    ]
+    return parse_breakdowns(cell_text)["siege_lesions"]
 
-    result = {}
-    for group_name, pattern in siege_patterns:
-        m = re.search(
-            r"\d+\s*" + pattern + r".*?\s+([\d\s]+?)$",
-            cell_text,
-            re.MULTILINE,
-        )
-        if m:
-            nums_text = m.group(1).strip()
-            digit_groups = re.findall(r"\d+", nums_text)
-            values = parse_table_row_numbers(digit_groups, ROW_MAX_VALUES)
-            result[group_name] = values[0] if values else 0
-        else:
-            result[group_name] = 0
 
-    return result
+def parse_activite_physique(cell_text: str) -> dict[str, int]:
+    """Extrait les comptes AT par activité physique spécifique depuis une cellule (page 2, cell [1][6])."""
+    return parse_breakdowns(None, cell_text)["activite_physique"]
 
 
-def _extract_section(cell_text: str, header: str, stop_headers: list[str]) -> str:
-    """Extrait le texte entre un header de section et le prochain header (ou la fin)."""
-    lines = cell_text.split("\n")
-    in_section = False
-    section_lines = []
-    for line in lines:
-        if header in line.upper():
-            in_section = True
-            continue
-        if in_section:
-            if any(h in line.upper() for h in stop_headers):
-                break
-            section_lines.append(line)
-    return "\n".join(section_lines)
+def parse_modalite_blessure(cell_text: str) -> dict[str, int]:
+    """Extrait les comptes AT par modalité de la blessure depuis une cellule (page 2, cell [1][6])."""
+    return parse_breakdowns(None, cell_text)["modalite_blessure"]
 
 
-def _parse_section_rows(section_text: str, patterns: list[tuple[str, str]]) -> dict[str, int]:
-    """Parse les lignes d'une section de répartition avec les patterns donnés."""
-    result = {}
-    for group_name, pattern in patterns:
-        m = re.search(
-            r"\d+\s*" + pattern + r".*?\s+([\d\s]+?)$",
-            section_text,
-            re.MULTILINE,
-        )
-        if m:
-            nums_text = m.group(1).strip()
-            digit_groups = re.findall(r"\d+", nums_text)
-            values = parse_table_row_numbers(digit_groups, ROW_MAX_VALUES)
-            result[group_name] = values[0] if values else 0
-        else:
-            result[group_name] = 0
-    return result
+# ═══════════════════════════════════════════
+# Gabarits de mise en page (mode "crop")
+# ═══════════════════════════════════════════
 
+# Le mode "full" convertit tous les objets des pages 1 à 3, lit tout le texte de la
+# page 1 et cherche tous les tableaux des pages 2 et 3. Le mode "crop" ne traite que
+# les zones lues : le bloc de synthèse, le bloc annuel et les trois cellules de
+# répartition. Leurs rectangles sont appris une fois par gabarit (numéro de page +
+# format) sur une fiche traitée en mode "full" ; ensuite la page est interprétée par
+# le device de pdf_backend.window, qui ne crée que les objets touchant ces rectangles
+# (pas d'analyse de mise en page du reste de la page), et les cellules sont lues sans
+# recherche de tableaux. Un gabarit n'est enregistré que s'il redonne exactement le
+# résultat du mode "full" sur la fiche qui l'a appris, et n'est réutilisé que si les
+# zones lues sont toujours à leur place : traits des cellules au même endroit, aucun
+# caractère à cheval sur le bord du bloc de synthèse (ligne plus longue qu'à
+# l'apprentissage). Les gabarits sont propres à un lot (dict `templates` créé par
+# l'appelant, voir iter_parsed_fiches) : rien n'est gardé d'un lancement à l'autre.
+LAYOUT_MODES = ("crop", "full")
+LAYOUT_TOLERANCE = 3  # tolérance d'alignement des traits (celle de pdfplumber)
 
-def parse_activite_physique(cell_text: str) -> dict[str, int]:
-    """Extrait les comptes AT par activité physique spécifique depuis une cellule (page 2, cell [1][6])."""
-    section = _extract_section(cell_text, "ACTIVITE PHYSIQUE", ["REPARTITION", "MODALITE"])
-    return _parse_section_rows(section, [
-        ("operation_machine", r"Op[ée]ration de machine"),
-        ("outils_main", r"Travail avec des outils [àa] main"),
-        ("conduite_transport", r"Conduite/pr[ée]sence moyen de transport"),
-        ("manipulation_objets", r"Manipulation d.objets"),
-        ("transport_manuel", r"Transport manuel"),
-        ("mouvement", r"Mouvement"),
-        ("presence", r"Pr[ée]sence"),
-        ("autre", r"Autre ou sans information"),
-    ])
+# Libellés de parse_synthesis (mêmes motifs : avec évolution, puis sans)
+SYNTHESIS_LABELS = ["Accidents du travail", "Accidents de trajet", "Maladies professionnelles"]
+SYNTHESIS_KEYS = ["at", "trajet", "mp"]
 
 
-def parse_modalite_blessure(cell_text: str) -> dict[str, int]:
-    """Extrait les comptes AT par modalité de la blessure depuis une cellule (page 2, cell [1][6])."""
-    section = _extract_section(cell_text, "MODALITE DE LA BLESSURE", ["REPARTITION", "(1)"])
-    return _parse_section_rows(section, [
-        ("contact_electrique", r"Contact courant [ée]lectrique"),
-        ("noyade_ensevelissement", r"Noyade, ensevelissement"),
-        ("ecrasement_mouvement", r"[ÉE]crasement mouvement"),
-        ("heurt_objet", r"Heurt par objet"),
-        ("contact_coupant", r"Contact agent mat[ée]riel coupant"),
-        ("coincement", r"Coincement, [ée]crasement"),
-        ("contrainte_corps", r"Contrainte du corps"),
-        ("morsure", r"Morsure, coup de pied"),
-        ("autre", r"Autre ou sans information"),
-    ])
-
-
-def parse_one_pdf(path: str | Path) -> dict | None:
-    """Parse une seule fiche PDF NAF.
+def _template_key(page) -> tuple:
+    return (page.page_number, round(page.width, 1), round(page.height, 1))
+
+
+def _yearly_bbox(width: float, height: float) -> tuple:
+    """Les 55 % gauches du haut de la page 1 : évite le chevauchement des graphiques."""
+    return (0, 0, width * 0.55, height * 0.35)
+
+
+def _union_bbox(boxes: list[tuple], margin: float = 0) -> tuple | None:
+    if not boxes:
+        return None
+    return (
+        min(b[0] for b in boxes) - margin,
+        min(b[1] for b in boxes) - margin,
+        max(b[2] for b in boxes) + margin,
+        max(b[3] for b in boxes) + margin,
+    )
+
+
+def _layout_objects(page, bboxes: list[tuple]) -> dict[str, list]:
+    """Objets de la page (dicts pdfplumber, par object_type) qui touchent l'un des
+    rectangles, à LAYOUT_TOLERANCE près.
+
+    Lus par pdf_backend.window sur le rectangle qui les englobe : si la page est déjà
+    entièrement convertie (page.objects en cache, par exemple la page 1 dans
+    fiche_pass.py, ou après une lecture en mode "full"), ses objets sont filtrés ;
+    sinon seuls les objets de l'interpréteur qui touchent ce rectangle sont créés, et
+    la page est lue en entier si les internes de pdfminer manquent.
+    """
+    margin = LAYOUT_TOLERANCE
+    boxes = [(b[0] - margin, b[1] - margin, b[2] + margin, b[3] + margin) for b in bboxes]
+
+    def touches(x0, top, x1, bottom):
+        return any(x0 <= b[2] and x1 >= b[0] and top <= b[3] and bottom >= b[1] for b in boxes)
+
+    # page pdf_backend minimale autour de la page pdfplumber
+    found = pdf_backend.window({"backend": "pdfplumber", "native": page}, _union_bbox(boxes))
+    objects: dict[str, list] = {}
+    for objs in found.values():
+        for o in objs:
+            if touches(o["x0"], o["top"], o["x1"], o["bottom"]):
+                objects.setdefault(o["object_type"], []).append(o)
+    return objects
+
+
+def _region_text(page, bbox: tuple, objects: dict, crop_fn=crop_to_bbox) -> str:
+    """page.crop(bbox).extract_text() (ou within_bbox avec crop_fn=within_bbox),
+    calculé sur `objects` (voir _layout_objects) au lieu de tous les objets de la page."""
+    region = page.crop(bbox) if crop_fn is crop_to_bbox else page.within_bbox(bbox)
+    # Cache d'objets de la page dérivée (attribut de pdfplumber) : pré-rempli pour ne
+    # pas déclencher la conversion de toute la page parente
+    region._objects = {kind: crop_fn(objs, bbox) for kind, objs in objects.items()}
+    return region.extract_text()
+
+
+def _synthesis_bbox(page) -> tuple | None:
+    """Rectangle couvrant les correspondances de parse_synthesis dans le texte de la page."""
+    boxes = []
+    for label in SYNTHESIS_LABELS:
+        found = page.search(label + r"\s+(.+?)\s+([+-]?\d+,\d+)\s*%") or page.search(label + r"\s+(\d[\d ]*)")
+        if found:
+            boxes.append((found[0]["x0"], found[0]["top"], found[0]["x1"], found[0]["bottom"]))
+    return _union_bbox(boxes, margin=2)
+
+
+def _inside_synthesis(objects: dict, bbox: tuple) -> bool:
+    """Vrai si aucun caractère proche du bloc de synthèse (à LAYOUT_TOLERANCE près) n'en
+    dépasse : sinon une ligne déborde du gabarit (nombre plus long, par exemple) et
+    within_bbox en perdrait la fin."""
+    x0, top, x1, bottom = bbox
+    tol = LAYOUT_TOLERANCE
+    for c in objects.get("char", []):
+        near = (c["x1"] >= x0 - tol and c["x0"] <= x1 + tol
+                and c["bottom"] >= top - tol and c["top"] <= bottom + tol)
+        if near and not (x0 <= c["x0"] and c["x1"] <= x1 and top <= c["top"] and c["bottom"] <= bottom):
+            return False
+    return True
+
+
+def _page1_texts(page, layout: str, templates: dict | None) -> tuple[dict, str]:
+    """(synthèse, texte du bloc annuel) de la page 1."""
+    key = _template_key(page)
+    yearly = _yearly_bbox(page.width, page.height)
+    template = templates.get(key) if layout == "crop" and templates is not None else None
+    if template is not None:
+        objects = _layout_objects(page, [template["synthesis"], yearly])
+        if _inside_synthesis(objects, template["synthesis"]):
+            synthesis = parse_synthesis(_region_text(page, template["synthesis"], objects, within_bbox))
+            if all(k in synthesis for k in SYNTHESIS_KEYS):
+                return synthesis, _region_text(page, yearly, objects)
+
+    synthesis = parse_synthesis(page.extract_text())
+    cropped_text = page.crop(yearly).extract_text()
+    if layout == "crop" and templates is not None:
+        bbox = _synthesis_bbox(page)
+        if bbox is not None:
+            objects = _layout_objects(page, [bbox, yearly])
+            if (_inside_synthesis(objects, bbox)
+                    and parse_synthesis(_region_text(page, bbox, objects, within_bbox)) == synthesis
+                    and _region_text(page, yearly, objects) == cropped_text):
+                templates[key] = {"synthesis": bbox}
+    return synthesis, cropped_text
+
+
+def _cell_text(objects: dict, bbox: tuple) -> str:
+    """Texte d'une cellule, identique à celui de page.extract_tables() pour ce rectangle."""
+    return chars_to_text([c for c in objects.get("char", []) if pdf_backend.char_in_bbox(c, bbox)])
+
+
+def _cell_ruled(objects: dict, bbox: tuple) -> bool:
+    """Vrai si les quatre bords de la cellule sont tracés et qu'aucun trait ne la coupe."""
+    tol = LAYOUT_TOLERANCE
+    x0, top, x1, bottom = bbox
+    edges = [e for kind in ("line", "rect", "curve") for o in objects.get(kind, []) for e in obj_to_edges(o)]
+    h_edges = [e for e in edges if e["orientation"] == "h"]
+    v_edges = [e for e in edges if e["orientation"] == "v"]
+
+    def spans_x(e):
+        return e["x0"] <= x0 + tol and e["x1"] >= x1 - tol
+
+    def spans_y(e):
+        return e["top"] <= top + tol and e["bottom"] >= bottom - tol
+
+    for y in (top, bottom):
+        if not any(abs(e["top"] - y) <= tol and spans_x(e) for e in h_edges):
+            return False
+    for x in (x0, x1):
+        if not any(abs(e["x0"] - x) <= tol and spans_y(e) for e in v_edges):
+            return False
+    if any(top + tol < e["top"] < bottom - tol and spans_x(e) for e in h_edges):
+        return False
+    if any(x0 + tol < e["x0"] < x1 - tol and spans_y(e) for e in v_edges):
+        return False
+    return True
+
+
+def _page_cells(page, table_index: int, columns: list[int], layout: str, templates: dict | None) -> list:
+    """Textes des cellules [table_index][1][col] (None si absente).
+
+    Mode "full" : page.find_tables() puis Table.extract(), comme page.extract_tables().
+    Mode "crop" : rectangles du gabarit si chaque cellule est encore tracée au même
+    endroit ; sinon mode "full" et apprentissage du gabarit.
+    """
+    key = _template_key(page)
+    template = templates.get(key) if layout == "crop" and templates is not None else None
+    if template is not None:
+        objects = _layout_objects(page, template["cells"])
+        if all(_cell_ruled(objects, b) for b in template["cells"]):
+            return [_cell_text(objects, b) for b in template["cells"]]
+
+    tables = page.find_tables()
+    texts = [None] * len(columns)
+    bboxes = [None] * len(columns)
+    if len(tables) > table_index and len(tables[table_index].rows) >= 2:
+        table = tables[table_index]
+        row = table.extract()[1]
+        for k, col in enumerate(columns):
+            if len(row) > col:
+                texts[k] = row[col]
+                bboxes[k] = table.rows[1].cells[col]
+
+    if layout == "crop" and templates is not None and all(b is not None for b in bboxes):
+        objects = _layout_objects(page, bboxes)
+        if all(_cell_ruled(objects, b) and _cell_text(objects, b) == t for b, t in zip(bboxes, texts)):
+            templates[key] = {"cells": bboxes}
+    return texts
+
+
+def parse_one_pdf(path: str | Path, layout: str = "crop", backend: str = "pdfplumber",
+                  templates: dict | None = None) -> dict | None:
+    """Parse une seule fiche PDF NAF (None si le fichier est illisible ou mal formé).
+
+    Voir parse_open_pdf pour le format du résultat, `layout` et `templates`,
+    pdf_backend pour `backend`.
+
+    Raises:
+        ValueError pour un backend inconnu.
+    """
+    pdf_backend.check_backend(backend)
+    try:
+        doc = pdf_backend.open_pdf(path, backend)
+    except Exception as e:
+        print(f"  ERREUR ouverture {path}: {e}")
+        return None
+
+    try:
+        return parse_document(doc, layout, templates)
+    except Exception as e:
+        print(f"  ERREUR parsing {path}: {e}")
+        return None
+    finally:
+        pdf_backend.close_pdf(doc)
+
+
+def _document_cells(page: dict, table_index: int, columns: list[int]) -> list:
+    """Textes des cellules [table_index][1][col] d'une page pdf_backend (None si absente)."""
+    tables = pdf_backend.find_tables(page)
+    texts = [None] * len(columns)
+    if len(tables) > table_index and len(tables[table_index]) >= 2:
+        row = tables[table_index][1]
+        for k, col in enumerate(columns):
+            if len(row) > col:
+                texts[k] = pdf_backend.cell_text(page, row[col])
+    return texts
+
+
+def parse_document(doc: dict, layout: str = "crop", templates: dict | None = None) -> dict:
+    """Parse une fiche ouverte avec pdf_backend.open_pdf (même résultat que parse_open_pdf).
+
+    Avec pdfplumber, délègue à parse_open_pdf (gabarits du mode `layout`). Avec un
+    autre backend, les pages sont analysées en entier (`layout` et `templates` ne
+    s'appliquent pas) :
+    texte de la page 1 et de son bloc annuel, cellules des tableaux des pages 2 et 3.
+    """
+    if layout not in LAYOUT_MODES:
+        raise ValueError(f"Mode de mise en page inconnu : {layout}")
+    if doc["backend"] == "pdfplumber":
+        return parse_open_pdf(doc["native"], layout, templates)
+
+    pages = pdf_backend.pages(doc)
+    page1 = pages[0]
+    synthesis = parse_synthesis(pdf_backend.page_text(page1))
+    cropped_text = pdf_backend.page_text(page1, _yearly_bbox(page1["width"], page1["height"]))
+    cell_text, right_cell = _document_cells(pages[1], 2, [0, 6])
+    (mp_cell_text,) = _document_cells(pages[2], 1, [0]) if len(pages) >= 3 else (None,)
+    return _fiche_result(synthesis, cropped_text, cell_text, right_cell, mp_cell_text)
+
+
+def parse_open_pdf(pdf, layout: str = "crop", templates: dict | None = None) -> dict:
+    """Parse une fiche NAF déjà ouverte (pdfplumber.PDF).
+
+    Les pages restent en cache sur `pdf` : un appelant qui lit aussi la page 1 (voir
+    fiche_pass.py) réutilise la même analyse de mise en page.
+
+    Args:
+        pdf: fiche ouverte avec pdfplumber
+        layout: "crop" (défaut) n'analyse que les zones lues, d'après les gabarits
+                appris ; "full" analyse les pages entières (référence). Les deux modes
+                rendent le même résultat.
+        templates: gabarits du mode "crop" partagés par les fiches d'un lot
+                   ({(page, largeur, hauteur): gabarit}, complété ici) ; None = aucun
+                   gabarit, les pages sont analysées en entier.
 
     Retourne:
         {
@@ -383,91 +811,142 @@ def parse_one_pdf(path: str | Path) -> dict | None:
             "at_yearly": {"2019": {count, ip, deces, journees}, ...},
             "trajet_yearly": {"2019": {count, ip, deces, journees}, ...},
             "mp_yearly": {"2019": {count, ip, deces, journees}, ...},
+            "yearly_confidence": {"at": {"count": 0-1, ...}, "trajet": {...}, "mp": {...}},
             "sex": {"masculin": int, "feminin": int},
             "age": {"<20": int, "20-24": int, ...},
             "mp_sex": {"masculin": int, "feminin": int},
             "mp_age": {"<20": int, "20-24": int, ...}
         }
     """
-    try:
-        pdf = pdfplumber.open(path)
-    except Exception as e:
-        print(f"  ERREUR ouverture {path}: {e}")
-        return None
+    if layout not in LAYOUT_MODES:
+        raise ValueError(f"Mode de mise en page inconnu : {layout}")
+    synthesis, cropped_text = _page1_texts(pdf.pages[0], layout, templates)
+
+    # Page 2 : détail AT, cellules [2][1][0] (sexe, âge, siège) et [2][1][6]
+    cell_text, right_cell = _page_cells(pdf.pages[1], 2, [0, 6], layout, templates)
+
+    # Page 3 : détail MP (sexe + âge) - même format, cellule [1][1][0]
+    mp_cell_text = None
+    if len(pdf.pages) >= 3:
+        (mp_cell_text,) = _page_cells(pdf.pages[2], 1, [0], layout, templates)
+
+    return _fiche_result(synthesis, cropped_text, cell_text, right_cell, mp_cell_text)
+
+
+def _fiche_result(synthesis: dict, cropped_text: str, cell_text: str | None,
+                  right_cell: str | None, mp_cell_text: str | None) -> dict:
+    """Résultat d'une fiche à partir des textes lus (format de parse_open_pdf)."""
+    at_yearly, at_confidence = _parse_yearly_section(cropped_text, "at")
+    trajet_yearly, trajet_confidence = _parse_yearly_section(cropped_text, "trajet")
+    mp_yearly, mp_confidence = _parse_yearly_section(cropped_text, "mp")
+    at_detail = parse_breakdowns(cell_text, right_cell)
+    mp_detail = parse_breakdowns(mp_cell_text)
+
+    return {
+        "synthesis": synthesis,
+        "at_yearly": at_yearly,
+        "trajet_yearly": trajet_yearly,
+        "mp_yearly": mp_yearly,
+        "yearly_confidence": {"at": at_confidence, "trajet": trajet_confidence, "mp": mp_confidence},
+        "sex": at_detail["sex"],
+        "age": at_detail["age"],
+        "siege_lesions": at_detail["siege_lesions"],
+        "activite_physique": at_detail["activite_physique"],
+        "modalite_blessure": at_detail["modalite_blessure"],
+        "mp_sex": mp_detail["sex"],
+        "mp_age": mp_detail["age"],
+    }
 
-    try:
-        p1 = pdf.pages[0]
-        p1_text = p1.extract_text()
-        synthesis = parse_synthesis(p1_text)
-
-        # Recadrer les 55% gauches de la page 1 pour éviter le chevauchement des graphiques
-        cropped = p1.crop((0, 0, p1.width * 0.55, p1.height * 0.35))
-        cropped_text = cropped.extract_text()
-
-        at_yearly = _parse_yearly_section(cropped_text, "at")
-        trajet_yearly = _parse_yearly_section(cropped_text, "trajet")
-        mp_yearly = _parse_yearly_section(cropped_text, "mp")
-
-        # Page 2 : détail AT (sexe + âge)
-        p2 = pdf.pages[1]
-        tables = p2.extract_tables()
-        sex = {}
-        age = {}
-
-        siege = {}
-
-        if len(tables) >= 3 and len(tables[2]) >= 2 and tables[2][1][0]:
-            cell_text = tables[2][1][0]
-            sex = parse_sex(cell_text)
-            age = parse_age(cell_text)
-            siege = parse_siege_lesions(cell_text)
-
-        # Page 2 right side: activité physique + modalité blessure (cell [1][6])
-        activite = {}
-        modalite = {}
-        if len(tables) >= 3 and len(tables[2]) >= 2 and len(tables[2][1]) >= 7 and tables[2][1][6]:
-            right_cell = tables[2][1][6]
-            activite = parse_activite_physique(right_cell)
-            modalite = parse_modalite_blessure(right_cell)
-
-        # Page 3 : détail MP (sexe + âge) - même format, index de tableau différent
-        mp_sex = {}
-        mp_age = {}
-        if len(pdf.pages) >= 3:
-            p3 = pdf.pages[2]
-            mp_tables = p3.extract_tables()
-            if len(mp_tables) >= 2 and len(mp_tables[1]) >= 2 and mp_tables[1][1][0]:
-                mp_cell_text = mp_tables[1][1][0]
-                mp_sex = parse_sex(mp_cell_text)
-                mp_age = parse_age(mp_cell_text)
-
-        return {
-            "synthesis": synthesis,
-            "at_yearly": at_yearly,
-            "trajet_yearly": trajet_yearly,
-            "mp_yearly": mp_yearly,
-            "sex": sex,
-            "age": age,
-            "siege_lesions": siege,
-            "activite_physique": activite,
-            "modalite_blessure": modalite,
-            "mp_sex": mp_sex,
-            "mp_age": mp_age,
-        }
-    except Exception as e:
-        print(f"  ERREUR parsing {path}: {e}")
-        return None
-    finally:
-        pdf.close()
 
+def backend_versions(versions: dict, backend: str) -> dict:
+    """Versions de la clé du cache : le backend y entre s'il n'est pas pdfplumber."""
+    return versions if backend == "pdfplumber" else {**versions, "backend": backend}
 
-def parse_all_pdfs(pdf_dir: Path) -> dict[str, dict]:
-    """Parse tous les PDFs NAF depuis un dossier local.
 
-    Args:
-        pdf_dir: chemin vers le dossier contenant les fichiers NAF_*.pdf
+def _cache_stamp(versions: dict | None = None) -> str:
+    return json.dumps(SECTION_VERSIONS if versions is None else versions, sort_keys=True)
+
 
-    Retourne {naf5: parsed_data} pour tous les PDFs traités avec succès.
+def open_fiche_cache(cache_path: Path) -> sqlite3.Connection:
+    """Ouvre (ou crée) le cache SQLite des fiches parsées."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(cache_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS fiches ("
+        " sha256 TEXT PRIMARY KEY, stamp TEXT NOT NULL, result TEXT NOT NULL)"
+    )
+    return conn
+
+
+def load_cached_fiches(
+    conn: sqlite3.Connection, hashes: list[str], versions: dict | None = None
+) -> dict[str, dict]:
+    """Résultats en cache pour ces empreintes, parsés avec les versions de section actuelles."""
+    stamp = _cache_stamp(versions)
+    found = {}
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        rows = conn.execute(
+            f"SELECT sha256, result FROM fiches WHERE stamp = ? AND sha256 IN ({','.join('?' * len(chunk))})",
+            [stamp, *chunk],
+        )
+        found.update((sha, json.loads(result)) for sha, result in rows)
+    return found
+
+
+def store_cached_fiches(
+    conn: sqlite3.Connection, parsed: dict[str, dict | None], versions: dict | None = None
+) -> None:
+    """Enregistre {sha256: résultat} ; les échecs (None) ne sont pas mis en cache."""
+    stamp = _cache_stamp(versions)
+    conn.executemany(
+        "INSERT OR REPLACE INTO fiches (sha256, stamp, result) VALUES (?, ?, ?)",
+        [(sha, stamp, json.dumps(result, ensure_ascii=False))
+         for sha, result in parsed.items() if result],
+    )
+    conn.commit()
+
+
+def _progress_step(total: int) -> int:
+    """Pas d'affichage de la progression : une vingtaine de lignes quel que soit le volume."""
+    return max(1, total // 20)
+
+
+def _cached_hashes(
+    conn: sqlite3.Connection, hashes: list[str], versions: dict | None = None
+) -> set[str]:
+    """Empreintes présentes dans le cache pour les versions actuelles (résultats non lus)."""
+    stamp = _cache_stamp(versions)
+    found = set()
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        rows = conn.execute(
+            f"SELECT sha256 FROM fiches WHERE stamp = ? AND sha256 IN ({','.join('?' * len(chunk))})",
+            [stamp, *chunk],
+        )
+        found.update(sha for (sha,) in rows)
+    return found
+
+
+def iter_parsed_fiches(
+    pdf_dir: Path,
+    workers: int = 1,
+    cache_path: Path | None = FICHE_CACHE_PATH,
+    parse=None,
+    versions: dict | None = None,
+    timeout: float | None = None,
+    max_docs_per_worker: int | None = None,
+):
+    """Parse les fiches NAF_*.pdf de pdf_dir et les rend une à une, dans l'ordre des noms.
+
+    Mêmes arguments, même cache et mêmes messages que parse_all_pdfs, mais aucune fiche
+    n'est conservée : un résultat en cache est relu au moment d'être rendu, un résultat
+    parsé est écrit dans le cache par lots de CACHE_BATCH fiches. La mémoire ne dépend
+    donc pas du nombre de fiches (avec workers > 1, les résultats terminés en avance
+    attendent leur tour dans le pool).
+
+    Yields:
+        (naf5, parsed) pour chaque fiche parsée avec succès.
     """
     pdf_files = sorted(pdf_dir.glob("NAF_*.pdf"))
     total = len(pdf_files)
@@ -475,26 +954,115 @@ def parse_all_pdfs(pdf_dir: Path) -> dict[str, dict]:
 
     if total == 0:
         print("  Aucun fichier NAF_*.pdf trouvé. Vérifiez le chemin et le contenu du dossier.")
-        return {}
-
-    results = {}
+        return
+
+    # Gabarits du mode "crop" propres à ce lot (copiés une fois dans chaque processus)
+    parse = partial(parse_one_pdf, templates={}) if parse is None else parse
+    conn = None
+    hashes = []
+    cached = set()
+    if cache_path is not None:
+        hashes = [file_sha256(p) for p in pdf_files]
+        conn = open_fiche_cache(cache_path)
+        cached = _cached_hashes(conn, hashes, versions)
+    to_parse = [i for i in range(total) if not hashes or hashes[i] not in cached]
+
+    step = _progress_step(len(to_parse))
+    paths = [pdf_files[i] for i in to_parse]
+    if (workers > 1 and len(to_parse) > 1) or (to_parse and (timeout or max_docs_per_worker)):
+        parsed_all = worker_pool.imap_bounded(parse, paths, workers, timeout, max_docs_per_worker)
+    else:
+        parsed_all = (("ok", parsed) for parsed in map(parse, paths))
+
+    pending = {}   # résultats parsés pas encore écrits dans le cache
+    succeeded = 0
     failures = []
+    timed_out = []
+    try:
+        n = failed = 0
+        for i, pdf_path in enumerate(pdf_files):
+            naf5 = pdf_path.stem.replace("NAF_", "")
+            if hashes and hashes[i] in cached:
+                parsed = load_cached_fiches(conn, [hashes[i]], versions)[hashes[i]]
+            else:
+                status, parsed = next(parsed_all)
+                n += 1
+                if status == "timeout":
+                    timed_out.append(naf5)
+                elif status == "crash":
+                    print(f"  ERREUR processus interrompu pendant {pdf_path}")
+                failed += status != "timeout" and not parsed
+                if n % step == 0 or n == len(to_parse):
+                    late = f", {len(timed_out)} hors délai" if timed_out else ""
+                    print(f"  [{n}/{len(to_parse)}] fiches traitées ({failed} échec(s){late})")
+                if status == "timeout":
+                    continue
+                if conn is not None and status != "crash":  # processus mort : ré-essayée ensuite
+                    pending[hashes[i]] = parsed
+                    if len(pending) >= CACHE_BATCH:
+                        store_cached_fiches(conn, pending, versions)
+                        pending = {}
+            if parsed:
+                succeeded += 1
+                yield naf5, parsed
+            else:
+                failures.append(naf5)
+    finally:
+        parsed_all.close()
+        if conn is not None:
+            if pending:
+                store_cached_fiches(conn, pending, versions)
+            conn.close()
 
-    for i, pdf_path in enumerate(pdf_files, 1):
-        naf5 = pdf_path.stem.replace("NAF_", "")
-        print(f"  [{i}/{total}] Traitement de {pdf_path.name}...")
-
-        parsed = parse_one_pdf(pdf_path)
-        if parsed:
-            results[naf5] = parsed
-        else:
-            failures.append(naf5)
-
-    print(f"\nRésumé : {len(results)} PDF(s) traité(s) avec succès, {len(failures)} échec(s)")
+    print(f"\nRésumé : {succeeded} PDF(s) traité(s) avec succès, {len(failures)} échec(s)")
     if failures:
         print(f"  Echecs : {failures[:20]}{'...' if len(failures) > 20 else ''}")
+    if timed_out:
+        print(f"  Hors délai ({timeout:g} s, non mises en cache) : {len(timed_out)} fiche(s) "
+              f"{timed_out[:20]}{'...' if len(timed_out) > 20 else ''}")
+    if cache_path is not None:
+        hits = total - len(to_parse)
+        print(f"  Cache fiches : {hits}/{total} réutilisée(s) ({hits / total:.0%}), "
+              f"{len(to_parse)} PDF(s) ouvert(s)")
+
+
+def parse_all_pdfs(
+    pdf_dir: Path,
+    workers: int = 1,
+    cache_path: Path | None = FICHE_CACHE_PATH,
+    parse=None,
+    versions: dict | None = None,
+    timeout: float | None = None,
+    max_docs_per_worker: int | None = None,
+) -> dict[str, dict]:
+    """Parse tous les PDFs NAF depuis un dossier local.
 
-    return results
+    Args:
+        pdf_dir: chemin vers le dossier contenant les fichiers NAF_*.pdf
+        workers: nombre de processus de parsing (1 = séquentiel). Les fiches sont
+                 traitées dans l'ordre des noms de fichiers quel que soit ce nombre :
+                 résultats et liste des échecs sont identiques au mode séquentiel.
+        cache_path: cache SQLite des résultats par fiche (None = pas de cache). Seules
+                    les fiches absentes du cache pour les SECTION_VERSIONS actuelles
+                    sont ouvertes.
+        parse: fonction appelée sur chaque chemin de fiche (défaut : parse_one_pdf,
+               avec des gabarits "crop" propres au lot), de niveau module pour être
+               envoyée aux processus ; None ou {} = échec
+        versions: versions entrant dans la clé de cache (défaut : SECTION_VERSIONS).
+                  Un autre `parse` doit fournir ses propres versions et son cache.
+        timeout: budget en secondes par fiche (None = illimité). Une fiche hors délai
+                 est abandonnée (son processus est tué), listée à part des échecs et
+                 ré-essayée au lancement suivant.
+        max_docs_per_worker: fiches traitées par processus avant son remplacement
+                             (None = illimité), pour borner la mémoire des longs lots.
+                             Avec timeout ou cette option, le parsing se fait hors du
+                             processus courant même avec workers = 1.
+
+    Retourne {naf5: parsed_data} pour tous les PDFs traités avec succès. Pour traiter
+    les fiches sans les garder toutes en mémoire, voir iter_parsed_fiches.
+    """
+    return dict(iter_parsed_fiches(pdf_dir, workers, cache_path, parse, versions,
+                                   timeout=timeout, max_docs_per_worker=max_docs_per_worker))
 
 
 def main() -> None:
@@ -506,6 +1074,41 @@ def main() -> None:
         required=True,
         help="Chemin vers le dossier contenant les fichiers NAF_*.pdf",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Nombre de processus de parsing (défaut : 1, séquentiel)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=FICHE_TIMEOUT,
+        help=f"Délai par fiche en secondes, 0 = illimité (défaut : {FICHE_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--max-docs-per-worker",
+        type=int,
+        default=MAX_DOCS_PER_WORKER,
+        help=f"Fiches par processus avant son remplacement, 0 = illimité (défaut : {MAX_DOCS_PER_WORKER})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Ignore le cache des fiches ({FICHE_CACHE_PATH.name}) et re-parse tous les PDF",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUT_MODES,
+        default="crop",
+        help="crop : zones apprises par gabarit (défaut) ; full : pages entières (référence)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=pdf_backend.PDF_BACKENDS,
+        default="pdfplumber",
+        help="Moteur d'extraction PDF (défaut : pdfplumber ; pdfium : plus rapide, voir pdf_backend.py)",
+    )
     args = parser.parse_args()
 
     pdf_dir = Path(args.pdf_dir)
@@ -525,9 +1128,14 @@ def main() -> None:
             file=sys.stderr,
         )
 
-    import json
-
-    results = parse_all_pdfs(pdf_dir)
+    cache_path = None if args.no_cache else FICHE_CACHE_PATH
+    # Même résultat dans les deux modes : le cache des fiches est partagé ; il ne l'est
+    # pas entre backends (équivalence vérifiée sur les fiches de test seulement)
+    parse = partial(parse_one_pdf, layout=args.layout, backend=args.backend, templates={})
+    versions = backend_versions(SECTION_VERSIONS, args.backend)
+    results = parse_all_pdfs(pdf_dir, workers=args.workers, cache_path=cache_path, parse=parse,
+                             versions=versions, timeout=args.timeout or None,
+                             max_docs_per_worker=args.max_docs_per_worker or None)
     if results:
         sample_key = next(iter(results))
         print(f"\nExemple (NAF {sample_key}) :")
@@ -1,30 +1,59 @@
 #!/usr/bin/env python3
-"""Extrait les données AT (Tableau 9) et Trajet (Tableau 17) du rapport annuel PDF.
+"""Extrait les tableaux par caisse régionale du rapport annuel PDF (REGIONAL_TABLES).
+
+Tableaux enregistrés : AT (Tableau 9) et Trajet (Tableau 17), les deux seuls lus
+jusqu'ici : le registre ne change pas la sortie, il prépare l'ajout d'autres tableaux
+une fois leur libellé et leurs en-têtes relevés dans un rapport réel.
 
 Input:  rapport annuel Assurance Maladie - Risques professionnels (PDF fourni via --pdf)
-Output: data/regional-data.json avec données par caisse régionale pour les années 2020-2024.
+Output: data/regional-data.json avec données par caisse régionale pour les années 2020-2024
+        (ou les années de toutes les éditions fournies).
 
 Usage:
     python parse_regional.py --pdf /chemin/vers/rapport-annuel.pdf
     python parse_regional.py --pdf /chemin/vers/rapport-annuel.pdf --out /chemin/vers/sortie.json
     python parse_regional.py --pdf /chemin/vers/rapport-annuel.pdf --dry-run
+    python parse_regional.py --pdf rapport-2023.pdf rapport-2024.pdf --workers 2
+
+Les pages des tableaux sont localisées par les signets et le texte brut des flux de
+contenu, confirmées par l'analyse de mise en page de ces seules pages, sinon par un
+parcours complet du rapport (locate_labels). Elles sont mémorisées par SHA-256 du PDF
+dans PAGE_CACHE_PATH : les lancements suivants (y compris --dry-run) vont directement
+aux pages des tableaux. --no-cache relance la recherche. Les tableaux d'une édition
+sont extraits l'un après l'autre : avec deux tableaux enregistrés, les répartir sur
+plusieurs processus ne se justifie pas encore.
+
+Plusieurs --pdf (une édition par rapport) : chaque édition est parsée avec ses propres
+années, lues sur les pages des tableaux, puis les éditions sont assemblées en une série
+longue par caisse (merge_editions) ; les chiffres révisés des éditions récentes
+l'emportent et chaque valeur garde son édition d'origine. Avec --workers N, les
+éditions sont parsées en parallèle (worker_pool.py).
 """
 
 import argparse
 import json
+import os
 import re
 import sys
+import tempfile
 import unicodedata
 from collections import defaultdict
 from datetime import date
 from pathlib import Path
 
-import pdfplumber
+import numpy as np
+
+import pdf_backend
+import worker_pool
+from manifest import file_sha256
 
 
 # Années couvertes par le rapport annuel
 YEARS = ["2020", "2021", "2022", "2023", "2024"]
 
+# Cache des pages de tableaux : {sha256 du rapport: {label: index de page}}
+PAGE_CACHE_PATH = Path(__file__).parent / ".cache" / "regional_pages.json"
+
 # Correspondance département -> (identifiant stable, nom canonique, type)
 # Format des noms dans le PDF: "NN – NomAbrégé" (numéro de département + tiret + nom court)
 # Les numéros DOM-TOM (971-976 pour AT, 71-76 pour Trajet) correspondent aux CGSS/CSS.
@@ -92,12 +121,166 @@ EXCLUDE_NAMES = {"total", "ensemble", "france", "france entiere", "france entiè
 # Pattern de numéro de département en début de ligne (2 ou 3 chiffres)
 _DEPT_RE = re.compile(r"^\d{2,3}$")
 
+# Tableaux par caisse extraits du rapport dans regional-data.json, dans l'ordre de sortie :
+#   label    : libellé cherché dans le rapport (locate_labels)
+#   key      : clé des valeurs par année dans chaque caisse de la sortie
+#   name     : nom affiché dans les messages et la validation
+#   headers  : en-têtes des colonnes de données, une paire Salariés / valeur par année
+#   salaries : les effectifs salariés de ce tableau alimentent la clé "salaries"
+#   nonzero  : validate_output refuse une valeur nulle (pas seulement absente)
+# Ajouter un tableau = ajouter une entrée, avec le libellé et les en-têtes relevés dans
+# le rapport ; il est localisé dans le même parcours et extrait avec les autres.
+REGIONAL_TABLES = [
+    {"label": "Tableau 9", "key": "at", "name": "AT", "headers": ("Salariés*", "AT**"),
+     "salaries": True, "nonzero": True},
+    {"label": "Tableau 17", "key": "trajet", "name": "Trajet", "headers": ("Salariés*", "Trajet**"),
+     "salaries": False, "nonzero": True},
+]
+
+# En-têtes de tous les tableaux enregistrés (défaut de read_table_by_coords)
+TABLE_HEADERS = tuple(dict.fromkeys(h for table in REGIONAL_TABLES for h in table["headers"]))
+
+
+def _load_page_cache(cache_path: Path) -> dict:
+    """Charge le cache des pages ; un fichier absent ou illisible donne un cache vide."""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _store_page_cache(cache_path: Path, found: dict[str, dict[str, int]]) -> None:
+    """Ajoute au cache les pages trouvées {sha256: {label: page}}.
+
+    Réservé au processus principal : les processus de build_regional_series rendent
+    leurs pages au lieu d'écrire (lecture-modification-écriture non verrouillée). Le
+    fichier temporaire est propre à chaque écriture, le remplacement reste atomique.
+    """
+    cache = _load_page_cache(cache_path)
+    for key, pages in found.items():
+        cache[key] = {**cache.get(key, {}), **pages}
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=cache_path.parent,
+                                     suffix=".tmp", delete=False) as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(f.name, cache_path)
+
+
+def _squeeze(text: str) -> str:
+    """Texte sans espaces (l'espacement du texte brut d'un flux de contenu n'est pas fiable)."""
+    return "".join(text.split())
+
+
+def _locate_fast(pdf: dict, labels: list[str], text_of) -> dict[str, int]:
+    """Pages des labels trouvées sans analyser la mise en page des autres pages.
+
+    Les candidates viennent des signets (titre contenant le label), puis du texte brut
+    des pages (pdf_backend.content_text) dans l'ordre ; chacune est confirmée par le
+    texte complet text_of(index). Une page dont le texte brut est illisible est
+    candidate pour tous les labels. Un label dont une candidate du texte brut n'est pas
+    confirmée est abandonné ici (le texte brut n'est pas fiable pour lui) et laissé au
+    parcours complet, comme un label introuvable.
+    """
+    found = {}
+    for title, i in pdf_backend.outline(pdf):
+        for label in labels:
+            if label not in found and label in title and label in text_of(i):
+                found[label] = i
+
+    remaining = [label for label in labels if label not in found]
+    keys = {label: _squeeze(label) for label in remaining}
+    for i, page in enumerate(pdf_backend.pages(pdf)):
+        if not remaining:
+            break
+        raw = pdf_backend.content_text(page)
+        raw = None if raw is None else _squeeze(raw)
+        for label in [label for label in remaining if raw is None or keys[label] in raw]:
+            if label in text_of(i):
+                found[label] = i
+                remaining.remove(label)
+            elif raw is not None:
+                remaining.remove(label)
+    return found
+
+
+def locate_labels(
+    pdf: dict, labels: list[str], pdf_path: Path | None = None, cache_path: Path | None = None,
+    new_pages: dict | None = None,
+) -> dict[str, int]:
+    """Trouve la page de chaque label en analysant la mise en page du moins de pages possible.
+
+    Les pages candidates sont prises dans les signets du document puis dans le texte
+    brut des flux de contenu (_locate_fast), et confirmées par leur texte complet. Les
+    labels restants sont cherchés par un parcours complet : le texte de chaque page
+    est extrait une fois et comparé à tous les labels encore cherchés, jusqu'au dernier
+    trouvé. Hors signets, la page retenue est la première qui contient le label ; un
+    signet désigne directement sa page.
+
+    Args:
+        pdf: document PDF ouvert avec pdf_backend.open_pdf
+        labels: textes à rechercher (ex. ["Tableau 9", "Tableau 17"])
+        pdf_path: chemin du PDF, pour la clé du cache (SHA-256 du contenu)
+        cache_path: cache JSON des pages trouvées (None = pas de cache). Les labels en
+                    cache pour ce PDF ne sont pas recherchés.
+        new_pages: si fourni, les pages nouvellement trouvées y sont ajoutées
+                   ({sha256: {label: page}}) au lieu d'être écrites dans cache_path ;
+                   l'appelant les écrit (processus de build_regional_series).
+
+    Returns:
+        {label: index de page (0-based)}, dans l'ordre de labels.
+
+    Raises:
+        ValueError si un label n'est trouvé dans aucune page.
+    """
+    key = file_sha256(pdf_path) if cache_path is not None and pdf_path is not None else None
+    cached = _load_page_cache(cache_path).get(key, {}) if key else {}
+    found = {label: cached[label] for label in labels if label in cached}
+
+    missing = [label for label in labels if label not in found]
+    if missing:
+        pages = pdf_backend.pages(pdf)
+        texts = {}  # index de page -> texte complet, extrait une fois
+
+        def text_of(i):
+            if i not in texts:
+                texts[i] = pdf_backend.page_text(pages[i]) or ""
+            return texts[i]
+
+        found.update(_locate_fast(pdf, missing, text_of))
+        missing = [label for label in labels if label not in found]
+        for i in range(len(pages)):
+            if not missing:
+                break
+            text = text_of(i)
+            for label in [label for label in missing if label in text]:
+                found[label] = i
+                missing.remove(label)
+        new = {label: i for label, i in found.items() if label not in cached}
+        if key and new:
+            if new_pages is not None:
+                new_pages.setdefault(key, {}).update(new)
+            else:
+                _store_page_cache(cache_path, {key: new})
+
+    for label in labels:
+        if label not in found:
+            raise ValueError(
+                f"Label '{label}' introuvable dans le PDF. "
+                "Vérifiez que le bon fichier a été fourni."
+            )
+        origin = " (cache)" if label in cached else ""
+        print(f"  {label} trouvé à la page {found[label] + 1} (index {found[label]}){origin}",
+              file=sys.stderr)
+    return {label: found[label] for label in labels}
+
 
-def find_tableau_page(pdf: pdfplumber.PDF, label: str) -> tuple[int, object]:
+def find_tableau_page(pdf: dict, label: str) -> tuple[int, dict]:
     """Trouve la première page contenant le label de tableau (ex. "Tableau 9").
 
     Args:
-        pdf: document PDF ouvert avec pdfplumber
+        pdf: document PDF ouvert avec pdf_backend.open_pdf
         label: texte à rechercher (ex. "Tableau 9", "Tableau 17")
 
     Returns:
@@ -106,15 +289,8 @@ def find_tableau_page(pdf: pdfplumber.PDF, label: str) -> tuple[int, object]:
     Raises:
         ValueError si le label n'est pas trouvé dans aucune page.
     """
-    for i, page in enumerate(pdf.pages):
-        text = page.extract_text() or ""
-        if label in text:
-            print(f"  {label} trouvé à la page {i + 1} (index {i})", file=sys.stderr)
-            return i, page
-    raise ValueError(
-        f"Label '{label}' introuvable dans le PDF. "
-        "Vérifiez que le bon fichier a été fourni."
-    )
+    i = locate_labels(pdf, [label])[label]
+    return i, pdf_backend.pages(pdf)[i]
 
 
 def merge_multiline_rows(raw_rows: list) -> list:
@@ -237,61 +413,107 @@ def _detect_salary_column(rows: list) -> int | None:
     return None
 
 
-def _words_by_row(page: object, y_tolerance: int = 8) -> dict[int, list]:
-    """Regroupe les mots pdfplumber par ligne (coordonnée y).
+def _word_arrays(page: object, y_tolerance: int = 8) -> dict:
+    """Mots de la page en tableaux, triés par ligne (coordonnée y regroupée) puis par x.
 
     Args:
-        page: objet page pdfplumber
+        page: page pdf_backend
         y_tolerance: fenêtre (en points) pour regrouper les mots sur la même ligne
 
     Returns:
-        Dict {y_bin: [mots triés par x]}
+        Dict {"text": [str], "x0", "x1", "cx", "y": tableaux numpy, "rows": [(y, début, fin)]},
+        une tranche [début, fin) par ligne, dans l'ordre des y croissants.
     """
-    words = page.extract_words(x_tolerance=3, y_tolerance=3)
-    rows = defaultdict(list)
-    for w in words:
-        y_bin = round(w["top"] / y_tolerance) * y_tolerance
-        rows[y_bin].append(w)
-    return {y: sorted(ws, key=lambda w: w["x0"]) for y, ws in rows.items()}
+    words = pdf_backend.words(page, x_tolerance=3, y_tolerance=3)
+    x0 = np.array([w["x0"] for w in words], dtype=float)
+    x1 = np.array([w["x1"] for w in words], dtype=float)
+    y = np.round(np.array([w["top"] for w in words], dtype=float) / y_tolerance) * y_tolerance
+    order = np.lexsort((x0, y))  # tri stable : à x égal, ordre de lecture conservé
+    x0, x1, y = x0[order], x1[order], y[order]
+    bounds = [0, *(np.flatnonzero(np.diff(y)) + 1).tolist(), len(order)]
+    return {
+        "text": [words[i]["text"] for i in order.tolist()],
+        "x0": x0,
+        "x1": x1,
+        "cx": (x0 + x1) / 2,
+        "y": y,
+        "rows": [(y[a], a, b) for a, b in zip(bounds, bounds[1:]) if a < b],
+    }
 
 
-def _detect_col_centers(rows_by_y: dict) -> list[float]:
+def _detect_col_centers(words: dict, headers: tuple[str, ...], min_cols: int = 8) -> list[float]:
     """Détecte les centres x des colonnes de données depuis la ligne d'en-tête.
 
-    Recherche les mots "Salariés*", "AT**" ou "Trajet**" dans les premières lignes.
+    Recherche les en-têtes de colonnes (ex. "Salariés*", "AT**") dans les lignes, de haut
+    en bas, jusqu'à en avoir trouvé au moins min_cols.
 
     Args:
-        rows_by_y: dict {y_bin: [mots]}
+        words: mots de la page (_word_arrays)
+        headers: textes exacts des en-têtes de colonnes de données
+        min_cols: nombre de centres à partir duquel la recherche s'arrête
 
     Returns:
-        Liste ordonnée des centres x des colonnes de données (10 colonnes pour 5 années).
+        Liste des centres x des colonnes de données, dans l'ordre de lecture.
     """
     col_centers = []
-    for y in sorted(rows_by_y.keys()):
-        words = rows_by_y[y]
-        texts = [w["text"] for w in words]
-        if any(t in ("Salariés*", "AT**", "Trajet**") for t in texts):
-            for w in words:
-                if w["text"] in ("Salariés*", "AT**", "Trajet**"):
-                    col_centers.append((w["x0"] + w["x1"]) / 2)
-            if len(col_centers) >= 8:
+    for _, start, stop in words["rows"]:
+        hits = [i for i in range(start, stop) if words["text"][i] in headers]
+        if hits:
+            col_centers.extend(words["cx"][hits].tolist())
+            if len(col_centers) >= min_cols:
                 break
     return col_centers
 
 
-def _nearest_col(cx: float, col_centers: list[float]) -> int:
-    """Trouve l'indice de la colonne la plus proche d'un centre x.
+def _assign_columns(cx: "np.ndarray", col_centers: list[float]) -> "np.ndarray":
+    """Indice de la colonne la plus proche de chaque centre x, par recherche dichotomique.
+
+    Les centres sont triés une fois ; chaque mot n'est comparé qu'à ses deux voisins.
+    À distance égale, la colonne de plus petit indice l'emporte.
 
     Args:
-        cx: centre x du mot à assigner
-        col_centers: liste des centres x de chaque colonne
+        cx: centres x des mots
+        col_centers: centres x des colonnes, dans l'ordre de _detect_col_centers
 
     Returns:
-        Indice de colonne (0-based).
+        Tableau d'indices de colonnes (0-based), de la taille de cx.
     """
-    if not col_centers:
-        return -1
-    return min(range(len(col_centers)), key=lambda i: abs(col_centers[i] - cx))
+    centers = np.asarray(col_centers, dtype=float)
+    order = np.argsort(centers, kind="stable")
+    ordered = centers[order]
+    pos = np.searchsorted(ordered, cx)
+    right = np.minimum(pos, len(ordered) - 1)
+    # Premier centre du groupe de valeurs égales, donc de plus petit indice
+    left = np.searchsorted(ordered, ordered[np.maximum(pos - 1, 0)])
+    d_left, d_right = np.abs(cx - ordered[left]), np.abs(ordered[right] - cx)
+    return np.where(
+        d_left < d_right, order[left],
+        np.where(d_right < d_left, order[right], np.minimum(order[left], order[right])),
+    )
+
+
+def _detect_years(words: dict, headers: tuple[str, ...]) -> list[str] | None:
+    """Années des colonnes, lues sur la ligne d'années au-dessus des en-têtes de colonnes.
+
+    Chaque édition du rapport couvre ses propres cinq années : la première ligne,
+    au-dessus de la première ligne d'en-têtes, qui porte au moins deux années
+    consécutives (20xx) les donne, dans l'ordre des colonnes.
+
+    Args:
+        words: mots de la page (_word_arrays)
+        headers: en-têtes des colonnes de données
+
+    Returns:
+        Liste des années (str), ou None si aucune ligne d'années n'est trouvée.
+    """
+    text = words["text"]
+    for _, start, stop in words["rows"]:
+        if any(t in headers for t in text[start:stop]):
+            break
+        years = [t for t in text[start:stop] if re.match(r"^20\d{2}$", t)]
+        if len(years) >= 2 and all(int(b) - int(a) == 1 for a, b in zip(years, years[1:])):
+            return years
+    return None
 
 
 def _is_data_token(text: str) -> bool:
@@ -299,160 +521,138 @@ def _is_data_token(text: str) -> bool:
     return bool(re.match(r"^\d+$", text.replace("\xa0", "").replace("\u00a0", ""))) or text in ("-", "–")
 
 
-def extract_regional_table_by_coords(
-    page: object, label: str, has_salaries: bool
+def read_table_by_coords(
+    page: dict, label: str, headers: tuple[str, ...] = TABLE_HEADERS, n_cols: int = 2 * len(YEARS),
+    words: dict | None = None,
 ) -> list[dict]:
-    """Extrait les données d'un tableau régional via les coordonnées de mots.
+    """Lit les lignes par caisse d'un tableau régional via les coordonnées de mots.
 
-    Le tableau du rapport annuel présente deux caisses côte à côte par rangée visuelle,
-    ce qui fausse l'extraction par extract_table(). Cette fonction utilise extract_words()
-    avec les coordonnées x pour assigner chaque token numérique à la bonne colonne.
+    Moteur commun aux "Tableau N" du rapport annuel : les mots de la page sont tenus en
+    tableaux numpy, chaque token numérique (ou tiret de valeur absente) est assigné à la
+    colonne d'en-tête la plus proche (_assign_columns), puis les tokens d'une même
+    colonne sont concaténés (séparateurs de milliers).
 
     Chaque caisse occupe une ou plusieurs lignes ayant le même bloc de données numériques.
     Le numéro de département en début de ligne identifie le début d'une nouvelle caisse.
 
     Args:
-        page: objet page pdfplumber
+        page: page pdf_backend
         label: label du tableau (ex. "Tableau 9") pour ancrer la recherche de l'en-tête
-        has_salaries: True pour Tableau 9 (colonnes alternent Salariés/AT),
-                      False pour Tableau 17 (colonnes alternent Salariés/Trajet)
+        headers: textes exacts des en-têtes de colonnes de données
+        n_cols: nombre de colonnes de données lues par caisse
+        words: mots de la page déjà extraits (_word_arrays), sinon extraits ici
 
     Returns:
-        Liste de dicts {"id": str, "name": str, "type": str, "values": dict, "salaries": dict|None}
+        Liste de dicts {"dept": str, "numbers": [int|None] * n_cols}, dans l'ordre du tableau.
     """
-    rows_by_y = _words_by_row(page)
-    col_centers = _detect_col_centers(rows_by_y)
+    if words is None:
+        words = _word_arrays(page)
+    col_centers = _detect_col_centers(words, headers)
 
     if not col_centers:
         print(f"  AVERTISSEMENT: colonnes non détectées pour {label}", file=sys.stderr)
         return []
 
     # Vérifier que le label est bien présent sur la page
-    page_text = page.extract_text() or ""
+    page_text = pdf_backend.page_text(page) or ""
     if label not in page_text:
         print(f"  AVERTISSEMENT: label '{label}' introuvable sur la page", file=sys.stderr)
         return []
 
+    text = words["text"]
     # Trouver la y-position minimale du label pour ignorer le texte au-dessus
-    label_y = None
-    for y in sorted(rows_by_y.keys()):
-        texts = [w["text"] for w in rows_by_y[y]]
-        # Le label est souvent sur une ligne contenant "Tableau" + numéro
-        combined = " ".join(texts)
-        if label in combined:
-            label_y = y
-            break
+    label_y = next((y for y, start, stop in words["rows"] if label in " ".join(text[start:stop])), None)
+
+    # Classement de tous les tokens en une fois : valeur, tiret, zone de données, colonne.
+    # Le nom de la caisse est à gauche de la zone de données, les valeurs à droite.
+    clean = [t.replace("\xa0", "") for t in text]
+    is_dash = np.array([t in ("-", "–") for t in text], dtype=bool)
+    is_data = np.array([_is_data_token(t) for t in text], dtype=bool) & (words["cx"] >= col_centers[0] - 30)
+    cols = _assign_columns(words["cx"], col_centers).tolist()
+    skip_tokens = set(headers) | {"Tableau"}
 
     # Accumuler les tokens numériques par colonne pour la caisse en cours
     current_dept = None
-    col_buffers: dict[int, list[str]] = defaultdict(list)
+    col_buffers: dict[int, list[str | None]] = defaultdict(list)
     results = []
 
     def flush() -> None:
         nonlocal current_dept, col_buffers
         if current_dept is None:
             return
-        # Reconstruire les 10 valeurs depuis les buffers de colonnes
         numbers: list[int | None] = []
-        for col_idx in range(10):
+        for col_idx in range(n_cols):
             tokens = col_buffers.get(col_idx, [])
-            if not tokens:
+            if not tokens or None in tokens:
                 numbers.append(None)
-            elif None in tokens:
+                continue
+            # Concaténer les chaînes brutes (préserve les zéros initiaux comme dans "034")
+            try:
+                numbers.append(int("".join(tokens)))
+            except ValueError:
                 numbers.append(None)
-            else:
-                # Concaténer les chaînes brutes (préserve les zéros initiaux comme dans "034")
-                combined = "".join(tokens)
-                try:
-                    numbers.append(int(combined))
-                except ValueError:
-                    numbers.append(None)
-        results.append({
-            "dept": current_dept,
-            "numbers": numbers,
-        })
+        results.append({"dept": current_dept, "numbers": numbers})
         current_dept = None
         col_buffers = defaultdict(list)
 
-    for y in sorted(rows_by_y.keys()):
+    for y, start, stop in words["rows"]:
         if label_y is not None and y <= label_y:
             continue  # ignorer les lignes avant et sur le label
-
-        words = rows_by_y[y]
-        texts = [w["text"] for w in words]
+        texts = text[start:stop]
 
         # Fin du tableau
-        if texts and texts[0].lower() == "total":
+        if texts[0].lower() == "total":
             break
 
         # Ignorer les lignes d'en-tête et les lignes non-données
-        if any(t in ("Salariés*", "AT**", "Trajet**", "Tableau") for t in texts):
+        if any(t in skip_tokens for t in texts):
             continue
 
-        # Détecter début de nouvelle caisse: premier token = numéro de département
-        first_tok = texts[0] if texts else ""
-        if _DEPT_RE.match(first_tok):
+        keep = is_data[start:stop]
+        if _DEPT_RE.match(texts[0]):
+            # Début de nouvelle caisse : le numéro de département et le premier tiret
+            # séparateur ("21 – Bourgogne") ne sont pas des données.
             flush()
-            current_dept = first_tok
-
-        # Traiter les tokens numériques de cette ligne.
-        # Si la ligne commence par un numéro de département, les 3 premiers tokens
-        # (dept, tiret, début du nom) sont ignorés. Tous les tokens numériques
-        # qui suivent le nom de la caisse sont assignés à leurs colonnes de données.
-        #
-        # Stratégie: parcourir les tokens en deux passes:
-        #   1. Identifier où commence la zone numérique (après le nom)
-        #   2. Assigner chaque token numérique à la colonne la plus proche
-        if _DEPT_RE.match(first_tok):
-            # Ligne de caisse: sauter dept + tiret + nom, puis collecter les données.
-            # Le nom se termine au premier token dont l'x-position dépasse le début
-            # de la zone de données (> x du premier centre de colonne - marge).
-            # On utilise la position x pour distinguer le nom (gauche) des données (droite).
-            data_x_threshold = col_centers[0] - 30 if col_centers else 130
-            skip_dept = True  # ignorer le premier token (numéro de département)
-            skip_dash = True  # ignorer le tiret séparateur
-            for w in words:
-                tok = w["text"]
-                tok_clean = tok.replace("\xa0", "").replace("\u00a0", "")
-                cx = (w["x0"] + w["x1"]) / 2
-
-                if skip_dept:
-                    skip_dept = False
-                    continue  # sauter le numéro de département (ex. "21")
-                if skip_dash and tok == "–":
-                    skip_dash = False
-                    continue  # sauter le tiret séparateur
-
-                # Un token est dans la zone données si son centre x dépasse le seuil
-                if cx >= data_x_threshold:
-                    if current_dept is not None:
-                        if tok in ("-", "–"):
-                            col = _nearest_col(cx, col_centers)
-                            col_buffers[col].append(None)  # type: ignore[arg-type]
-                        elif re.match(r"^\d+$", tok_clean):
-                            col = _nearest_col(cx, col_centers)
-                            col_buffers[col].append(tok_clean)
-                # else: partie du nom (à gauche du seuil), ignorer
-        else:
-            # Ligne de continuation (suite du nom, ou données pures, ou nom+données).
-            # Utiliser la position x pour distinguer nom (gauche) et données (droite).
-            # Tout token dont le centre x dépasse le seuil est une donnée.
-            if current_dept is not None:
-                data_x_threshold = col_centers[0] - 30 if col_centers else 130
-                for w in words:
-                    tok = w["text"]
-                    tok_clean = tok.replace("\xa0", "").replace("\u00a0", "")
-                    cx = (w["x0"] + w["x1"]) / 2
-                    if cx >= data_x_threshold:
-                        if tok in ("-", "–"):
-                            col = _nearest_col(cx, col_centers)
-                            col_buffers[col].append(None)  # type: ignore[arg-type]
-                        elif re.match(r"^\d+$", tok_clean):
-                            col = _nearest_col(cx, col_centers)
-                            col_buffers[col].append(tok_clean)
-                    # else: partie du nom à gauche du seuil, ignorer
+            current_dept = texts[0]
+            keep = keep.copy()
+            keep[0] = False
+            dash = next((j for j in range(1, len(texts)) if texts[j] == "–"), None)
+            if dash is not None:
+                keep[dash] = False
+        elif current_dept is None:
+            continue
+        # Sinon, ligne de continuation (suite du nom, données pures, ou nom + données)
+        for i in (np.flatnonzero(keep) + start).tolist():
+            col_buffers[cols[i]].append(None if is_dash[i] else clean[i])
 
     flush()
+    return results
+
+
+def extract_regional_table_by_coords(
+    page: dict, label: str, has_salaries: bool, headers: tuple[str, ...] = TABLE_HEADERS,
+    years: list[str] | None = None,
+) -> list[dict]:
+    """Extrait les données d'un tableau régional via les coordonnées de mots.
+
+    Le tableau du rapport annuel présente deux caisses côte à côte par rangée visuelle,
+    ce qui fausse l'extraction par extract_table(). Les lignes sont lues par
+    read_table_by_coords ; les colonnes alternent effectifs salariés et valeur du tableau.
+
+    Args:
+        page: page pdf_backend
+        label: label du tableau (ex. "Tableau 9") pour ancrer la recherche de l'en-tête
+        has_salaries: True pour Tableau 9 (colonnes alternent Salariés/AT),
+                      False pour Tableau 17 (colonnes alternent Salariés/Trajet)
+        headers: en-têtes des colonnes de données (voir TABLE_HEADERS)
+        years: années des colonnes ; par défaut lues sur la page (_detect_years), sinon YEARS
+
+    Returns:
+        Liste de dicts {"id": str, "name": str, "type": str, "values": dict, "salaries": dict|None}
+    """
+    words = _word_arrays(page)
+    years = years or _detect_years(words, headers) or YEARS
+    results = read_table_by_coords(page, label, headers, 2 * len(years), words)
 
     # Convertir les résultats bruts en entrées de caisse
     entries = []
@@ -469,11 +669,11 @@ def extract_regional_table_by_coords(
 
         caisse_id, canonical_name, caisse_type = DEPT_MAP[dept]
 
-        # Les 10 nombres alternent: Salariés_yr0, DATA_yr0, Salariés_yr1, DATA_yr1, ...
+        # Les nombres alternent: Salariés_yr0, DATA_yr0, Salariés_yr1, DATA_yr1, ...
         values: dict[str, int] = {}
         salaries: dict[str, int] = {}
 
-        for i, year in enumerate(YEARS):
+        for i, year in enumerate(years):
             sal_idx = i * 2
             data_idx = i * 2 + 1
             if sal_idx < len(numbers):
@@ -504,11 +704,11 @@ def extract_regional_table_by_coords(
 
 
 # Alias pour la compatibilité avec l'API historique utilisée dans parse_regional_pdf().
-def extract_regional_table(page: object, has_salaries: bool, label: str = "") -> list[dict]:
+def extract_regional_table(page: dict, has_salaries: bool, label: str = "") -> list[dict]:
     """Interface de compatibilité pour extract_regional_table_by_coords().
 
     Args:
-        page: objet page pdfplumber
+        page: page pdf_backend
         has_salaries: True pour Tableau 9 (avec effectifs salariés)
         label: label du tableau à passer à la fonction de base
 
@@ -518,14 +718,41 @@ def extract_regional_table(page: object, has_salaries: bool, label: str = "") ->
     return extract_regional_table_by_coords(page, label=label, has_salaries=has_salaries)
 
 
-def validate_output(caisses: list) -> None:
+def extract_tables(
+    pdf: dict, indexes: dict[str, int], tables: list[dict] = REGIONAL_TABLES,
+) -> dict[str, list[dict]]:
+    """Extrait les tableaux enregistrés depuis leurs pages.
+
+    Args:
+        pdf: document ouvert (pdf_backend.open_pdf)
+        indexes: {label: index de page} (locate_labels)
+        tables: entrées de REGIONAL_TABLES à extraire
+
+    Returns:
+        {clé du tableau: entrées de caisse (extract_regional_table_by_coords)}
+    """
+    pages = pdf_backend.pages(pdf)
+    rows = {}
+    for table in tables:
+        print(f"Extraction des données {table['name']} ({table['label']})...", file=sys.stderr)
+        entries = extract_regional_table_by_coords(
+            pages[indexes[table["label"]]], table["label"], table["salaries"], table["headers"])
+        print(f"  {len(entries)} entrées {table['name']} extraites", file=sys.stderr)
+        rows[table["key"]] = entries
+    return rows
+
+
+def validate_output(caisses: list, tables: list[dict] = REGIONAL_TABLES, years: list[str] = YEARS) -> None:
     """Valide le résultat extrait avant d'écrire le fichier JSON.
 
     Vérifie que le nombre minimum de caisses métropolitaines est présent
-    et que chacune a des données AT et Trajet non nulles pour les années 2020-2024.
+    et que chacune a une valeur pour chaque tableau et chaque année de l'édition
+    (non nulle pour les tableaux "nonzero", comme AT et Trajet).
 
     Args:
         caisses: liste de dicts au format de sortie final
+        tables: tableaux attendus (REGIONAL_TABLES)
+        years: années couvertes par l'édition (défaut YEARS)
 
     Raises:
         AssertionError si les données ne sont pas conformes aux attentes minimales.
@@ -537,17 +764,13 @@ def validate_output(caisses: list) -> None:
     )
 
     for c in metro:
-        for year in YEARS:
-            at_val = c.get("at", {}).get(year)
-            assert at_val not in (None, 0), (
-                f"Donnée AT manquante ou nulle pour {c['id']} année {year}. "
-                "Vérifier l'extraction du Tableau 9."
-            )
-            trajet_val = c.get("trajet", {}).get(year)
-            assert trajet_val not in (None, 0), (
-                f"Donnée Trajet manquante ou nulle pour {c['id']} année {year}. "
-                "Vérifier l'extraction du Tableau 17."
-            )
+        for year in years:
+            for table in tables:
+                val = c.get(table["key"], {}).get(year)
+                assert val is not None and not (table["nonzero"] and val == 0), (
+                    f"Donnée {table['name']} manquante ou nulle pour {c['id']} année {year}. "
+                    f"Vérifier l'extraction du {table['label']}."
+                )
 
     dom_tom = [c for c in caisses if c["type"] in ("cgss", "css")]
     if len(dom_tom) < 4:
@@ -558,75 +781,71 @@ def validate_output(caisses: list) -> None:
         )
 
 
-def parse_regional_pdf(pdf_path: Path) -> dict:
-    """Extrait et fusionne les données AT et Trajet depuis le rapport annuel PDF.
+def parse_regional_pdf(
+    pdf_path: Path, backend: str = "pdfplumber", cache_path: Path | None = PAGE_CACHE_PATH,
+    tables: list[dict] = REGIONAL_TABLES, new_pages: dict | None = None,
+) -> dict:
+    """Extrait et fusionne les tableaux par caisse (REGIONAL_TABLES) du rapport annuel PDF.
 
-    Ouvre le PDF, localise les pages des Tableaux 9 et 17, extrait les données
-    par caisse régionale et construit le JSON de sortie selon le schéma défini.
+    Ouvre le PDF, localise les pages de tous les tableaux en un parcours, extrait les
+    données par caisse régionale et construit le JSON de sortie selon le schéma défini :
+    une clé par tableau dans chaque caisse ("at", "trajet", ...).
 
     Args:
         pdf_path: chemin vers le fichier PDF du rapport annuel
+        backend: moteur d'extraction (pdf_backend.PDF_BACKENDS)
+        cache_path: cache des pages de tableaux (None = recherche complète, voir locate_labels)
+        tables: tableaux à extraire (entrées de REGIONAL_TABLES)
+        new_pages: pages trouvées à rendre au lieu de les écrire (voir locate_labels)
 
     Returns:
-        Dict conforme au schéma regional-data.json (meta + caisses).
+        Dict conforme au schéma regional-data.json (meta + caisses). meta["years"] donne
+        les années de l'édition, lues sur les pages des tableaux (YEARS à défaut).
 
     Raises:
-        ValueError si Tableau 9 ou Tableau 17 n'est pas trouvé dans le PDF.
+        ValueError si un tableau n'est pas trouvé dans le PDF, ou pour un backend inconnu.
         AssertionError si la validation du résultat échoue.
     """
     print(f"Ouverture du PDF: {pdf_path}", file=sys.stderr)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        print(f"  Nombre de pages: {len(pdf.pages)}", file=sys.stderr)
-
-        # Localiser les pages des tableaux
-        _, page_t9 = find_tableau_page(pdf, "Tableau 9")
-        _, page_t17 = find_tableau_page(pdf, "Tableau 17")
-
-        # Extraire les données AT (avec salariés)
-        print("Extraction des données AT (Tableau 9)...", file=sys.stderr)
-        at_rows = extract_regional_table(page_t9, has_salaries=True, label="Tableau 9")
-        print(f"  {len(at_rows)} entrées AT extraites", file=sys.stderr)
+    pdf = pdf_backend.open_pdf(pdf_path, backend)
+    try:
+        print(f"  Nombre de pages: {len(pdf_backend.pages(pdf))}", file=sys.stderr)
 
-        # Extraire les données Trajet (sans salariés)
-        print("Extraction des données Trajet (Tableau 17)...", file=sys.stderr)
-        trajet_rows = extract_regional_table(page_t17, has_salaries=False, label="Tableau 17")
-        print(f"  {len(trajet_rows)} entrées Trajet extraites", file=sys.stderr)
+        # Localiser les pages de tous les tableaux (un seul parcours, ou cache)
+        indexes = locate_labels(pdf, [table["label"] for table in tables], pdf_path, cache_path, new_pages)
+        rows = extract_tables(pdf, indexes, tables)
+    finally:
+        pdf_backend.close_pdf(pdf)
 
-    # Indexer par identifiant caisse
-    at_by_id = {r["id"]: r for r in at_rows}
-    trajet_by_id = {r["id"]: r for r in trajet_rows}
+    # Indexer chaque tableau par identifiant caisse
+    by_id = {table["key"]: {r["id"]: r for r in rows[table["key"]]} for table in tables}
 
-    # Fusionner AT et Trajet par caisse
-    all_ids = set(at_by_id.keys()) | set(trajet_by_id.keys())
+    # Fusionner les tableaux par caisse
     caisses = []
+    for caisse_id in sorted(set().union(*by_id.values())):
+        entries = [by_id[table["key"]].get(caisse_id) for table in tables]
 
-    for caisse_id in sorted(all_ids):
-        at_entry = at_by_id.get(caisse_id)
-        trajet_entry = trajet_by_id.get(caisse_id)
-
-        if at_entry is None and trajet_entry is None:
-            continue
-
-        # Métadonnées depuis l'entrée disponible (priorité AT)
-        ref = at_entry or trajet_entry
-        caisse = {
-            "id": caisse_id,
-            "name": ref["name"],
-            "type": ref["type"],
-            "at": at_entry["values"] if at_entry else {},
-            "trajet": trajet_entry["values"] if trajet_entry else {},
-        }
+        # Métadonnées depuis la première entrée disponible (ordre de REGIONAL_TABLES)
+        ref = next(e for e in entries if e is not None)
+        caisse = {"id": caisse_id, "name": ref["name"], "type": ref["type"]}
+        for table, entry in zip(tables, entries):
+            caisse[table["key"]] = entry["values"] if entry else {}
 
-        # Salariés uniquement depuis Tableau 9 (AT)
-        if at_entry and at_entry.get("salaries"):
-            caisse["salaries"] = at_entry["salaries"]
+        # Salariés depuis le premier tableau qui en fournit (Tableau 9)
+        salaries = next((e["salaries"] for t, e in zip(tables, entries)
+                         if t["salaries"] and e and e.get("salaries")), None)
+        if salaries:
+            caisse["salaries"] = salaries
 
         caisses.append(caisse)
 
+    # Années de l'édition : celles présentes dans les tableaux extraits
+    years = sorted({y for c in caisses for key in (*by_id, "salaries") for y in c.get(key, {})}) or YEARS
+
     # Validation avant écriture
     print("Validation des données extraites...", file=sys.stderr)
-    validate_output(caisses)
+    validate_output(caisses, tables, years)
     print(f"  Validation réussie: {len(caisses)} caisses au total", file=sys.stderr)
 
     # Construire l'objet de sortie complet
@@ -634,7 +853,7 @@ def parse_regional_pdf(pdf_path: Path) -> dict:
         "meta": {
             "source": "Rapport annuel Assurance Maladie - Risques professionnels",
             "generated": date.today().isoformat(),
-            "years": YEARS,
+            "years": years,
         },
         "caisses": caisses,
     }
@@ -642,18 +861,130 @@ def parse_regional_pdf(pdf_path: Path) -> dict:
     return output
 
 
+def _parse_edition_job(job: tuple) -> tuple[dict, dict]:
+    """parse_regional_pdf dans un processus de worker_pool : job = (pdf_path, backend, cache_path, tables).
+
+    Le cache des pages est seulement lu : les pages trouvées sont rendues avec
+    l'édition, (données, {sha256: {label: page}}), et écrites par le processus principal.
+    """
+    pdf_path, backend, cache_path, tables = job
+    new_pages = {}
+    return parse_regional_pdf(pdf_path, backend, cache_path, tables=tables, new_pages=new_pages), new_pages
+
+
+def merge_editions(editions: list[dict], tables: list[dict] = REGIONAL_TABLES) -> dict:
+    """Assemble une série longue par caisse à partir de plusieurs éditions du rapport.
+
+    Les éditions (sorties de parse_regional_pdf) sont appliquées de la plus ancienne à la
+    plus récente, identifiées par leur dernière année : une valeur publiée à nouveau par
+    une édition plus récente (chiffre révisé) remplace l'ancienne. L'index des caisses
+    est le dict des identifiants de DEPT_MAP, donc la fusion coûte O(caisses × années).
+
+    Args:
+        editions: sorties de parse_regional_pdf, dans n'importe quel ordre
+        tables: tableaux extraits (REGIONAL_TABLES)
+
+    Returns:
+        Dict au schéma regional-data.json, années de toutes les éditions. Chaque caisse
+        a en plus "editions" : {clé: {année: édition}} donnant l'édition de chaque
+        valeur ; meta["editions"] liste les éditions et leurs années.
+    """
+    keys = [table["key"] for table in tables] + ["salaries"]
+    ordered = sorted(editions, key=lambda data: data["meta"]["years"][-1])
+    by_id: dict[str, dict] = {}
+    revised = 0
+    for data in ordered:
+        edition = data["meta"]["years"][-1]
+        for c in data["caisses"]:
+            caisse = by_id.get(c["id"])
+            if caisse is None:
+                caisse = by_id[c["id"]] = {"id": c["id"], "name": c["name"], "type": c["type"],
+                                           **{key: {} for key in keys},
+                                           "editions": {key: {} for key in keys}}
+            for key in keys:
+                for year, value in c.get(key, {}).items():
+                    if caisse[key].get(year, value) != value:
+                        revised += 1
+                    caisse[key][year] = value
+                    caisse["editions"][key][year] = edition
+    print(f"  {len(ordered)} éditions fusionnées, {revised} valeurs révisées par une édition plus récente",
+          file=sys.stderr)
+
+    caisses = []
+    for caisse_id in sorted(by_id):
+        caisse = by_id[caisse_id]
+        for key in keys:
+            caisse[key] = dict(sorted(caisse[key].items()))
+            caisse["editions"][key] = dict(sorted(caisse["editions"][key].items()))
+        if not caisse["salaries"]:
+            del caisse["salaries"], caisse["editions"]["salaries"]
+        caisses.append(caisse)
+
+    return {
+        "meta": {
+            "source": "Rapport annuel Assurance Maladie - Risques professionnels",
+            "generated": date.today().isoformat(),
+            "years": sorted({y for data in ordered for y in data["meta"]["years"]}),
+            "editions": [{"edition": data["meta"]["years"][-1], "years": data["meta"]["years"]}
+                         for data in ordered],
+        },
+        "caisses": caisses,
+    }
+
+
+def build_regional_series(
+    pdf_paths: list[Path], backend: str = "pdfplumber", cache_path: Path | None = PAGE_CACHE_PATH,
+    workers: int = 1, tables: list[dict] = REGIONAL_TABLES,
+) -> dict:
+    """Parse plusieurs éditions du rapport annuel et les assemble (merge_editions).
+
+    Args:
+        pdf_paths: rapports annuels PDF, un par édition
+        backend: moteur d'extraction (pdf_backend.PDF_BACKENDS)
+        cache_path: cache des pages de tableaux (voir locate_labels)
+        workers: nombre de processus ; les éditions sont alors parsées en parallèle
+        tables: tableaux à extraire (entrées de REGIONAL_TABLES)
+
+    Returns:
+        Série longue au schéma de merge_editions.
+
+    Raises:
+        ValueError / AssertionError d'une édition, comme parse_regional_pdf.
+    """
+    if workers > 1 and len(pdf_paths) > 1:
+        jobs = [(path, backend, cache_path, tables) for path in pdf_paths]
+        editions, new_pages = [], {}
+        for path, (status, result) in zip(pdf_paths, worker_pool.imap_bounded(
+                _parse_edition_job, jobs, min(workers, len(jobs)))):
+            if status != "ok":
+                raise ValueError(f"Parsing de l'édition {path} interrompu ({status})")
+            data, pages = result
+            editions.append(data)
+            for key, found in pages.items():
+                new_pages.setdefault(key, {}).update(found)
+        if cache_path is not None and new_pages:
+            _store_page_cache(cache_path, new_pages)
+    else:
+        editions = [parse_regional_pdf(path, backend, cache_path, tables=tables) for path in pdf_paths]
+    return merge_editions(editions, tables)
+
+
 def main() -> None:
     """Point d'entrée principal du script."""
     parser = argparse.ArgumentParser(
         description=(
-            "Extrait les données AT/Trajet par caisse régionale depuis le rapport annuel PDF "
+            "Extrait les tableaux par caisse régionale (AT, Trajet...) depuis le rapport annuel PDF "
             "et écrit data/regional-data.json."
         )
     )
     parser.add_argument(
         "--pdf",
         required=True,
-        help="Chemin vers le rapport annuel PDF (Assurance Maladie - Risques professionnels)",
+        nargs="+",
+        help=(
+            "Chemin vers le rapport annuel PDF (Assurance Maladie - Risques professionnels). "
+            "Plusieurs éditions : une série longue par caisse (voir merge_editions)"
+        ),
     )
     parser.add_argument(
         "--out",
@@ -671,12 +1002,33 @@ def main() -> None:
             "Utile pour vérifier DEPT_MAP avant une extraction complète."
         ),
     )
+    parser.add_argument(
+        "--backend",
+        choices=pdf_backend.PDF_BACKENDS,
+        default="pdfplumber",
+        help="Moteur d'extraction PDF (défaut: pdfplumber ; voir pdf_backend.py)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Ignore le cache des pages de tableaux ({PAGE_CACHE_PATH.name}) et parcourt tout le rapport",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Nombre de processus avec plusieurs --pdf : une édition par processus (défaut: 1)"
+        ),
+    )
     args = parser.parse_args()
+    cache_path = None if args.no_cache else PAGE_CACHE_PATH
 
-    pdf_path = Path(args.pdf)
-    if not pdf_path.exists():
-        print(f"Erreur: le fichier PDF '{pdf_path}' n'existe pas.", file=sys.stderr)
-        sys.exit(1)
+    pdf_paths = [Path(p) for p in args.pdf]
+    for pdf_path in pdf_paths:
+        if not pdf_path.exists():
+            print(f"Erreur: le fichier PDF '{pdf_path}' n'existe pas.", file=sys.stderr)
+            sys.exit(1)
 
     # Chemin de sortie par défaut: data/regional-data.json relatif à la racine du projet
     if args.out is None:
@@ -688,36 +1040,33 @@ def main() -> None:
     if args.dry_run:
         # Mode diagnostic: afficher les départements et valeurs sans valider ni écrire
         print("Mode --dry-run: extraction diagnostique uniquement.", file=sys.stderr)
-        print(f"Ouverture du PDF: {pdf_path}", file=sys.stderr)
-        with pdfplumber.open(pdf_path) as pdf:
-            _, page_t9 = find_tableau_page(pdf, "Tableau 9")
-            _, page_t17 = find_tableau_page(pdf, "Tableau 17")
-
-            rows_t9 = extract_regional_table_by_coords(page_t9, "Tableau 9", has_salaries=True)
-            rows_t17 = extract_regional_table_by_coords(page_t17, "Tableau 17", has_salaries=False)
-
-        print("\n=== Données extraites du Tableau 9 (AT) ===")
-        for entry in rows_t9:
-            caisse_id = entry["id"]
-            name = entry["name"]
-            status = "OK" if caisse_id else "INCONNU"
-            print(f"  [{status}] {caisse_id} ({name})")
-            print(f"    AT:       {entry['values']}")
-            if entry.get("salaries"):
-                print(f"    Salariés: {entry['salaries']}")
-
-        print("\n=== Données extraites du Tableau 17 (Trajet) ===")
-        for entry in rows_t17:
-            caisse_id = entry["id"]
-            name = entry["name"]
-            status = "OK" if caisse_id else "INCONNU"
-            print(f"  [{status}] {caisse_id} ({name})")
-            print(f"    Trajet:   {entry['values']}")
+        for pdf_path in pdf_paths:
+            print(f"Ouverture du PDF: {pdf_path}", file=sys.stderr)
+            pdf = pdf_backend.open_pdf(pdf_path, args.backend)
+            try:
+                indexes = locate_labels(pdf, [t["label"] for t in REGIONAL_TABLES], pdf_path, cache_path)
+                rows = extract_tables(pdf, indexes, REGIONAL_TABLES)
+            finally:
+                pdf_backend.close_pdf(pdf)
+
+            for table in REGIONAL_TABLES:
+                print(f"\n=== Données extraites du {table['label']} ({table['name']}) ===")
+                for entry in rows[table["key"]]:
+                    caisse_id = entry["id"]
+                    name = entry["name"]
+                    status = "OK" if caisse_id else "INCONNU"
+                    print(f"  [{status}] {caisse_id} ({name})")
+                    print(f"    {table['name'] + ':':<10}{entry['values']}")
+                    if entry.get("salaries"):
+                        print(f"    Salariés: {entry['salaries']}")
         return
 
-    # Extraction complète
+    # Extraction complète (une édition, ou série longue sur plusieurs éditions)
     try:
-        data = parse_regional_pdf(pdf_path)
+        if len(pdf_paths) == 1:
+            data = parse_regional_pdf(pdf_paths[0], args.backend, cache_path)
+        else:
+            data = build_regional_series(pdf_paths, args.backend, cache_path, args.workers)
     except (ValueError, AssertionError) as e:
         print(f"Erreur d'extraction: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,829 @@
+#!/usr/bin/env python3
+"""Backends d'extraction PDF interchangeables pour les fiches NAF et le rapport régional.
+
+Les parseurs (parse_pdf, fiche_pass, extract_extra, extract_size, extract_size_chart,
+parse_regional) ne lisent d'une page que du texte, des mots, des caractères, des
+rectangles, des courbes et les traits des tableaux. Ce module expose ces primitives
+sur une page ouverte, quel que soit le moteur :
+
+    pdfplumber : référence (pdfminer en Python pur), comportement historique
+    pdfium     : pypdfium2 (PDFium compilé, déjà installé avec pdfplumber) ; les
+                 caractères et les tracés sont lus par l'API native puis mis au
+                 format des objets pdfplumber, et le texte, les mots et les
+                 tableaux sont reconstruits par les mêmes fonctions de
+                 pdfplumber.utils / pdfplumber.table. Environ deux fois plus
+                 rapide par fiche (mesuré sur les fiches synthétiques).
+
+Un document ouvert est un dict {"backend", "native", "pages"} ; une page est un dict
+{"backend", "native", "page_number", "width", "height", "doctop"} (les objets pdfium
+sont extraits une fois par page et gardés dans "cache"). Coordonnées : celles de
+pdfplumber (points, origine en haut à gauche, `top` croissant vers le bas).
+
+Écarts connus du backend pdfium : couleurs lues en RGB 8 bits (0-255 ramené à 0-1,
+l'espace de couleur d'origine n'est pas conservé), descente des polices standard
+prise dans les métriques AFM de pdfminer comme pdfplumber, pages sans rotation
+uniquement. test_pdf_backend.py vérifie l'équivalence des deux backends sur les
+fiches de test ; `--pdf-dir` la vérifie sur de vraies fiches avant de changer de
+backend en production.
+
+Usage (comparaison des backends) :
+    python pdf_backend.py --pdf-dir /chemin/vers/pdfs [--limit N]
+"""
+
+import argparse
+import ctypes
+import re
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pdfplumber
+from pdfplumber import utils
+from pdfplumber.table import TableFinder, TableSettings
+
+PDF_BACKENDS = ("pdfplumber", "pdfium")
+
+# Segments de tracé PDFium (fpdf_edit.h)
+_SEGMENT_OPS = {0: "l", 1: "c", 2: "m"}
+# PDFium rend les points des tracés en float32 (erreur ~3e-5 sur une page A4) :
+# arrondis à 4 décimales, ils redonnent les coordonnées écrites dans le PDF, comme
+# les lit pdfminer. Les positions des caractères (cumul des chasses) gardent cet écart.
+COORD_DIGITS = 4
+
+
+def check_backend(backend: str) -> None:
+    """Raises: ValueError pour un backend hors de PDF_BACKENDS."""
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Backend PDF inconnu : {backend} (connus : {', '.join(PDF_BACKENDS)})")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Documents et pages
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def open_pdf(path, backend: str = "pdfplumber") -> dict:
+    """Ouvre un PDF avec le backend demandé (à refermer avec close_pdf).
+
+    Raises:
+        ValueError pour un backend inconnu ; les erreurs de lecture du moteur.
+    """
+    check_backend(backend)
+    if backend == "pdfplumber":
+        native = pdfplumber.open(path)
+        return {"backend": backend, "native": native, "pages": None}
+
+    import pypdfium2 as pdfium
+
+    native = pdfium.PdfDocument(path)
+    return {"backend": backend, "native": native, "pages": None}
+
+
+def close_pdf(doc: dict) -> None:
+    for page in doc["pages"] or []:
+        cache = page.get("cache")
+        if cache and "textpage" in cache:
+            cache["textpage"].close()
+    if doc["backend"] == "pdfium" and doc["pages"]:
+        for page in doc["pages"]:
+            page["native"].close()
+    doc["native"].close()
+
+
+def pages(doc: dict) -> list[dict]:
+    """Pages du document (créées au premier appel, doctop cumulé comme pdfplumber)."""
+    if doc["pages"] is None:
+        if doc["backend"] == "pdfplumber":
+            doc["pages"] = [
+                {"backend": "pdfplumber", "native": p, "page_number": p.page_number,
+                 "width": p.width, "height": p.height, "doctop": p.initial_doctop}
+                for p in doc["native"].pages
+            ]
+        else:
+            doc["pages"] = []
+            doctop = 0
+            for i in range(len(doc["native"])):
+                native = doc["native"][i]
+                if native.get_rotation():
+                    raise ValueError(f"Page {i + 1} tournée : non prise en charge par le backend pdfium")
+                x0, y0, x1, y1 = native.get_mediabox()
+                doc["pages"].append({
+                    "backend": "pdfium", "native": native, "page_number": i + 1,
+                    "width": x1 - x0, "height": y1 - y0, "doctop": doctop,
+                    "origin": (x0, y1), "cache": {},
+                })
+                doctop += y1 - y0
+    return doc["pages"]
+
+
+def _bbox_or_page(page: dict, bbox):
+    return bbox if bbox is not None else (0, 0, page["width"], page["height"])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Extraction pdfium
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def _font_descent(font, fonts: dict) -> tuple[str, float]:
+    """(nom de police, descente pour une taille 1) ; les polices standard suivent
+    les métriques AFM de pdfminer, comme pdfplumber."""
+    import pypdfium2.raw as raw
+    from pdfminer.fontmetrics import FONT_METRICS
+
+    key = ctypes.cast(font, ctypes.c_void_p).value
+    if key not in fonts:
+        size = raw.FPDFFont_GetBaseFontName(font, None, 0)
+        buf = ctypes.create_string_buffer(size)
+        raw.FPDFFont_GetBaseFontName(font, buf, size)
+        name = buf.value.decode("latin-1")
+        if name in FONT_METRICS:
+            descent = FONT_METRICS[name][0].get("Descent", 0) / 1000
+        else:
+            value = ctypes.c_float()
+            raw.FPDFFont_GetDescent(font, ctypes.c_float(1.0), ctypes.byref(value))
+            descent = -abs(value.value)
+        fonts[key] = (name, descent)
+    return fonts[key]
+
+
+def _textpage(page: dict):
+    """Couche texte PDFium de la page (créée une fois, fermée par close_pdf)."""
+    cache = page["cache"]
+    if "textpage" not in cache:
+        cache["textpage"] = page["native"].get_textpage()
+    return cache["textpage"]
+
+
+def _pdfium_chars(page: dict, bbox=None) -> list[dict]:
+    """Caractères de la page ; avec bbox, ceux dont la boîte « loose » de PDFium (élargie
+    de sa hauteur) ne touche pas bbox sont écartés avant toute autre lecture."""
+    import pypdfium2.raw as raw
+
+    native = page["native"]
+    left, top0 = page["origin"]
+    tp = _textpage(page).raw
+    fonts = {}
+    box = [ctypes.c_double() for _ in range(2)]
+    matrix = raw.FS_MATRIX()
+    chars = []
+    for i in range(raw.FPDFText_CountChars(tp)):
+        rect = raw.FS_RECTF()
+        raw.FPDFText_GetLooseCharBox(tp, i, ctypes.byref(rect))
+        if bbox is not None:
+            margin = max(rect.top - rect.bottom, 1.0)
+            if not _touches(rect.left - left, top0 - rect.top, rect.right - left,
+                            top0 - rect.bottom, bbox, margin):
+                continue
+        if raw.FPDFText_IsGenerated(tp, i) == 1:
+            continue
+        code = raw.FPDFText_GetUnicode(tp, i)
+        if code in (0, 0xFFFE):
+            continue
+        raw.FPDFText_GetCharOrigin(tp, i, ctypes.byref(box[0]), ctypes.byref(box[1]))
+        raw.FPDFText_GetMatrix(tp, i, ctypes.byref(matrix))
+        size = raw.FPDFText_GetFontSize(tp, i)
+        fontname, descent = _font_descent(
+            raw.FPDFTextObj_GetFont(raw.FPDFText_GetTextObject(tp, i)), fonts)
+        a, b, c, d = matrix.a, matrix.b, matrix.c, matrix.d
+        y0 = box[1].value + d * descent * size
+        y1 = y0 + d * size
+        # x0 = origine du glyphe, x1 = origine + chasse (boîte « loose » de PDFium)
+        x0, x1 = box[0].value - left, rect.right - left
+        y0, y1 = y0 - (top0 - page["height"]), y1 - (top0 - page["height"])
+        chars.append({
+            "object_type": "char", "page_number": page["page_number"],
+            "text": chr(code), "fontname": fontname, "size": y1 - y0,
+            "matrix": (a, b, c, d, matrix.e - left, matrix.f),
+            "upright": 0 < a * d and b * c <= 0,
+            "x0": x0, "x1": x1, "y0": y0, "y1": y1,
+            "width": x1 - x0, "height": y1 - y0,
+            "top": page["height"] - y1, "bottom": page["height"] - y0,
+            "doctop": page["doctop"] + page["height"] - y1,
+        })
+    return chars
+
+
+def _path_segments(obj, matrix) -> list[tuple]:
+    """Segments d'un tracé au format pdfminer (("m", (x, y)), ("l", ...), ("c", ...), ("h",))."""
+    import pypdfium2.raw as raw
+
+    a, b, c, d, e, f = matrix
+    path, pending = [], []
+    x, y = ctypes.c_float(), ctypes.c_float()
+    for i in range(raw.FPDFPath_CountSegments(obj)):
+        segment = raw.FPDFPath_GetPathSegment(obj, i)
+        raw.FPDFPathSegment_GetPoint(segment, ctypes.byref(x), ctypes.byref(y))
+        px, py = round(x.value, COORD_DIGITS), round(y.value, COORD_DIGITS)
+        point = (a * px + c * py + e, b * px + d * py + f)
+        op = _SEGMENT_OPS.get(raw.FPDFPathSegment_GetType(segment))
+        if op == "c":
+            pending.append(point)
+            if len(pending) == 3:
+                path.append(("c", *pending))
+                pending = []
+        elif op is not None:
+            path.append((op, point))
+        if raw.FPDFPathSegment_GetClose(segment):
+            path.append(("h",))
+    return path
+
+
+def _paint_path(path: list[tuple], attrs: dict, out: dict) -> None:
+    """Classement ligne / rectangle / courbe de pdfminer (PDFLayoutAnalyzer.paint_path)."""
+    shape = "".join(seg[0] for seg in path)
+    if shape[:1] != "m":
+        return
+    if shape.count("m") > 1:
+        start = 0
+        for i in range(1, len(path) + 1):
+            if i == len(path) or path[i][0] == "m":
+                _paint_path(path[start:i], attrs, out)
+                start = i
+        return
+    pts = [seg[-1] if seg[0] != "h" else path[0][-1] for seg in path]
+    if len(shape) > 3 and shape[-2:] == "lh" and pts[-2] == pts[0]:
+        shape = shape[:-2] + "h"
+        pts.pop()
+    kind = "curve"
+    if shape in ("mlh", "ml"):
+        kind = "line"
+    elif shape in ("mlllh", "mllll"):
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3), _ = pts
+        if pts[0] == pts[4] and ((x0 == x1 and y1 == y2 and x2 == x3 and y3 == y0)
+                                 or (y0 == y1 and x1 == x2 and y2 == y3 and x3 == x0)):
+            kind = "rect"
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    obj = dict(attrs, object_type=kind, x0=min(xs), x1=max(xs), y0=min(ys), y1=max(ys),
+               path=path)
+    if kind == "rect":
+        obj["pts"] = [pts[0], pts[1], pts[2], pts[3]]
+    else:
+        obj["pts"] = pts
+    out[kind + "s"].append(obj)
+
+
+def _pdfium_objects(page: dict, handle, matrix, out: dict, bbox=None, colors=None,
+                    tol: float = 0.0) -> None:
+    """Tracés de la page (ou du XObject `handle`) classés dans out par _paint_path.
+
+    Avec bbox ou colors (voir window), un tracé est écarté sur sa couleur, puis pour
+    les objets de premier niveau sur ses bornes PDFium, avant la lecture de ses
+    segments.
+    """
+    import pypdfium2.raw as raw
+
+    native = page["native"]
+    if handle is None:
+        count = raw.FPDFPage_CountObjects(native.raw)
+        get = lambda i: raw.FPDFPage_GetObject(native.raw, i)  # noqa: E731
+    else:
+        count = raw.FPDFFormObj_CountObjects(handle)
+        get = lambda i: raw.FPDFFormObj_GetObject(handle, i)  # noqa: E731
+    m = raw.FS_MATRIX()
+    for i in range(count):
+        obj = get(i)
+        kind = raw.FPDFPageObj_GetType(obj)
+        if kind not in (raw.FPDF_PAGEOBJ_PATH, raw.FPDF_PAGEOBJ_FORM):
+            continue
+        raw.FPDFPageObj_GetMatrix(obj, ctypes.byref(m))
+        a, b, c, d, e, f = matrix
+        own = (m.a * a + m.b * c, m.a * b + m.b * d, m.c * a + m.d * c,
+               m.c * b + m.d * d, m.e * a + m.f * c + e, m.e * b + m.f * d + f)
+        if kind == raw.FPDF_PAGEOBJ_FORM:
+            _pdfium_objects(page, obj, own, out)
+            continue
+        fill_mode, stroke = ctypes.c_int(), ctypes.c_int()
+        raw.FPDFPath_GetDrawMode(obj, ctypes.byref(fill_mode), ctypes.byref(stroke))
+        rgba = [ctypes.c_uint() for _ in range(4)]
+        raw.FPDFPageObj_GetFillColor(obj, *(ctypes.byref(v) for v in rgba))
+        fill_color = tuple(v.value / 255 for v in rgba[:3])
+        raw.FPDFPageObj_GetStrokeColor(obj, *(ctypes.byref(v) for v in rgba))
+        stroke_color = tuple(v.value / 255 for v in rgba[:3])
+        if colors is not None and not (_color_near(fill_color, colors, tol)
+                                       or _color_near(stroke_color, colors, tol)):
+            continue
+        if bbox is not None and handle is None:
+            bounds = [ctypes.c_float() for _ in range(4)]
+            raw.FPDFPageObj_GetBounds(obj, *(ctypes.byref(v) for v in bounds))
+            x0, y0, x1, y1 = (v.value for v in bounds)
+            left, top0 = page["origin"]
+            if not _touches(x0 - left, top0 - y1, x1 - left, top0 - y0, bbox, 1.0):
+                continue
+        width = ctypes.c_float()
+        raw.FPDFPageObj_GetStrokeWidth(obj, ctypes.byref(width))
+        attrs = {"page_number": page["page_number"], "linewidth": width.value,
+                 "stroke": bool(stroke.value), "fill": fill_mode.value != 0,
+                 "evenodd": fill_mode.value == 1,
+                 "stroking_color": stroke_color, "non_stroking_color": fill_color}
+        _paint_path(_path_segments(obj, own), attrs, out)
+
+
+def _pdfium_page_objects(page: dict) -> dict:
+    """Objets de la page au format pdfplumber, extraits une fois par page."""
+    cache = page["cache"]
+    if "chars" not in cache:
+        left, top0 = page["origin"]
+        offset = top0 - page["height"]
+        shapes = {"lines": [], "rects": [], "curves": []}
+        _pdfium_objects(page, None, (1, 0, 0, 1, -left, -offset), shapes)
+        cache.update(_pdfium_finish_shapes(page, shapes))
+        cache["chars"] = _pdfium_chars(page)
+    return cache
+
+
+def _pdfium_finish_shapes(page: dict, shapes: dict) -> dict:
+    """Complète les tracés de _pdfium_objects (largeur, hauteur, top, bottom, doctop)."""
+    for objs in shapes.values():
+        for obj in objs:
+            obj["width"] = obj["x1"] - obj["x0"]
+            obj["height"] = obj["y1"] - obj["y0"]
+            obj["top"] = page["height"] - obj["y1"]
+            obj["bottom"] = page["height"] - obj["y0"]
+            obj["doctop"] = page["doctop"] + obj["top"]
+            obj["pts"] = [(x, page["height"] - y) for x, y in obj["pts"]]
+    return shapes
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Primitives communes
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def _objects(page: dict, kind: str, bbox=None) -> list[dict]:
+    if page["backend"] == "pdfplumber":
+        native = page["native"] if bbox is None else page["native"].crop(bbox)
+        return getattr(native, kind)
+    objs = _pdfium_page_objects(page)[kind]
+    return objs if bbox is None else utils.crop_to_bbox(objs, bbox)
+
+
+def chars(page: dict, bbox=None) -> list[dict]:
+    """Caractères (format pdfplumber), limités à bbox (x0, top, x1, bottom) si donné."""
+    return _objects(page, "chars", bbox)
+
+
+def rects(page: dict, bbox=None) -> list[dict]:
+    return _objects(page, "rects", bbox)
+
+
+def curves(page: dict, bbox=None) -> list[dict]:
+    return _objects(page, "curves", bbox)
+
+
+def lines(page: dict, bbox=None) -> list[dict]:
+    return _objects(page, "lines", bbox)
+
+
+def edges(page: dict, bbox=None) -> list[dict]:
+    """Traits de la page (côtés des rectangles, lignes, segments des courbes)."""
+    if page["backend"] == "pdfplumber":
+        return _objects(page, "edges", bbox)
+    return ([utils.line_to_edge(ln) for ln in lines(page, bbox)]
+            + [e for r in rects(page, bbox) for e in utils.rect_to_edges(r)]
+            + [e for cv in curves(page, bbox) for e in utils.curve_to_edges(cv)])
+
+
+def page_text(page: dict, bbox=None) -> str:
+    """Texte de la page (ou de bbox) comme Page.extract_text() de pdfplumber."""
+    if page["backend"] == "pdfplumber":
+        native = page["native"] if bbox is None else page["native"].crop(bbox)
+        return native.extract_text()
+    area = _bbox_or_page(page, bbox)
+    return utils.chars_to_textmap(
+        chars(page, bbox), layout_bbox=area,
+        layout_width=area[2] - area[0], layout_height=area[3] - area[1],
+    ).as_string
+
+
+def words(page: dict, bbox=None, **kwargs) -> list[dict]:
+    """Mots de la page (ou de bbox) comme Page.extract_words(**kwargs)."""
+    return utils.extract_words(chars(page, bbox), **kwargs)
+
+
+def find_tables(page: dict) -> list[list[list]]:
+    """Tableaux à traits de la page (réglages par défaut de pdfplumber).
+
+    Returns:
+        un tableau par élément, chacun en lignes de bbox de cellules (None si vide),
+        dans l'ordre de Page.find_tables().
+    """
+    if page["backend"] == "pdfplumber":
+        tables = page["native"].find_tables()
+    else:
+        area = SimpleNamespace(edges=edges(page), bbox=_bbox_or_page(page, None))
+        tables = TableFinder(area, TableSettings.resolve(None)).tables
+    return [[list(row.cells) for row in table.rows] for table in tables]
+
+
+def char_in_bbox(char: dict, bbox) -> bool:
+    """Règle du point milieu de pdfplumber.table (attribution d'un caractère à une cellule)."""
+    v_mid = (char["top"] + char["bottom"]) / 2
+    h_mid = (char["x0"] + char["x1"]) / 2
+    x0, top, x1, bottom = bbox
+    return (h_mid >= x0) and (h_mid < x1) and (v_mid >= top) and (v_mid < bottom)
+
+
+def cell_text(page: dict, bbox) -> str | None:
+    """Texte d'une cellule comme Table.extract() ; None pour une cellule absente."""
+    if bbox is None:
+        return None
+    return utils.extract_text([c for c in chars(page) if char_in_bbox(c, bbox)])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Fenêtre filtrée (sans objets hors cadre)
+# ═══════════════════════════════════════════════════════════════════════════
+
+WINDOW_KINDS = ("chars", "rects", "curves", "lines")
+
+
+def _touches(x0: float, top: float, x1: float, bottom: float, bbox, margin: float = 0.0) -> bool:
+    """La boîte (x0, top, x1, bottom) touche bbox élargi de margin (bords compris)."""
+    bx0, btop, bx1, bbottom = bbox
+    return (x1 >= bx0 - margin and x0 <= bx1 + margin
+            and bottom >= btop - margin and top <= bbottom + margin)
+
+
+def _color_rgb(color) -> tuple | None:
+    """Couleur pdfplumber (gris, RGB ou CMJN, scalaire ou tuple) en RGB 0-1."""
+    if color is None:
+        return None
+    if isinstance(color, (int, float)):
+        return (float(color),) * 3
+    try:
+        if len(color) == 1:
+            return (float(color[0]),) * 3
+        if len(color) == 3:
+            return tuple(float(v) for v in color)
+        if len(color) == 4:
+            c, m, y, k = (float(v) for v in color)
+            return ((1 - c) * (1 - k), (1 - m) * (1 - k), (1 - y) * (1 - k))
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _color_near(color, colors, tol: float) -> bool:
+    rgb = _color_rgb(color)
+    return rgb is not None and any(
+        all(abs(a - b) <= tol for a, b in zip(rgb, target)) for target in colors)
+
+
+def _string_advance(textstate, seq) -> tuple:
+    """Position de fin d'une chaîne horizontale, calculée comme
+    PDFTextDevice.render_string_horizontal mais sans rendre les caractères."""
+    font, fontsize = textstate.font, textstate.fontsize
+    scaling = textstate.scaling * 0.01
+    charspace = textstate.charspace * scaling
+    wordspace = 0 if font.is_multibyte() else textstate.wordspace * scaling
+    dxscale = 0.001 * fontsize * scaling
+    x, y = textstate.linematrix
+    needcharspace = False
+    for obj in seq:
+        if isinstance(obj, (int, float)):
+            x -= obj * dxscale
+            needcharspace = True
+        elif isinstance(obj, bytes):
+            for cid in font.decode(obj):
+                if needcharspace:
+                    x += charspace
+                x += font.char_width(cid) * fontsize * scaling
+                if cid == 32 and wordspace:
+                    x += wordspace
+                needcharspace = True
+    return (x, y)
+
+
+def _window_device(rsrcmgr, pageno: int, laparams, kinds, bbox, colors, tol: float):
+    """Device pdfminer de pdfplumber qui n'ajoute à la mise en page que les objets utiles.
+
+    Le texte n'est pas rendu si "chars" n'est pas demandé ; une chaîne horizontale dont
+    la bande verticale ne touche pas bbox avance sans créer de caractères (seule la
+    position de la ligne est tenue à jour) ; les images sont ignorées, un tracé hors
+    couleurs n'est pas classé, et un objet qui ne touche pas bbox est retiré sitôt
+    créé. Les marges d'un point laissent le filtre exact aux dicts.
+    bbox est en coordonnées pdfminer, y changé de signe (voir _plumber_window).
+    """
+    from pdfminer.utils import mult_matrix
+    from pdfplumber.page import PDFPageAggregatorWithMarkedContent
+
+    def inside(items):
+        return [o for o in items if _touches(o.x0, -o.y1, o.x1, -o.y0, bbox, 1.0)]
+
+    def off_rows(textstate, ctm) -> bool:
+        a, b, c, d, e, f = mult_matrix(textstate.matrix, ctm)
+        if b != 0 or c != 0 or textstate.font.is_vertical():
+            return False
+        # boîte verticale de LTChar : descente + montée, sur la ligne courante
+        fontsize = textstate.fontsize
+        y0 = f + d * (textstate.linematrix[1] + textstate.font.get_descent() * fontsize
+                      + textstate.rise)
+        y1 = y0 + d * fontsize
+        return not _touches(bbox[0], -max(y0, y1), bbox[2], -min(y0, y1), bbox, 1.0)
+
+    class WindowDevice(PDFPageAggregatorWithMarkedContent):
+        def render_string(self, textstate, seq, ncs, graphicstate):
+            if "chars" not in kinds:
+                return
+            if bbox is not None and off_rows(textstate, self.ctm):
+                textstate.linematrix = _string_advance(textstate, seq)
+                return
+            objs = self.cur_item._objs
+            start = len(objs)
+            super().render_string(textstate, seq, ncs, graphicstate)
+            if bbox is not None:
+                objs[start:] = inside(objs[start:])
+
+        def render_image(self, *args, **kwargs):
+            pass
+
+        def paint_path(self, gstate, stroke, fill, evenodd, path):
+            if colors is not None and not (_color_near(gstate.ncolor, colors, tol)
+                                           or _color_near(gstate.scolor, colors, tol)):
+                return
+            objs = self.cur_item._objs
+            start = len(objs)
+            super().paint_path(gstate, stroke, fill, evenodd, path)
+            if bbox is not None:
+                objs[start:] = inside(objs[start:])
+
+    return WindowDevice(rsrcmgr, pageno=pageno, laparams=laparams)
+
+
+_plumber_internals_found = None  # résultat de _plumber_internals(), état du processus
+
+
+def _plumber_internals() -> bool:
+    """Les internes pdfminer dont dépendent _window_device et _string_advance existent.
+
+    Ils ne font pas partie de l'API publique (voir les bornes de requirements.txt) :
+    sans eux, window() retombe sur la lecture complète de la page.
+    """
+    global _plumber_internals_found
+    if _plumber_internals_found is None:
+        try:
+            from pdfminer.converter import PDFTextDevice
+            from pdfminer.layout import LTLayoutContainer
+            from pdfplumber.page import PDFPageAggregatorWithMarkedContent
+        except ImportError:
+            _plumber_internals_found = False
+        else:
+            _plumber_internals_found = (
+                hasattr(PDFTextDevice, "render_string_horizontal")
+                and hasattr(PDFPageAggregatorWithMarkedContent, "get_result")
+                and isinstance(getattr(LTLayoutContainer((0, 0, 0, 0)), "_objs", None), list))
+    return _plumber_internals_found
+
+
+def _plumber_window_supported(native) -> bool:
+    """La page pdfplumber peut être lue par _plumber_window."""
+    return (_plumber_internals() and hasattr(native, "iter_layout_objects")
+            and hasattr(native.pdf, "rsrcmgr") and hasattr(native.pdf, "laparams"))
+
+
+def _plumber_window(page: dict, kinds, bbox, colors, tol: float) -> dict:
+    from pdfminer.pdfinterp import PDFPageInterpreter
+
+    native = page["native"]
+    if bbox is not None:
+        # boîte pdfplumber -> pdfminer (y vers le haut, relatif à la MediaBox), en
+        # négatif pour garder la comparaison top/bottom de _touches
+        mb_x0, mb_top = native.mediabox[:2]
+        x0, top, x1, bottom = bbox
+        bbox = (x0 - mb_x0, top - mb_top - native.height, x1 - mb_x0, bottom - mb_top - native.height)
+    device = _window_device(native.pdf.rsrcmgr, native.page_number, native.pdf.laparams,
+                            kinds, bbox, colors, tol)
+    PDFPageInterpreter(native.pdf.rsrcmgr, device).process_page(native.page_obj)
+    out = {}
+    for obj in native.iter_layout_objects(device.get_result()._objs):
+        out.setdefault(obj["object_type"] + "s", []).append(obj)
+    return out
+
+
+def _pdfium_window(page: dict, kinds, bbox, colors, tol: float) -> dict:
+    left, top0 = page["origin"]
+    offset = top0 - page["height"]
+    shapes = {"lines": [], "rects": [], "curves": []}
+    if any(kind in shapes for kind in kinds):
+        _pdfium_objects(page, None, (1, 0, 0, 1, -left, -offset), shapes, bbox, colors, tol)
+    out = _pdfium_finish_shapes(page, shapes)
+    if "chars" in kinds:
+        out["chars"] = _pdfium_chars(page, bbox)
+    return out
+
+
+def window(page: dict, bbox=None, kinds=WINDOW_KINDS, colors=None, tol: float = 0.0) -> dict:
+    """Objets de la page qui touchent bbox, filtrés pendant la lecture du flux de contenu.
+
+    Les objets hors du cadre ou hors couleurs ne deviennent jamais des dicts : pdfium
+    les écarte sur leur couleur et leurs bornes avant de lire les segments (ou la
+    boîte « loose » avant de lire un caractère), pdfplumber interprète la page avec
+    un device qui ne décode pas le texte inutile et ne classe pas ces tracés. Si les
+    objets de la page sont déjà extraits (page partagée par fiche_pass.py), ils sont
+    simplement filtrés : mêmes dicts que rects(page), curves(page)... Le device
+    pdfplumber s'appuie sur des internes de pdfminer ; s'ils manquent, la page est lue
+    en entier puis filtrée de la même façon.
+
+    Args:
+        page: page pdf_backend
+        bbox: (x0, top, x1, bottom) ; un objet est gardé si sa boîte le touche, bords
+              compris, sans être rognée (contrairement à chars(page, bbox)) ; None pour
+              toute la page
+        kinds: sortes d'objets voulues, parmi WINDOW_KINDS
+        colors: couleurs RGB 0-1 ; un tracé n'est gardé que si sa couleur de
+                remplissage ou de trait est à tol près (par composante) de l'une
+                d'elles (gris et CMJN convertis en RGB) ; None pour ne pas filtrer.
+                Les caractères ne sont pas filtrés sur la couleur.
+        tol: tolérance sur les couleurs
+
+    Returns:
+        {sorte: [objets au format pdfplumber, dans l'ordre de la page]} pour chaque
+        sorte de kinds.
+    """
+    if page["backend"] == "pdfplumber":
+        native = page["native"]
+        if hasattr(native, "_objects") or not _plumber_window_supported(native):
+            found = {kind: getattr(native, kind) for kind in kinds}
+        else:
+            found = _plumber_window(page, kinds, bbox, colors, tol)
+    elif "chars" in page["cache"]:
+        found = page["cache"]
+    else:
+        found = _pdfium_window(page, kinds, bbox, colors, tol)
+    out = {}
+    for kind in kinds:
+        objs = found.get(kind, [])
+        if bbox is not None:
+            objs = [o for o in objs if _touches(o["x0"], o["top"], o["x1"], o["bottom"], bbox)]
+        if colors is not None and kind != "chars":
+            objs = [o for o in objs if _color_near(o.get("non_stroking_color"), colors, tol)
+                    or _color_near(o.get("stroking_color"), colors, tol)]
+        out[kind] = objs
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Recherche rapide (sans analyse de mise en page)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Chaînes d'un flux de contenu : littérales (un niveau de parenthèses imbriquées) ou
+# hexadécimales (pas les dictionnaires "<<")
+_STRING_RE = re.compile(rb"\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)|<(?!<)[0-9A-Fa-f\s]*>", re.S)
+_ESCAPE_RE = re.compile(rb"\\([0-7]{1,3}|\r\n|.)", re.S)
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+            b"\r\n": b"", b"\n": b"", b"\r": b""}  # barre oblique + fin de ligne : continuation
+
+
+def _unescape(match) -> bytes:
+    code = match.group(1)
+    if code[:1].isdigit():
+        return bytes([int(code, 8) & 0xFF])
+    return _ESCAPES.get(code, code)
+
+
+def _string_bytes(token: bytes) -> bytes:
+    if token[:1] == b"(":
+        return _ESCAPE_RE.sub(_unescape, token[1:-1])
+    digits = re.sub(rb"\s", b"", token[1:-1])
+    return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())
+
+
+def _has_subtype(resources: dict, category: str, subtypes: set) -> bool:
+    from pdfminer.pdftypes import resolve1
+
+    for obj in (resolve1(resources.get(category)) or {}).values():
+        obj = resolve1(obj)
+        attrs = getattr(obj, "attrs", obj)
+        subtype = resolve1(attrs.get("Subtype")) if isinstance(attrs, dict) else None
+        if getattr(subtype, "name", None) in subtypes:
+            return True
+    return False
+
+
+def content_text(page: dict) -> str | None:
+    """Texte brut de la page, lu sans analyse de mise en page, pour une recherche rapide.
+
+    pdfplumber : chaînes du flux de contenu décodé, concaténées sans espacement (octets
+    lus en latin-1). None si la page utilise des polices composites ou Type3 (codes de
+    caractères non textuels) ou des XObjects de formulaire (texte hors du flux de la
+    page) : la page doit alors être lue par page_text.
+    pdfium : couche texte native de PDFium (FPDFText), sans reconstruction des lignes.
+
+    Les espaces n'y sont pas fiables : comparer des textes débarrassés de leurs espaces,
+    et confirmer par page_text.
+    """
+    if page["backend"] == "pdfium":
+        return _textpage(page).get_text_range()
+
+    from pdfminer.pdftypes import resolve1
+
+    page_obj = page["native"].page_obj
+    resources = resolve1(page_obj.resources) or {}
+    if (_has_subtype(resources, "Font", {"Type0", "Type3"})
+            or _has_subtype(resources, "XObject", {"Form"})):
+        return None
+    data = b"\n".join(resolve1(stream).get_data() for stream in page_obj.contents)
+    return b"".join(_string_bytes(m.group()) for m in _STRING_RE.finditer(data)).decode("latin-1")
+
+
+def _outline_dest_page(native, dest, action, page_index: dict) -> int | None:
+    from pdfminer.pdfdocument import PDFDestinationNotFound
+    from pdfminer.pdftypes import resolve1
+    from pdfminer.psparser import PSLiteral
+
+    if dest is None and action is not None:
+        action = resolve1(action)
+        dest = action.get("D") if isinstance(action, dict) else None
+    dest = resolve1(dest)
+    if isinstance(dest, (str, bytes, PSLiteral)):
+        name = dest.name if isinstance(dest, PSLiteral) else dest
+        try:
+            dest = resolve1(native.doc.get_dest(name))
+        except (KeyError, PDFDestinationNotFound):
+            return None
+    if isinstance(dest, dict):
+        dest = resolve1(dest.get("D"))
+    if isinstance(dest, list) and dest:
+        return page_index.get(getattr(dest[0], "objid", None))
+    return None
+
+
+def outline(doc: dict) -> list[tuple[str, int]]:
+    """Signets du document : [(titre, index de page 0-based)] ; les signets sans page
+    résolue sont omis, [] pour un document sans signets."""
+    if doc["backend"] == "pdfium":
+        items = []
+        for bookmark in doc["native"].get_toc():
+            dest = bookmark.get_dest()
+            index = dest.get_index() if dest is not None else None
+            if index is not None:
+                items.append((bookmark.get_title(), index))
+        return items
+
+    from pdfminer.pdfdocument import PDFNoOutlines
+
+    native = doc["native"]
+    page_index = {p.page_obj.pageid: i for i, p in enumerate(native.pages)}
+    items = []
+    try:
+        for _level, title, dest, action, _se in native.doc.get_outlines():
+            index = _outline_dest_page(native, dest, action, page_index)
+            if index is not None:
+                items.append((title, index))
+    except PDFNoOutlines:
+        return []
+    return items
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Comparaison des backends
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+def compare_backends(paths, extractors) -> tuple[list[str], dict[str, float]]:
+    """Applique fiche_pass aux fiches avec chaque backend.
+
+    Returns:
+        (fiches dont les résultats diffèrent, {backend: secondes})
+    """
+    import fiche_pass
+
+    results, seconds = {}, {}
+    for backend in PDF_BACKENDS:
+        t0 = time.perf_counter()
+        results[backend] = [fiche_pass.parse_fiche(p, tuple(extractors), backend=backend) for p in paths]
+        seconds[backend] = time.perf_counter() - t0
+    reference = results[PDF_BACKENDS[0]]
+    differing = [
+        Path(p).name for i, p in enumerate(paths)
+        if any(results[b][i] != reference[i] for b in PDF_BACKENDS[1:])
+    ]
+    return differing, seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare les backends PDF sur des fiches NAF")
+    parser.add_argument("--pdf-dir", required=True, help="Dossier contenant les fichiers NAF_*.pdf")
+    parser.add_argument("--limit", type=int, default=None, help="Nombre maximal de fiches")
+    args = parser.parse_args()
+
+    import fiche_pass
+
+    paths = sorted(Path(args.pdf_dir).glob("NAF_*.pdf"))[:args.limit]
+    if not paths:
+        print(f"Erreur : aucune fiche NAF_*.pdf dans '{args.pdf_dir}'.", file=sys.stderr)
+        sys.exit(1)
+    differing, seconds = compare_backends(paths, fiche_pass.resolve_extractors(fiche_pass.DEFAULT_EXTRACTORS))
+    for backend, s in seconds.items():
+        print(f"  {backend:<10} : {s:.2f}s ({len(paths)} fiche(s))")
+    if differing:
+        print(f"  {len(differing)} fiche(s) différente(s) : {', '.join(differing[:20])}")
+        sys.exit(1)
+    print("  Résultats identiques.")
+
+
+if __name__ == "__main__":
+    main()
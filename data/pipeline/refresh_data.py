@@ -2,18 +2,35 @@
 """Telecharge les donnees AT + MP depuis ameli.fr et produit les JSON pour le dashboard.
 
 Usage:
-    python refresh_data.py [--pdf-dir /chemin/vers/pdfs]
+    python refresh_data.py [--pdf-dir /chemin/vers/pdfs] [--rapport-pdf rapport.pdf]
+                           [--columnar] [--xlsx-backend stream] [--pdf-backend pdfium]
+                           [--no-cache] [--jobs N] [--workers N] [--force STAGE]
+                           [--pdf-timeout SECONDES] [--max-docs-per-worker N]
 
 Sorties dans data/ (dossier parent de data/pipeline/) :
     at-data.json, mp-data.json, trajet-data.json
+    extra-dimensions.json, size-data.json (avec --pdf-dir, voir fiche_pass.py)
+
+Le resultat du parsing Excel est mis en cache dans data/pipeline/.cache/ (voir
+CACHE DE PARSING) : tant que les classeurs et les mappings de colonnes ne changent
+pas, les re-executions sautent la phase Excel. Les etapes independantes (AT, MP,
+PDF fiches, rapport regional) tournent en parallele (scheduler.py) ; la fusion PDF,
+l'evolution annuelle et le Trajet attendent les deux cotes.
 """
 
+import hashlib
 import json
+import os
 import subprocess
 import sys
+import time
+import zipfile
 from pathlib import Path
 from collections import defaultdict
 
+from manifest import file_sha256, stage_cache
+from scheduler import print_timings, run_stages
+
 PIPELINE_DIR = Path(__file__).parent
 OUTPUT_DIR = PIPELINE_DIR.parent  # data/
 
@@ -33,6 +50,9 @@ AT_COL = {
     "at_1er_reglement": 11, "at_4j_arret": 12,
     "nouvelles_ip": 13, "deces": 16, "journees_it": 17,
 }
+# Mesures AT sommees a chaque niveau NAF (ordre des colonnes du mode colonnaire)
+AT_MEASURES = ["nb_salaries", "nb_heures", "nb_siret", "at_1er_reglement",
+               "at_4j_arret", "nouvelles_ip", "deces", "journees_it"]
 # Le fichier 2024 inclut les causes de risque en colonnes 20-31 (le format 2023
 # ne les fournissait pas, d'ou l'ancien recours au fichier 2021). L'ordre des
 # colonnes de causes differe de l'ancien mapping : il suit l'en-tete 2024.
@@ -69,6 +89,11 @@ MP_COL = {
     "top_cancers": 27, "top_cancers_ht": 28, "top_psy": 29,
 }
 
+# Mesures MP sommees a chaque niveau NAF
+MP_MEASURES = ["nb_salaries", "nb_heures", "nb_siret", "mp_1er_reglement",
+               "nouvelles_ip", "ip_taux_inf_10", "ip_taux_sup_10",
+               "deces", "journees_it", "somme_taux_ip"]
+
 # Causes MP derivees des flags (colonnes 24-29)
 MP_CAUSE_FLAGS = {
     "TMS": 24,
@@ -89,8 +114,17 @@ MP_TABLEAU_MAP = {
 # ── Trajet config ──
 TRAJET_JSON_PATH = OUTPUT_DIR / "trajet-data.json"
 
+# ── Regional / manifeste ──
+REGIONAL_JSON_PATH = OUTPUT_DIR / "regional-data.json"
+EXTRA_JSON_PATH = OUTPUT_DIR / "extra-dimensions.json"
+SIZE_JSON_PATH = OUTPUT_DIR / "size-data.json"
+MANIFEST_PATH = OUTPUT_DIR / "refresh-manifest.json"
+
 HEADER_ROW = 4  # 1-based, identique pour AT et MP
 
+# Lecteurs Excel : openpyxl (reference) ou lecture en flux du XML (xlsx_stream.py)
+XLSX_BACKENDS = ("openpyxl", "stream")
+
 
 def download_xlsx(path, url):
     """Telecharge un fichier Excel depuis ameli.fr via curl (gere le SSL)."""
@@ -102,6 +136,29 @@ def download_xlsx(path, url):
     print(f"  [ok] Sauvegarde ({path.stat().st_size / 1024:.0f} KB)")
 
 
+def iter_xlsx_rows(xlsx_path, columns, backend="openpyxl"):
+    """Itere les lignes de donnees (apres HEADER_ROW) de la feuille active.
+
+    Chaque ligne est un tuple compact : une valeur par indice de `columns`
+    (0-based, dans cet ordre). Le backend "stream" ne materialise que ces
+    colonnes ; "openpyxl" reste la reference pour les tests d'equivalence.
+    """
+    if backend not in XLSX_BACKENDS:
+        raise ValueError(f"Backend Excel inconnu : {backend} (attendu : {', '.join(XLSX_BACKENDS)})")
+    if backend == "stream":
+        from xlsx_stream import iter_sheet_rows
+        yield from iter_sheet_rows(xlsx_path, columns, min_row=HEADER_ROW + 1)
+        return
+
+    import openpyxl
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(min_row=HEADER_ROW + 1, values_only=True):
+            yield tuple(row[c] for c in columns)
+    finally:
+        wb.close()
+
+
 def safe_num(val):
     if val is None:
         return 0
@@ -133,19 +190,150 @@ def write_json(data, json_path, label):
     print(f"  [ok] {label} : {json_path.name} ({json_path.stat().st_size / 1024:.0f} KB)")
 
 
+def build_naf_index(by_naf5, by_naf4, by_naf2):
+    """Index de recherche (code, libelle, niveau) trie par niveau puis code."""
+    naf_index = []
+    for level, entries in [("naf5", by_naf5), ("naf4", by_naf4), ("naf2", by_naf2)]:
+        for code, data in entries.items():
+            naf_index.append({"code": code, "libelle": data["libelle"], "level": level})
+    naf_index.sort(key=lambda x: (x["level"], x["code"]))
+    return naf_index
+
+
+# ═══════════════════════════════════════════
+# ROLLUP NAF (commun AT / MP)
+# ═══════════════════════════════════════════
+
+def _new_rollup_group(fields):
+    g = {field: 0 for field in fields}
+    g.update({
+        "causes": {}, "source_codes": [],
+        "libelle": "", "libelle_pos": float("inf"),
+        "libelle_naf2": "", "libelle_naf2_pos": float("inf"),
+    })
+    return g
+
+
+def _merge_rollup_group(target, g, fields, label_key):
+    """Ajoute les sommes partielles de g dans target (libelle : le plus ancien gagne)."""
+    for field in fields:
+        target[field] += g[field]
+    causes = target["causes"]
+    for cause, val in g["causes"].items():
+        causes[cause] = causes.get(cause, 0.0) + val
+    target["source_codes"].extend(g["source_codes"])
+    if g[label_key + "_pos"] < target["libelle_pos"]:
+        target["libelle"] = g[label_key]
+        target["libelle_pos"] = g[label_key + "_pos"]
+
+
+def rollup_naf_rows(rows, fields, causes_key):
+    """Agrege les lignes en un seul passage au niveau NAF5, puis derive NAF4, NAF2 et
+    national en fusionnant les sommes partielles NAF5 (au lieu d'un parcours par niveau).
+
+    Chaque groupe porte ses champs sommes, ses sous-totaux de causes ("causes"),
+    ses source_codes et son libelle. Le libelle retenu est le premier non vide dans
+    l'ordre des lignes : chaque groupe NAF5 garde la position de ligne de son libelle
+    (et de son libelle NAF2) pour que la fusion choisisse le plus ancien.
+
+    Retourne {"naf5": {...}, "naf4": {...}, "naf2": {...}, "national": {...}}.
+    """
+    naf5_groups = {}
+    for pos, row in enumerate(rows):
+        code = row["naf5"]
+        g = naf5_groups.get(code)
+        if g is None:
+            g = naf5_groups[code] = _new_rollup_group(fields)
+            g["naf2"] = row["naf2"]
+            g["source_codes"].append(code)
+        for field in fields:
+            g[field] += row[field]
+        causes = g["causes"]
+        for cause, val in row[causes_key].items():
+            causes[cause] = causes.get(cause, 0.0) + val
+        if not g["libelle"] and row["libelle"]:
+            g["libelle"], g["libelle_pos"] = row["libelle"], pos
+        if not g["libelle_naf2"] and row["libelle_naf2"]:
+            g["libelle_naf2"], g["libelle_naf2_pos"] = row["libelle_naf2"], pos
+
+    naf4_groups = {}
+    naf2_groups = {}
+    national = {field: 0 for field in fields}
+    for code, g in naf5_groups.items():
+        for groups, key, label_key in [(naf4_groups, code[:4], "libelle"),
+                                       (naf2_groups, g["naf2"], "libelle_naf2")]:
+            if not key:
+                continue
+            if key not in groups:
+                groups[key] = _new_rollup_group(fields)
+            _merge_rollup_group(groups[key], g, fields, label_key)
+        for field in fields:
+            national[field] += g[field]
+
+    return {"naf5": naf5_groups, "naf4": naf4_groups, "naf2": naf2_groups, "national": national}
+
+
+def build_naf_dataset(rollup, compute_stats, compute_causes, total_field, source, source_url):
+    """Construit la structure du dashboard (NAF5, NAF4, NAF2, national + index) depuis un rollup.
+
+    Seul endroit ou compute_at_stats / compute_mp_stats et les pourcentages de causes
+    sont derives des sommes brutes, quel que soit le moteur d'agregation.
+    """
+    def derived(g):
+        return {
+            "stats": compute_stats(g),
+            "risk_causes": compute_causes(dict(g["causes"]), g[total_field]),
+        }
+
+    by_naf5 = {}
+    for code, g in sorted(rollup["naf5"].items()):
+        by_naf5[code] = {"libelle": g["libelle"], "naf4": code[:4], "naf2": code[:2], **derived(g)}
+
+    by_naf4 = {}
+    for code, g in sorted(rollup["naf4"].items()):
+        by_naf4[code] = {
+            "libelle": g["libelle"], "naf2": code[:2],
+            "codes_naf5": sorted(set(g["source_codes"])),
+            **derived(g),
+        }
+
+    by_naf2 = {}
+    for code, g in sorted(rollup["naf2"].items()):
+        by_naf2[code] = {"libelle": g["libelle"], **derived(g)}
+
+    return {
+        "meta": {
+            "source": source,
+            "source_url": source_url,
+            "national": compute_stats(rollup["national"]),
+        },
+        "by_naf5": by_naf5, "by_naf4": by_naf4, "by_naf2": by_naf2,
+        "naf_index": build_naf_index(by_naf5, by_naf4, by_naf2),
+    }
+
+
 # ═══════════════════════════════════════════
 # AT PIPELINE
 # ═══════════════════════════════════════════
 
-def parse_at_xlsx():
+# Colonnes AT lues : libelles puis mesures (cles de AT_COL), puis causes de risque
+AT_READ_KEYS = ["ctn", "naf5", "naf2", "libelle_naf", "libelle_naf2"] + AT_MEASURES
+
+
+def at_read_columns():
+    """Indices Excel lus par les parseurs AT et position de chaque cle dans le tuple."""
+    columns = [AT_COL[k] for k in AT_READ_KEYS] + list(AT_RISK_CAUSES)
+    return columns, {k: i for i, k in enumerate(AT_READ_KEYS)}
+
+
+def parse_at_xlsx(xlsx_path=AT_XLSX_PATH, backend="openpyxl"):
     """Parse le fichier Excel AT, retourne une liste de dicts par ligne."""
-    import openpyxl
-    wb = openpyxl.load_workbook(AT_XLSX_PATH, read_only=True, data_only=True)
-    ws = wb.active
+    columns, pos = at_read_columns()
+    cause_pos = list(enumerate(AT_RISK_CAUSES.values(), len(AT_READ_KEYS)))
 
     data_rows = []
-    for row in ws.iter_rows(min_row=HEADER_ROW + 1, values_only=True):
-        naf5_val = row[AT_COL["naf5"]]
+    for row in iter_xlsx_rows(xlsx_path, columns, backend):
+        naf5_val = row[pos["naf5"]]
         if not naf5_val:
             continue
         naf5 = str(naf5_val).strip()
@@ -153,24 +341,22 @@ def parse_at_xlsx():
             continue
 
         entry = {
-            "ctn": str(row[AT_COL["ctn"]] or "").strip(),
+            "ctn": str(row[pos["ctn"]] or "").strip(),
             "naf5": naf5,
-            "naf2": str(row[AT_COL["naf2"]] or naf5[:2]).strip(),
-            "libelle": str(row[AT_COL["libelle_naf"]] or "").strip(),
-            "libelle_naf2": str(row[AT_COL["libelle_naf2"]] or "").strip(),
+            "naf2": str(row[pos["naf2"]] or naf5[:2]).strip(),
+            "libelle": str(row[pos["libelle_naf"]] or "").strip(),
+            "libelle_naf2": str(row[pos["libelle_naf2"]] or "").strip(),
         }
 
-        for key in ["nb_salaries", "nb_heures", "nb_siret", "at_1er_reglement",
-                     "at_4j_arret", "nouvelles_ip", "deces", "journees_it"]:
-            entry[key] = safe_num(row[AT_COL[key]])
+        for key in AT_MEASURES:
+            entry[key] = safe_num(row[pos[key]])
 
         entry["risk_causes_raw"] = {}
-        for col_idx, label in AT_RISK_CAUSES.items():
-            entry["risk_causes_raw"][label] = safe_num(row[col_idx])
+        for i, label in cause_pos:
+            entry["risk_causes_raw"][label] = safe_num(row[i])
 
         data_rows.append(entry)
 
-    wb.close()
     print(f"  [parse] {len(data_rows)} lignes AT")
     return data_rows
 
@@ -201,107 +387,150 @@ def compute_risk_causes(causes_summed, total_at_4j):
     return {name: round(count / total_at_4j * 100, 1) for name, count in causes_summed.items()}
 
 
-def aggregate_at_rows(rows, key_fn, libelle_fn=None):
-    """Agrege les lignes AT par une cle de groupement."""
-    groups = defaultdict(lambda: {
-        "nb_salaries": 0, "nb_heures": 0, "nb_siret": 0,
-        "at_1er_reglement": 0, "at_4j_arret": 0,
-        "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-        "risk_causes_raw": defaultdict(float),
-        "source_codes": [],
-        "libelle": "",
-    })
-    for row in rows:
-        key = key_fn(row)
-        if not key:
-            continue
-        g = groups[key]
-        for field in ["nb_salaries", "nb_heures", "nb_siret", "at_1er_reglement",
-                       "at_4j_arret", "nouvelles_ip", "deces", "journees_it"]:
-            g[field] += row[field]
-        for cause, val in row["risk_causes_raw"].items():
-            g["risk_causes_raw"][cause] += val
-        g["source_codes"].append(row["naf5"])
-        if libelle_fn:
-            g["libelle"] = libelle_fn(row, g["libelle"])
-        elif not g["libelle"]:
-            g["libelle"] = row.get("libelle", "")
-    return groups
-
-
 def build_at_data(rows):
     """Construit la structure de donnees AT (NAF5, NAF4, NAF2 + index)."""
-    naf5_groups = aggregate_at_rows(rows, key_fn=lambda r: r["naf5"],
-                                    libelle_fn=lambda r, prev: prev or r["libelle"])
-    by_naf5 = {}
-    for code, g in sorted(naf5_groups.items()):
-        by_naf5[code] = {
-            "libelle": g["libelle"], "naf4": code[:4], "naf2": code[:2],
-            "stats": compute_at_stats(g),
-            "risk_causes": compute_risk_causes(dict(g["risk_causes_raw"]), g["at_4j_arret"]),
-        }
+    return build_naf_dataset(
+        rollup_naf_rows(rows, AT_MEASURES, "risk_causes_raw"),
+        compute_at_stats, compute_risk_causes, "at_4j_arret",
+        source="Ameli - Risque AT par CTN x NAF 2024", source_url=AT_XLSX_URL,
+    )
 
-    naf4_groups = aggregate_at_rows(rows, key_fn=lambda r: r["naf5"][:4],
-                                    libelle_fn=lambda r, prev: prev or r["libelle"])
-    by_naf4 = {}
-    for code, g in sorted(naf4_groups.items()):
-        by_naf4[code] = {
-            "libelle": g["libelle"], "naf2": code[:2],
-            "codes_naf5": sorted(set(g["source_codes"])),
-            "stats": compute_at_stats(g),
-            "risk_causes": compute_risk_causes(dict(g["risk_causes_raw"]), g["at_4j_arret"]),
-        }
 
-    naf2_groups = aggregate_at_rows(rows, key_fn=lambda r: r["naf2"],
-                                    libelle_fn=lambda r, prev: prev or r.get("libelle_naf2", r["libelle"]))
-    by_naf2 = {}
-    for code, g in sorted(naf2_groups.items()):
-        by_naf2[code] = {
-            "libelle": g["libelle"],
-            "stats": compute_at_stats(g),
-            "risk_causes": compute_risk_causes(dict(g["risk_causes_raw"]), g["at_4j_arret"]),
-        }
+# ═══════════════════════════════════════════
+# AT PIPELINE - MODE COLONNAIRE (numpy)
+# ═══════════════════════════════════════════
 
-    national = {k: 0 for k in ["nb_salaries", "nb_heures", "nb_siret",
-                                 "at_1er_reglement", "at_4j_arret",
-                                 "nouvelles_ip", "deces", "journees_it"]}
-    for g in naf5_groups.values():
-        for field in national:
-            national[field] += g[field]
+def parse_at_columns(xlsx_path=AT_XLSX_PATH, backend="openpyxl"):
+    """Parse le fichier Excel AT en colonnes typees (sans dict par ligne).
 
-    naf_index = []
-    for code, data in by_naf5.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf5"})
-    for code, data in by_naf4.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf4"})
-    for code, data in by_naf2.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf2"})
-    naf_index.sort(key=lambda x: (x["level"], x["code"]))
+    Memes filtres que parse_at_xlsx. Retourne un dict de tableaux numpy :
+        naf5, naf2, libelle, libelle_naf2, ctn : chaines (une entree par ligne)
+        measures : float64 (n, len(AT_MEASURES))
+        causes   : float64 (n, len(AT_RISK_CAUSES)), ordre de AT_RISK_CAUSES
+    """
+    import numpy as np
+
+    columns, pos = at_read_columns()
+    measure_pos = [pos[k] for k in AT_MEASURES]
+    cause_pos = range(len(AT_READ_KEYS), len(columns))
+    text = {"ctn": [], "naf5": [], "naf2": [], "libelle": [], "libelle_naf2": []}
+    measures = []
+    causes = []
+    for row in iter_xlsx_rows(xlsx_path, columns, backend):
+        naf5_val = row[pos["naf5"]]
+        if not naf5_val:
+            continue
+        naf5 = str(naf5_val).strip()
+        if is_placeholder_naf(naf5):
+            continue
+        text["ctn"].append(str(row[pos["ctn"]] or "").strip())
+        text["naf5"].append(naf5)
+        text["naf2"].append(str(row[pos["naf2"]] or naf5[:2]).strip())
+        text["libelle"].append(str(row[pos["libelle_naf"]] or "").strip())
+        text["libelle_naf2"].append(str(row[pos["libelle_naf2"]] or "").strip())
+        measures.extend(safe_num(row[i]) for i in measure_pos)
+        causes.extend(safe_num(row[i]) for i in cause_pos)
+
+    n = len(text["naf5"])
+    cols = {k: np.array(v, dtype=str) for k, v in text.items()}
+    cols["measures"] = np.array(measures, dtype=np.float64).reshape(n, len(measure_pos))
+    cols["causes"] = np.array(causes, dtype=np.float64).reshape(n, len(cause_pos))
+    print(f"  [parse] {n} lignes AT (colonnaire)")
+    return cols
+
+
+def _segmented_sums(keys, values, labels):
+    """Reduction segmentee : tri stable par cle puis np.add.reduceat.
+
+    Le tri stable conserve l'ordre d'origine des lignes dans chaque segment, donc le
+    libelle retenu est, comme dans rollup_naf_rows, le premier non vide rencontre.
+    Retourne (cles triees uniques, sommes (k, m), libelles (k,)).
+    """
+    import numpy as np
+    if len(keys) == 0:  # reduceat refuse un tableau d'indices vide
+        return keys, np.zeros((0,) + values.shape[1:], dtype=values.dtype), labels
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    sums = np.add.reduceat(values[order], starts, axis=0)
+
+    ends = np.r_[starts[1:], len(sorted_keys)]
+    filled = np.flatnonzero(labels[order] != "")
+    first = np.searchsorted(filled, starts)
+    first_pos = filled[np.minimum(first, len(filled) - 1)] if len(filled) else starts
+    has_label = (first < len(filled)) & (first_pos < ends)
+    group_labels = np.where(has_label, labels[order][first_pos], "")
+    return sorted_keys[starts], sums, group_labels
+
+
+def rollup_at_columns(cols):
+    """Equivalent colonnaire de rollup_naf_rows pour les colonnes de parse_at_columns."""
+    import numpy as np
+    values = np.hstack([cols["measures"], cols["causes"]])
+    cause_names = list(AT_RISK_CAUSES.values())
+    n_meas = len(AT_MEASURES)
+    naf5 = cols["naf5"]
+
+    def groups(keys, labels):
+        codes, sums, libelles = _segmented_sums(keys, values, labels)
+        out = {}
+        for code, row, libelle in zip(codes.tolist(), sums.tolist(), libelles.tolist()):
+            g = dict(zip(AT_MEASURES, row[:n_meas]))
+            g.update({"causes": dict(zip(cause_names, row[n_meas:])),
+                      "libelle": libelle, "source_codes": [code]})
+            out[code] = g
+        return out
+
+    naf5_groups = groups(naf5, cols["libelle"])
+    # source_codes NAF4 : les NAF5 uniques sont tries, chaque NAF4 en est une tranche contigue
+    naf5_codes = np.array(list(naf5_groups), dtype=str)
+    naf5_prefix = naf5_codes.astype("<U4")
+    naf4_groups = groups(naf5.astype("<U4"), cols["libelle"])
+    for code, g in naf4_groups.items():
+        lo = np.searchsorted(naf5_prefix, code, side="left")
+        hi = np.searchsorted(naf5_prefix, code, side="right")
+        g["source_codes"] = naf5_codes[lo:hi].tolist()
 
     return {
-        "meta": {
-            "source": "Ameli - Risque AT par CTN x NAF 2024",
-            "source_url": AT_XLSX_URL,
-            "national": compute_at_stats(national),
-        },
-        "by_naf5": by_naf5, "by_naf4": by_naf4, "by_naf2": by_naf2,
-        "naf_index": naf_index,
+        "naf5": naf5_groups,
+        "naf4": naf4_groups,
+        "naf2": groups(cols["naf2"], cols["libelle_naf2"]),
+        "national": dict(zip(AT_MEASURES, cols["measures"].sum(axis=0).tolist())),
     }
 
 
+def build_at_data_columnar(cols):
+    """Construit la structure AT depuis parse_at_columns (sortie identique a build_at_data)."""
+    return build_naf_dataset(
+        rollup_at_columns(cols),
+        compute_at_stats, compute_risk_causes, "at_4j_arret",
+        source="Ameli - Risque AT par CTN x NAF 2024", source_url=AT_XLSX_URL,
+    )
+
+
 # ═══════════════════════════════════════════
 # MP PIPELINE
 # ═══════════════════════════════════════════
 
-def parse_mp_xlsx():
+# Colonnes MP lues (cles de MP_COL), suivies des flags de MP_CAUSE_FLAGS
+MP_READ_KEYS = ["ctn", "naf5", "libelle_naf", "naf2", "libelle_naf2",
+                "tableau_libelle"] + MP_MEASURES
+
+
+def mp_read_columns():
+    """Indices Excel lus par parse_mp_xlsx et position de chaque cle dans le tuple."""
+    columns = [MP_COL[k] for k in MP_READ_KEYS] + list(MP_CAUSE_FLAGS.values())
+    return columns, {k: i for i, k in enumerate(MP_READ_KEYS)}
+
+
+def parse_mp_xlsx(xlsx_path=MP_XLSX_PATH, backend="openpyxl"):
     """Parse le fichier Excel MP.
     - Main-d'oeuvre (nb_salaries, nb_heures, nb_siret) dedupliquee par CTN+NAF
     - Statistiques MP cumulees sur toutes les lignes (tableau x syndrome)
     - Causes trackees par ligne via les flags
     """
-    import openpyxl
-    wb = openpyxl.load_workbook(MP_XLSX_PATH, read_only=True, data_only=True)
-    ws = wb.active
+    columns, pos = mp_read_columns()
+    flag_pos = list(enumerate(MP_CAUSE_FLAGS, len(MP_READ_KEYS)))
 
     # Passe 1 : main-d'oeuvre unique par CTN+NAF
     workforce = {}
@@ -314,45 +543,45 @@ def parse_mp_xlsx():
         "libelle": "", "naf2": "", "libelle_naf2": "", "ctn_set": set(),
     })
 
-    for row in ws.iter_rows(min_row=HEADER_ROW + 1, values_only=True):
-        naf5_val = row[MP_COL["naf5"]]
+    for row in iter_xlsx_rows(xlsx_path, columns, backend):
+        naf5_val = row[pos["naf5"]]
         if not naf5_val:
             continue
         naf5 = str(naf5_val).strip()
         if is_placeholder_naf(naf5):
             continue
 
-        ctn = str(row[MP_COL["ctn"]] or "").strip()
+        ctn = str(row[pos["ctn"]] or "").strip()
         key = (ctn, naf5)
 
         # Main-d'oeuvre : premiere occurrence par CTN+NAF (identique sur toutes les lignes)
         if key not in workforce:
             workforce[key] = {
-                "nb_salaries": safe_num(row[MP_COL["nb_salaries"]]),
-                "nb_heures": safe_num(row[MP_COL["nb_heures"]]),
-                "nb_siret": safe_num(row[MP_COL["nb_siret"]]),
+                "nb_salaries": safe_num(row[pos["nb_salaries"]]),
+                "nb_heures": safe_num(row[pos["nb_heures"]]),
+                "nb_siret": safe_num(row[pos["nb_siret"]]),
             }
 
         # Statistiques MP : cumul sur toutes les lignes (tableau x syndrome)
         mp = naf5_mp[naf5]
-        mp_count = safe_num(row[MP_COL["mp_1er_reglement"]])
+        mp_count = safe_num(row[pos["mp_1er_reglement"]])
         mp["mp_1er_reglement"] += mp_count
-        mp["nouvelles_ip"] += safe_num(row[MP_COL["nouvelles_ip"]])
-        mp["ip_taux_inf_10"] += safe_num(row[MP_COL["ip_taux_inf_10"]])
-        mp["ip_taux_sup_10"] += safe_num(row[MP_COL["ip_taux_sup_10"]])
-        mp["deces"] += safe_num(row[MP_COL["deces"]])
-        mp["journees_it"] += safe_num(row[MP_COL["journees_it"]])
-        mp["somme_taux_ip"] += safe_num(row[MP_COL["somme_taux_ip"]])
+        mp["nouvelles_ip"] += safe_num(row[pos["nouvelles_ip"]])
+        mp["ip_taux_inf_10"] += safe_num(row[pos["ip_taux_inf_10"]])
+        mp["ip_taux_sup_10"] += safe_num(row[pos["ip_taux_sup_10"]])
+        mp["deces"] += safe_num(row[pos["deces"]])
+        mp["journees_it"] += safe_num(row[pos["journees_it"]])
+        mp["somme_taux_ip"] += safe_num(row[pos["somme_taux_ip"]])
 
         # Categorisation des causes : flags en priorite, puis nom du tableau
         if mp_count > 0:
             flagged = False
-            for cause_name, col_idx in MP_CAUSE_FLAGS.items():
-                if row[col_idx] == "oui":
+            for i, cause_name in flag_pos:
+                if row[i] == "oui":
                     mp["cause_counts"][cause_name] += mp_count
                     flagged = True
             if not flagged:
-                tab_name = str(row[MP_COL["tableau_libelle"]] or "").strip()
+                tab_name = str(row[pos["tableau_libelle"]] or "").strip()
                 category = "Autres MP"
                 for prefix, cat in MP_TABLEAU_MAP.items():
                     if tab_name.startswith(prefix):
@@ -361,15 +590,13 @@ def parse_mp_xlsx():
                 mp["cause_counts"][category] += mp_count
 
         if not mp["libelle"]:
-            mp["libelle"] = str(row[MP_COL["libelle_naf"]] or "").strip()
+            mp["libelle"] = str(row[pos["libelle_naf"]] or "").strip()
         if not mp["naf2"]:
-            mp["naf2"] = str(row[MP_COL["naf2"]] or naf5[:2]).strip()
+            mp["naf2"] = str(row[pos["naf2"]] or naf5[:2]).strip()
         if not mp["libelle_naf2"]:
-            mp["libelle_naf2"] = str(row[MP_COL["libelle_naf2"]] or "").strip()
+            mp["libelle_naf2"] = str(row[pos["libelle_naf2"]] or "").strip()
         mp["ctn_set"].add(ctn)
 
-    wb.close()
-
     # Construction des lignes aggregees : une par NAF5, main-d'oeuvre somme sur les CTNs
     naf5_workforce = defaultdict(lambda: {"nb_salaries": 0, "nb_heures": 0, "nb_siret": 0})
     for (ctn, naf5), wf in workforce.items():
@@ -429,95 +656,164 @@ def compute_mp_causes(cause_counts, total_mp):
     return {name: round(count / total_mp * 100, 1) for name, count in cause_counts.items()}
 
 
-def aggregate_mp_rows(rows, key_fn, libelle_fn=None):
-    """Agrege les lignes MP par une cle de groupement."""
-    groups = defaultdict(lambda: {
-        "nb_salaries": 0, "nb_heures": 0, "nb_siret": 0,
-        "mp_1er_reglement": 0, "nouvelles_ip": 0,
-        "ip_taux_inf_10": 0, "ip_taux_sup_10": 0,
-        "deces": 0, "journees_it": 0, "somme_taux_ip": 0,
-        "cause_counts": defaultdict(float),
-        "source_codes": [],
-        "libelle": "",
-    })
+def build_mp_data(rows):
+    """Construit la structure de donnees MP (meme forme que AT pour le dashboard)."""
+    return build_naf_dataset(
+        rollup_naf_rows(rows, MP_MEASURES, "cause_counts"),
+        compute_mp_stats, compute_mp_causes, "mp_1er_reglement",
+        source="Ameli - Risque MP par CTN x NAF 2024", source_url=MP_XLSX_URL,
+    )
+
+
+# ═══════════════════════════════════════════
+# CACHE DE PARSING (classeurs Ameli)
+# ═══════════════════════════════════════════
+
+# Les lignes parsees sont stockees en colonnes typees (npz, lu sans pickle) sous une
+# cle = SHA-256 du classeur + PARSER_VERSION + mapping de colonnes. Incrementer
+# PARSER_VERSION a chaque changement de logique des parseurs Excel ; une modification
+# de AT_COL / MP_COL (ou des causes, du tableau de repli, de HEADER_ROW) invalide
+# le cache automatiquement.
+PARSE_CACHE_DIR = PIPELINE_DIR / ".cache"
+PARSER_VERSION = 1
+
+AT_TEXT_KEYS = ["ctn", "naf5", "naf2", "libelle", "libelle_naf2"]
+MP_TEXT_KEYS = ["naf5", "naf2", "libelle", "libelle_naf2"]
+
+
+def at_parse_config():
+    """Parametres dont depend le resultat des parseurs AT (entrent dans la cle de cache)."""
+    return {"col": AT_COL, "measures": AT_MEASURES, "causes": AT_RISK_CAUSES,
+            "header_row": HEADER_ROW}
+
+
+def mp_parse_config():
+    """Parametres dont depend le resultat de parse_mp_xlsx (entrent dans la cle de cache)."""
+    return {"col": MP_COL, "measures": MP_MEASURES, "flags": MP_CAUSE_FLAGS,
+            "tableau_map": MP_TABLEAU_MAP, "header_row": HEADER_ROW}
+
+
+def parse_cache_key(xlsx_path, config):
+    """Cle de cache : contenu du classeur, version des parseurs et mapping de colonnes."""
+    h = hashlib.sha256()
+    h.update(file_sha256(xlsx_path).encode())
+    h.update(f"v{PARSER_VERSION}".encode())
+    h.update(json.dumps(config, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def encode_rows(rows, text_keys, num_keys, dict_key):
+    """Lignes (dicts) -> colonnes numpy.
+
+    Le dict de causes de chaque ligne devient une matrice de valeurs et une matrice
+    de rangs d'insertion (-1 = absente) : l'ordre des cles, qui fixe l'ordre des
+    causes dans le JSON, est ainsi restitue a l'identique.
+    """
+    import numpy as np
+    names = {}
     for row in rows:
-        key = key_fn(row)
-        if not key:
-            continue
-        g = groups[key]
-        for field in ["nb_salaries", "nb_heures", "nb_siret", "mp_1er_reglement",
-                       "nouvelles_ip", "ip_taux_inf_10", "ip_taux_sup_10",
-                       "deces", "journees_it", "somme_taux_ip"]:
-            g[field] += row.get(field, 0)
-        for cause, val in row.get("cause_counts", {}).items():
-            g["cause_counts"][cause] += val
-        g["source_codes"].append(row["naf5"])
-        if libelle_fn:
-            g["libelle"] = libelle_fn(row, g["libelle"])
-        elif not g["libelle"]:
-            g["libelle"] = row.get("libelle", "")
-    return groups
+        for name in row[dict_key]:
+            names.setdefault(name, len(names))
+    n = len(rows)
+    values = np.zeros((n, len(names)), dtype=np.float64)
+    rank = np.full((n, len(names)), -1, dtype=np.int16)
+    for i, row in enumerate(rows):
+        for r, (name, val) in enumerate(row[dict_key].items()):
+            values[i, names[name]] = val
+            rank[i, names[name]] = r
+
+    arrays = {f"text_{k}": np.array([row[k] for row in rows], dtype=str) for k in text_keys}
+    arrays["num"] = np.array([[row[k] for k in num_keys] for row in rows],
+                             dtype=np.float64).reshape(n, len(num_keys))
+    arrays["dict_names"] = np.array(list(names), dtype=str)
+    arrays["dict_values"] = values
+    arrays["dict_rank"] = rank
+    return arrays
+
+
+def decode_rows(arrays, text_keys, num_keys, dict_key):
+    """Colonnes numpy (encode_rows) -> lignes (dicts), dans l'ordre d'origine."""
+    names = arrays["dict_names"].tolist()
+    text = [arrays[f"text_{k}"].tolist() for k in text_keys]
+    num = arrays["num"].tolist()
+    values = arrays["dict_values"].tolist()
+    rank = arrays["dict_rank"].tolist()
+
+    rows = []
+    for i in range(len(num)):
+        row = {k: col[i] for k, col in zip(text_keys, text)}
+        row.update(zip(num_keys, num[i]))
+        present = sorted((r, j) for j, r in enumerate(rank[i]) if r >= 0)
+        row[dict_key] = {names[j]: values[i][j] for _, j in present}
+        rows.append(row)
+    return rows
+
+
+def cached_parse(name, xlsx_path, config, parse, encode, decode, use_cache=True):
+    """Retourne parse() en passant par le cache disque de PARSE_CACHE_DIR.
+
+    encode convertit le resultat en dict de tableaux numpy, decode fait l'inverse.
+    Un fichier de cache illisible est traite comme absent. Les anciennes entrees du
+    meme nom sont supprimees a l'ecriture.
+    """
+    if not use_cache:
+        return parse()
 
+    import numpy as np
+    key = parse_cache_key(xlsx_path, config)
+    cache_path = PARSE_CACHE_DIR / f"{name}-{key[:16]}.npz"
+    if cache_path.exists():
+        try:
+            with np.load(cache_path, allow_pickle=False) as npz:
+                arrays = dict(npz)
+            result = decode(arrays)
+            print(f"  [cache] {name} : {cache_path.name}")
+            return result
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            print(f"  [cache] {name} : cache illisible ({e}), re-parsing")
+
+    result = parse()
+    PARSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for old in PARSE_CACHE_DIR.glob(f"{name}-*.npz"):
+        old.unlink()
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **encode(result))
+    os.replace(tmp_path, cache_path)
+    return result
 
-def build_mp_data(rows):
-    """Construit la structure de donnees MP (meme forme que AT pour le dashboard)."""
-    naf5_groups = aggregate_mp_rows(rows, key_fn=lambda r: r["naf5"],
-                                    libelle_fn=lambda r, prev: prev or r["libelle"])
-    by_naf5 = {}
-    for code, g in sorted(naf5_groups.items()):
-        by_naf5[code] = {
-            "libelle": g["libelle"], "naf4": code[:4], "naf2": code[:2],
-            "stats": compute_mp_stats(g),
-            "risk_causes": compute_mp_causes(dict(g["cause_counts"]), g["mp_1er_reglement"]),
-        }
 
-    naf4_groups = aggregate_mp_rows(rows, key_fn=lambda r: r["naf5"][:4],
-                                    libelle_fn=lambda r, prev: prev or r["libelle"])
-    by_naf4 = {}
-    for code, g in sorted(naf4_groups.items()):
-        by_naf4[code] = {
-            "libelle": g["libelle"], "naf2": code[:2],
-            "codes_naf5": sorted(set(g["source_codes"])),
-            "stats": compute_mp_stats(g),
-            "risk_causes": compute_mp_causes(dict(g["cause_counts"]), g["mp_1er_reglement"]),
-        }
+def load_at_rows(backend="openpyxl", use_cache=True):
+    """parse_at_xlsx() via le cache de parsing."""
+    return cached_parse(
+        "at-rows", AT_XLSX_PATH, at_parse_config(),
+        lambda: parse_at_xlsx(backend=backend),
+        lambda rows: encode_rows(rows, AT_TEXT_KEYS, AT_MEASURES, "risk_causes_raw"),
+        lambda arrays: decode_rows(arrays, AT_TEXT_KEYS, AT_MEASURES, "risk_causes_raw"),
+        use_cache,
+    )
 
-    naf2_groups = aggregate_mp_rows(rows, key_fn=lambda r: r["naf2"],
-                                    libelle_fn=lambda r, prev: prev or r.get("libelle_naf2", r["libelle"]))
-    by_naf2 = {}
-    for code, g in sorted(naf2_groups.items()):
-        by_naf2[code] = {
-            "libelle": g["libelle"],
-            "stats": compute_mp_stats(g),
-            "risk_causes": compute_mp_causes(dict(g["cause_counts"]), g["mp_1er_reglement"]),
-        }
 
-    national = {k: 0 for k in ["nb_salaries", "nb_heures", "nb_siret",
-                                 "mp_1er_reglement", "nouvelles_ip",
-                                 "ip_taux_inf_10", "ip_taux_sup_10",
-                                 "deces", "journees_it", "somme_taux_ip"]}
-    for g in naf5_groups.values():
-        for field in national:
-            national[field] += g[field]
+def load_at_columns(backend="openpyxl", use_cache=True):
+    """parse_at_columns() via le cache de parsing (deja en colonnes : stocke tel quel)."""
+    return cached_parse(
+        "at-columns", AT_XLSX_PATH, at_parse_config(),
+        lambda: parse_at_columns(backend=backend),
+        lambda cols: cols,
+        lambda arrays: arrays,
+        use_cache,
+    )
 
-    naf_index = []
-    for code, data in by_naf5.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf5"})
-    for code, data in by_naf4.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf4"})
-    for code, data in by_naf2.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf2"})
-    naf_index.sort(key=lambda x: (x["level"], x["code"]))
 
-    return {
-        "meta": {
-            "source": "Ameli - Risque MP par CTN x NAF 2024",
-            "source_url": MP_XLSX_URL,
-            "national": compute_mp_stats(national),
-        },
-        "by_naf5": by_naf5, "by_naf4": by_naf4, "by_naf2": by_naf2,
-        "naf_index": naf_index,
-    }
+def load_mp_rows(backend="openpyxl", use_cache=True):
+    """parse_mp_xlsx() via le cache de parsing."""
+    return cached_parse(
+        "mp-rows", MP_XLSX_PATH, mp_parse_config(),
+        lambda: parse_mp_xlsx(backend=backend),
+        lambda rows: encode_rows(rows, MP_TEXT_KEYS, MP_MEASURES, "cause_counts"),
+        lambda arrays: decode_rows(arrays, MP_TEXT_KEYS, MP_MEASURES, "cause_counts"),
+        use_cache,
+    )
 
 
 # ═══════════════════════════════════════════
@@ -540,22 +836,23 @@ YEARLY_MP_COLS = {
 }
 
 
-def parse_yearly_xlsx(xlsx_path, col_map, is_mp=False):
+def parse_yearly_xlsx(xlsx_path, col_map, is_mp=False, backend="openpyxl"):
     """Extrait les stats de base par NAF5 depuis un fichier Excel annuel.
     Pour MP, deduplique la main-d'oeuvre par CTN+NAF (meme logique que le pipeline principal).
     Retourne {naf5: {events, nb_salaries, nb_heures, nb_siret, IF, TG}}.
     """
-    import openpyxl
-    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
-    ws = wb.active
+    # Le CTN (colonne 0) sert a la deduplication MP ; il est lu en tete de tuple
+    keys = list(col_map)
+    columns = [0] + [col_map[k] for k in keys]
+    pos = {k: i for i, k in enumerate(keys, 1)}
 
     if is_mp:
         workforce = {}
         naf5_stats = defaultdict(lambda: {
             "events": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
         })
-        for row in ws.iter_rows(min_row=HEADER_ROW + 1, values_only=True):
-            naf5_val = row[col_map["naf5"]]
+        for row in iter_xlsx_rows(xlsx_path, columns, backend):
+            naf5_val = row[pos["naf5"]]
             if not naf5_val:
                 continue
             naf5 = str(naf5_val).strip()
@@ -565,15 +862,15 @@ def parse_yearly_xlsx(xlsx_path, col_map, is_mp=False):
             key = (ctn, naf5)
             if key not in workforce:
                 workforce[key] = {
-                    "nb_salaries": safe_num(row[col_map["nb_salaries"]]),
-                    "nb_heures": safe_num(row[col_map["nb_heures"]]),
-                    "nb_siret": safe_num(row[col_map["nb_siret"]]),
+                    "nb_salaries": safe_num(row[pos["nb_salaries"]]),
+                    "nb_heures": safe_num(row[pos["nb_heures"]]),
+                    "nb_siret": safe_num(row[pos["nb_siret"]]),
                 }
             s = naf5_stats[naf5]
-            s["events"] += safe_num(row[col_map["events"]])
-            s["nouvelles_ip"] += safe_num(row[col_map["nouvelles_ip"]])
-            s["deces"] += safe_num(row[col_map["deces"]])
-            s["journees_it"] += safe_num(row[col_map["journees_it"]])
+            s["events"] += safe_num(row[pos["events"]])
+            s["nouvelles_ip"] += safe_num(row[pos["nouvelles_ip"]])
+            s["deces"] += safe_num(row[pos["deces"]])
+            s["journees_it"] += safe_num(row[pos["journees_it"]])
 
         naf5_wf = defaultdict(lambda: {"nb_salaries": 0, "nb_heures": 0, "nb_siret": 0})
         for (ctn, naf5), wf in workforce.items():
@@ -599,8 +896,8 @@ def parse_yearly_xlsx(xlsx_path, col_map, is_mp=False):
             "events": 0, "at_4j_arret": 0, "nb_salaries": 0, "nb_heures": 0,
             "nb_siret": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
         })
-        for row in ws.iter_rows(min_row=HEADER_ROW + 1, values_only=True):
-            naf5_val = row[col_map["naf5"]]
+        for row in iter_xlsx_rows(xlsx_path, columns, backend):
+            naf5_val = row[pos["naf5"]]
             if not naf5_val:
                 continue
             naf5 = str(naf5_val).strip()
@@ -609,7 +906,7 @@ def parse_yearly_xlsx(xlsx_path, col_map, is_mp=False):
             a = naf5_agg[naf5]
             for field in ["events", "at_4j_arret", "nb_salaries", "nb_heures",
                           "nb_siret", "nouvelles_ip", "deces", "journees_it"]:
-                a[field] += safe_num(row[col_map[field]])
+                a[field] += safe_num(row[pos[field]])
 
         result = {}
         for naf5, a in naf5_agg.items():
@@ -624,47 +921,51 @@ def parse_yearly_xlsx(xlsx_path, col_map, is_mp=False):
                 "taux_gravite": round(a["journees_it"] / (nb_h / 1000), 2) if nb_h > 0 else 0,
             }
 
-    wb.close()
     print(f"  [parse] {len(result)} entrees NAF5 depuis {xlsx_path.name}")
     return result
 
 
+YEARLY_SUM_FIELDS = ["events", "nb_salaries", "nb_heures", "nb_siret",
+                     "nouvelles_ip", "deces", "journees_it"]
+
+
+def _new_yearly_sums():
+    return {field: 0 for field in YEARLY_SUM_FIELDS}
+
+
+def _add_yearly_sums(target, s):
+    for field in YEARLY_SUM_FIELDS:
+        target[field] += s[field]
+
+
+def _yearly_rates(g):
+    """Sommes annuelles + indice de frequence et taux de gravite."""
+    nb_sal = g["nb_salaries"]
+    nb_h = g["nb_heures"]
+    return {
+        **g,
+        "indice_frequence": round(g["events"] / nb_sal * 1000, 1) if nb_sal > 0 else 0,
+        "taux_gravite": round(g["journees_it"] / (nb_h / 1000), 2) if nb_h > 0 else 0,
+    }
+
+
 def aggregate_yearly_to_level(yearly_naf5, level_fn):
     """Agrege les donnees annuelles NAF5 au niveau NAF4 ou NAF2."""
-    groups = defaultdict(lambda: {
-        "events": 0, "nb_salaries": 0, "nb_heures": 0, "nb_siret": 0,
-        "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-    })
+    groups = {}
     for naf5, s in yearly_naf5.items():
         key = level_fn(naf5)
-        g = groups[key]
-        for field in ["events", "nb_salaries", "nb_heures", "nb_siret",
-                       "nouvelles_ip", "deces", "journees_it"]:
-            g[field] += s[field]
-    result = {}
-    for code, g in groups.items():
-        nb_sal = g["nb_salaries"]
-        nb_h = g["nb_heures"]
-        result[code] = {
-            **g,
-            "indice_frequence": round(g["events"] / nb_sal * 1000, 1) if nb_sal > 0 else 0,
-            "taux_gravite": round(g["journees_it"] / (nb_h / 1000), 2) if nb_h > 0 else 0,
-        }
-    return result
+        if key not in groups:
+            groups[key] = _new_yearly_sums()
+        _add_yearly_sums(groups[key], s)
+    return {code: _yearly_rates(g) for code, g in groups.items()}
 
 
 def compute_yearly_national(yearly_naf5):
     """Calcule les totaux nationaux depuis les donnees annuelles NAF5."""
-    totals = {"events": 0, "nb_salaries": 0, "nb_heures": 0, "nb_siret": 0,
-              "nouvelles_ip": 0, "deces": 0, "journees_it": 0}
+    totals = _new_yearly_sums()
     for s in yearly_naf5.values():
-        for field in totals:
-            totals[field] += s[field]
-    nb_sal = totals["nb_salaries"]
-    nb_h = totals["nb_heures"]
-    totals["indice_frequence"] = round(totals["events"] / nb_sal * 1000, 1) if nb_sal > 0 else 0
-    totals["taux_gravite"] = round(totals["journees_it"] / (nb_h / 1000), 2) if nb_h > 0 else 0
-    return totals
+        _add_yearly_sums(totals, s)
+    return _yearly_rates(totals)
 
 
 def merge_yearly_into_data(data, yearly_data_by_year):
@@ -695,108 +996,180 @@ def merge_yearly_into_data(data, yearly_data_by_year):
 AGE_GROUPS = ["<20", "20-24", "25-29", "30-34", "35-39", "40-49", "50-59", "60-64", "65+"]
 
 
-def merge_pdf_data(at_data, pdf_data, mp_data=None):
-    """Fusionne les demographics extraites des PDFs dans les donnees AT (et MP optionnel)."""
+PDF_YEARS = ["2020", "2021", "2022", "2023", "2024"]
+
+# Les fusions PDF sont ecrites comme des accumulateurs alimentes fiche par fiche
+# (new_* / add_fiche_* / finish_*) : build_pdf_outputs les consomme en flux (etape
+# merge, sur les fiches reduites par l'etape pdf), les fonctions par lot
+# (merge_pdf_data, build_yearly_from_pdf, build_trajet_data) les appliquent a un
+# dict de fiches.
+# Leur taille depend du nombre de codes NAF, pas du nombre de fiches lues.
+
+
+def _add_counts(target, counts):
+    for key, val in counts.items():
+        target[key] = target.get(key, 0) + val
+
+
+def _new_demographics_group():
+    return {"sex": {}, "age": {}, "trajet_count": 0}
+
+
+def _demographics_groups(side, code):
+    """Groupes NAF4, NAF2 et national d'une fiche (crees a la demande)."""
+    for level, key in [("by_naf4", code[:4]), ("by_naf2", code[:2])]:
+        groups = side[level]
+        if key not in groups:
+            groups[key] = _new_demographics_group()
+        yield groups[key]
+    yield side["national"]
+
+
+def new_demographics_acc():
+    """Sommes demographiques AT et MP par niveau (NAF4, NAF2, national)."""
+    return {side: {"by_naf4": {}, "by_naf2": {}, "national": _new_demographics_group()}
+            for side in ("at", "mp")}
+
+
+def add_fiche_demographics(acc, code, parsed, at_data, mp_data=None):
+    """Fusionne les demographics d'une fiche au niveau NAF5 et les ajoute aux sommes."""
+    sex = parsed["sex"]
+    trajet = parsed.get("synthesis", {}).get("trajet")
+    mp_sex = parsed.get("mp_sex", {})
+    mp_age = parsed.get("mp_age", {})
+
     # Niveau NAF5 : fusion directe
-    for code, parsed in pdf_data.items():
-        if code in at_data["by_naf5"]:
-            entry = at_data["by_naf5"][code]
-            if parsed["sex"]:
-                entry["demographics"] = {"sex": parsed["sex"], "age": parsed["age"]}
-            trajet = parsed.get("synthesis", {}).get("trajet")
-            if trajet:
-                entry["trajet"] = trajet
-
-        if mp_data and code in mp_data["by_naf5"]:
-            mp_sex = parsed.get("mp_sex", {})
-            mp_age = parsed.get("mp_age", {})
-            if mp_sex:
-                mp_data["by_naf5"][code]["demographics"] = {"sex": mp_sex, "age": mp_age}
-
-    # Niveaux NAF4/NAF2 : agregation des demographics par somme des NAF5
-    for level, key_fn in [("by_naf4", lambda c: c[:4]), ("by_naf2", lambda c: c[:2])]:
-        at_agg = defaultdict(lambda: {
-            "sex": defaultdict(int), "age": defaultdict(int),
-            "trajet_count": 0,
-        })
-        mp_agg = defaultdict(lambda: {
-            "sex": defaultdict(int), "age": defaultdict(int),
-        })
-        for code, parsed in pdf_data.items():
-            key = key_fn(code)
-            if parsed["sex"]:
-                for s, v in parsed["sex"].items():
-                    at_agg[key]["sex"][s] += v
-                for a, v in parsed["age"].items():
-                    at_agg[key]["age"][a] += v
-            trajet = parsed.get("synthesis", {}).get("trajet")
+    if code in at_data["by_naf5"]:
+        entry = at_data["by_naf5"][code]
+        if sex:
+            entry["demographics"] = {"sex": sex, "age": parsed["age"]}
+        if trajet:
+            entry["trajet"] = trajet
+    if mp_data and code in mp_data["by_naf5"] and mp_sex:
+        mp_data["by_naf5"][code]["demographics"] = {"sex": mp_sex, "age": mp_age}
+
+    # NAF4/NAF2/national : somme des NAF5
+    if sex or trajet:
+        for g in _demographics_groups(acc["at"], code):
+            if sex:
+                _add_counts(g["sex"], sex)
+                _add_counts(g["age"], parsed["age"])
             if trajet:
-                at_agg[key]["trajet_count"] += trajet["count"]
+                g["trajet_count"] += trajet["count"]
+    if mp_sex:
+        for g in _demographics_groups(acc["mp"], code):
+            _add_counts(g["sex"], mp_sex)
+            _add_counts(g["age"], mp_age)
 
-            mp_sex = parsed.get("mp_sex", {})
-            mp_age = parsed.get("mp_age", {})
-            if mp_sex:
-                for s, v in mp_sex.items():
-                    mp_agg[key]["sex"][s] += v
-                for a, v in mp_age.items():
-                    mp_agg[key]["age"][a] += v
 
-        for code, data in at_agg.items():
+def finish_demographics(acc, at_data, mp_data=None):
+    """Ecrit les demographics NAF4, NAF2 et nationales sommees dans les donnees AT (et MP)."""
+    for level in ["by_naf4", "by_naf2"]:
+        for code, g in acc["at"][level].items():
             if code not in at_data[level]:
                 continue
             entry = at_data[level][code]
-            if data["sex"]:
-                entry["demographics"] = {
-                    "sex": dict(data["sex"]),
-                    "age": dict(data["age"]),
-                }
-            entry["trajet"] = {"count": data["trajet_count"]}
+            if g["sex"]:
+                entry["demographics"] = {"sex": dict(g["sex"]), "age": dict(g["age"])}
+            entry["trajet"] = {"count": g["trajet_count"]}
 
         if mp_data:
-            for code, data in mp_agg.items():
-                if code not in mp_data[level]:
-                    continue
-                if data["sex"]:
-                    mp_data[level][code]["demographics"] = {
-                        "sex": dict(data["sex"]),
-                        "age": dict(data["age"]),
-                    }
-
-    # Niveau national : somme de tous les NAF5
-    nat_sex = defaultdict(int)
-    nat_age = defaultdict(int)
-    nat_trajet = 0
-    mp_nat_sex = defaultdict(int)
-    mp_nat_age = defaultdict(int)
-    for parsed in pdf_data.values():
-        if parsed["sex"]:
-            for s, v in parsed["sex"].items():
-                nat_sex[s] += v
-            for a, v in parsed["age"].items():
-                nat_age[a] += v
-        trajet = parsed.get("synthesis", {}).get("trajet")
-        if trajet:
-            nat_trajet += trajet["count"]
-
-        mp_sex = parsed.get("mp_sex", {})
-        mp_age = parsed.get("mp_age", {})
-        if mp_sex:
-            for s, v in mp_sex.items():
-                mp_nat_sex[s] += v
-            for a, v in mp_age.items():
-                mp_nat_age[a] += v
-
-    at_data["meta"]["national"]["demographics"] = {
-        "sex": dict(nat_sex),
-        "age": dict(nat_age),
-    }
-    at_data["meta"]["national"]["trajet"] = {"count": nat_trajet}
+            for code, g in acc["mp"][level].items():
+                if code in mp_data[level] and g["sex"]:
+                    mp_data[level][code]["demographics"] = {"sex": dict(g["sex"]), "age": dict(g["age"])}
+
+    nat = acc["at"]["national"]
+    at_data["meta"]["national"]["demographics"] = {"sex": dict(nat["sex"]), "age": dict(nat["age"])}
+    at_data["meta"]["national"]["trajet"] = {"count": nat["trajet_count"]}
 
     if mp_data:
-        mp_data["meta"]["national"]["demographics"] = {
-            "sex": dict(mp_nat_sex),
-            "age": dict(mp_nat_age),
+        mp_nat = acc["mp"]["national"]
+        mp_data["meta"]["national"]["demographics"] = {"sex": dict(mp_nat["sex"]), "age": dict(mp_nat["age"])}
+
+
+def merge_pdf_data(at_data, pdf_data, mp_data=None):
+    """Fusionne les demographics extraites des PDFs dans les donnees AT (et MP optionnel)."""
+    acc = new_demographics_acc()
+    for code, parsed in pdf_data.items():
+        add_fiche_demographics(acc, code, parsed, at_data, mp_data)
+    finish_demographics(acc, at_data, mp_data)
+
+
+def new_yearly_acc(section_key):
+    """Evolution 5 ans en cours de construction pour section_key ("at_yearly" ou "mp_yearly")."""
+    return {
+        "section_key": section_key,
+        "count": 0,
+        "years": {yr: {"naf5": {}, "naf4": {}, "naf2": {}, "national": _new_yearly_sums()}
+                  for yr in PDF_YEARS},
+    }
+
+
+def add_fiche_yearly(acc, code, parsed, base_data=None):
+    """Ajoute le tableau annuel d'une fiche ; retourne ses lignes NAF5 {year: {...}}.
+
+    base_data : donnees AT pour la main-d'oeuvre (voir build_yearly_from_pdf).
+    """
+    section_key = acc["section_key"]
+    yearly = parsed.get(section_key)
+    if not yearly:
+        return {}
+    acc["count"] += 1
+    base = base_data["by_naf5"].get(code) if base_data else None
+
+    records = {}
+    for year in PDF_YEARS:
+        if year not in yearly:
+            continue
+        y = yearly[year]
+
+        if section_key == "at_yearly":
+            nb_sal = y.get("salaries", 0)
+        else:
+            nb_sal = 0
+            at_yearly = parsed.get("at_yearly")
+            if at_yearly and year in at_yearly:
+                nb_sal = at_yearly[year].get("salaries", 0)
+        if nb_sal == 0 and base:
+            nb_sal = base["stats"]["nb_salaries"]
+        nb_h = base["stats"].get("nb_heures", 0) if base else 0
+
+        events = y["count"]
+        journees = y["journees"]
+        record = records[year] = {
+            "events": events,
+            "nb_salaries": int(nb_sal),
+            "nb_heures": int(nb_h),
+            "nb_siret": 0,
+            "nouvelles_ip": y["ip"],
+            "deces": y["deces"],
+            "journees_it": journees,
+            "indice_frequence": round(events / nb_sal * 1000, 1) if nb_sal > 0 else 0,
+            "taux_gravite": round(journees / (nb_h / 1000), 2) if nb_h > 0 else 0,
+        }
+
+        sums = acc["years"][year]
+        sums["naf5"][code] = record
+        for level, key in [("naf4", code[:4]), ("naf2", code[:2])]:
+            if key not in sums[level]:
+                sums[level][key] = _new_yearly_sums()
+            _add_yearly_sums(sums[level][key], record)
+        _add_yearly_sums(sums["national"], record)
+    return records
+
+
+def finish_yearly(acc):
+    """Retourne {year: {naf5: {...}, naf4: {...}, naf2: {...}, national: {...}}, ...}."""
+    yearly_by_year = {}
+    for year, sums in acc["years"].items():
+        yearly_by_year[year] = {
+            "naf5": sums["naf5"],
+            "naf4": {code: _yearly_rates(g) for code, g in sums["naf4"].items()},
+            "naf2": {code: _yearly_rates(g) for code, g in sums["naf2"].items()},
+            "national": _yearly_rates(sums["national"]),
         }
+    print(f"  [build] Evolution 5 ans depuis {acc['count']} PDFs ({acc['section_key']})")
+    return yearly_by_year
 
 
 # ═══════════════════════════════════════════
@@ -818,199 +1191,144 @@ def compute_trajet_stats(group):
     }
 
 
-def build_trajet_data(pdf_data, at_data):
-    """Construit les donnees trajet depuis les fiches PDF + main-d'oeuvre AT.
+TRAJET_SUM_FIELDS = ["trajet_count", "nouvelles_ip", "deces", "journees_it", "nb_salaries", "nb_siret"]
+TRAJET_YEARLY_FIELDS = ["events", "nb_salaries", "nouvelles_ip", "deces", "journees_it"]
 
-    Utilise les valeurs 2024 de trajet_yearly pour les stats ; 5 ans pour l'evolution.
-    Main-d'oeuvre (nb_salaries, nb_siret) issue des donnees AT.
-    """
-    years = ["2020", "2021", "2022", "2023", "2024"]
 
-    # Niveau NAF5
-    by_naf5 = {}
-    for code, pdf in pdf_data.items():
-        yearly = pdf.get("trajet_yearly")
-        if not yearly:
-            continue
-        at_entry = at_data["by_naf5"].get(code)
-        if not at_entry:
-            continue
-        at_stats = at_entry["stats"]
-        y23 = yearly["2024"]
+def _new_trajet_group():
+    g = {field: 0 for field in TRAJET_SUM_FIELDS}
+    g.update({"libelle": "", "source_codes": [], "yearly_agg": {}})
+    return g
 
-        entry = {
-            "libelle": at_entry["libelle"],
-            "naf4": code[:4],
-            "naf2": code[:2],
-            "stats": compute_trajet_stats({
-                "trajet_count": y23["count"],
-                "nouvelles_ip": y23["ip"],
-                "deces": y23["deces"],
-                "journees_it": y23["journees"],
-                "nb_salaries": at_stats["nb_salaries"],
-                "nb_siret": at_stats["nb_siret"],
-            }),
-            "yearly": {},
-        }
-        for yr in years:
-            if yr in yearly:
-                y = yearly[yr]
-                at_yr = at_entry.get("yearly", {}).get(yr)
-                nb_sal = at_yr["nb_salaries"] if at_yr else at_stats["nb_salaries"]
-                entry["yearly"][yr] = {
-                    "events": y["count"],
-                    "nb_salaries": int(nb_sal),
-                    "nouvelles_ip": y["ip"],
-                    "deces": y["deces"],
-                    "journees_it": y["journees"],
-                    "indice_frequence": round(y["count"] / nb_sal * 1000, 1) if nb_sal > 0 else 0,
-                }
-        by_naf5[code] = entry
-
-    # Agregation vers NAF4
-    naf4_agg = defaultdict(lambda: {
-        "trajet_count": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-        "nb_salaries": 0, "nb_siret": 0, "libelle": "", "source_codes": [],
-        "yearly_agg": defaultdict(lambda: {
-            "events": 0, "nb_salaries": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-        }),
-    })
-    for code, entry in by_naf5.items():
-        key = code[:4]
-        g = naf4_agg[key]
-        s = entry["stats"]
-        g["trajet_count"] += s["trajet_count"]
-        g["nouvelles_ip"] += s["nouvelles_ip"]
-        g["deces"] += s["deces"]
-        g["journees_it"] += s["journees_it"]
-        g["nb_salaries"] += s["nb_salaries"]
-        g["nb_siret"] += s["nb_siret"]
-        g["source_codes"].append(code)
-        if not g["libelle"]:
-            g["libelle"] = entry["libelle"]
-        for yr, yd in entry.get("yearly", {}).items():
-            ya = g["yearly_agg"][yr]
-            ya["events"] += yd["events"]
-            ya["nb_salaries"] += yd["nb_salaries"]
-            ya["nouvelles_ip"] += yd["nouvelles_ip"]
-            ya["deces"] += yd["deces"]
-            ya["journees_it"] += yd["journees_it"]
 
-    by_naf4 = {}
-    for code, g in sorted(naf4_agg.items()):
-        yearly = {}
-        for yr, ya in g["yearly_agg"].items():
-            nb_sal = ya["nb_salaries"]
-            yearly[yr] = {
-                **ya,
-                "indice_frequence": round(ya["events"] / nb_sal * 1000, 1) if nb_sal > 0 else 0,
+def _trajet_yearly_rates(ya):
+    nb_sal = ya["nb_salaries"]
+    return {**ya, "indice_frequence": round(ya["events"] / nb_sal * 1000, 1) if nb_sal > 0 else 0}
+
+
+def new_trajet_acc():
+    """Entrees Trajet NAF5 et sommes NAF4, NAF2 et nationales."""
+    return {"by_naf5": {}, "naf4": {}, "naf2": {}, "national": _new_trajet_group()}
+
+
+def add_fiche_trajet(acc, code, parsed, at_data, at_yearly=None):
+    """Ajoute l'entree Trajet d'une fiche (ignoree sans trajet_yearly ou sans entree AT).
+
+    at_yearly : evolution AT de la fiche {year: {...}} si elle n'est pas encore
+    fusionnee dans at_data (defaut : at_data["by_naf5"][code]["yearly"]).
+    """
+    yearly = parsed.get("trajet_yearly")
+    if not yearly:
+        return
+    at_entry = at_data["by_naf5"].get(code)
+    if not at_entry:
+        return
+    if at_yearly is None:
+        at_yearly = at_entry.get("yearly", {})
+    at_stats = at_entry["stats"]
+    y23 = yearly["2024"]
+
+    entry = {
+        "libelle": at_entry["libelle"],
+        "naf4": code[:4],
+        "naf2": code[:2],
+        "stats": compute_trajet_stats({
+            "trajet_count": y23["count"],
+            "nouvelles_ip": y23["ip"],
+            "deces": y23["deces"],
+            "journees_it": y23["journees"],
+            "nb_salaries": at_stats["nb_salaries"],
+            "nb_siret": at_stats["nb_siret"],
+        }),
+        "yearly": {},
+    }
+    for yr in PDF_YEARS:
+        if yr in yearly:
+            y = yearly[yr]
+            at_yr = at_yearly.get(yr)
+            nb_sal = at_yr["nb_salaries"] if at_yr else at_stats["nb_salaries"]
+            entry["yearly"][yr] = {
+                "events": y["count"],
+                "nb_salaries": int(nb_sal),
+                "nouvelles_ip": y["ip"],
+                "deces": y["deces"],
+                "journees_it": y["journees"],
+                "indice_frequence": round(y["count"] / nb_sal * 1000, 1) if nb_sal > 0 else 0,
             }
+    acc["by_naf5"][code] = entry
+
+    # Agregation vers NAF4, NAF2 et national
+    groups = []
+    for level, key in [("naf4", code[:4]), ("naf2", code[:2])]:
+        if key not in acc[level]:
+            acc[level][key] = _new_trajet_group()
+        groups.append(acc[level][key])
+    naf4, naf2 = groups
+    for g in groups + [acc["national"]]:
+        for field in TRAJET_SUM_FIELDS:
+            g[field] += entry["stats"][field]
+        for yr, yd in entry["yearly"].items():
+            ya = g["yearly_agg"].setdefault(yr, {field: 0 for field in TRAJET_YEARLY_FIELDS})
+            for field in TRAJET_YEARLY_FIELDS:
+                ya[field] += yd[field]
+
+    naf4["source_codes"].append(code)
+    if not naf4["libelle"]:
+        naf4["libelle"] = entry["libelle"]
+    if not naf2["libelle"]:
+        at_naf2 = at_data["by_naf2"].get(code[:2])
+        naf2["libelle"] = at_naf2["libelle"] if at_naf2 else entry["libelle"]
+
+
+def finish_trajet(acc):
+    """Construit le dataset Trajet (NAF5, NAF4, NAF2, national + index)."""
+    by_naf5 = acc["by_naf5"]
+    by_naf4 = {}
+    for code, g in sorted(acc["naf4"].items()):
         by_naf4[code] = {
             "libelle": g["libelle"], "naf2": code[:2],
             "codes_naf5": sorted(set(g["source_codes"])),
             "stats": compute_trajet_stats(g),
-            "yearly": yearly,
+            "yearly": {yr: _trajet_yearly_rates(ya) for yr, ya in g["yearly_agg"].items()},
         }
-
-    # Agregation vers NAF2
-    naf2_agg = defaultdict(lambda: {
-        "trajet_count": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-        "nb_salaries": 0, "nb_siret": 0, "libelle": "",
-        "yearly_agg": defaultdict(lambda: {
-            "events": 0, "nb_salaries": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-        }),
-    })
-    for code, entry in by_naf5.items():
-        key = code[:2]
-        g = naf2_agg[key]
-        s = entry["stats"]
-        g["trajet_count"] += s["trajet_count"]
-        g["nouvelles_ip"] += s["nouvelles_ip"]
-        g["deces"] += s["deces"]
-        g["journees_it"] += s["journees_it"]
-        g["nb_salaries"] += s["nb_salaries"]
-        g["nb_siret"] += s["nb_siret"]
-        if not g["libelle"]:
-            at_naf2 = at_data["by_naf2"].get(key)
-            g["libelle"] = at_naf2["libelle"] if at_naf2 else entry["libelle"]
-        for yr, yd in entry.get("yearly", {}).items():
-            ya = g["yearly_agg"][yr]
-            ya["events"] += yd["events"]
-            ya["nb_salaries"] += yd["nb_salaries"]
-            ya["nouvelles_ip"] += yd["nouvelles_ip"]
-            ya["deces"] += yd["deces"]
-            ya["journees_it"] += yd["journees_it"]
-
     by_naf2 = {}
-    for code, g in sorted(naf2_agg.items()):
-        yearly = {}
-        for yr, ya in g["yearly_agg"].items():
-            nb_sal = ya["nb_salaries"]
-            yearly[yr] = {
-                **ya,
-                "indice_frequence": round(ya["events"] / nb_sal * 1000, 1) if nb_sal > 0 else 0,
-            }
+    for code, g in sorted(acc["naf2"].items()):
         by_naf2[code] = {
             "libelle": g["libelle"],
             "stats": compute_trajet_stats(g),
-            "yearly": yearly,
+            "yearly": {yr: _trajet_yearly_rates(ya) for yr, ya in g["yearly_agg"].items()},
         }
 
-    # National
-    national = {
-        "trajet_count": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-        "nb_salaries": 0, "nb_siret": 0,
-    }
-    nat_yearly_agg = defaultdict(lambda: {
-        "events": 0, "nb_salaries": 0, "nouvelles_ip": 0, "deces": 0, "journees_it": 0,
-    })
-    for entry in by_naf5.values():
-        s = entry["stats"]
-        national["trajet_count"] += s["trajet_count"]
-        national["nouvelles_ip"] += s["nouvelles_ip"]
-        national["deces"] += s["deces"]
-        national["journees_it"] += s["journees_it"]
-        national["nb_salaries"] += s["nb_salaries"]
-        national["nb_siret"] += s["nb_siret"]
-        for yr, yd in entry.get("yearly", {}).items():
-            ya = nat_yearly_agg[yr]
-            ya["events"] += yd["events"]
-            ya["nb_salaries"] += yd["nb_salaries"]
-            ya["nouvelles_ip"] += yd["nouvelles_ip"]
-            ya["deces"] += yd["deces"]
-            ya["journees_it"] += yd["journees_it"]
-
+    national = acc["national"]
     national_stats = compute_trajet_stats(national)
-    nat_yearly = {}
-    for yr, ya in sorted(nat_yearly_agg.items()):
-        nb_sal = ya["nb_salaries"]
-        nat_yearly[yr] = {
-            **ya,
-            "indice_frequence": round(ya["events"] / nb_sal * 1000, 1) if nb_sal > 0 else 0,
-        }
-    national_stats["yearly"] = nat_yearly
-
-    naf_index = []
-    for code, data in by_naf5.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf5"})
-    for code, data in by_naf4.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf4"})
-    for code, data in by_naf2.items():
-        naf_index.append({"code": code, "libelle": data["libelle"], "level": "naf2"})
-    naf_index.sort(key=lambda x: (x["level"], x["code"]))
+    national_stats["yearly"] = {
+        yr: _trajet_yearly_rates(ya) for yr, ya in sorted(national["yearly_agg"].items())
+    }
 
     return {
         "meta": {
             "source": "Ameli, Fiches NAF 2023 (PDF) + main-d'oeuvre AT",
             "source_url": "https://assurance-maladie.ameli.fr/etudes-et-donnees/sinistralite-at-mp-par-code-naf",
-            "years": years,
+            "years": list(PDF_YEARS),
             "national": national_stats,
         },
         "by_naf5": by_naf5, "by_naf4": by_naf4, "by_naf2": by_naf2,
-        "naf_index": naf_index,
+        "naf_index": build_naf_index(by_naf5, by_naf4, by_naf2),
     }
 
 
+def build_trajet_data(pdf_data, at_data):
+    """Construit les donnees trajet depuis les fiches PDF + main-d'oeuvre AT.
+
+    Utilise les valeurs 2024 de trajet_yearly pour les stats ; 5 ans pour l'evolution.
+    Main-d'oeuvre (nb_salaries, nb_siret) issue des donnees AT.
+    """
+    acc = new_trajet_acc()
+    for code, pdf in pdf_data.items():
+        add_fiche_trajet(acc, code, pdf, at_data)
+    return finish_trajet(acc)
+
+
 def build_yearly_from_pdf(pdf_data, section_key, base_data=None):
     """Construit l'evolution annuelle depuis les tableaux PDF (5 ans).
 
@@ -1022,57 +1340,36 @@ def build_yearly_from_pdf(pdf_data, section_key, base_data=None):
 
     Retourne: {year: {naf5: {...}, naf4: {...}, naf2: {...}, national: {...}}, ...}
     """
-    years = ["2020", "2021", "2022", "2023", "2024"]
-    yearly_by_year = {}
+    acc = new_yearly_acc(section_key)
+    for code, pdf in pdf_data.items():
+        add_fiche_yearly(acc, code, pdf, base_data)
+    return finish_yearly(acc)
 
-    for year in years:
-        naf5_data = {}
-        for code, pdf in pdf_data.items():
-            yearly = pdf.get(section_key)
-            if not yearly or year not in yearly:
-                continue
-            y = yearly[year]
-
-            if section_key == "at_yearly":
-                nb_sal = y.get("salaries", 0)
-                if nb_sal == 0 and base_data and code in base_data["by_naf5"]:
-                    nb_sal = base_data["by_naf5"][code]["stats"]["nb_salaries"]
-            else:
-                nb_sal = 0
-                at_yearly = pdf_data.get(code, {}).get("at_yearly")
-                if at_yearly and year in at_yearly:
-                    nb_sal = at_yearly[year].get("salaries", 0)
-                if nb_sal == 0 and base_data and code in base_data["by_naf5"]:
-                    nb_sal = base_data["by_naf5"][code]["stats"]["nb_salaries"]
-
-            nb_h = 0
-            if base_data and code in base_data["by_naf5"]:
-                nb_h = base_data["by_naf5"][code]["stats"].get("nb_heures", 0)
-
-            events = y["count"]
-            journees = y["journees"]
-            naf5_data[code] = {
-                "events": events,
-                "nb_salaries": int(nb_sal),
-                "nb_heures": int(nb_h),
-                "nb_siret": 0,
-                "nouvelles_ip": y["ip"],
-                "deces": y["deces"],
-                "journees_it": journees,
-                "indice_frequence": round(events / nb_sal * 1000, 1) if nb_sal > 0 else 0,
-                "taux_gravite": round(journees / (nb_h / 1000), 2) if nb_h > 0 else 0,
-            }
 
-        yearly_by_year[year] = {
-            "naf5": naf5_data,
-            "naf4": aggregate_yearly_to_level(naf5_data, lambda c: c[:4]),
-            "naf2": aggregate_yearly_to_level(naf5_data, lambda c: c[:2]),
-            "national": compute_yearly_national(naf5_data),
-        }
+def build_pdf_outputs(fiches, at_data, mp_data):
+    """Fusion PDF, evolution 5 ans et Trajet en un seul parcours des fiches.
 
-    count = sum(1 for pdf in pdf_data.values() if pdf.get(section_key))
-    print(f"  [build] Evolution 5 ans depuis {count} PDFs ({section_key})")
-    return yearly_by_year
+    Equivalent a merge_pdf_data, build_yearly_from_pdf (AT et MP) puis
+    build_trajet_data, mais fiches peut etre un flux de (naf5, parsed) : chaque fiche
+    est versee dans les accumulateurs puis oubliee. at_data et mp_data sont completes
+    sur place.
+
+    Retourne les donnees Trajet.
+    """
+    demographics = new_demographics_acc()
+    at_acc = new_yearly_acc("at_yearly")
+    mp_acc = new_yearly_acc("mp_yearly")
+    trajet = new_trajet_acc()
+    for code, parsed in fiches:
+        add_fiche_demographics(demographics, code, parsed, at_data, mp_data)
+        at_records = add_fiche_yearly(at_acc, code, parsed, base_data=at_data)
+        add_fiche_yearly(mp_acc, code, parsed, base_data=at_data)
+        add_fiche_trajet(trajet, code, parsed, at_data, at_yearly=at_records)
+
+    finish_demographics(demographics, at_data, mp_data)
+    merge_yearly_into_data(at_data, finish_yearly(at_acc))
+    merge_yearly_into_data(mp_data, finish_yearly(mp_acc))
+    return finish_trajet(trajet)
 
 
 def validate(data, label, spot_code="4711D"):
@@ -1096,12 +1393,183 @@ def validate(data, label, spot_code="4711D"):
         print(f"      IF : {s['indice_frequence']} | IP : {s['nouvelles_ip']}")
 
 
+# ═══════════════════════════════════════════
+# ETAPES (ordonnancees par scheduler.run_stages)
+# ═══════════════════════════════════════════
+
+# Les etapes sans "local" s'executent dans un processus du pool : ce sont des
+# fonctions de niveau module, leurs arguments et resultats sont picklables.
+
+def stage_at(columnar, backend, use_cache):
+    """Telechargement, parsing et construction AT."""
+    print("=== Pipeline AT ===")
+    print("[1] Telechargement...")
+    download_xlsx(AT_XLSX_PATH, AT_XLSX_URL)
+    print("[2] Parsing...")
+    if columnar:
+        at_cols = load_at_columns(backend, use_cache)
+        print("[3] Construction...")
+        return build_at_data_columnar(at_cols)
+    at_rows = load_at_rows(backend, use_cache)
+    print("[3] Construction...")
+    return build_at_data(at_rows)
+
+
+def stage_mp(backend, use_cache):
+    """Telechargement, parsing et construction MP."""
+    print("\n=== Pipeline MP ===")
+    print("[1] Telechargement...")
+    download_xlsx(MP_XLSX_PATH, MP_XLSX_URL)
+    print("[2] Parsing...")
+    mp_rows = load_mp_rows(backend, use_cache)
+    print("[3] Construction...")
+    return build_mp_data(mp_rows)
+
+
+# Champs d'une fiche lus par add_fiche_demographics, add_fiche_yearly et
+# add_fiche_trajet : l'etape pdf ne garde que ceux-la (voir merge_fields).
+PDF_MERGE_FIELDS = ["sex", "age", "mp_sex", "mp_age", "at_yearly", "mp_yearly", "trajet_yearly"]
+
+
+def merge_fields(parsed):
+    """Partie d'une fiche parsee utile a build_pdf_outputs (sans les repartitions
+    siege/activite/modalite ni les indices de confiance)."""
+    fields = {key: parsed[key] for key in PDF_MERGE_FIELDS if key in parsed}
+    trajet = parsed.get("synthesis", {}).get("trajet")
+    fields["synthesis"] = {"trajet": trajet} if trajet else {}
+    return fields
+
+
+def stage_fiches(pdf_dir, workers, use_cache, pdf_backend, timeout, max_docs_per_worker):
+    """Passe unique sur les fiches PDF (fiche_pass.py), lues avec pdf_backend, en flux.
+
+    timeout / max_docs_per_worker : None = valeurs par defaut de parse_pdf.py
+    (FICHE_TIMEOUT, MAX_DOCS_PER_WORKER), 0 = illimite.
+
+    Ne depend pas des etapes AT et MP, qui tournent pendant la lecture des fiches.
+    Chaque fiche est reduite des sa lecture aux champs lus par la fusion
+    (merge_fields) ; seules les sorties de extra et size_engine sont gardees en
+    entier jusqu'a leur ecriture. Ecrit extra-dimensions.json et size-data.json,
+    retourne {naf5: merge_fields(fiche)} pour stage_merge.
+    """
+    from fiche_pass import DEFAULT_EXTRACTORS, FICHE_PASS_CACHE_PATH, iter_fiche_pass, write_outputs
+    from parse_pdf import FICHE_TIMEOUT, MAX_DOCS_PER_WORKER
+    print("\n=== Fiches PDF ===")
+    cache_path = FICHE_PASS_CACHE_PATH if use_cache else None
+    timeout = FICHE_TIMEOUT if timeout is None else timeout
+    max_docs_per_worker = MAX_DOCS_PER_WORKER if max_docs_per_worker is None else max_docs_per_worker
+    outputs = {name: {} for name in DEFAULT_EXTRACTORS if name != "demographics"}
+    fiches = {}
+    for code, results in iter_fiche_pass(pdf_dir, DEFAULT_EXTRACTORS, workers=workers, cache_path=cache_path,
+                                         backend=pdf_backend, timeout=timeout or None,
+                                         max_docs_per_worker=max_docs_per_worker or None):
+        for name in outputs:
+            if results.get(name):
+                outputs[name][code] = results[name]
+        if results.get("demographics"):
+            fiches[code] = merge_fields(results["demographics"])
+    write_outputs(outputs, OUTPUT_DIR)
+    return fiches
+
+
+def stage_merge(at_data, mp_data, fiches=None):
+    """Jointure Excel x PDF : fusion des demographics, evolution 5 ans et Trajet
+    (build_pdf_outputs sur les fiches reduites de stage_fiches).
+
+    Sans fiches, retourne les donnees AT/MP telles quelles. Retourne {"at", "mp"}
+    et, avec fiches, "trajet".
+    """
+    if fiches is None:
+        return {"at": at_data, "mp": mp_data}
+    print("\n=== Fusion PDF ===")
+    trajet_data = build_pdf_outputs(fiches.items(), at_data, mp_data)
+    return {"at": at_data, "mp": mp_data, "trajet": trajet_data}
+
+
+def stage_write(datasets):
+    at_data, mp_data = datasets["at"], datasets["mp"]
+    print("\n[write] AT...")
+    write_json(at_data, AT_JSON_PATH, "AT")
+    validate(at_data, "AT")
+
+    print("[write] MP...")
+    write_json(mp_data, MP_JSON_PATH, "MP")
+    validate(mp_data, "MP")
+
+
+def stage_trajet(datasets):
+    print("\n=== Pipeline Trajet ===")
+    trajet_data = datasets["trajet"]
+    write_json(trajet_data, TRAJET_JSON_PATH, "Trajet")
+    validate(trajet_data, "Trajet")
+
+
+def stage_regional(rapport_pdf_path, pdf_backend="pdfplumber", use_cache=True):
+    """Extraction regionale depuis le rapport annuel.
+
+    Tous les tableaux de parse_regional.REGIONAL_TABLES sont extraits. Les erreurs sont levees : l'etape est declaree
+    optional dans build_stages, le scheduler les signale sans interrompre les autres
+    etapes et une etape en echec n'est pas enregistree dans le manifeste.
+    """
+    print("\n=== Pipeline Regional ===")
+    if not rapport_pdf_path.exists():
+        raise FileNotFoundError(f"Rapport PDF introuvable : {rapport_pdf_path}")
+    from parse_regional import PAGE_CACHE_PATH, parse_regional_pdf
+    cache_path = PAGE_CACHE_PATH if use_cache else None
+    regional_data = parse_regional_pdf(rapport_pdf_path, pdf_backend, cache_path)
+    with open(REGIONAL_JSON_PATH, "w", encoding="utf-8") as f:
+        json.dump(regional_data, f, ensure_ascii=False, indent=2)
+    nb_caisses = len(regional_data.get("caisses", []))
+    metro = sum(
+        1 for c in regional_data.get("caisses", [])
+        if c.get("type") in ("carsat", "cramif")
+    )
+    print(f"  [ok] regional-data.json : {nb_caisses} caisses ({metro} metropolitaines)")
+
+
+def build_stages(args, pdf_dir):
+    """Graphe d'etapes de main() (voir scheduler.py et manifest.py pour les cles)."""
+    stages = [
+        {"name": "at", "fn": stage_at, "args": (args.columnar, args.xlsx_backend, not args.no_cache),
+         "inputs": [AT_XLSX_PATH], "packages": ["openpyxl", "numpy"]},
+        {"name": "mp", "fn": stage_mp, "args": (args.xlsx_backend, not args.no_cache),
+         "inputs": [MP_XLSX_PATH], "packages": ["openpyxl", "numpy"]},
+    ]
+    if pdf_dir is not None:
+        stages.append({"name": "pdf", "fn": stage_fiches,
+                       "args": (pdf_dir, args.workers, not args.no_cache, args.pdf_backend,
+                                args.pdf_timeout, args.max_docs_per_worker),
+                       "inputs": sorted(pdf_dir.glob("NAF_*.pdf")), "packages": ["pdfplumber", "pypdfium2"],
+                       "outputs": [EXTRA_JSON_PATH, SIZE_JSON_PATH]})
+    stages += [
+        {"name": "merge", "fn": stage_merge, "local": True,
+         "deps": ["at", "mp"] + (["pdf"] if pdf_dir is not None else [])},
+        {"name": "write", "fn": stage_write, "deps": ["merge"], "local": True,
+         "outputs": [AT_JSON_PATH, MP_JSON_PATH]},
+    ]
+    if pdf_dir is not None:
+        stages.append({"name": "trajet", "fn": stage_trajet, "deps": ["merge"],
+                       "after": ["write"], "local": True, "outputs": [TRAJET_JSON_PATH]})
+    if args.rapport_pdf:
+        rapport_pdf_path = Path(args.rapport_pdf)
+        stages.append({"name": "regional", "fn": stage_regional, "args": (rapport_pdf_path, args.pdf_backend,
+                                                                       not args.no_cache),
+                       "optional": True,
+                       "inputs": [rapport_pdf_path], "packages": ["pdfplumber", "pypdfium2"],
+                       "outputs": [REGIONAL_JSON_PATH]})
+    return stages
+
+
 # ═══════════════════════════════════════════
 # MAIN
 # ═══════════════════════════════════════════
 
 def main():
     import argparse
+    try:
+        from pdf_backend import PDF_BACKENDS
+    except ImportError:
+        PDF_BACKENDS = None  # scripts PDF absents : signale plus bas, pas de controle ici
     parser = argparse.ArgumentParser(
         description="Rafraichit les donnees AT/MP/Trajet depuis ameli.fr."
     )
@@ -1115,6 +1583,63 @@ def main():
         help="Chemin vers le rapport annuel PDF pour extraction des donnees regionales.",
         default=None,
     )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Agregation AT en mode colonnaire (numpy), sortie identique au mode par lignes.",
+    )
+    parser.add_argument(
+        "--xlsx-backend",
+        choices=XLSX_BACKENDS,
+        default="openpyxl",
+        help="Lecteur Excel : openpyxl (reference) ou stream (lit uniquement les colonnes utiles).",
+    )
+    parser.add_argument(
+        "--pdf-backend",
+        choices=PDF_BACKENDS,
+        default="pdfplumber",
+        help="Moteur d'extraction des fiches et du rapport : pdfplumber (reference) ou pdfium "
+             "(plus rapide, voir pdf_backend.py).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore les caches (parsing Excel, fiches PDF, etapes du manifeste) : reconstruction complete.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Nombre de processus pour les etapes independantes (defaut : nombre de coeurs, 1 = sequentiel).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Nombre de processus pour le parsing des fiches PDF (defaut : 1).",
+    )
+    parser.add_argument(
+        "--pdf-timeout",
+        type=float,
+        default=None,
+        help="Delai par fiche PDF en secondes, 0 = illimite (defaut : FICHE_TIMEOUT de parse_pdf.py). "
+             "Les fiches hors delai sont listees a part et re-essayees au lancement suivant.",
+    )
+    parser.add_argument(
+        "--max-docs-per-worker",
+        type=int,
+        default=None,
+        help="Fiches par processus avant son remplacement, 0 = illimite "
+             "(defaut : MAX_DOCS_PER_WORKER de parse_pdf.py).",
+    )
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        metavar="STAGE",
+        help="Re-execute l'etape meme si le manifeste la juge inchangee "
+             "(at, mp, pdf, merge, write, trajet, regional ; repetable).",
+    )
     args = parser.parse_args()
 
     pdf_dir = None
@@ -1124,90 +1649,30 @@ def main():
             print(f"[erreur] Dossier PDF introuvable : {pdf_dir}", file=sys.stderr)
             sys.exit(1)
 
-    # ── AT ──
-    print("=== Pipeline AT ===")
-    print("[1] Telechargement...")
-    download_xlsx(AT_XLSX_PATH, AT_XLSX_URL)
-    print("[2] Parsing...")
-    at_rows = parse_at_xlsx()
-    print("[3] Construction...")
-    at_data = build_at_data(at_rows)
-
-    # ── MP ──
-    print("\n=== Pipeline MP ===")
-    print("[1] Telechargement...")
-    download_xlsx(MP_XLSX_PATH, MP_XLSX_URL)
-    print("[2] Parsing...")
-    mp_rows = parse_mp_xlsx()
-    print("[3] Construction...")
-    mp_data = build_mp_data(mp_rows)
-
-    # ── PDF (optionnel) ──
+    # ── Etapes independantes (AT, MP, PDF, rapport) puis jointures ──
     if pdf_dir is not None:
         try:
-            from parse_pdf import parse_all_pdfs
+            import fiche_pass  # noqa: F401
         except ImportError:
-            print("[avert] parse_pdf.py introuvable - demographics et Trajet ignores.")
-            print("        Verifiez que parse_pdf.py est present dans data/pipeline/.")
+            print("[avert] fiche_pass.py ou parse_pdf.py introuvable - demographics et Trajet ignores.")
+            print("        Verifiez que les scripts PDF sont presents dans data/pipeline/.")
             pdf_dir = None
-
-    if pdf_dir is not None:
-        print("\n=== Parsing PDF ===")
-        pdf_data = parse_all_pdfs(pdf_dir)
-        merge_pdf_data(at_data, pdf_data, mp_data=mp_data)
-
-        print("\n=== Evolution AT (5 ans) ===")
-        at_yearly = build_yearly_from_pdf(pdf_data, "at_yearly", base_data=at_data)
-        merge_yearly_into_data(at_data, at_yearly)
-
-        print("\n=== Evolution MP (5 ans) ===")
-        mp_yearly = build_yearly_from_pdf(pdf_data, "mp_yearly", base_data=at_data)
-        merge_yearly_into_data(mp_data, mp_yearly)
-    else:
-        if args.pdf_dir is None:
-            print("\n[info] --pdf-dir non fourni. Demographics et Trajet non generes.")
-            print("       Pour les inclure : python refresh_data.py --pdf-dir /chemin/vers/pdfs")
-
-    # ── Ecriture AT ──
-    print("\n[write] AT...")
-    write_json(at_data, AT_JSON_PATH, "AT")
-    validate(at_data, "AT")
-
-    # ── Ecriture MP ──
-    print("[write] MP...")
-    write_json(mp_data, MP_JSON_PATH, "MP")
-    validate(mp_data, "MP")
-
-    # ── Trajet (necessite les PDFs) ──
-    if pdf_dir is not None:
-        print("\n=== Pipeline Trajet ===")
-        trajet_data = build_trajet_data(pdf_data, at_data)
-        write_json(trajet_data, TRAJET_JSON_PATH, "Trajet")
-        validate(trajet_data, "Trajet")
-    else:
+    if pdf_dir is None and args.pdf_dir is None:
+        print("\n[info] --pdf-dir non fourni. Demographics et Trajet non generes.")
+        print("       Pour les inclure : python refresh_data.py --pdf-dir /chemin/vers/pdfs")
+
+    stages = build_stages(args, pdf_dir)
+    unknown = sorted(set(args.force) - {st["name"] for st in stages})
+    if unknown:
+        parser.error(f"--force : etape inconnue {', '.join(unknown)}")
+    force = {st["name"] for st in stages} if args.no_cache else args.force
+
+    lookup, store, _ = stage_cache(MANIFEST_PATH, PARSE_CACHE_DIR / "stages", force)
+    t0 = time.perf_counter()
+    _, timings = run_stages(stages, jobs=args.jobs, lookup=lookup, store=store)
+    if pdf_dir is None:
         print("\n[info] Trajet non genere (necessite --pdf-dir).")
-
-    # ── Regional (optionnel) ──
-    if args.rapport_pdf:
-        print("\n=== Pipeline Regional ===")
-        rapport_pdf_path = Path(args.rapport_pdf)
-        if not rapport_pdf_path.exists():
-            print(f"[erreur] Rapport PDF introuvable : {rapport_pdf_path}", file=sys.stderr)
-        else:
-            try:
-                from parse_regional import parse_regional_pdf
-                regional_data = parse_regional_pdf(rapport_pdf_path)
-                regional_json_path = OUTPUT_DIR / "regional-data.json"
-                with open(regional_json_path, "w", encoding="utf-8") as f:
-                    json.dump(regional_data, f, ensure_ascii=False, indent=2)
-                nb_caisses = len(regional_data.get("caisses", []))
-                metro = sum(
-                    1 for c in regional_data.get("caisses", [])
-                    if c.get("type") in ("carsat", "cramif")
-                )
-                print(f"  [ok] regional-data.json : {nb_caisses} caisses ({metro} metropolitaines)")
-            except Exception as e:
-                print(f"[erreur] Extraction regionale echouee : {e}", file=sys.stderr)
+    print_timings(timings, time.perf_counter() - t0)
 
     print("\nTermine.")
 
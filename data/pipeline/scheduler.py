@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Ordonnanceur d'étapes (DAG) pour refresh_data.main().
+
+Une étape est un dict :
+    name   : identifiant unique
+    fn     : fonction de niveau module (picklable), appelée avec
+             fn(*args, *[résultat de chaque dépendance de deps])
+    args   : arguments fixes (tuple, optionnel)
+    deps   : étapes dont le résultat est passé à fn (liste, optionnel)
+    after  : étapes à terminer avant, sans passer leur résultat (liste, optionnel)
+    local  : True pour exécuter l'étape dans le processus principal (jointures qui
+             modifient en place des résultats déjà rapatriés), optionnel
+    optional : True si un échec de l'étape ne doit pas interrompre l'exécution :
+             l'erreur est affichée, le résultat vaut None et store n'est pas appelé
+             (l'étape sera ré-exécutée la fois suivante), optionnel
+
+Les étapes indépendantes sont exécutées en parallèle dans un ProcessPoolExecutor ;
+les étapes locales s'exécutent dès que leurs dépendances sont prêtes.
+"""
+
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def _requires(stage: dict) -> list[str]:
+    """Toutes les étapes à terminer avant `stage` (deps puis after)."""
+    return list(stage.get("deps", [])) + list(stage.get("after", []))
+
+
+def check_stages(stages: list[dict]) -> None:
+    """Vérifie l'unicité des noms, l'existence des dépendances et l'absence de cycle.
+
+    Raises:
+        ValueError avec un message décrivant l'étape fautive.
+    """
+    names = [s["name"] for s in stages]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"Étapes en double : {', '.join(sorted(duplicates))}")
+    known = set(names)
+    for stage in stages:
+        missing = [d for d in _requires(stage) if d not in known]
+        if missing:
+            raise ValueError(f"Étape '{stage['name']}' : dépendance inconnue {', '.join(missing)}")
+
+    done = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [s for s in remaining if all(d in done for d in _requires(s))]
+        if not ready:
+            blocked = ", ".join(s["name"] for s in remaining)
+            raise ValueError(f"Cycle de dépendances entre les étapes : {blocked}")
+        done.update(s["name"] for s in ready)
+        remaining = [s for s in remaining if s["name"] not in done]
+
+
+def _timed_call(fn, args, optional=False):
+    """Exécute fn(*args) et retourne (résultat, durée en secondes, erreur).
+
+    erreur vaut None, ou le message de l'exception si `optional` (sinon elle est levée).
+    """
+    t0 = time.perf_counter()
+    try:
+        result = fn(*args)
+    except Exception as e:
+        if not optional:
+            raise
+        return None, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+    return result, time.perf_counter() - t0, None
+
+
+def _call_args(stage: dict, results: dict) -> tuple:
+    return tuple(stage.get("args", ())) + tuple(results[d] for d in stage.get("deps", []))
+
+
+def run_stages(stages: list[dict], jobs: int | None = None, lookup=None, store=None) -> tuple[dict, dict]:
+    """Exécute les étapes dans l'ordre du DAG.
+
+    Args:
+        stages: liste d'étapes (voir le docstring du module), dans l'ordre de préférence
+        jobs: nombre de processus ; 1 exécute tout séquentiellement dans le processus
+              courant, None laisse ProcessPoolExecutor choisir (nombre de coeurs)
+        lookup: optionnel, lookup(stage) -> (trouvé, résultat) appelé quand l'étape est
+                prête ; si trouvé, l'étape n'est pas exécutée (voir manifest.py)
+        store: optionnel, store(stage, résultat, durée) appelé dans le processus
+               principal après chaque étape exécutée
+
+    Returns:
+        (results, timings) : {nom: résultat} et {nom: durée de l'étape en secondes,
+        None si l'étape a été reprise par lookup}. Une exception levée par une étape
+        est propagée telle quelle, sauf pour une étape optional (résultat None).
+    """
+    check_stages(stages)
+    results = {}
+    timings = {}
+    pending = list(stages)
+
+    def ready_stages():
+        return [s for s in pending if all(d in results for d in _requires(s))]
+
+    def finish(stage, result, seconds, error=None):
+        if error is not None:
+            print(f"[erreur] Étape '{stage['name']}' échouée : {error}", file=sys.stderr)
+        elif store is not None and seconds is not None:
+            store(stage, result, seconds)
+        results[stage["name"]], timings[stage["name"]] = result, seconds
+
+    def try_reuse(stage):
+        if lookup is None:
+            return False
+        found, result = lookup(stage)
+        if found:
+            finish(stage, result, None)
+        return found
+
+    if jobs == 1:
+        while pending:
+            stage = ready_stages()[0]
+            pending.remove(stage)
+            if not try_reuse(stage):
+                finish(stage, *_timed_call(stage["fn"], _call_args(stage, results), stage.get("optional")))
+        return results, timings
+
+    remote = sum(1 for s in stages if not s.get("local"))
+    workers = max(1, min(jobs, remote)) if jobs else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            progressed = False
+            for stage in ready_stages():
+                pending.remove(stage)
+                if try_reuse(stage):
+                    progressed = True
+                    break  # d'autres étapes peuvent être devenues prêtes
+                args = _call_args(stage, results)
+                if stage.get("local"):
+                    finish(stage, *_timed_call(stage["fn"], args, stage.get("optional")))
+                    progressed = True
+                    break
+                running[pool.submit(_timed_call, stage["fn"], args, stage.get("optional"))] = stage
+            if progressed:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(running.pop(future), *future.result())
+    return results, timings
+
+
+def print_timings(timings: dict, wall: float, file=None) -> None:
+    """Affiche la durée de chaque étape (ordre d'achèvement) et la durée totale."""
+    print("\n=== Durées par étape ===", file=file)
+    width = max([len(name) for name in timings] + [len("total")])
+    for name, seconds in timings.items():
+        if seconds is None:
+            print(f"  {name:<{width}}  reprise (inchangée)", file=file)
+        else:
+            print(f"  {name:<{width}}  {seconds:7.1f} s", file=file)
+    print(f"  {'total':<{width}}  {wall:7.1f} s (temps réel)", file=file)
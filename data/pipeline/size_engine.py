@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Graphique par taille d'établissement : les deux digitaliseurs sur une même page.
+
+extract_size.py (étalonnage sur les mots « N% » de l'axe et les libellés de tranches)
+et extract_size_chart.py (droite des moindres carrés sur les glyphes des deux axes,
+lecture de l'IF) lisent le même graphique. Ici les deux stratégies tournent sur la
+page déjà analysée (objets et mots partagés, voir fiche_pass.open_fiche) et le
+résultat retenu est celui dont les sommes vertes et violettes sont les plus proches
+de 100 % ; l'IF vient toujours de extract_size_chart, seul à le lire. Chaque secteur
+garde ses diagnostics (sommes des deux stratégies, écart maximal entre elles).
+
+Le catalogue est traité par fiche_pass.run_fiche_pass (extracteur "size_engine" :
+processus parallèles, cache SQLite, délai par fiche).
+
+Sorties :
+    size-data.json          : {naf5: {"bands": [...]}} dans --out-dir (défaut data/)
+    size-diagnostics.json   : {naf5: diagnostics} (--diagnostics)
+
+Usage:
+    python size_engine.py --pdf-dir /chemin/vers/pdfs [--out-dir DOSSIER] [--workers N]
+                          [--backend pdfplumber|pdfium] [--no-cache]
+                          [--diagnostics FICHIER]
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+
+import extract_size
+import extract_size_chart
+import pdf_backend
+
+DIAGNOSTICS_PATH = Path(__file__).parent / ".cache" / "size-diagnostics.json"
+STRATEGIES = ("glyphs", "words")  # ordre de préférence à écart égal
+SUM_TOL = 5.0  # écart à 100 % toléré dans le bilan, en points
+
+
+def _deviation(green_sum, purple_sum) -> float:
+    """Écart des deux sommes à 100 % (infini si une série manque)."""
+    if green_sum is None or purple_sum is None:
+        return math.inf
+    return abs(green_sum - 100) + abs(purple_sum - 100)
+
+
+def _max_diff(a: list[dict], b: list[dict]) -> float | None:
+    """Plus grand écart entre deux lectures des parts (points), None si l'une manque."""
+    diffs = [abs(x[k] - y[k]) for x, y in zip(a, b)
+             for k in ("part_accidents", "part_salaries") if x[k] is not None and y[k] is not None]
+    return round(max(diffs), 1) if diffs else None
+
+
+def parse_page(page: dict, words: list[dict] | None = None) -> dict:
+    """Graphique par taille de la page 1 par les deux stratégies, le meilleur retenu.
+
+    Args:
+        page: page 1 (pdf_backend), partagée avec les autres extracteurs
+        words: pdf_backend.words(page) s'ils sont déjà calculés
+
+    Returns:
+        {"bands": [{"label", "part_accidents", "part_salaries", "if"}] * 6,
+         "_diag": {"strategy": "glyphs" | "words" | None, "glyphs": {...},
+                   "words": {...} | None, "max_diff"}} ; les clés en "_" ne sont
+        pas écrites dans size-data.json (fiche_pass.write_outputs).
+    """
+    chart = extract_size_chart.parse_page(page)
+    chart_diag = chart["_diag"]
+    try:
+        ticks = extract_size.parse_page(page, words)
+    except Exception as e:  # noqa: BLE001  (stratégie en échec : l'autre reste)
+        print(f"  ERREUR size (mots): {e}")
+        ticks = None
+
+    readings = {"glyphs": chart["bands"], "words": ticks["bands"] if ticks else None}
+    deviations = {
+        "glyphs": _deviation(chart_diag["green_sum"], chart_diag["purple_sum"]),
+        "words": _deviation(ticks["_g"], ticks["_p"]) if ticks else math.inf,
+    }
+    strategy = min(STRATEGIES, key=lambda s: deviations[s])
+    if deviations[strategy] == math.inf:
+        strategy = None
+
+    chosen = readings[strategy] if strategy else chart["bands"]
+    bands = [{"label": band["label"], "part_accidents": band["part_accidents"],
+              "part_salaries": band["part_salaries"], "if": chart_band["if"]}
+             for band, chart_band in zip(chosen, chart["bands"])]
+    diag = {
+        "strategy": strategy,
+        "glyphs": chart_diag,
+        "words": {"green_sum": ticks["_g"], "purple_sum": ticks["_p"], "bands": ticks["_n"]}
+        if ticks else None,
+        "max_diff": _max_diff(chart["bands"], ticks["bands"]) if ticks else None,
+    }
+    return {"bands": bands, "_diag": diag}
+
+
+def parse_one(path, backend: str = "pdfplumber") -> dict:
+    """parse_page sur la page 1 d'une fiche (ouverte une fois pour les deux stratégies)."""
+    doc = pdf_backend.open_pdf(path, backend)
+    try:
+        page = pdf_backend.pages(doc)[0]
+        return parse_page(page, pdf_backend.words(page))
+    finally:
+        pdf_backend.close_pdf(doc)
+
+
+def summarize(results: dict[str, dict]) -> dict:
+    """Bilan des diagnostics par secteur : stratégies retenues, sommes à ±SUM_TOL de
+    100 %, secteurs où les deux lectures divergent de plus de SUM_TOL points."""
+    chosen = {s: 0 for s in (*STRATEGIES, None)}
+    sums_ok, disagree = 0, []
+    for naf5, result in sorted(results.items()):
+        diag = result["_diag"]
+        chosen[diag["strategy"]] += 1
+        green = sum(b["part_accidents"] or 0 for b in result["bands"])
+        purple = sum(b["part_salaries"] or 0 for b in result["bands"])
+        if diag["strategy"] and abs(green - 100) <= SUM_TOL and abs(purple - 100) <= SUM_TOL:
+            sums_ok += 1
+        if diag["max_diff"] is not None and diag["max_diff"] > SUM_TOL:
+            disagree.append(naf5)
+    return {"sectors": len(results), "strategy": chosen, "sums_ok": sums_ok, "disagree": disagree}
+
+
+def main() -> None:
+    import fiche_pass
+    import parse_pdf
+
+    parser = argparse.ArgumentParser(
+        description="Graphique par taille d'établissement des fiches NAF (deux étalonnages, le meilleur retenu)"
+    )
+    parser.add_argument("--pdf-dir", required=True, help="Dossier contenant les fichiers NAF_*.pdf")
+    parser.add_argument("--out-dir", default=str(fiche_pass.OUTPUT_DIR),
+                        help="Dossier de size-data.json (défaut : data/)")
+    parser.add_argument("--diagnostics", default=str(DIAGNOSTICS_PATH),
+                        help=f"Diagnostics par secteur (défaut : .cache/{DIAGNOSTICS_PATH.name})")
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus (défaut : 1)")
+    parser.add_argument("--timeout", type=float, default=parse_pdf.FICHE_TIMEOUT,
+                        help=f"Délai par fiche en secondes, 0 = illimité (défaut : {parse_pdf.FICHE_TIMEOUT})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Ignore le cache ({fiche_pass.FICHE_PASS_CACHE_PATH.name}) et ré-ouvre toutes les fiches")
+    parser.add_argument("--backend", choices=pdf_backend.PDF_BACKENDS, default="pdfplumber",
+                        help="Moteur d'extraction PDF (défaut : pdfplumber ; voir pdf_backend.py)")
+    args = parser.parse_args()
+
+    pdf_dir = Path(args.pdf_dir)
+    if not pdf_dir.is_dir():
+        print(f"Erreur : '{pdf_dir}' n'est pas un dossier.", file=sys.stderr)
+        sys.exit(1)
+
+    cache_path = None if args.no_cache else fiche_pass.FICHE_PASS_CACHE_PATH
+    by_extractor = fiche_pass.run_fiche_pass(pdf_dir, ["size_engine"], workers=args.workers,
+                                             cache_path=cache_path, backend=args.backend,
+                                             timeout=args.timeout or None)
+    fiche_pass.write_outputs(by_extractor, Path(args.out_dir))
+
+    results = by_extractor["size_engine"]
+    diagnostics = Path(args.diagnostics)
+    diagnostics.parent.mkdir(parents=True, exist_ok=True)
+    with open(diagnostics, "w", encoding="utf-8") as f:
+        json.dump({naf5: r["_diag"] for naf5, r in results.items()}, f, ensure_ascii=False, indent=2)
+
+    summary = summarize(results)
+    print(f"  Secteurs : {summary['sectors']} (glyphes : {summary['strategy']['glyphs']}, "
+          f"mots : {summary['strategy']['words']}, aucun : {summary['strategy'][None]})")
+    print(f"  Sommes à 100 % ±{SUM_TOL:g} : {summary['sums_ok']}/{summary['sectors']}")
+    if summary["disagree"]:
+        print(f"  Lectures divergentes (> {SUM_TOL:g} points) : {', '.join(summary['disagree'][:20])}")
+    print(f"  [ok] Diagnostics : {diagnostics}")
+
+
+if __name__ == "__main__":
+    main()
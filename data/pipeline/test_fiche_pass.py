@@ -0,0 +1,117 @@
+"""Tests pour fiche_pass.py sur des fiches NAF synthétiques (voir conftest.py).
+
+Ils couvrent:
+- une seule ouverture par fiche, résultats identiques aux extracteurs pris isolément
+- résolution des extracteurs (prérequis, inconnus, sorties en conflit)
+- run_fiche_pass() (parallèle, cache) et write_outputs()
+"""
+
+import json
+
+import pdfplumber
+import pytest
+
+import extract_extra
+import extract_size
+import fiche_pass as m
+import parse_pdf
+from conftest import mp_disease_rows, size_chart_values
+
+
+def _count_opens(monkeypatch):
+    opened = []
+    original = pdfplumber.open
+
+    def counting(path, *args, **kwargs):
+        opened.append(path.name)
+        return original(path, *args, **kwargs)
+
+    monkeypatch.setattr(pdfplumber, "open", counting)
+    return opened
+
+
+# ---------------------------------------------------------------------------
+# Tests parse_fiche
+# ---------------------------------------------------------------------------
+
+
+def test_parse_fiche_single_open(fiche_dir, monkeypatch):
+    """Tous les extracteurs tournent sur une seule ouverture de la fiche."""
+    opened = _count_opens(monkeypatch)
+    m.parse_fiche(fiche_dir / "NAF_4520A.pdf", tuple(m.EXTRACTORS))
+    assert opened == ["NAF_4520A.pdf"]
+
+
+def test_parse_fiche_matches_separate_extractors(fiche_dir):
+    """Chaque extracteur rend exactement ce que rend son script seul."""
+    path = fiche_dir / "NAF_4520A.pdf"
+    results = m.parse_fiche(path, ("demographics", "extra", "size"))
+    assert results["demographics"] == parse_pdf.parse_one_pdf(path)
+    assert results["extra"] == extract_extra.parse_one(path)
+    assert results["size"] == {"bands": extract_size.parse_one(path)["bands"]}
+    assert results["extra"]["mp_diseases"] == mp_disease_rows(6)
+
+
+def test_parse_fiche_size_chart(fiche_dir):
+    """Le digitaliseur à axes ajustés lit aussi l'IF par tranche."""
+    results = m.parse_fiche(fiche_dir / "NAF_0111Z.pdf", ("size_chart",))
+    bands = results["size_chart"]["bands"]
+    assert [{k: b[k] for k in ("part_accidents", "part_salaries", "if")} for b in bands] == size_chart_values(3)
+
+
+def test_parse_fiche_invalid(fiche_dir):
+    assert m.parse_fiche(fiche_dir / "NAF_9999Z.pdf") is None
+
+
+# ---------------------------------------------------------------------------
+# Tests resolve_extractors
+# ---------------------------------------------------------------------------
+
+
+def test_resolve_extractors_adds_requirements():
+    assert m.resolve_extractors(["extra"]) == ["demographics", "extra"]
+    assert m.resolve_extractors(["size", "demographics"]) == ["demographics", "size"]
+
+
+def test_resolve_extractors_errors():
+    with pytest.raises(ValueError, match="inconnu"):
+        m.resolve_extractors(["statut"])
+    with pytest.raises(ValueError, match="size-data.json"):
+        m.resolve_extractors(["size", "size_chart"])
+
+
+# ---------------------------------------------------------------------------
+# Tests run_fiche_pass / write_outputs
+# ---------------------------------------------------------------------------
+
+
+def test_run_fiche_pass_parallel_identical(fiche_dir):
+    serial = m.run_fiche_pass(fiche_dir, cache_path=None)
+    parallel = m.run_fiche_pass(fiche_dir, workers=3, cache_path=None)
+    assert parallel == serial
+    assert serial["demographics"] == parse_pdf.parse_all_pdfs(fiche_dir, cache_path=None)
+    assert list(serial["size_engine"]) == ["0111Z", "4520A", "4711D", "8610Z", "9609Z"]
+
+
+def test_run_fiche_pass_cache(fiche_dir, tmp_path, monkeypatch):
+    """Au second passage seule la fiche illisible est ré-ouverte ; un autre jeu
+    d'extracteurs ne réutilise pas les résultats en cache."""
+    cache = tmp_path / "pass.sqlite"
+    first = m.run_fiche_pass(fiche_dir, cache_path=cache)
+    opened = _count_opens(monkeypatch)
+    assert m.run_fiche_pass(fiche_dir, cache_path=cache) == first
+    assert opened == ["NAF_9999Z.pdf"]
+
+    opened.clear()
+    m.run_fiche_pass(fiche_dir, ["size"], cache_path=cache)
+    assert len(opened) == 6
+
+
+def test_write_outputs(fiche_dir, tmp_path):
+    by_extractor = m.run_fiche_pass(fiche_dir, cache_path=None)
+    written = m.write_outputs(by_extractor, tmp_path)
+    assert [p.name for p in written] == ["extra-dimensions.json", "size-data.json"]
+    size = json.loads((tmp_path / "size-data.json").read_text(encoding="utf-8"))
+    expected = size_chart_values(3)[0]
+    assert size["0111Z"]["bands"][0] == {"label": "- de 10", "part_accidents": expected["part_accidents"],
+                                         "part_salaries": expected["part_salaries"], "if": expected["if"]}
@@ -0,0 +1,173 @@
+"""Tests pour la reconstruction incrémentale (manifest.py).
+
+Ils couvrent:
+- code_parts() (fonctions et constantes atteintes par une étape)
+- stage_cache() (reprise, invalidation par entrée, sortie, dépendance ou --force ;
+  étape optional en échec jamais enregistrée)
+- run_stages() avec lookup / store
+"""
+
+import json
+
+import manifest as m
+import parse_pdf
+import pdf_backend
+import refresh_data
+import scheduler
+
+
+def _double(x):
+    return x * 2
+
+
+def _write_output(path, value):
+    path.write_text(json.dumps(value), encoding="utf-8")
+    return value
+
+
+def _write_then_fail(path):
+    path.write_text("partiel", encoding="utf-8")
+    raise RuntimeError("extraction échouée")
+
+
+# ---------------------------------------------------------------------------
+# Tests code_parts
+# ---------------------------------------------------------------------------
+
+
+def test_code_parts_follows_calls_and_constants():
+    """Les fonctions appelées, imports locaux compris, et les mappings sont inclus."""
+    parts = m.code_parts([refresh_data.stage_at])
+    assert "refresh_data.parse_at_xlsx" in parts
+    assert "refresh_data.build_naf_dataset" in parts
+    assert "xlsx_stream.iter_sheet_rows" in parts  # import local dans iter_xlsx_rows
+    assert "refresh_data.AT_COL" in parts
+    assert "refresh_data.PARSER_VERSION" in parts
+
+
+def test_code_parts_isolates_builders():
+    """Modifier le builder Trajet (appliqué par l'étape merge) ne touche ni l'empreinte de
+    l'étape AT ni celle de la lecture des fiches."""
+    assert "refresh_data.add_fiche_trajet" not in m.code_parts([refresh_data.stage_at])
+    assert "refresh_data.add_fiche_trajet" not in m.code_parts([refresh_data.stage_fiches])
+    assert "refresh_data.add_fiche_trajet" in m.code_parts([refresh_data.stage_merge])
+    assert "refresh_data.add_fiche_trajet" not in m.code_parts([refresh_data.stage_trajet])
+
+
+def test_code_parts_registry_of_functions():
+    """Un registre d'extracteurs est empreinté sans adresses mémoire, fonctions comprises."""
+    parts = m.code_parts([refresh_data.stage_fiches])
+    assert "fiche_pass.EXTRACTORS" in parts
+    assert " at 0x" not in parts["fiche_pass.EXTRACTORS"]
+    assert "fiche_pass._size" in parts
+    assert "extract_size.parse_page" in parts
+
+
+def test_code_parts_ignores_process_state(monkeypatch):
+    """Le résultat mis en cache par pdf_backend (état du processus) n'entre pas dans l'empreinte."""
+    monkeypatch.setattr(pdf_backend, "_plumber_internals_found", None)
+    before = m.code_parts([parse_pdf.parse_open_pdf])
+    pdf_backend._plumber_internals()
+    assert m.code_parts([parse_pdf.parse_open_pdf]) == before
+    assert "pdf_backend._plumber_internals_found" not in before
+
+
+def test_code_parts_follows_module_constants():
+    """Les constantes de module atteintes (noms en majuscules) entrent dans l'empreinte."""
+    parts = m.code_parts([parse_pdf.parse_open_pdf])
+    assert "parse_pdf.LAYOUT_TOLERANCE" in parts
+    assert "parse_pdf.SYNTHESIS_LABELS" in parts
+
+
+# ---------------------------------------------------------------------------
+# Tests stage_cache
+# ---------------------------------------------------------------------------
+
+
+def _stages(tmp_path):
+    source = tmp_path / "input.txt"
+    if not source.exists():
+        source.write_text("v1")
+    out = tmp_path / "out.json"
+    return [
+        {"name": "a", "fn": _double, "args": (21,), "inputs": [source]},
+        {"name": "b", "fn": _write_output, "args": (out,), "deps": ["a"], "outputs": [out]},
+    ]
+
+
+def _run(tmp_path, force=()):
+    lookup, store, manifest = m.stage_cache(tmp_path / "manifest.json", tmp_path / "artifacts", force)
+    results, timings = scheduler.run_stages(_stages(tmp_path), jobs=1, lookup=lookup, store=store)
+    return results, timings, manifest
+
+
+def test_stage_cache_reuses_unchanged_stages(tmp_path):
+    """Une seconde exécution reprend les résultats depuis les artefacts."""
+    results, timings, manifest = _run(tmp_path)
+    assert results == {"a": 42, "b": 42}
+    assert all(t is not None for t in timings.values())
+    assert set(manifest["stages"]) == {"a", "b"}
+    assert manifest["stages"]["b"]["outputs"] == {
+        str(tmp_path / "out.json"): m.file_sha256(tmp_path / "out.json")}
+
+    results, timings, _ = _run(tmp_path)
+    assert results == {"a": 42, "b": 42}
+    assert timings == {"a": None, "b": None}
+
+
+def test_stage_cache_input_change(tmp_path):
+    """Une entrée modifiée relance l'étape ; la suite est reprise si le résultat est identique."""
+    _run(tmp_path)
+    (tmp_path / "input.txt").write_text("v2")
+    _, timings, _ = _run(tmp_path)
+    assert timings["a"] is not None
+    assert timings["b"] is None
+
+
+def test_stage_cache_output_modified(tmp_path):
+    """Une sortie modifiée ou supprimée relance l'étape qui l'écrit."""
+    _run(tmp_path)
+    (tmp_path / "out.json").write_text("modifié à la main")
+    _, timings, _ = _run(tmp_path)
+    assert timings == {"a": None, "b": timings["b"]}
+    assert timings["b"] is not None
+    assert json.loads((tmp_path / "out.json").read_text()) == 42
+
+
+def test_stage_cache_force(tmp_path):
+    """--force relance l'étape demandée même si elle est inchangée."""
+    _run(tmp_path)
+    _, timings, _ = _run(tmp_path, force=["b"])
+    assert timings["a"] is None
+    assert timings["b"] is not None
+
+
+def test_stage_cache_dependency_artifact_change(tmp_path):
+    """Un artefact de dépendance différent relance les étapes suivantes."""
+    _run(tmp_path)
+    stages = _stages(tmp_path)
+    stages[0]["args"] = (5,)
+    lookup, store, _ = m.stage_cache(tmp_path / "manifest.json", tmp_path / "artifacts", ["a"])
+    results, timings = scheduler.run_stages(stages, jobs=1, lookup=lookup, store=store)
+    assert results == {"a": 10, "b": 10}
+    assert timings["b"] is not None
+
+
+def test_stage_cache_optional_failure(tmp_path):
+    """Une étape optional en échec n'est pas enregistrée : elle est relancée ensuite."""
+    out = tmp_path / "regional.json"
+    stages = [{"name": "r", "fn": _write_then_fail, "args": (out,), "optional": True, "outputs": [out]}]
+    for _ in range(2):
+        lookup, store, manifest = m.stage_cache(tmp_path / "manifest.json", tmp_path / "artifacts")
+        results, timings = scheduler.run_stages(stages, jobs=1, lookup=lookup, store=store)
+        assert results == {"r": None}
+        assert timings["r"] is not None
+        assert "r" not in manifest["stages"]
+    assert not (tmp_path / "artifacts" / "r.json").exists()
+
+
+def test_load_manifest_invalid(tmp_path):
+    """Un manifeste illisible est ignoré."""
+    path = tmp_path / "manifest.json"
+    path.write_text("{pas du json")
+    assert m.load_manifest(path)["stages"] == {}
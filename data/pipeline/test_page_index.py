@@ -0,0 +1,92 @@
+"""Tests pour l'index spatial des objets de page page_index.py.
+
+Ils couvrent:
+- query(), row(), column() identiques à un parcours complet (boîtes aléatoires et
+  objets d'une fiche synthétique), ordre d'origine conservé
+- with_text() et matching()
+- for_page() : un index par page et par sorte, réutilisé ou reconstruit selon la liste
+"""
+
+import math
+import random
+
+import pytest
+
+import page_index as m
+import pdf_backend
+
+
+def _touches(obj, x0, top, x1, bottom):
+    return obj["x1"] >= x0 and obj["x0"] <= x1 and obj["bottom"] >= top and obj["top"] <= bottom
+
+
+def _random_objs(n, seed=0):
+    rng = random.Random(seed)
+    objs = []
+    for i in range(n):
+        x0, top = rng.uniform(-10, 600), rng.uniform(-10, 850)
+        objs.append({"x0": x0, "x1": x0 + rng.choice([0, 2, 15, 300]), "top": top,
+                     "bottom": top + rng.choice([0, 5, 40]), "text": f"t{i % 7}"})
+    return objs
+
+
+@pytest.fixture
+def fiche_page(fiche_dir):
+    doc = pdf_backend.open_pdf(fiche_dir / "NAF_4520A.pdf")
+    yield pdf_backend.pages(doc)[0]
+    pdf_backend.close_pdf(doc)
+
+
+# ---------------------------------------------------------------------------
+# Tests requêtes
+# ---------------------------------------------------------------------------
+
+
+def test_query_matches_scan():
+    objs = _random_objs(400)
+    index = m.build(objs)
+    rng = random.Random(1)
+    for _ in range(200):
+        x0, top = rng.uniform(-50, 650), rng.uniform(-50, 900)
+        box = (x0, top, x0 + rng.uniform(0, 120), top + rng.uniform(0, 80))
+        assert m.query(index, *box) == [o for o in objs if _touches(o, *box)]
+    assert m.query(index) == objs
+    assert m.row(index, 100, 110) == [o for o in objs if _touches(o, -math.inf, 100, math.inf, 110)]
+    assert m.column(index, 300, 301) == [o for o in objs if _touches(o, 300, -math.inf, 301, math.inf)]
+    assert m.query(index, 2000, 2000, 3000, 3000) == []
+
+
+def test_query_page_objects(fiche_page):
+    for kind in m.KINDS:
+        objs = getattr(pdf_backend, kind)(fiche_page)
+        index = m.build(objs)
+        box = (300, 600, 550, 800)
+        assert m.query(index, *box) == [o for o in objs if _touches(o, *box)]
+
+
+def test_text_lookups():
+    objs = [{"x0": 0, "x1": 1, "top": 0, "bottom": 1, "text": t} for t in ["12%", "Code", "5%", "x%", "Code"]]
+    index = m.build(objs)
+    assert m.with_text(index, "Code") == [objs[1], objs[4]]
+    assert m.with_text(index, "absent") == []
+    assert m.matching(index, r"\d+%") == [objs[0], objs[2]]
+    assert m.build([])["objs"] == [] and m.query(m.build([]), 0, 0, 10, 10) == []
+
+
+# ---------------------------------------------------------------------------
+# Tests for_page
+# ---------------------------------------------------------------------------
+
+
+def test_for_page_cached(fiche_page):
+    index = m.for_page(fiche_page, "chars")
+    assert m.for_page(fiche_page, "chars") is index
+    assert index["objs"] == pdf_backend.chars(fiche_page)
+
+    words = pdf_backend.words(fiche_page)
+    by_words = m.for_page(fiche_page, "words", words)
+    assert by_words["objs"] is words
+    assert m.for_page(fiche_page, "words") is by_words
+    assert m.for_page(fiche_page, "words", words) is by_words
+    other = pdf_backend.words(fiche_page, x_tolerance=1)
+    assert m.for_page(fiche_page, "words", other)["objs"] is other
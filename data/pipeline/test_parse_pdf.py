@@ -0,0 +1,342 @@
+"""Tests pour parse_pdf.py sur des fiches NAF synthétiques (voir conftest.py).
+
+Ils couvrent:
+- parse_one_pdf() (blocs de synthèse, annuels et répartitions)
+- parse_breakdowns() (toutes les répartitions d'une cellule en un passage)
+- segment_row_numbers() (découpe des lignes annuelles en milliers, confiance)
+- mode "crop" (gabarits de mise en page) : identique au mode "full", repli si la page change
+  (tableau déplacé, ligne de synthèse plus longue) ou sans les internes de pdfminer
+- parse_all_pdfs() (mode parallèle identique au mode séquentiel, échecs, progression)
+- cache des fiches (SQLite) : réutilisation, fiche modifiée, version de section
+- iter_parsed_fiches() (fiches rendues une à une, cache écrit au fil de l'eau)
+- délai par fiche : fiche hors délai signalée à part et non mise en cache
+- processus mort pendant une fiche : échec non mis en cache
+"""
+
+import os
+import time
+
+import pdfplumber
+import pytest
+
+import parse_pdf as m
+from conftest import _breakdown_lines, fiche_pages, write_pdf
+
+
+# ---------------------------------------------------------------------------
+# Tests parse_one_pdf
+# ---------------------------------------------------------------------------
+
+
+def test_parse_one_pdf_fiche(fiche_dir):
+    """Une fiche synthétique est entièrement lue."""
+    parsed = m.parse_one_pdf(fiche_dir / "NAF_0111Z.pdf")
+    assert parsed["synthesis"]["at"] == {"count": 1043, "evolution_pct": 3.5}
+    assert parsed["at_yearly"]["2024"] == {
+        "count": 1043, "ip": 47, "deces": 0, "journees": 60304, "salaries": 20007,
+    }
+    assert parsed["sex"] == {"masculin": 1203, "feminin": 703}
+    assert parsed["age"]["30-34"] == 1233
+    assert parsed["mp_sex"] == {"masculin": 1202, "feminin": 702}
+    assert parsed["modalite_blessure"]["contrainte_corps"] == 903
+    assert parsed["yearly_confidence"]["at"] == {
+        "salaries": 1.0, "count": 1.0, "ip": 1.0, "deces": 1.0, "journees": 1.0,
+    }
+
+
+def test_parse_one_pdf_invalid(fiche_dir):
+    """Un fichier illisible retourne None."""
+    assert m.parse_one_pdf(fiche_dir / "NAF_9999Z.pdf") is None
+
+
+# ---------------------------------------------------------------------------
+# Tests segment_row_numbers
+# ---------------------------------------------------------------------------
+
+
+def test_segment_row_numbers_prefers_consistent_years():
+    """Journées AT : la lecture gloutonne fusionnait "2 647 931" ; la découpe optimale non."""
+    groups = "16 033 19 533 2 647 931 15 875".split()
+    values, confidence = m._parse_yearly_row(groups, "at", "journees")
+    assert values == [16033, 19533, 2647, 931, 15875]
+    assert confidence > 0.99
+    assert m.parse_table_row_numbers(groups, m.YEARLY_MAX["at"]["relaxed"]["journees"]) != values
+
+
+def test_segment_row_numbers_confidence():
+    """Confiance 1 pour une découpe unique, < 1 si plusieurs découpes sont possibles."""
+    assert m.segment_row_numbers("1 043 1 053 998".split(), [[999] * 3, [50_000] * 3], 3) == ([1043, 1053, 998], 1.0)
+    values, confidence = m.segment_row_numbers("1 100 200 300".split(), [[999] * 3, [999_999] * 3], 3)
+    assert values == [1100, 200, 300]
+    assert 0 < confidence < 1
+    assert m.segment_row_numbers("1 2".split(), [[999] * 3], 3) == ([], 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Tests parse_breakdowns
+# ---------------------------------------------------------------------------
+
+
+def test_parse_breakdowns_all_sections():
+    """Les cinq répartitions sont lues en un appel ; libellés absents à 0."""
+    left, right = _breakdown_lines(0)
+    parsed = m.parse_breakdowns("\n".join(left), "\n".join(right))
+    assert parsed["sex"] == {"masculin": 1200, "feminin": 700}
+    assert parsed["age"]["30-34"] == 1230
+    assert parsed["siege_lesions"]["dos"] == 300
+    assert parsed["siege_lesions"]["cou"] == 0
+    assert parsed["activite_physique"]["autre"] == 0
+    assert parsed["modalite_blessure"]["autre"] == 70
+    assert parsed["modalite_blessure"]["contrainte_corps"] == 900
+    assert parsed["sex"] == m.parse_sex("\n".join(left))
+    assert parsed["modalite_blessure"] == m.parse_modalite_blessure("\n".join(right))
+
+
+def test_parse_breakdowns_sections_and_missing_cells():
+    """Une ligne hors de sa section est ignorée ; une cellule absente donne des dicts vides."""
+    right = "\n".join([
+        "ACTIVITE PHYSIQUE SPECIFIQUE",
+        "1 Mouvement 12",
+        "2 Autre ou sans information 3",
+        "MODALITE DE LA BLESSURE",
+        "1 Heurt par objet 1 204 5 0 88",
+        "2 Autre ou sans information 9",
+        "(1) Mouvement 40",
+    ])
+    parsed = m.parse_breakdowns(None, right)
+    assert parsed["activite_physique"]["mouvement"] == 12
+    assert parsed["activite_physique"]["autre"] == 3
+    assert parsed["modalite_blessure"]["heurt_objet"] == 1204
+    assert parsed["modalite_blessure"]["autre"] == 9
+    assert parsed["sex"] == {} and parsed["age"] == {}
+    assert m.parse_breakdowns("1 MASCULIN 7\n2 féminin")["sex"] == {"masculin": 7}
+
+
+# ---------------------------------------------------------------------------
+# Tests gabarits de mise en page (mode "crop")
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def templates():
+    """Gabarits d'un lot, vides au départ."""
+    return {}
+
+
+def test_crop_matches_full(fiche_dir, templates):
+    """Le mode "crop" rend le même résultat que le mode "full", avant et après apprentissage."""
+    paths = sorted(fiche_dir.glob("NAF_*.pdf"))
+    full = [m.parse_one_pdf(p, layout="full") for p in paths]
+    assert templates == {}
+    assert [m.parse_one_pdf(p, templates=templates) for p in paths] == full
+    assert sorted(k[0] for k in templates) == [1, 2, 3]
+    assert [m.parse_one_pdf(p, templates=templates) for p in paths] == full
+
+
+def test_crop_template_skips_table_search(fiche_dir, templates, monkeypatch):
+    """Avec un gabarit, ni recherche de tableaux ni conversion de toutes les pages."""
+    m.parse_one_pdf(fiche_dir / "NAF_0111Z.pdf", templates=templates)
+    calls = []
+    monkeypatch.setattr(pdfplumber.page.Page, "find_tables", lambda *a, **k: calls.append("tables"))
+    monkeypatch.setattr(pdfplumber.page.Page, "parse_objects", lambda *a, **k: calls.append("objects"))
+    parsed = m.parse_one_pdf(fiche_dir / "NAF_4520A.pdf", templates=templates)
+    assert calls == []
+    assert parsed["sex"] == {"masculin": 1206, "feminin": 706}
+
+
+def test_crop_changed_layout_falls_back(fiche_dir, tmp_path, templates):
+    """Tableau de la page 2 déplacé : repli sur le mode "full" et nouveau gabarit."""
+    reference = m.parse_one_pdf(fiche_dir / "NAF_0111Z.pdf", templates=templates)
+    pages = fiche_pages(3)
+    pages[1]["lines"] = [(x0, t0 + 30, x1, t1 + 30) for x0, t0, x1, t1 in pages[1]["lines"]]
+    pages[1]["texts"] = [(x, top + 30, text, size) for x, top, text, size in pages[1]["texts"]]
+    moved = tmp_path / "NAF_0111Z.pdf"
+    write_pdf(moved, pages)
+    learned = templates[(2, 595, 842)]["cells"]
+
+    assert m.parse_one_pdf(moved, templates=templates) == reference
+    assert templates[(2, 595, 842)]["cells"] == [(x0, t + 30, x1, b + 30) for x0, t, x1, b in learned]
+
+
+def test_crop_wider_synthesis_falls_back(fiche_dir, tmp_path, templates):
+    """Ligne de synthèse plus longue que le gabarit : relue en entier, évolution gardée."""
+    m.parse_one_pdf(fiche_dir / "NAF_0111Z.pdf", templates=templates)
+    pages = fiche_pages(3)
+    pages[0]["texts"][0] = (340, 40, "Accidents du travail 1 234 567 +12,5 %", 9)
+    wider = tmp_path / "NAF_0111Z.pdf"
+    write_pdf(wider, pages)
+
+    parsed = m.parse_one_pdf(wider, templates=templates)
+    assert parsed == m.parse_one_pdf(wider, layout="full")
+    assert parsed["synthesis"]["at"] == {"count": 1234567, "evolution_pct": 12.5}
+
+
+def test_crop_without_plumber_internals(fiche_dir, templates, monkeypatch):
+    """Sans les internes de pdfminer, les zones sont filtrées sur la page lue en entier."""
+    paths = sorted(fiche_dir.glob("NAF_*.pdf"))
+    full = [m.parse_one_pdf(p, layout="full") for p in paths]
+    monkeypatch.setattr(m.pdf_backend, "_plumber_internals_found", False)
+    assert [m.parse_one_pdf(p, templates=templates) for p in paths] == full
+    assert [m.parse_one_pdf(p, templates=templates) for p in paths] == full
+
+
+def test_parse_one_pdf_unknown_layout(fiche_dir):
+    with pytest.raises(ValueError, match="inconnu"):
+        m.parse_open_pdf(None, layout="partiel")
+
+
+# ---------------------------------------------------------------------------
+# Tests parse_all_pdfs
+# ---------------------------------------------------------------------------
+
+
+def test_parse_all_pdfs_parallel_identical(fiche_dir, capsys):
+    """Le mode parallèle rend exactement les mêmes résultats, dans le même ordre."""
+    serial = m.parse_all_pdfs(fiche_dir, cache_path=None)
+    serial_out = capsys.readouterr().out
+    parallel = m.parse_all_pdfs(fiche_dir, workers=3, cache_path=None)
+    parallel_out = capsys.readouterr().out
+
+    assert parallel == serial
+    assert list(parallel) == ["0111Z", "4520A", "4711D", "8610Z", "9609Z"]
+    # Même résumé et même liste d'échecs
+    assert "Echecs : ['9999Z']" in serial_out
+    assert serial_out.splitlines()[-2:] == parallel_out.splitlines()[-2:]
+
+
+def test_parse_all_pdfs_aggregated_progress(fiche_dir, capsys):
+    """La progression est agrégée : pas une ligne par fichier."""
+    m.parse_all_pdfs(fiche_dir, workers=2, cache_path=None)
+    out = capsys.readouterr().out
+    assert "[6/6] fiches traitées (1 échec(s))" in out
+    assert "Traitement de" not in out
+
+
+def test_parse_all_pdfs_empty(tmp_path):
+    """Un dossier sans fiche retourne un dict vide."""
+    assert m.parse_all_pdfs(tmp_path, workers=4, cache_path=None) == {}
+
+
+# ---------------------------------------------------------------------------
+# Tests cache des fiches
+# ---------------------------------------------------------------------------
+
+
+def _count_opened(monkeypatch):
+    """Compte les appels à parse_one_pdf (mode séquentiel)."""
+    opened = []
+    original = m.parse_one_pdf
+
+    def counting(path, **kwargs):
+        opened.append(path.name)
+        return original(path, **kwargs)
+
+    monkeypatch.setattr(m, "parse_one_pdf", counting)
+    return opened
+
+
+def test_fiche_cache_reuse(fiche_dir, tmp_path, monkeypatch, capsys):
+    """Au second passage, seule la fiche en échec (non mise en cache) est ré-ouverte."""
+    cache = tmp_path / "fiches.sqlite"
+    first = m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    opened = _count_opened(monkeypatch)
+    capsys.readouterr()
+    second = m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    assert second == first
+    assert list(second) == list(first)
+    assert opened == ["NAF_9999Z.pdf"]
+    assert "Cache fiches : 5/6 réutilisée(s) (83%), 1 PDF(s) ouvert(s)" in capsys.readouterr().out
+
+
+def test_fiche_cache_changed_file(fiche_dir, tmp_path, monkeypatch):
+    """Une fiche modifiée est re-parsée, les autres sont reprises du cache."""
+    from conftest import write_fiche_pdf
+
+    cache = tmp_path / "fiches.sqlite"
+    m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    write_fiche_pdf(fiche_dir / "NAF_4711D.pdf", 40)
+    opened = _count_opened(monkeypatch)
+    results = m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    assert opened == ["NAF_4711D.pdf", "NAF_9999Z.pdf"]
+    assert results["4711D"]["sex"] == {"masculin": 1240, "feminin": 740}
+
+
+def test_fiche_cache_section_version_bump(fiche_dir, tmp_path, monkeypatch):
+    """Incrémenter une version de section invalide toutes les fiches en cache."""
+    cache = tmp_path / "fiches.sqlite"
+    m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    monkeypatch.setitem(m.SECTION_VERSIONS, "at_detail", m.SECTION_VERSIONS["at_detail"] + 1)
+    opened = _count_opened(monkeypatch)
+    m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    assert len(opened) == 6
+
+
+# ---------------------------------------------------------------------------
+# Tests iter_parsed_fiches
+# ---------------------------------------------------------------------------
+
+
+def test_iter_parsed_fiches_lazy(fiche_dir, tmp_path, monkeypatch):
+    """Une fiche n'est ouverte qu'au moment d'être rendue ; un parcours interrompu
+    garde en cache les fiches déjà parsées."""
+    cache = tmp_path / "fiches.sqlite"
+    opened = _count_opened(monkeypatch)
+    fiches = m.iter_parsed_fiches(fiche_dir, cache_path=cache)
+    code, parsed = next(fiches)
+    assert code == "0111Z" and opened == ["NAF_0111Z.pdf"]
+    fiches.close()
+
+    opened.clear()
+    results = dict(m.iter_parsed_fiches(fiche_dir, cache_path=cache))
+    assert results["0111Z"] == parsed
+    assert list(results) == ["0111Z", "4520A", "4711D", "8610Z", "9609Z"]
+    assert opened == ["NAF_4520A.pdf", "NAF_4711D.pdf", "NAF_8610Z.pdf", "NAF_9609Z.pdf", "NAF_9999Z.pdf"]
+
+
+# ---------------------------------------------------------------------------
+# Tests délai par fiche
+# ---------------------------------------------------------------------------
+
+
+def _stuck_on_4711D(path):
+    """parse_one_pdf, sauf pour 4711D qui ne rend jamais la main (fiche pathologique)."""
+    if "4711D" in path.name:
+        time.sleep(60)
+    return m.parse_one_pdf(path)
+
+
+def test_parse_all_pdfs_timeout(fiche_dir, tmp_path, capsys):
+    """La fiche bloquée est abandonnée au bout du délai, listée à part des échecs,
+    et n'entre pas dans le cache."""
+    cache = tmp_path / "fiches.sqlite"
+    t0 = time.monotonic()
+    results = m.parse_all_pdfs(fiche_dir, workers=2, cache_path=cache, parse=_stuck_on_4711D,
+                               timeout=5, max_docs_per_worker=2)
+    assert time.monotonic() - t0 < 30
+    assert list(results) == ["0111Z", "4520A", "8610Z", "9609Z"]
+    out = capsys.readouterr().out
+    assert "Echecs : ['9999Z']" in out
+    assert "Hors délai (5 s, non mises en cache) : 1 fiche(s) ['4711D']" in out
+
+    m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    assert "Cache fiches : 4/6 réutilisée(s) (67%), 2 PDF(s) ouvert(s)" in capsys.readouterr().out
+
+
+def _crash_on_4711D(path):
+    """parse_one_pdf, sauf pour 4711D qui tue le processus (plantage de l'interpréteur)."""
+    if "4711D" in path.name:
+        os._exit(1)
+    return m.parse_one_pdf(path)
+
+
+def test_parse_all_pdfs_crash_not_cached(fiche_dir, tmp_path, capsys):
+    """Une fiche dont le processus meurt est un échec, ré-ouverte au lancement suivant."""
+    cache = tmp_path / "fiches.sqlite"
+    results = m.parse_all_pdfs(fiche_dir, workers=2, cache_path=cache, parse=_crash_on_4711D)
+    assert list(results) == ["0111Z", "4520A", "8610Z", "9609Z"]
+    out = capsys.readouterr().out
+    assert "Echecs : ['4711D', '9999Z']" in out
+
+    results = m.parse_all_pdfs(fiche_dir, cache_path=cache)
+    assert "4711D" in results
+    assert "Cache fiches : 4/6 réutilisée(s) (67%), 2 PDF(s) ouvert(s)" in capsys.readouterr().out
@@ -1,18 +1,28 @@
 """Tests unitaires pour les fonctions pures de parse_regional.py.
 
-Ces tests ne nécessitent pas de fichier PDF réel. Ils couvrent:
+Ces tests ne nécessitent pas de fichier PDF réel (PDF synthétiques de conftest.py). Ils couvrent:
 - merge_multiline_rows()
 - normalize_caisse_name()
 - parse_fr_number()
 - CAISSE_MAP (complétude)
 - validate_output()
+- read_table_by_coords() et extract_regional_table_by_coords() (tableaux synthétiques)
+- parse_regional_pdf() avec un tableau ajouté au registre
+- merge_editions() / build_regional_series() (série longue sur deux éditions, cache des
+  pages écrit par le seul processus principal)
+- locate_labels() (signets et texte brut, un seul parcours complet sinon, cache par
+  SHA-256, sur un rapport synthétique)
 """
 
+import json
 import unicodedata
 
+import numpy as np
 import pytest
 
 import parse_regional as m
+from conftest import write_pdf
+from manifest import file_sha256
 
 
 # ---------------------------------------------------------------------------
@@ -274,3 +284,287 @@ def test_validate_output_fails_missing_trajet():
     caisses[3]["trajet"]["2023"] = None
     with pytest.raises(AssertionError, match="Trajet manquante ou nulle"):
         m.validate_output(caisses)
+
+
+# ---------------------------------------------------------------------------
+# Tests extraction par coordonnées
+# ---------------------------------------------------------------------------
+
+DIGIT = 0.556 * 8  # largeur d'un chiffre Helvetica en corps 8
+HEADER_HALF = {"Salariés*": 16.0, "AT**": 8.2, "Trajet**": 13.3, "MP**": 9.6}
+
+
+def _number_texts(cx: float, top: float, value) -> list:
+    """Valeur centrée sur cx, groupes de milliers en mots séparés ; None = tiret."""
+    if value is None:
+        return [(cx - 1.3, top, "-", 8)]
+    groups = f"{value:,}".split(",")
+    x = cx - (sum(map(len, groups)) * DIGIT + 4 * (len(groups) - 1)) / 2
+    texts = []
+    for g in groups:
+        texts.append((x, top, g, 8))
+        x += len(g) * DIGIT + 4
+    return texts
+
+
+def _table_page(label: str, header: str, rows: list, years: list[str] | None = None) -> dict:
+    """Page de tableau par caisse : 5 paires Salariés / header (sous une ligne d'années si
+    years), lignes (dept, nom, 10 valeurs, suite) où suite = (texte, {colonne: valeur}) ou None."""
+    def centre(k):
+        h = "Salariés*" if k % 2 == 0 else header
+        return 150 + (k // 2) * 85 + (k % 2) * 42 + HEADER_HALF[h]
+
+    texts = [(40, 60, f"{label} - Sinistres par caisse", 10), (40, 100, "Caisse", 8)]
+    texts += [(centre(k) - HEADER_HALF["Salariés*" if k % 2 == 0 else header], 100,
+               "Salariés*" if k % 2 == 0 else header, 8) for k in range(10)]
+    texts += [(180 + i * 85, 86, year, 8) for i, year in enumerate(years or [])]
+    top = 130
+    for dept, name, values, suite in rows:
+        texts += [(40, top, dept, 8), (48 + len(dept) * DIGIT, top, "–", 8), (66, top, name, 8)]
+        for k, v in enumerate(values):
+            if v is not ...:  # ... : valeur portée par la ligne de suite
+                texts += _number_texts(centre(k), top, v)
+        top += 14
+        if suite:
+            texts.append((66, top, suite[0], 8))
+            for k, v in suite[1].items():
+                texts += _number_texts(centre(k), top, v)
+            top += 14
+    texts.append((40, top, "Total", 8))
+    return {"texts": texts}
+
+
+TABLE_ROWS = [
+    ("21", "Bourgogne", [812345, 12034, 815000, 11890, 820100, 10543, 830000, 10999, 835500, 11002],
+     ("Franche-Comté", {})),
+    ("75", "Ile-de-France", [410000, 98765, 415000, None, 420000, 95000, 421000, 94000, 423000, 93000], None),
+    ("99", "Inconnue", [1, 2, 3, 4, 5, 6, 7, 8, 9, 10], None),
+    ("13", "Sud-Est", [650000, 20100, 655000, 20200, 660000, 20300, 665000, ..., 670000, ...],
+     ("Marseille", {7: 20400, 9: 20500})),
+    ("974", "Réunion", [250000, 5012, 251000, 5100, 252000, 5200, 253000, 5300, 254000, 5400], ("La", {})),
+]
+
+
+@pytest.mark.parametrize("backend", m.pdf_backend.PDF_BACKENDS)
+def test_extract_regional_table_by_coords(tmp_path, backend):
+    """Milliers concaténés, tiret = valeur absente, données sur la ligne de suite,
+    département inconnu ignoré, arrêt à la ligne Total."""
+    path = tmp_path / "rapport.pdf"
+    write_pdf(path, [_table_page("Tableau 9", "AT**", TABLE_ROWS),
+                     _table_page("Tableau 17", "Trajet**", TABLE_ROWS)])
+    pdf = m.pdf_backend.open_pdf(path, backend)
+    try:
+        page_t9, page_t17 = m.pdf_backend.pages(pdf)
+        at = m.extract_regional_table_by_coords(page_t9, "Tableau 9", has_salaries=True)
+        trajet = m.extract_regional_table_by_coords(page_t17, "Tableau 17", has_salaries=False)
+    finally:
+        m.pdf_backend.close_pdf(pdf)
+
+    assert [e["id"] for e in at] == ["bourgogne-franche-comte", "cramif", "sud-est", "cgss-reunion"]
+    assert at[0]["values"] == {"2020": 12034, "2021": 11890, "2022": 10543, "2023": 10999, "2024": 11002}
+    assert at[0]["salaries"]["2020"] == 812345
+    assert "2021" not in at[1]["values"]
+    assert at[2]["values"]["2023"] == 20400 and at[2]["values"]["2024"] == 20500
+    assert [{**e, "salaries": None} for e in at] == trajet
+
+
+def test_read_table_by_coords_custom_headers(tmp_path):
+    """Le même moteur lit un autre tableau en lui donnant ses en-têtes de colonnes."""
+    path = tmp_path / "rapport.pdf"
+    write_pdf(path, [_table_page("Tableau 22", "MP**", TABLE_ROWS[:2])])
+    pdf = m.pdf_backend.open_pdf(path, "pdfplumber")
+    try:
+        page = m.pdf_backend.pages(pdf)[0]
+        rows = m.read_table_by_coords(page, "Tableau 22", headers=("Salariés*", "MP**"))
+    finally:
+        m.pdf_backend.close_pdf(pdf)
+    assert rows == [{"dept": d, "numbers": v} for d, _, v, _ in TABLE_ROWS[:2]]
+
+
+def test_assign_columns_matches_nearest():
+    """Recherche dichotomique = colonne la plus proche, plus petit indice à égalité."""
+    rng = np.random.default_rng(0)
+    for centers in ([100.0, 150.0, 200.0], [300.0, 100.0, 200.0, 100.0], [50.0]):
+        cx = np.concatenate([rng.uniform(0, 400, 200), centers, [125.0, 175.0, 250.0]])
+        expected = [min(range(len(centers)), key=lambda i: abs(centers[i] - x)) for x in cx]
+        assert m._assign_columns(cx, centers).tolist() == expected
+
+
+def _full_report(path, years=None, value=lambda i, k: 9000 + i) -> list[dict]:
+    """Rapport avec les 16 caisses métropolitaines dans les Tableaux 9, 17 et 22 (MP) ;
+    value(i, k) = valeur de la caisse i pour la k-ième année."""
+    metro = [d for d, (_, _, t) in m.DEPT_MAP.items() if t in ("carsat", "cramif")]
+    rows = [(d, "Caisse", [n for k in range(5) for n in (500000 + i, value(i, k))], None)
+            for i, d in enumerate(metro)]
+    write_pdf(path, [
+        {"texts": [(60, 80, "Sommaire", 12)]},
+        _table_page("Tableau 9", "AT**", rows, years),
+        _table_page("Tableau 17", "Trajet**", rows, years),
+        _table_page("Tableau 22", "MP**", rows, years),
+    ])
+    mp = {"label": "Tableau 22", "key": "mp", "name": "MP", "headers": ("Salariés*", "MP**"),
+          "salaries": False, "nonzero": False}
+    return [*m.REGIONAL_TABLES, mp]
+
+
+def test_parse_regional_pdf_registry(tmp_path):
+    """Un tableau ajouté au registre est fusionné sous sa clé."""
+    path = tmp_path / "rapport.pdf"
+    tables = _full_report(path)
+    serial = m.parse_regional_pdf(path, cache_path=None, tables=tables)
+    caisse = serial["caisses"][0]
+    assert list(caisse) == ["id", "name", "type", "at", "trajet", "mp", "salaries"]
+    assert caisse["mp"] == caisse["at"] == caisse["trajet"]
+    assert len(serial["caisses"]) == 16
+
+    assert list(m.parse_regional_pdf(path, cache_path=None)["caisses"][0]) == [
+        "id", "name", "type", "at", "trajet", "salaries"]
+
+
+def test_merge_editions_series_and_provenance(tmp_path):
+    """Deux éditions chevauchantes : années lues sur les pages, série 2015-2020,
+    chiffre révisé pris dans l'édition la plus récente, édition de chaque valeur."""
+    old, new = tmp_path / "rapport-2019.pdf", tmp_path / "rapport-2020.pdf"
+    _full_report(old, [str(y) for y in range(2015, 2020)], lambda i, k: 9000 + i)
+    # Édition 2020 : années 2016-2020, 2017 révisé pour la première caisse
+    _full_report(new, [str(y) for y in range(2016, 2021)], lambda i, k: 9000 + i + (7 if (i, k) == (0, 1) else 0))
+
+    edition = m.parse_regional_pdf(old, cache_path=None)
+    assert edition["meta"]["years"] == ["2015", "2016", "2017", "2018", "2019"]
+
+    series = m.build_regional_series([new, old], cache_path=None)
+    assert series == m.build_regional_series([old, new], cache_path=None, workers=2)
+    assert series["meta"]["years"] == [str(y) for y in range(2015, 2021)]
+    assert [e["edition"] for e in series["meta"]["editions"]] == ["2019", "2020"]
+    by_id = {c["id"]: c for c in series["caisses"]}
+    revised, other = by_id["sud-est"], by_id["cramif"]  # caisses 0 et 13 du tableau
+    assert list(revised["at"]) == series["meta"]["years"]
+    assert revised["at"]["2017"] == revised["at"]["2016"] + 7 and other["at"]["2017"] == other["at"]["2016"]
+    assert revised["editions"]["at"] == {"2015": "2019", **{str(y): "2020" for y in range(2016, 2021)}}
+    assert revised["editions"]["salaries"]["2015"] == "2019"
+
+
+def test_build_regional_series_page_cache(tmp_path):
+    """En parallèle, les pages trouvées par chaque édition sont écrites une fois par le
+    processus principal : aucune n'est perdue, les entrées existantes sont gardées."""
+    cache = tmp_path / "pages.json"
+    cache.write_text('{"autre": {"Tableau 9": 4}}', encoding="utf-8")
+    paths = []
+    for first in range(2012, 2016):
+        path = tmp_path / f"rapport-{first + 4}.pdf"
+        _full_report(path, [str(y) for y in range(first, first + 5)])
+        paths.append(path)
+    m.build_regional_series(paths, cache_path=cache, workers=3)
+
+    pages = json.loads(cache.read_text(encoding="utf-8"))
+    assert pages == {"autre": {"Tableau 9": 4},
+                     **{file_sha256(p): {"Tableau 9": 1, "Tableau 17": 2} for p in paths}}
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_validate_output_registered_table():
+    """Chaque tableau du registre est validé ; nonzero=False accepte une valeur nulle."""
+    caisses = [_make_metro_entry(f"caisse-{i}") for i in range(16)]
+    mp = {"label": "Tableau 22", "key": "mp", "name": "MP", "headers": (), "salaries": False, "nonzero": False}
+    for c in caisses:
+        c["mp"] = {y: 0 for y in m.YEARS}
+    m.validate_output(caisses, [*m.REGIONAL_TABLES, mp])
+    del caisses[5]["mp"]["2024"]
+    with pytest.raises(AssertionError, match="MP manquante ou nulle .* Tableau 22"):
+        m.validate_output(caisses, [*m.REGIONAL_TABLES, mp])
+
+
+# ---------------------------------------------------------------------------
+# Tests locate_labels
+# ---------------------------------------------------------------------------
+
+
+def _rapport(path, outline=()):
+    write_pdf(path, [
+        {"texts": [(60, 80, "Sommaire", 12)]},
+        {"texts": [(60, 80, "Tableau 9 - Accidents du travail par caisse", 10)]},
+        {"texts": [(60, 80, "Tableau 17 - Accidents de trajet par caisse", 10)]},
+        {"texts": [(60, 80, "Annexes", 10)]},
+    ], outline=outline)
+
+
+def _count_page_text(monkeypatch):
+    extracted = []
+    original = m.pdf_backend.page_text
+
+    def counting(page, *args, **kwargs):
+        extracted.append(page["page_number"])
+        return original(page, *args, **kwargs)
+
+    monkeypatch.setattr(m.pdf_backend, "page_text", counting)
+    return extracted
+
+
+def test_locate_labels_single_pass_and_cache(tmp_path, monkeypatch):
+    """Sans texte brut lisible, chaque page est lue au plus une fois, jusqu'au dernier
+    label ; au second passage les pages viennent du cache sans lire le document."""
+    path, cache = tmp_path / "rapport.pdf", tmp_path / "pages.json"
+    _rapport(path)
+    monkeypatch.setattr(m.pdf_backend, "content_text", lambda page: None)
+    extracted = _count_page_text(monkeypatch)
+    pdf = m.pdf_backend.open_pdf(path, "pdfplumber")
+    try:
+        assert m.locate_labels(pdf, ["Tableau 17", "Tableau 9"], path, cache) == {"Tableau 17": 2, "Tableau 9": 1}
+        assert extracted == [1, 2, 3]
+        extracted.clear()
+        assert m.locate_labels(pdf, ["Tableau 9", "Tableau 17"], path, cache) == {"Tableau 9": 1, "Tableau 17": 2}
+        assert extracted == []
+        with pytest.raises(ValueError, match="Tableau 42"):
+            m.locate_labels(pdf, ["Tableau 9", "Tableau 42"], path, cache)
+    finally:
+        m.pdf_backend.close_pdf(pdf)
+
+
+@pytest.mark.parametrize("backend", m.pdf_backend.PDF_BACKENDS)
+def test_locate_labels_fast_path(tmp_path, monkeypatch, backend):
+    """Seules les pages candidates (texte brut, signets) sont analysées."""
+    path = tmp_path / "rapport.pdf"
+    _rapport(path, outline=[("Sommaire", 0), ("Tableau 17 - Trajet", 2)])
+    extracted = _count_page_text(monkeypatch)
+    pdf = m.pdf_backend.open_pdf(path, backend)
+    try:
+        assert m.locate_labels(pdf, ["Tableau 9", "Tableau 17"]) == {"Tableau 9": 1, "Tableau 17": 2}
+        assert extracted == [3, 2]
+        extracted.clear()
+        with pytest.raises(ValueError, match="Tableau 42"):
+            m.locate_labels(pdf, ["Tableau 42"])
+        assert extracted == [1, 2, 3, 4]
+    finally:
+        m.pdf_backend.close_pdf(pdf)
+
+
+def test_locate_labels_unconfirmed_candidate_falls_back(tmp_path, monkeypatch):
+    """Une candidate du texte brut non confirmée renvoie le label au parcours complet."""
+    path = tmp_path / "rapport.pdf"
+    _rapport(path)
+    monkeypatch.setattr(m.pdf_backend, "content_text", lambda page: "Tableau 9")
+    extracted = _count_page_text(monkeypatch)
+    pdf = m.pdf_backend.open_pdf(path, "pdfplumber")
+    try:
+        assert m.locate_labels(pdf, ["Tableau 9"]) == {"Tableau 9": 1}
+        assert extracted == [1, 2]
+    finally:
+        m.pdf_backend.close_pdf(pdf)
+
+
+def test_locate_labels_cache_keyed_by_content(tmp_path):
+    """Un autre rapport au même chemin est re-parcouru."""
+    path, cache = tmp_path / "rapport.pdf", tmp_path / "pages.json"
+    _rapport(path)
+    pdf = m.pdf_backend.open_pdf(path, "pdfplumber")
+    try:
+        m.locate_labels(pdf, ["Tableau 9"], path, cache)
+    finally:
+        m.pdf_backend.close_pdf(pdf)
+
+    write_pdf(path, [{"texts": [(60, 80, "Tableau 9 - Accidents du travail par caisse", 10)]}])
+    pdf = m.pdf_backend.open_pdf(path, "pdfplumber")
+    try:
+        assert m.locate_labels(pdf, ["Tableau 9"], path, cache) == {"Tableau 9": 0}
+    finally:
+        m.pdf_backend.close_pdf(pdf)
@@ -0,0 +1,191 @@
+"""Tests d'équivalence des backends de pdf_backend.py sur des fiches synthétiques (voir conftest.py).
+
+Ils couvrent:
+- primitives (caractères, mots, texte, rectangles, courbes, tableaux) identiques entre backends
+- texte brut des flux de contenu et signets identiques entre backends
+- window() : objets filtrés pendant la lecture identiques aux objets de la page filtrés,
+  y compris sans les internes pdfminer (lecture complète de la page)
+- parse_one_pdf, fiche_pass.parse_fiche et parse_regional.find_tableau_page identiques
+- backend inconnu
+"""
+
+import pytest
+
+import fiche_pass
+import parse_pdf
+import parse_regional
+import pdf_backend as m
+from conftest import write_pdf
+from extract_size_chart import _norm_color
+
+TOL = 1e-3
+
+
+def _same_geometry(a: list[dict], b: list[dict]) -> bool:
+    return len(a) == len(b) and all(
+        all(abs(x[k] - y[k]) < TOL for k in ("x0", "x1", "top", "bottom")) for x, y in zip(a, b)
+    )
+
+
+def _same_color(a, b) -> bool:
+    """Couleurs égales au pas de 1/255 près, une fois ramenées en RGB (gris pdfplumber : 0 ou (0,))."""
+    a, b = _norm_color(a), _norm_color(b)
+    return all(abs(x - y) <= 1 / 255 for x, y in zip(a, b))
+
+
+@pytest.fixture
+def docs(fiche_dir):
+    opened = [m.open_pdf(fiche_dir / "NAF_4520A.pdf", backend) for backend in m.PDF_BACKENDS]
+    yield opened
+    for doc in opened:
+        m.close_pdf(doc)
+
+
+# ---------------------------------------------------------------------------
+# Tests primitives
+# ---------------------------------------------------------------------------
+
+
+def test_pages_match(docs):
+    reference, other = (m.pages(doc) for doc in docs)
+    assert len(reference) == len(other) == 3
+    for key in ("page_number", "width", "height", "doctop"):
+        assert [p[key] for p in reference] == [p[key] for p in other]
+
+
+def test_text_and_words_match(docs):
+    for ref, page in zip(*(m.pages(doc) for doc in docs)):
+        ref_chars, chars = m.chars(ref), m.chars(page)
+        assert _same_geometry(ref_chars, chars)
+        assert [c["text"] for c in ref_chars] == [c["text"] for c in chars]
+        assert m.page_text(ref) == m.page_text(page)
+        bbox = (0, 0, ref["width"] * 0.55, ref["height"] * 0.35)
+        assert m.page_text(ref, bbox) == m.page_text(page, bbox)
+        ref_words = m.words(ref, x_tolerance=3, y_tolerance=3)
+        words = m.words(page, x_tolerance=3, y_tolerance=3)
+        assert [w["text"] for w in ref_words] == [w["text"] for w in words]
+        assert _same_geometry(ref_words, words)
+
+
+def test_shapes_and_tables_match(docs):
+    for ref, page in zip(*(m.pages(doc) for doc in docs)):
+        for kind in (m.rects, m.curves, m.lines):
+            ref_objs, objs = kind(ref), kind(page)
+            assert _same_geometry(ref_objs, objs)
+            for a, b in zip(ref_objs, objs):
+                assert _same_color(a["non_stroking_color"], b["non_stroking_color"])
+                assert _same_color(a["stroking_color"], b["stroking_color"])
+                assert (a["fill"], a["stroke"]) == (b["fill"], b["stroke"])
+        assert m.find_tables(ref) == m.find_tables(page)
+    page2 = m.pages(docs[1])[1]
+    tables = m.find_tables(page2)
+    assert len(tables) == 3
+    assert m.cell_text(page2, tables[2][1][0]).startswith("REPARTITION PAR SEXE")
+    assert m.cell_text(page2, None) is None
+
+
+@pytest.mark.parametrize("backend", m.PDF_BACKENDS)
+def test_window_matches_filtered_page(fiche_dir, backend):
+    bbox = (300.0, 670.0, 550.0, 800.0)
+    colors = [(0.8, 1.0, 0.8), (0.502, 0.0, 0.502), (0.753, 0.0, 0.0)]
+    for kinds, box, cols in [(m.WINDOW_KINDS, bbox, colors), (("chars",), bbox, None),
+                             (("rects",), None, colors[:2])]:
+        doc = m.open_pdf(fiche_dir / "NAF_4520A.pdf", backend)
+        page = m.pages(doc)[0]
+        window = m.window(page, box, kinds, cols, tol=0.06)
+        expected = {}
+        for kind in kinds:
+            objs = getattr(m, kind)(page)
+            if box is not None:
+                objs = [o for o in objs if m._touches(o["x0"], o["top"], o["x1"], o["bottom"], box)]
+            if cols is not None and kind != "chars":
+                objs = [o for o in objs if m._color_near(o["non_stroking_color"], cols, 0.06)
+                        or m._color_near(o["stroking_color"], cols, 0.06)]
+            expected[kind] = objs
+        assert window == expected
+        assert window["chars" if "chars" in kinds else "rects"]
+        # objets déjà extraits : simple filtre, mêmes dicts
+        cached = m.window(page, box, kinds, cols, tol=0.06)
+        assert all(a is b for kind in kinds for a, b in zip(cached[kind], expected[kind]))
+        m.close_pdf(doc)
+
+
+def test_window_without_plumber_internals(fiche_dir, monkeypatch):
+    bbox = (300.0, 670.0, 550.0, 800.0)
+    colors = [(0.8, 1.0, 0.8), (0.502, 0.0, 0.502), (0.753, 0.0, 0.0)]
+    doc = m.open_pdf(fiche_dir / "NAF_4520A.pdf", "pdfplumber")
+    fast = m.window(m.pages(doc)[0], bbox, m.WINDOW_KINDS, colors, tol=0.06)
+    m.close_pdf(doc)
+    monkeypatch.setattr(m, "_plumber_internals_found", False)
+
+    def no_device(*args):
+        raise AssertionError("device pdfminer utilisé sans ses internes")
+
+    monkeypatch.setattr(m, "_plumber_window", no_device)
+    doc = m.open_pdf(fiche_dir / "NAF_4520A.pdf", "pdfplumber")
+    page = m.pages(doc)[0]
+    assert m.window(page, bbox, m.WINDOW_KINDS, colors, tol=0.06) == fast
+    assert fast["chars"] and fast["rects"]
+    m.close_pdf(doc)
+
+
+def test_content_text_and_outline_match(tmp_path):
+    path = tmp_path / "rapport.pdf"
+    write_pdf(path, [
+        {"texts": [(60, 80, "Sommaire", 12)]},
+        {"texts": [(60, 80, "Tableau 9 - Accidents (travail)", 10)]},
+    ], outline=[("Sommaire", 0), ("Tableau 9", 1)])
+    results = []
+    for backend in m.PDF_BACKENDS:
+        doc = m.open_pdf(path, backend)
+        try:
+            texts = ["".join(m.content_text(p).split()) for p in m.pages(doc)]
+            results.append((texts, m.outline(doc)))
+        finally:
+            m.close_pdf(doc)
+    assert results[0] == results[1]
+    assert results[0] == (["Sommaire", "Tableau9-Accidents(travail)"], [("Sommaire", 0), ("Tableau 9", 1)])
+
+
+# ---------------------------------------------------------------------------
+# Tests parseurs
+# ---------------------------------------------------------------------------
+
+
+def test_parse_one_pdf_backends_identical(fiche_dir):
+    for path in sorted(fiche_dir.glob("NAF_*.pdf")):
+        assert parse_pdf.parse_one_pdf(path, backend="pdfium") == parse_pdf.parse_one_pdf(path, layout="full")
+
+
+def test_parse_fiche_backends_identical(fiche_dir):
+    """Tous les extracteurs, y compris le digitaliseur du graphique par taille."""
+    names = tuple(fiche_pass.EXTRACTORS)
+    for path in sorted(fiche_dir.glob("NAF_*.pdf")):
+        assert fiche_pass.parse_fiche(path, names, backend="pdfium") == fiche_pass.parse_fiche(path, names)
+
+
+def test_find_tableau_page_backends(tmp_path):
+    path = tmp_path / "rapport.pdf"
+    write_pdf(path, [
+        {"texts": [(60, 80, "Sommaire", 12)]},
+        {"texts": [(60, 80, "Tableau 9 - Accidents du travail par caisse", 10)]},
+        {"texts": [(60, 80, "Tableau 17 - Accidents de trajet par caisse", 10)]},
+    ])
+    for backend in m.PDF_BACKENDS:
+        doc = m.open_pdf(path, backend)
+        try:
+            assert parse_regional.find_tableau_page(doc, "Tableau 9")[0] == 1
+            assert parse_regional.find_tableau_page(doc, "Tableau 17")[0] == 2
+            with pytest.raises(ValueError, match="introuvable"):
+                parse_regional.find_tableau_page(doc, "Tableau 42")
+        finally:
+            m.close_pdf(doc)
+
+
+def test_unknown_backend(fiche_dir):
+    with pytest.raises(ValueError, match="Backend PDF inconnu"):
+        m.open_pdf(fiche_dir / "NAF_4520A.pdf", "mupdf")
+    with pytest.raises(ValueError, match="Backend PDF inconnu"):
+        parse_pdf.parse_one_pdf(fiche_dir / "NAF_4520A.pdf", backend="mupdf")
+    with pytest.raises(ValueError, match="Backend PDF inconnu"):
+        fiche_pass.run_fiche_pass(fiche_dir, cache_path=None, backend="mupdf")
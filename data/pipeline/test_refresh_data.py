@@ -0,0 +1,247 @@
+"""Tests pour les étapes d'agrégation de refresh_data.py.
+
+Ces tests utilisent les classeurs Ameli versionnés dans data/pipeline/. Ils couvrent:
+- build_at_data_columnar() (sortie identique à build_at_data(), y compris sans ligne)
+- rollup_naf_rows() (un seul passage NAF5, fusion NAF4/NAF2/national)
+- build_naf_index()
+- encode_rows() / decode_rows() et cached_parse() (cache de parsing Excel)
+- stage_fiches() / stage_merge() (fiches réduites en flux, identique aux fusions par lot)
+"""
+
+import copy
+import json
+
+import pytest
+
+import parse_pdf
+import refresh_data as m
+
+
+def _dump(data: dict) -> str:
+    """Sérialise comme write_json pour comparer les sorties octet par octet."""
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+# ---------------------------------------------------------------------------
+# Tests build_at_data_columnar
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.skipif(not m.AT_XLSX_PATH.exists(), reason="classeur AT absent")
+def test_build_at_data_columnar_identical():
+    """Le mode colonnaire produit exactement le même JSON que le mode par lignes."""
+    expected = m.build_at_data(m.parse_at_xlsx())
+    result = m.build_at_data_columnar(m.parse_at_columns())
+    assert _dump(result) == _dump(expected)
+
+
+def test_build_at_data_columnar_empty():
+    """Classeur sans ligne retenue : pas d'erreur, même sortie que le mode par lignes."""
+    import numpy as np
+
+    cols = {k: np.array([], dtype=str) for k in ("naf5", "naf2", "libelle", "libelle_naf2", "ctn")}
+    cols["measures"] = np.zeros((0, len(m.AT_MEASURES)))
+    cols["causes"] = np.zeros((0, len(m.AT_RISK_CAUSES)))
+    assert _dump(m.build_at_data_columnar(cols)) == _dump(m.build_at_data([]))
+
+
+# ---------------------------------------------------------------------------
+# Tests rollup_naf_rows
+# ---------------------------------------------------------------------------
+
+
+def _row(naf5: str, libelle: str, salaries: float, causes: dict) -> dict:
+    """Construit une ligne minimale au format des parseurs Excel."""
+    return {
+        "naf5": naf5, "naf2": naf5[:2], "libelle": libelle,
+        "libelle_naf2": f"Division {naf5[:2]}" if libelle else "",
+        "nb_salaries": salaries, "cause_counts": causes,
+    }
+
+
+def test_rollup_naf_rows_levels():
+    """Les niveaux NAF4, NAF2 et national sont les sommes des partiels NAF5."""
+    rows = [
+        _row("4711D", "Supermarchés", 10.0, {"TMS": 2.0}),
+        _row("4711F", "Hypermarchés", 5.0, {"TMS": 1.0, "Bruit": 3.0}),
+        _row("4711D", "Supermarchés", 7.0, {"Bruit": 1.0}),
+        _row("4520A", "Garages", 3.0, {}),
+    ]
+    rollup = m.rollup_naf_rows(rows, ["nb_salaries"], "cause_counts")
+    assert rollup["naf5"]["4711D"]["nb_salaries"] == 17.0
+    assert rollup["naf5"]["4711D"]["causes"] == {"TMS": 2.0, "Bruit": 1.0}
+    assert rollup["naf4"]["4711"]["nb_salaries"] == 22.0
+    assert sorted(rollup["naf4"]["4711"]["source_codes"]) == ["4711D", "4711F"]
+    assert rollup["naf2"]["47"]["nb_salaries"] == 22.0
+    assert rollup["naf2"]["45"]["libelle"] == "Division 45"
+    assert rollup["national"]["nb_salaries"] == 25.0
+
+
+def test_rollup_naf_rows_first_label_in_row_order():
+    """Le libellé d'un niveau est le premier non vide dans l'ordre des lignes."""
+    rows = [
+        _row("4711D", "", 1.0, {}),
+        _row("4711F", "Hypermarchés", 1.0, {}),
+        _row("4711D", "Supermarchés", 1.0, {}),
+    ]
+    rollup = m.rollup_naf_rows(rows, ["nb_salaries"], "cause_counts")
+    assert rollup["naf4"]["4711"]["libelle"] == "Hypermarchés"
+    assert rollup["naf5"]["4711D"]["libelle"] == "Supermarchés"
+
+
+# ---------------------------------------------------------------------------
+# Tests build_naf_index
+# ---------------------------------------------------------------------------
+
+
+def test_build_naf_index_order():
+    """L'index est trié par niveau puis par code."""
+    by_naf5 = {"4711D": {"libelle": "Supermarchés"}, "0111Z": {"libelle": "Céréales"}}
+    by_naf4 = {"4711": {"libelle": "Commerce"}}
+    by_naf2 = {"47": {"libelle": "Commerce de détail"}}
+    index = m.build_naf_index(by_naf5, by_naf4, by_naf2)
+    assert [(e["level"], e["code"]) for e in index] == [
+        ("naf2", "47"), ("naf4", "4711"), ("naf5", "0111Z"), ("naf5", "4711D"),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Tests cache de parsing
+# ---------------------------------------------------------------------------
+
+
+def _mp_rows():
+    """Lignes au format parse_mp_xlsx, causes insérées dans des ordres différents."""
+    base = {k: 1.0 for k in m.MP_MEASURES}
+    return [
+        {**_row("4711D", "Supermarchés", 10.0, {"TMS": 2.0, "Bruit": 1.0}), **base},
+        {**_row("4520A", "Garages", 3.0, {"Bruit": 4.0, "Autres MP": 1.0, "TMS": 0.5}), **base},
+        {**_row("0111Z", "", 0.0, {}), **base},
+    ]
+
+
+def test_encode_decode_rows_roundtrip():
+    """Le passage en colonnes restitue valeurs et ordre d'insertion des causes."""
+    rows = _mp_rows()
+    arrays = m.encode_rows(rows, m.MP_TEXT_KEYS, m.MP_MEASURES, "cause_counts")
+    decoded = m.decode_rows(arrays, m.MP_TEXT_KEYS, m.MP_MEASURES, "cause_counts")
+    expected = [
+        {k: r[k] for k in m.MP_TEXT_KEYS + m.MP_MEASURES + ["cause_counts"]} for r in rows
+    ]
+    assert decoded == expected
+    assert list(decoded[1]["cause_counts"]) == ["Bruit", "Autres MP", "TMS"]
+
+
+def test_encode_rows_empty():
+    """Une liste vide donne des colonnes vides, décodées en liste vide."""
+    arrays = m.encode_rows([], m.MP_TEXT_KEYS, m.MP_MEASURES, "cause_counts")
+    assert arrays["num"].shape == (0, len(m.MP_MEASURES))
+    assert m.decode_rows(arrays, m.MP_TEXT_KEYS, m.MP_MEASURES, "cause_counts") == []
+
+
+def _cached(xlsx_path, config, calls):
+    """cached_parse avec un parseur factice qui compte ses appels."""
+    def parse():
+        calls.append(1)
+        return _mp_rows()
+
+    return m.cached_parse(
+        "test-rows", xlsx_path, config, parse,
+        lambda rows: m.encode_rows(rows, m.MP_TEXT_KEYS, m.MP_MEASURES, "cause_counts"),
+        lambda arrays: m.decode_rows(arrays, m.MP_TEXT_KEYS, m.MP_MEASURES, "cause_counts"),
+    )
+
+
+def test_cached_parse_hit_and_invalidation(tmp_path, monkeypatch):
+    """Le cache évite le re-parsing et s'invalide sur changement de classeur ou de mapping."""
+    monkeypatch.setattr(m, "PARSE_CACHE_DIR", tmp_path / "cache")
+    xlsx = tmp_path / "fake.xlsx"
+    xlsx.write_bytes(b"v1")
+    config = {"col": {"naf5": 2}}
+    calls = []
+
+    first = _cached(xlsx, config, calls)
+    second = _cached(xlsx, config, calls)
+    assert len(calls) == 1
+    assert second == first
+
+    _cached(xlsx, {"col": {"naf5": 3}}, calls)
+    assert len(calls) == 2
+    xlsx.write_bytes(b"v2")
+    _cached(xlsx, {"col": {"naf5": 3}}, calls)
+    assert len(calls) == 3
+    # Une seule entrée conservée par nom de cache
+    assert len(list((tmp_path / "cache").glob("test-rows-*.npz"))) == 1
+
+
+def test_cached_parse_corrupt_file(tmp_path, monkeypatch):
+    """Un fichier de cache illisible est ignoré et réécrit."""
+    monkeypatch.setattr(m, "PARSE_CACHE_DIR", tmp_path / "cache")
+    xlsx = tmp_path / "fake.xlsx"
+    xlsx.write_bytes(b"v1")
+    calls = []
+    _cached(xlsx, {}, calls)
+    (cache_file,) = (tmp_path / "cache").glob("test-rows-*.npz")
+    cache_file.write_bytes(b"pas un npz")
+    assert _cached(xlsx, {}, calls) == _cached(xlsx, {}, calls)
+    assert len(calls) == 2
+
+
+def test_cached_parse_truncated_file(tmp_path, monkeypatch):
+    """Un .npz tronqué (zipfile.BadZipFile) est lui aussi traité comme absent."""
+    monkeypatch.setattr(m, "PARSE_CACHE_DIR", tmp_path / "cache")
+    xlsx = tmp_path / "fake.xlsx"
+    xlsx.write_bytes(b"v1")
+    calls = []
+    first = _cached(xlsx, {}, calls)
+    (cache_file,) = (tmp_path / "cache").glob("test-rows-*.npz")
+    data = cache_file.read_bytes()
+    cache_file.write_bytes(data[:len(data) // 2])
+    assert _cached(xlsx, {}, calls) == first
+    assert len(calls) == 2
+    assert _cached(xlsx, {}, calls) == first
+    assert len(calls) == 2
+
+
+# ---------------------------------------------------------------------------
+# Tests stage_fiches / stage_merge
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.skipif(not (m.AT_XLSX_PATH.exists() and m.MP_XLSX_PATH.exists()),
+                    reason="classeurs AT/MP absents")
+def test_stage_fiches_streams_like_batch(fiche_dir, tmp_path, monkeypatch):
+    """L'étape pdf, qui réduit chaque fiche en flux aux champs de la fusion, puis l'étape
+    merge (build_pdf_outputs) produisent les mêmes AT, MP et Trajet que les fusions par
+    lot sur le dict complet des fiches."""
+    monkeypatch.setattr(m, "OUTPUT_DIR", tmp_path)
+    at_data = m.build_at_data(m.parse_at_xlsx())
+    mp_data = m.build_mp_data(m.parse_mp_xlsx())
+    at_stream, mp_stream = copy.deepcopy(at_data), copy.deepcopy(mp_data)
+
+    pdf_data = parse_pdf.parse_all_pdfs(fiche_dir, cache_path=None)
+    m.merge_pdf_data(at_data, pdf_data, mp_data=mp_data)
+    m.merge_yearly_into_data(at_data, m.build_yearly_from_pdf(pdf_data, "at_yearly", base_data=at_data))
+    m.merge_yearly_into_data(mp_data, m.build_yearly_from_pdf(pdf_data, "mp_yearly", base_data=at_data))
+    trajet = m.build_trajet_data(pdf_data, at_data)
+
+    parsed = []
+    iter_parsed = parse_pdf.iter_parsed_fiches
+
+    def recording(*args, **kwargs):
+        for naf5, results in iter_parsed(*args, **kwargs):
+            parsed.append(naf5)
+            yield naf5, results
+
+    monkeypatch.setattr(parse_pdf, "iter_parsed_fiches", recording)
+    fiches = m.stage_fiches(fiche_dir, 1, False, "pdfplumber", 0, 0)
+    assert parsed == sorted(pdf_data)
+    assert sorted(fiches) == sorted(pdf_data)
+    assert all(set(f) <= set(m.PDF_MERGE_FIELDS) | {"synthesis"} for f in fiches.values())
+    result = m.stage_merge(at_stream, mp_stream, fiches)
+    assert result["at"] is at_stream and result["mp"] is mp_stream
+    assert _dump(at_stream) == _dump(at_data)
+    assert _dump(mp_stream) == _dump(mp_data)
+    assert _dump(result["trajet"]) == _dump(trajet)
+    assert trajet["by_naf5"]
+    assert (tmp_path / "extra-dimensions.json").exists() and (tmp_path / "size-data.json").exists()
@@ -0,0 +1,135 @@
+"""Tests pour l'ordonnanceur d'étapes scheduler.py.
+
+Ils couvrent:
+- check_stages() (doublons, dépendances inconnues, cycles)
+- run_stages() (passage des résultats, étapes locales, parallélisme, mode séquentiel,
+  échec d'une étape optional)
+"""
+
+import time
+
+import pytest
+
+import scheduler as m
+
+
+def _value(x):
+    return x
+
+
+def _add(a, b):
+    return a + b
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def _append(log, *values):
+    log.append(values)
+    return len(log)
+
+
+# ---------------------------------------------------------------------------
+# Tests check_stages
+# ---------------------------------------------------------------------------
+
+
+def test_check_stages_duplicate():
+    """Deux étapes de même nom sont refusées."""
+    stages = [{"name": "a", "fn": _value}, {"name": "a", "fn": _value}]
+    with pytest.raises(ValueError, match="en double"):
+        m.check_stages(stages)
+
+
+def test_check_stages_unknown_dependency():
+    """Une dépendance vers une étape absente est refusée."""
+    with pytest.raises(ValueError, match="dépendance inconnue x"):
+        m.check_stages([{"name": "a", "fn": _value, "after": ["x"]}])
+
+
+def test_check_stages_cycle():
+    """Un cycle de dépendances est détecté."""
+    stages = [
+        {"name": "a", "fn": _value, "deps": ["b"]},
+        {"name": "b", "fn": _value, "deps": ["a"]},
+        {"name": "c", "fn": _value},
+    ]
+    with pytest.raises(ValueError, match="Cycle de dépendances entre les étapes : a, b"):
+        m.check_stages(stages)
+
+
+# ---------------------------------------------------------------------------
+# Tests run_stages
+# ---------------------------------------------------------------------------
+
+
+def _diamond():
+    return [
+        {"name": "sum", "fn": _add, "deps": ["left", "right"]},
+        {"name": "left", "fn": _value, "args": (2,)},
+        {"name": "right", "fn": _value, "args": (3,)},
+        {"name": "double", "fn": _add, "deps": ["sum", "sum"], "local": True},
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_stages_passes_dependency_results(jobs):
+    """Le résultat de chaque dépendance est passé dans l'ordre de deps."""
+    results, timings = m.run_stages(_diamond(), jobs=jobs)
+    assert results == {"left": 2, "right": 3, "sum": 5, "double": 10}
+    assert set(timings) == set(results)
+
+
+def test_run_stages_local_after_ordering():
+    """Les étapes locales partagent les objets du processus principal et respectent after."""
+    log = []
+    stages = [
+        {"name": "x", "fn": _value, "args": (1,)},
+        {"name": "second", "fn": _append, "args": (log, "second"), "after": ["first"], "local": True},
+        {"name": "first", "fn": _append, "args": (log, "first"), "deps": ["x"], "local": True},
+    ]
+    results, _ = m.run_stages(stages, jobs=2)
+    assert log == [("first", 1), ("second",)]
+    assert results["second"] == 2
+
+
+def test_run_stages_runs_independent_stages_concurrently():
+    """Deux étapes indépendantes durent le temps de la plus lente, pas la somme."""
+    stages = [{"name": f"s{i}", "fn": _sleep, "args": (0.5,)} for i in range(2)]
+    t0 = time.perf_counter()
+    _, timings = m.run_stages(stages, jobs=2)
+    assert time.perf_counter() - t0 < 0.95
+    assert all(t >= 0.5 for t in timings.values())
+
+
+def test_run_stages_propagates_errors():
+    """Une exception levée par une étape est propagée."""
+    with pytest.raises(RuntimeError, match="boom"):
+        m.run_stages([{"name": "a", "fn": _fail}], jobs=2)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_stages_optional_failure(jobs, capsys):
+    """L'échec d'une étape optional est signalé sans arrêter les autres ni appeler store."""
+    stored = []
+    stages = [{"name": "a", "fn": _fail, "optional": True}, {"name": "b", "fn": _value, "args": (1,)}]
+    results, timings = m.run_stages(stages, jobs=jobs, store=lambda stage, *_: stored.append(stage["name"]))
+    assert results == {"a": None, "b": 1}
+    assert timings["a"] is not None
+    assert stored == ["b"]
+    assert "[erreur] Étape 'a' échouée : RuntimeError: boom" in capsys.readouterr().err
+
+
+def test_print_timings(capsys):
+    """Chaque étape et le total apparaissent dans le rapport."""
+    m.print_timings({"at": 1.5, "pdf": 30.0}, 31.5)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[-3].split() == ["at", "1.5", "s"]
+    assert lines[-2].split() == ["pdf", "30.0", "s"]
+    assert lines[-1].split() == ["total", "31.5", "s", "(temps", "réel)"]
@@ -0,0 +1,73 @@
+"""Tests pour le moteur du graphique par taille size_engine.py (fiches synthétiques, voir conftest.py).
+
+Ils couvrent:
+- les deux stratégies sur une même page, la plus proche de 100 % retenue, IF toujours lu
+- diagnostics par secteur et bilan (summarize)
+- extracteur "size_engine" de fiche_pass : sortie sans diagnostics, parallèle identique
+"""
+
+import json
+
+import extract_size_chart
+import fiche_pass
+import size_engine as m
+from conftest import size_chart_values
+
+
+def _values(bands):
+    return [{k: b[k] for k in ("part_accidents", "part_salaries", "if")} for b in bands]
+
+
+# ---------------------------------------------------------------------------
+# Tests parse_page
+# ---------------------------------------------------------------------------
+
+
+def test_parse_one_both_strategies(fiche_dir):
+    result = m.parse_one(fiche_dir / "NAF_0111Z.pdf")
+    assert _values(result["bands"]) == size_chart_values(3)
+    diag = result["_diag"]
+    assert diag["strategy"] == "glyphs"
+    assert diag["glyphs"]["green_sum"] == diag["words"]["green_sum"] == 100.0
+    assert diag["max_diff"] == 0.0
+
+
+def test_parse_page_keeps_closest_to_100(fiche_dir, monkeypatch):
+    """Étalonnage des glyphes faussé : la lecture par les mots est retenue, l'IF reste."""
+    reference = m.parse_one(fiche_dir / "NAF_0111Z.pdf")
+    parse_chart = extract_size_chart.parse_page
+
+    def skewed(page):
+        result = parse_chart(page)
+        for band in result["bands"]:
+            band["part_accidents"] *= 1.5
+        result["_diag"]["green_sum"] = 150.0
+        return result
+
+    monkeypatch.setattr(extract_size_chart, "parse_page", skewed)
+    result = m.parse_one(fiche_dir / "NAF_4520A.pdf")
+    assert result["_diag"]["strategy"] == "words"
+    assert _values(result["bands"]) == size_chart_values(6)
+    assert result["_diag"]["max_diff"] > m.SUM_TOL
+
+    summary = m.summarize({"4520A": result, "0111Z": reference})
+    assert summary == {"sectors": 2, "strategy": {"glyphs": 1, "words": 1, None: 0},
+                       "sums_ok": 2, "disagree": ["4520A"]}
+
+
+# ---------------------------------------------------------------------------
+# Tests fiche_pass
+# ---------------------------------------------------------------------------
+
+
+def test_fiche_pass_size_engine(fiche_dir, tmp_path):
+    serial = fiche_pass.run_fiche_pass(fiche_dir, ["size_engine"], cache_path=None)
+    parallel = fiche_pass.run_fiche_pass(fiche_dir, ["size_engine"], workers=3, cache_path=None)
+    assert parallel == serial
+    results = serial["size_engine"]
+    assert all(r["_diag"]["strategy"] == "glyphs" for r in results.values())
+
+    fiche_pass.write_outputs(serial, tmp_path)
+    written = json.loads((tmp_path / "size-data.json").read_text(encoding="utf-8"))
+    assert sorted(written) == sorted(results)
+    assert written["0111Z"] == {"bands": results["0111Z"]["bands"]}
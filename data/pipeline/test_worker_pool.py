@@ -0,0 +1,62 @@
+"""Tests pour le pool de processus recyclables worker_pool.py.
+
+Ils couvrent:
+- imap_bounded() : ordre des résultats, recyclage des processus (max_tasks)
+- document hors délai (processus tué et remplacé), processus mort, exception propagée
+"""
+
+import os
+import time
+
+import pytest
+
+import worker_pool as m
+
+
+def _square_pid(x):
+    return x * x, os.getpid()
+
+
+def _slow_or_exit(x):
+    if x == 2:
+        time.sleep(60)
+    if x == 4:
+        os._exit(1)
+    return x
+
+
+def _fail(x):
+    raise RuntimeError(f"boom {x}")
+
+
+# ---------------------------------------------------------------------------
+# Tests imap_bounded
+# ---------------------------------------------------------------------------
+
+
+def test_imap_bounded_order_and_recycling():
+    """Résultats dans l'ordre d'entrée ; un processus ne traite pas plus de max_tasks documents."""
+    results = list(m.imap_bounded(_square_pid, range(12), workers=3, max_tasks=2))
+    assert [status for status, _ in results] == ["ok"] * 12
+    assert [value for (_, (value, _)) in results] == [x * x for x in range(12)]
+    pids = [pid for (_, (_, pid)) in results]
+    assert all(pids.count(pid) <= 2 for pid in pids)
+    assert len(set(pids)) >= 6
+
+
+def test_imap_bounded_timeout_and_crash():
+    """Le document trop long et celui qui tue son processus sont signalés, les autres aboutissent."""
+    t0 = time.monotonic()
+    results = list(m.imap_bounded(_slow_or_exit, range(7), workers=2, timeout=1))
+    assert time.monotonic() - t0 < 10
+    assert results == [("ok", 0), ("ok", 1), ("timeout", None), ("ok", 3),
+                       ("crash", None), ("ok", 5), ("ok", 6)]
+
+
+def test_imap_bounded_exception_propagated():
+    with pytest.raises(RuntimeError, match="boom 0"):
+        list(m.imap_bounded(_fail, range(3), workers=2))
+
+
+def test_imap_bounded_empty():
+    assert list(m.imap_bounded(_square_pid, [], workers=2, timeout=1)) == []
@@ -0,0 +1,111 @@
+"""Tests d'équivalence du lecteur XLSX en flux (xlsx_stream.py) avec openpyxl.
+
+openpyxl est le backend de référence. Ces tests couvrent:
+- iter_sheet_rows() sur un classeur généré (types de cellules, lignes manquantes)
+- iter_xlsx_rows() sur les classeurs Ameli versionnés (backends stream / openpyxl)
+- _column_letters()
+"""
+
+import itertools
+
+import openpyxl
+import pytest
+
+import refresh_data
+import xlsx_stream as m
+
+
+def _reference_rows(path, columns, min_row=1):
+    """Lignes projetées sur `columns` telles que lues par openpyxl en read_only."""
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(min_row=min_row, values_only=True)
+        return [tuple(row[c] if c < len(row) else None for c in columns) for row in rows]
+    finally:
+        wb.close()
+
+
+# ---------------------------------------------------------------------------
+# Tests iter_sheet_rows (classeur généré)
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def sample_xlsx(tmp_path):
+    """Classeur avec chaînes, entiers, décimaux, booléens, entités XML et trous."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["ctn", "naf5", "libelle", "valeur", "ratio", "flag"])
+    ws.append(["A", "4711D", "Supermarchés & co <x>", 12, 0.5, True])
+    ws.append(["B", None, "", 0, 1e-7, False])
+    ws["A6"] = "C"
+    ws["D6"] = 42
+    ws["AB6"] = "loin"
+    ws["D8"] = 3.0
+    path = tmp_path / "sample.xlsx"
+    wb.save(path)
+    return path
+
+
+def test_iter_sheet_rows_all_columns(sample_xlsx):
+    """Toutes les colonnes : mêmes valeurs et mêmes lignes vides qu'openpyxl."""
+    columns = list(range(28))
+    assert list(m.iter_sheet_rows(sample_xlsx, columns)) == _reference_rows(sample_xlsx, columns)
+
+
+def test_iter_sheet_rows_subset_and_order(sample_xlsx):
+    """Un sous-ensemble de colonnes est rendu dans l'ordre demandé, doublons compris."""
+    columns = [3, 0, 27, 3]
+    result = list(m.iter_sheet_rows(sample_xlsx, columns, min_row=2))
+    assert result == _reference_rows(sample_xlsx, columns, min_row=2)
+    assert result[0] == (12, "A", None, 12)
+    assert result[3] == (None, None, None, None)  # ligne 5 absente du XML
+    assert result[4] == (42, "C", "loin", 42)
+
+
+def test_iter_sheet_rows_types(sample_xlsx):
+    """Entiers, flottants et booléens suivent la conversion d'openpyxl."""
+    rows = list(m.iter_sheet_rows(sample_xlsx, [3, 4, 5], min_row=2))
+    assert rows[0] == (12, 0.5, True)
+    assert isinstance(rows[0][0], int)
+    assert rows[1] == (0, 1e-7, False)
+    assert rows[-1] == (3.0, None, None)
+
+
+def test_column_letters():
+    """Conversion indice 0-based -> lettres de colonne Excel."""
+    assert m._column_letters(0) == "A"
+    assert m._column_letters(25) == "Z"
+    assert m._column_letters(26) == "AA"
+    assert m._column_letters(32) == "AG"
+    assert m._column_letters(701) == "ZZ"
+    assert m._column_letters(702) == "AAA"
+
+
+# ---------------------------------------------------------------------------
+# Tests iter_xlsx_rows (classeurs Ameli)
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.skipif(not refresh_data.AT_XLSX_PATH.exists(), reason="classeur AT absent")
+def test_iter_xlsx_rows_at_backends_identical():
+    """Classeur AT complet : les deux backends rendent les mêmes tuples."""
+    columns, _ = refresh_data.at_read_columns()
+    stream = list(refresh_data.iter_xlsx_rows(refresh_data.AT_XLSX_PATH, columns, "stream"))
+    reference = list(refresh_data.iter_xlsx_rows(refresh_data.AT_XLSX_PATH, columns, "openpyxl"))
+    assert stream == reference
+
+
+@pytest.mark.skipif(not refresh_data.MP_XLSX_PATH.exists(), reason="classeur MP absent")
+def test_iter_xlsx_rows_mp_backends_identical():
+    """Classeur MP (premières lignes) : les deux backends rendent les mêmes tuples."""
+    columns, _ = refresh_data.mp_read_columns()
+    stream = refresh_data.iter_xlsx_rows(refresh_data.MP_XLSX_PATH, columns, "stream")
+    reference = refresh_data.iter_xlsx_rows(refresh_data.MP_XLSX_PATH, columns, "openpyxl")
+    assert list(itertools.islice(stream, 3000)) == list(itertools.islice(reference, 3000))
+
+
+def test_iter_xlsx_rows_unknown_backend(sample_xlsx):
+    """Un backend inconnu lève ValueError."""
+    with pytest.raises(ValueError, match="Backend Excel inconnu"):
+        list(refresh_data.iter_xlsx_rows(sample_xlsx, [0], "xlrd"))
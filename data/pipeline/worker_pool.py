@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Pool de processus recyclables avec délai par document, pour les lots de fiches PDF.
+
+Une fiche malformée peut faire tourner pdfplumber plusieurs minutes, et les caches de
+page d'un processus qui enchaîne des milliers de fiches ne sont jamais libérés. Ici :
+    - chaque document a un budget de `timeout` secondes : au-delà, le processus qui le
+      traite est tué et remplacé, le document est signalé "timeout" ;
+    - un processus s'arrête après `max_tasks` documents et est remplacé par un neuf ;
+    - un processus mort en cours de document (crash de l'interpréteur PDF, mémoire)
+      est remplacé, le document est signalé "crash".
+
+Les résultats sont rendus dans l'ordre d'entrée, comme ProcessPoolExecutor.map ;
+au plus `workers * LOOKAHEAD` documents sont en cours ou en attente d'être rendus.
+"""
+
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+
+LOOKAHEAD = 4  # documents distribués d'avance par processus
+
+
+def _worker(fn, conn, max_tasks) -> None:
+    """Boucle d'un processus : reçoit (index, item), renvoie (index, statut, résultat)."""
+    done = 0
+    while max_tasks is None or done < max_tasks:
+        try:
+            index, item = conn.recv()
+        except EOFError:
+            break
+        try:
+            result = ("ok", fn(item))
+        except Exception as e:
+            result = ("error", e)
+        conn.send((index, *result))
+        done += 1
+    conn.close()
+
+
+def _start(fn, max_tasks) -> dict:
+    conn, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=_worker, args=(fn, child, max_tasks), daemon=True)
+    proc.start()
+    child.close()
+    return {"proc": proc, "conn": conn, "task": None, "start": 0.0, "done": 0}
+
+
+def _stop(w: dict, kill: bool = False) -> None:
+    if kill and w["proc"].is_alive():
+        w["proc"].kill()
+    w["proc"].join()
+    w["conn"].close()
+
+
+def imap_bounded(fn, items, workers: int = 1, timeout: float | None = None, max_tasks: int | None = None):
+    """Applique fn à chaque item dans des processus recyclables.
+
+    Args:
+        fn: fonction de niveau module (picklable), appelée fn(item)
+        items: éléments à traiter (picklables)
+        workers: nombre de processus simultanés
+        timeout: budget en secondes par document (None = illimité)
+        max_tasks: documents traités par processus avant son remplacement (None = illimité)
+
+    Yields:
+        (statut, résultat) dans l'ordre de items : ("ok", fn(item)), ("timeout", None)
+        ou ("crash", None). Une exception levée par fn est propagée.
+    """
+    items = list(items)
+    pool = []
+    pending = {}   # index -> (statut, résultat) arrivés avant leur tour
+    next_task = next_out = 0
+    try:
+        while next_out < len(items):
+            while next_task < len(items) and next_task < next_out + workers * LOOKAHEAD:
+                w = next((w for w in pool if w["task"] is None), None)
+                if w is None:
+                    if len(pool) >= workers:
+                        break
+                    w = _start(fn, max_tasks)
+                    pool.append(w)
+                w["conn"].send((next_task, items[next_task]))
+                w["task"], w["start"] = next_task, time.monotonic()
+                next_task += 1
+
+            if next_out in pending:
+                status, result = pending.pop(next_out)
+                next_out += 1
+                if status == "error":
+                    raise result
+                yield status, result
+                continue
+
+            busy = [w for w in pool if w["task"] is not None]
+            delay = None
+            if timeout is not None:
+                delay = max(0.0, min(w["start"] for w in busy) + timeout - time.monotonic())
+            wait([w["conn"] for w in busy] + [w["proc"].sentinel for w in busy], delay)
+
+            now = time.monotonic()
+            for w in busy:
+                status = None
+                if w["conn"].poll():
+                    try:
+                        index, status, result = w["conn"].recv()
+                    except EOFError:
+                        status = "crash"
+                    else:
+                        w["task"] = None
+                        w["done"] += 1
+                        pending[index] = (status, result)
+                        if max_tasks is not None and w["done"] >= max_tasks:
+                            pool.remove(w)
+                            _stop(w)
+                        continue
+                elif not w["proc"].is_alive():
+                    status = "crash"
+                elif timeout is not None and now - w["start"] >= timeout:
+                    status = "timeout"
+                if status is not None:
+                    pending[w["task"]] = (status, None)
+                    pool.remove(w)
+                    _stop(w, kill=True)
+    finally:
+        # Processus inactifs (bloqués sur recv) ou abandonnés en cours de document
+        for w in pool:
+            _stop(w, kill=True)
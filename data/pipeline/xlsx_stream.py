@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Lecteur XLSX en flux : ne matérialise que les colonnes demandées.
+
+openpyxl (même en read_only) construit une cellule pour chaque colonne de chaque ligne.
+Ce lecteur décompresse la feuille active par blocs et n'y reconnaît (regex compilée)
+que les cellules des colonnes demandées ; les autres sont sautées sans appel Python.
+Les petites parties XML (classeur, chaînes partagées) sont lues avec expat. Chaque
+ligne est rendue sous forme de tuple compact.
+
+Les valeurs suivent la sémantique d'openpyxl en mode data_only / values_only :
+nombres -> int ou float, chaînes partagées ou inline -> str, booléens -> bool,
+erreurs -> chaîne ("#N/A"), cellule vide -> None. Les formats de date ne sont pas
+convertis en datetime (aucune colonne des classeurs Ameli lus par le pipeline n'en a) :
+la valeur numérique brute est rendue.
+
+openpyxl reste le backend de référence (voir refresh_data.iter_xlsx_rows) ; les tests
+d'équivalence comparent les deux.
+"""
+
+import html
+import posixpath
+import re
+import zipfile
+from xml.parsers import expat
+
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_CHUNK = 1 << 16
+
+
+def _local(name: str) -> str:
+    """Nom local d'une balise expat (namespace_separator="}")."""
+    return name.rpartition("}")[2]
+
+
+def _cast_number(value: str) -> int | float:
+    """Même règle qu'openpyxl : float si point décimal ou exposant, sinon int."""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _parse_xml(stream, handlers: dict):
+    """Parse un flux XML par blocs avec expat (namespaces résolus, texte bufferisé).
+
+    Générateur : rend la main après chaque bloc pour que l'appelant vide les lignes
+    terminées sans attendre la fin du fichier.
+    """
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.StartElementHandler = handlers.get("start")
+    parser.EndElementHandler = handlers.get("end")
+    parser.CharacterDataHandler = handlers.get("text")
+    while True:
+        chunk = stream.read(_CHUNK)
+        if not chunk:
+            break
+        parser.Parse(chunk, False)
+        yield
+    parser.Parse(b"", True)
+    yield
+
+
+def _text_collector() -> dict:
+    """Handlers expat qui reconstruisent le texte brut de <si>/<is> (runs <r>, sans <rPh>).
+
+    Retourne un dict d'état : l'appelant fixe "container" (balise englobante) et
+    "on_text" (appelé avec chaque texte terminé), puis branche state["handlers"].
+    """
+    state = {"parts": None, "in_t": False, "in_rph": False, "on_text": None, "container": None}
+
+    def start(name, attrs):
+        tag = _local(name)
+        if tag == state["container"]:
+            state["parts"] = []
+        elif tag == "rPh":
+            state["in_rph"] = True
+        elif tag == "t" and state["parts"] is not None and not state["in_rph"]:
+            state["in_t"] = True
+
+    def end(name):
+        tag = _local(name)
+        if tag == "t":
+            state["in_t"] = False
+        elif tag == "rPh":
+            state["in_rph"] = False
+        elif tag == state["container"] and state["parts"] is not None:
+            state["on_text"]("".join(state["parts"]))
+            state["parts"] = None
+
+    def text(data):
+        if state["in_t"]:
+            state["parts"].append(data)
+
+    state["handlers"] = {"start": start, "end": end, "text": text}
+    return state
+
+
+def read_shared_strings(zf: zipfile.ZipFile) -> list[str]:
+    """Lit la table des chaînes partagées (texte brut, comme openpyxl)."""
+    try:
+        info = zf.getinfo("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    collector = _text_collector()
+    collector["container"] = "si"
+    collector["on_text"] = lambda s: strings.append(s.replace("x005F_", ""))
+    with zf.open(info) as f:
+        for _ in _parse_xml(f, collector["handlers"]):
+            pass
+    return strings
+
+
+def active_sheet_path(zf: zipfile.ZipFile) -> str:
+    """Chemin dans l'archive de la feuille active (workbookView@activeTab, défaut 0)."""
+    sheets = []
+    active = [0]
+
+    def start(name, attrs):
+        tag = _local(name)
+        if tag == "workbookView":
+            active[0] = int(attrs.get("activeTab", 0))
+        elif tag == "sheet":
+            sheets.append(attrs.get(_REL_NS + "}id"))
+
+    with zf.open("xl/workbook.xml") as f:
+        for _ in _parse_xml(f, {"start": start}):
+            pass
+
+    targets = {}
+
+    def rel_start(name, attrs):
+        if _local(name) == "Relationship":
+            targets[attrs.get("Id")] = attrs.get("Target")
+
+    with zf.open("xl/_rels/workbook.xml.rels") as f:
+        for _ in _parse_xml(f, {"start": rel_start}):
+            pass
+
+    index = active[0] if active[0] < len(sheets) else 0
+    target = targets[sheets[index]]
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def _column_letters(index: int) -> str:
+    """Lettres de colonne depuis un indice 0-based (32 -> "AG")."""
+    letters = ""
+    n = index + 1
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell_pattern(prefix: bytes, columns) -> re.Pattern:
+    """Regex qui ne reconnaît que les cellules des colonnes voulues.
+
+    Les cellules des autres colonnes sont sautées par le moteur de regex (en C), sans
+    aucun appel Python : c'est ce qui rend ce lecteur plus rapide qu'openpyxl.
+    """
+    letters = b"|".join(sorted({_column_letters(c).encode() for c in columns}, key=len, reverse=True))
+    return re.compile(
+        b"<" + prefix + b"c r=\"(" + letters + b")(\\d+)\"([^>]*?)(?:/>|>(.*?)</" + prefix + b"c>)",
+        re.S,
+    )
+
+
+_TYPE_ATTR = re.compile(rb'\st="([^"]*)"')
+_ROW_TAG = re.compile(rb'<(?:\w+:)?row r="(\d+)"')
+_CELL_NO_REF = re.compile(rb'<(?:\w+:)?c(?:>|/>|\s(?!r="))')
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension ref="(?:[A-Z]+\d+:)?[A-Z]+(\d+)"')
+_SHEET_DATA = re.compile(rb"<(\w+:)?sheetData[\s>/]")
+
+
+def _cell_value(cell_type: bytes, inner: bytes | None, prefix: bytes, shared: list[str]):
+    """Convertit le contenu XML brut d'une cellule (sémantique openpyxl)."""
+    if inner is None:
+        return None
+    if cell_type == b"inlineStr":
+        m = re.search(b"<" + prefix + b"is>(.*?)</" + prefix + b"is>", inner, re.S)
+        if m is None:
+            return None
+        body = re.sub(b"<" + prefix + b"rPh.*?</" + prefix + b"rPh>", b"", m.group(1), flags=re.S)
+        parts = re.findall(b"<" + prefix + b"t(?:\\s[^>]*)?>(.*?)</" + prefix + b"t>", body, re.S)
+        return html.unescape(b"".join(parts).decode("utf-8"))
+    m = re.search(b"<" + prefix + b"v>(.*?)</" + prefix + b"v>", inner, re.S)
+    if m is None or not m.group(1):
+        return None
+    raw = m.group(1)
+    if cell_type == b"n":
+        return _cast_number(raw.decode("ascii"))
+    if cell_type == b"s":
+        return shared[int(raw)]
+    if cell_type == b"b":
+        return bool(int(raw))
+    return html.unescape(raw.decode("utf-8"))
+
+
+def iter_sheet_rows(xlsx_path, columns: list[int], min_row: int = 1):
+    """Itère les lignes de la feuille active en tuples compacts.
+
+    Args:
+        xlsx_path: chemin du classeur .xlsx
+        columns: indices de colonnes 0-based à matérialiser, dans l'ordre du tuple rendu
+        min_row: première ligne (1-based) rendue
+
+    Yields:
+        Un tuple (len(columns) valeurs) par ligne à partir de min_row. Comme openpyxl
+        en read_only, les lignes absentes du XML (ou sans cellule voulue) sont rendues
+        remplies de None et la lecture s'arrête à la dernière ligne déclarée par
+        <dimension>.
+
+    Raises:
+        ValueError si la feuille contient des cellules sans référence (attribut r) :
+        ce format rare n'est pas géré en flux, utiliser le backend openpyxl.
+    """
+    positions = {}
+    for pos, col in enumerate(columns):
+        positions.setdefault(_column_letters(col).encode(), []).append(pos)
+    width = len(columns)
+    empty_row = (None,) * width
+
+    with zipfile.ZipFile(xlsx_path) as zf:
+        shared = read_shared_strings(zf)
+        with zf.open(active_sheet_path(zf)) as f:
+            buf = b""
+            cell_re = None
+            prefix = b""
+            max_row = None
+            counter = min_row   # prochaine ligne à rendre
+            last_row = 0        # dernière ligne <row> vue dans le XML
+            row_idx, values = None, None
+            eof = False
+            while not eof:
+                chunk = f.read(_CHUNK * 16)
+                eof = not chunk
+                buf += chunk
+                if cell_re is None:
+                    m = _SHEET_DATA.search(buf)
+                    if m is None and not eof:
+                        continue
+                    prefix = (m.group(1) or b"") if m else b""
+                    dim = _DIMENSION.search(buf)
+                    max_row = int(dim.group(1)) if dim else None
+                    cell_re = _cell_pattern(prefix, columns)
+                # Ne traiter que jusqu'à la dernière ligne complète du bloc
+                cut = len(buf) if eof else buf.rfind(b"</" + prefix + b"row>")
+                if cut <= 0:
+                    continue
+                cut = cut if eof else cut + len(prefix) + 6
+                block, buf = buf[:cut], buf[cut:]
+                if _CELL_NO_REF.search(block):
+                    raise ValueError(
+                        f"{xlsx_path}: cellules sans référence (r) non gérées par le lecteur "
+                        "en flux. Utiliser le backend openpyxl."
+                    )
+                rows = _ROW_TAG.findall(block)
+                if rows:
+                    last_row = max(last_row, int(rows[-1]))
+
+                for m in cell_re.finditer(block):
+                    idx = int(m.group(2))
+                    if idx != row_idx:
+                        if values is not None:
+                            yield from _flush(row_idx, values, counter, empty_row)
+                            counter = max(counter, row_idx + 1)
+                        if max_row is not None and idx > max_row:
+                            return
+                        row_idx, values = idx, [None] * width
+                    t = _TYPE_ATTR.search(m.group(3))
+                    value = _cell_value(t.group(1) if t else b"n", m.group(4), prefix, shared)
+                    for pos in positions[m.group(1)]:
+                        values[pos] = value
+
+            if values is not None:
+                yield from _flush(row_idx, values, counter, empty_row)
+                counter = max(counter, row_idx + 1)
+            if max_row is not None:
+                last_row = min(last_row, max_row)
+            while counter <= last_row:
+                counter += 1
+                yield empty_row
+
+
+def _flush(row_idx: int, values: list, counter: int, empty_row: tuple):
+    """Rend les lignes vides manquantes avant row_idx puis la ligne elle-même."""
+    if row_idx < counter:
+        return
+    for _ in range(counter, row_idx):
+        yield empty_row
+    yield tuple(values)